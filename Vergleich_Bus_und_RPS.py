@@ -1,692 +1,1727 @@
-import streamlit as st
-from datetime import date
-import plotly.graph_objects as go
-import pandas as pd
-import numpy as np
-import toml
-
-st.set_page_config(page_title="OekoRPS")
-
-# Custom CSS to hide the + and - buttons
-hide_buttons_css = """
-    <style>
-    .stNumberInput button.step-up, .stNumberInput button.step-down {
-        display: none;
-    }
-    </style>
-"""
-# Inject the custom CSS into the Streamlit app
-st.markdown(hide_buttons_css, unsafe_allow_html=True)
-
-# Setze das Thema aus der config.toml Datei
-config = toml.load(".streamlit/config.toml")
-
-# Funktion zur Anzeige der Sidebar
-def show_sidebar():
-    st.sidebar.image("Logo_of_Fachhochschule_Münster.png", use_column_width=True)
-    st.sidebar.markdown("""
-        <style>
-            .css-18e3th9 {  
-                width: 50x;  
-                position: fixed;
-                right: 0;
-                top: 0;
-                height: 100%;
-                margin-top: 0;
-            }
-            .css-1l02zno {  
-                margin-left: auto;
-            }
-        </style>
-    """, unsafe_allow_html=True)
-
-################################################################ Berechnung RPS ################################################################
-
-
-def show_methodik():
-    with st.expander("**Methodik**"):
-        st.write("Das Programm dient zur Bestimmung der CO2eq-Emissionen von Ridepooling-Systemen im Vergleich zu konventionellen Bussystemen. Ziel ist es, die CO2eq-Emissionen pro Personenkilometer (g CO2eq/Pkm) zu berechnen und diese gegenüberzustellen. Dabei wird auch der CO2eq-Ausstoß des Busses anhand seiner Platzausnutzung berechnet und dem des Ridepooling-Systems gegenübergestellt. Diese Auswertung ist besonders sinnvoll, um die ökologische Nachhaltigkeit verschiedener Verkehrssysteme fundiert zu bewerten. Durch den Vergleich der CO2eq-Emissionen beider Systeme kann aufgezeigt werden, wie effizient sie in Bezug auf Platzausnutzung und Emissionsvermeidung sind. Dies hilft, Potenziale zur Reduzierung von Emissionen durch optimierte Platzausnutzung oder alternative Mobilitätskonzepte zu identifizieren und somit fundierte Entscheidungen für eine umweltfreundlichere Mobilität zu treffen.")
-        
-        st.write("**Methodische Vorgehensweise:**")
-
-        st.write("""
-        - **Datenerhebung und Eingabe:** Der Benutzer gibt grundlegende Informationen zum Ridepooling-System, wie Betriebsdaten (Anzahl der Fahrten, transportierte Fahrgäste) und Fahrzeugflottendaten (Verbrauchsdaten, gefahrene Kilometer) ein.
-
-        - **Berechnung der Umweltwirkungen:** Basierend auf den Eingabedaten werden die Gesamtemissionen (Benzin, Diesel, Strom) des Ridepooling-Systems berechnet. Die Emissionen pro Personenkilometer werden ermittelt.
-
-        - **Vergleich mit Bussystem:** Das Programm berechnet die durchschnittliche Platzausnutzung eines Busses und den entsprechenden CO2eq-Ausstoß pro Personenkilometer, angepasst an unterschiedliche Platzausnutzungen. Diese Werte werden mit denen des Ridepooling-Systems verglichen.
-
-        """)
-
-
-# Funktion zur Initialisierung der Session State Variablen
-def initialize_session_state():
-    if 'vehicle_list' not in st.session_state:
-        st.session_state['vehicle_list'] = []
-
-# Funktion zur Validierung der Eingaben
-def validate_input(text):
-    return text.isdigit()
-
-def validate_input_int(text):
-    try:
-        value = int(text)
-        return 0 <= value <= 100
-    except ValueError:
-        return False
-
-# Funktion zur Darstellung der Allgemeinen Informationen
-# Funktion zur Darstellung der Allgemeinen Informationen
-def show_general_info():
-    with st.expander("**1.1 Allgemeine Informationen**"):
-        st.info("**Hinweis:** Bitte geben Sie zunächst allgemeine Informationen zum Ridepooling-System an. Bitte berücksichtigen Sie den Betrachtungszeitraum, auf welchen sich die folgenden Angaben beziehen.")
-        name_ridepooling_system = st.text_input("Name des Ridepooling-Systems:")
-        start_date = st.date_input("Beginn Betrachtungszeitraum:", date(2022, 1, 1))
-        end_date = st.date_input("Ende Betrachtungszeitraum:", date(2022, 12, 31))
-
-        st.session_state.update({
-            'name_ridepooling_system': name_ridepooling_system,
-            'start_date': start_date,
-            'end_date': end_date
-        })
-        # Das Startdatum muss vor dem Enddatum liegen
-        if start_date > end_date:
-            st.error("Das Startdatum muss vor dem Enddatum liegen.")
-        # Weder Start-Datum noch End-Datum dürfen in der Zukunft liegen
-        elif end_date > date.today():
-            st.error("Das Enddatum darf nicht in der Zukunft liegen.")
-        else:
-            st.session_state.update({
-                'name_ridepooling_system': name_ridepooling_system,
-                'start_date': start_date,
-                'end_date': end_date
-            })
-    
-
-
-# Funktion zur Darstellung der Systemleistungs-Sektion
-def show_system_performance():
-    with st.expander("**1.2 Beförderungsleistung**"):
-        st.info("**Hinweis:** Bitte geben Sie die Beförderungsleistung des Ridepooling-Systems an. Hierzu zählen die Anzahl der abgeschlossenen Buchungen und die Anzahl der transportierten Fahrgäste im Betrachtungszeitraum. Optional können Sie auch ein Ridepooling-System auswählen, um vorausgefüllte Daten zu erhalten.")
-        
-        # Daten für das Dropdown-Menü
-        ridepooling_data = {
-            "Eigene Angaben": {"Fahrten": 0, "Transportierte Fahrgäste": 0},
-            "bussi": {"Fahrten": 8450, "Transportierte Fahrgäste": 13839, "vehicle_type": "LEVC TX (Volvo XC 90 Recharge T8 AWD)", "Benzinverbrauch (l/100km)": 1.2, "Dieselverbrauch (l/100km)": 0.0, "Stromverbrauch (kWh/100km)": 20.5, "Kilometer leer": 50422.31, "Kilometer besetzt": 40063.44},
-            "G-Mobil": {"Fahrten": 60045, "Transportierte Fahrgäste": 74556},
-            "kommit-Shuttle": {"Fahrten": 21895, "Transportierte Fahrgäste": 26263},
-            "LOOPmünster": {"Fahrten": 151415, "Transportierte Fahrgäste": 187309},
-        }
-
-        # Dropdown-Menü zum Auswählen des Ridepooling-Systems
-        selected_system = st.selectbox('Wählen Sie ein Ridepooling-System (Optional):', list(ridepooling_data.keys()))
-
-        # Eingabefelder mit vorausgefüllten Daten basierend auf der Auswahl
-        abgeschlossene_buchungen = st.number_input("Abgeschlossene Buchungen im Betrachtungszeitraum:", value=ridepooling_data[selected_system]["Fahrten"], min_value=0, step=0)
-        transportierte_fahrgaeste = st.number_input("Transportierte Fahrgäste im Betrachtungszeitraum:", value=ridepooling_data[selected_system]["Transportierte Fahrgäste"], min_value=0, step=0)
-
-        # Speichern der globalen Variablen
-        st.session_state.update({
-            'abgeschlossene_buchungen': abgeschlossene_buchungen,
-            'transportierte_fahrgaeste': transportierte_fahrgaeste
-        })
-
-# Funktion zur Darstellung der Fahrzeugflotten- und Fahrtleistungs-Sektion
-def show_vehicle_fleet_performance():
-    with st.expander("**1.3 Fahrzeugflotte & Fahrtleistung**"):
-        # Vordefinierte Fahrzeugtypen und deren Verbrauchsdaten
-        vehicle_types = {
-            "LEVC TX (Volvo XC 90 Recharge T8 AWD)": {"Benzinverbrauch (l/100km)": 1.2, "Dieselverbrauch (l/100km)": 0.0, "Stromverbrauch (kWh/100km)": 20.5, "Kilometer leer": 0, "Kilometer besetzt": 0},
-            "Mercedes Vito lang 114 CDI": {"Benzinverbrauch (l/100km)": 0.0, "Dieselverbrauch (l/100km)": 8.4, "Stromverbrauch (kWh/100km)": 0.0, "Kilometer leer": 0, "Kilometer besetzt": 0},
-            "Mercedes eVito Tourer PRO lang (90 kWh)": {"Benzinverbrauch (l/100km)": 0.0, "Dieselverbrauch (l/100km)": 0.0, "Stromverbrauch (kWh/100km)": 29.8, "Kilometer leer": 0, "Kilometer besetzt": 0},
-            "Anderer Fahrzeugtyp": {"Benzinverbrauch (l/100km)": 0.0, "Dieselverbrauch (l/100km)": 0.0, "Stromverbrauch (kWh/100km)": 0.0, "Kilometer leer": 0, "Kilometer besetzt": 0}
-        }
-
-        # Initialisierung der Fahrzeugliste im Session State, falls noch nicht vorhanden
-        if 'vehicle_list' not in st.session_state:
-            st.session_state['vehicle_list'] = []
-
-        # Fahrzeugdaten durch Nutzereingaben modifizieren
-        with st.container():
-            st.info("**Hinweis:** Bitte geben Sie an, welche Fahrzeugtypen in Ihrer Flotte vorhanden sind. Bitte geben Sie für jeden Fahrzeugtyp die gefahrenen Kilometerleistungen (leer, besetzt) flottenbezogen an. Bitte beziehen Sie sich auf den Betrachtungszeitraum. Die vorgegebenen Verbrauchsdaten beziehen sich auf die WLTP-Methode (Deutsche Automobil Treuhand GmbH, Leitfaden CO2eq (2022)). Passen Sie ggf. Verbrauchsdaten an. Klicken Sie anschließend auf 'Daten übernehmen & berechnen'. Sie können andere Fahrzeugtypen abbilden, indem Sie ein leeres Feld auswählen und die entsprechenden Kilometer- & Verbrauchsdaten eingeben.")
-
-        with st.form("vehicle_form", clear_on_submit=True):
-            new_vehicle_type = st.selectbox("Wählen Sie einen Fahrzeugtyp", list(vehicle_types.keys()))
-            add_vehicle = st.form_submit_button("Fahrzeug hinzufügen")
-        if add_vehicle:
-            data = vehicle_types[new_vehicle_type].copy() if new_vehicle_type in vehicle_types else {"Benzinverbrauch (l/100km)": 0.0, "Dieselverbrauch (l/100km)": 0.0, "Stromverbrauch (kWh/100km)": 0.0, "Kilometer leer": 0, "Kilometer besetzt": 0}
-            data['Fahrzeugtyp'] = new_vehicle_type  # Füge den Fahrzeugtyp hinzu
-            vehicle_id = len(st.session_state['vehicle_list']) + 1
-            st.session_state[f'vehicle_{vehicle_id}'] = data
-            st.session_state['vehicle_list'].append(data)
-
-        for i, vehicle in enumerate(st.session_state['vehicle_list'], start=1):
-            cols = st.columns((3, 1, 1, 1, 1, 1))
-            vehicle['Fahrzeugtyp'] = cols[0].text_input(f"Fahrzeugtyp {i}", vehicle['Fahrzeugtyp'])
-            vehicle['Benzinverbrauch (l/100km)'] = cols[1].number_input(f"Benzin {i} (l/100km)", value=vehicle['Benzinverbrauch (l/100km)'], min_value=0.0, format='%f')
-            vehicle['Dieselverbrauch (l/100km)'] = cols[2].number_input(f"Diesel {i} (l/100km)", value=vehicle['Dieselverbrauch (l/100km)'], min_value=0.0, format='%f')
-            vehicle['Stromverbrauch (kWh/100km)'] = cols[3].number_input(f"Strom {i} (kWh/100km)", value=vehicle['Stromverbrauch (kWh/100km)'], min_value=0.0, format='%f')
-            vehicle['Kilometer leer'] = cols[4].number_input(f"KM leer {i}", value=vehicle['Kilometer leer'], min_value=0, format='%d')
-            vehicle['Kilometer besetzt'] = cols[5].number_input(f"KM besetzt {i}", value=vehicle['Kilometer besetzt'], min_value=0, format='%d')
-            # Speichern der globalen Variablen
-            st.session_state['Benzinverbrauch (l/100km)'] = vehicle['Benzinverbrauch (l/100km)'],
-            st.session_state['Dieselverbrauch (l/100km)'] = vehicle['Dieselverbrauch (l/100km)'],
-            st.session_state['Stromverbrauch (kWh/100km)'] = vehicle['Stromverbrauch (kWh/100km)']
-
-        if st.button('Letztes Fahrzeug entfernen'):
-            if st.session_state['vehicle_list']:
-                removed_vehicle_id = len(st.session_state['vehicle_list'])
-                st.session_state.pop(f'vehicle_{removed_vehicle_id}', None)  # Remove the global variable
-                st.session_state['vehicle_list'].pop()
-
-        # Berechne die Kilometer leer und besetzt für die gesamte Flotte
-        fahrzeugkilometer_leer = sum(vehicle['Kilometer leer'] for vehicle in st.session_state['vehicle_list'])
-        fahrzeugkilometer_besetzt = sum(vehicle['Kilometer besetzt'] for vehicle in st.session_state['vehicle_list'])
-
-        if st.button('Daten übernehmen & berechnen'):
-            try:
-                abgeschlossene_buchungen = float(st.session_state['abgeschlossene_buchungen'])
-                transportierte_fahrgaeste = float(st.session_state['transportierte_fahrgaeste'])
-                fahrzeugkilometer_leer = float(fahrzeugkilometer_leer)
-                fahrzeugkilometer_besetzt = float(fahrzeugkilometer_besetzt)
-                fahrzeugkilometer_gesamt = round(fahrzeugkilometer_leer + fahrzeugkilometer_besetzt, 2)
-                durchschnittliche_fahrtdistanz_mit_lk = round(fahrzeugkilometer_gesamt / abgeschlossene_buchungen, 2) if abgeschlossene_buchungen > 0 else 0
-                durchschnittliche_fahrtdistanz_mit_bk = round(fahrzeugkilometer_besetzt / abgeschlossene_buchungen, 2) if abgeschlossene_buchungen > 0 else 0
-                personenkilometer_gefahren = round((fahrzeugkilometer_besetzt / abgeschlossene_buchungen) * transportierte_fahrgaeste, 2) if abgeschlossene_buchungen > 0 else 0
-
-                # Berechnungen der neuen Kennzahlen
-                leerkilometeranteil = round((fahrzeugkilometer_leer / fahrzeugkilometer_gesamt) *100, 2) if fahrzeugkilometer_gesamt > 0 else 0
-                buendelungsquote = round(personenkilometer_gefahren / fahrzeugkilometer_gesamt, 2) if fahrzeugkilometer_gesamt > 0 else 0
-                besetzungsquote = round(personenkilometer_gefahren / fahrzeugkilometer_besetzt, 2) if fahrzeugkilometer_besetzt > 0 else 0
-
-                # Speichern des Werts in den Sitzungszustand
-                st.session_state.update({
-                    'fahrzeugkilometer_leer': fahrzeugkilometer_leer,
-                    'fahrzeugkilometer_besetzt': fahrzeugkilometer_besetzt,
-                    'fahrzeugkilometer_gesamt': fahrzeugkilometer_gesamt,
-                    'durchschnittliche_fahrtdistanz_mit_lk': durchschnittliche_fahrtdistanz_mit_lk,
-                    'durchschnittliche_fahrtdistanz_mit_bk': durchschnittliche_fahrtdistanz_mit_bk,
-                    'personenkilometer_gefahren': personenkilometer_gefahren,
-                    'leerkilometeranteil': leerkilometeranteil,
-                    'buendelungsquote': buendelungsquote,
-                    'besetzungsquote': besetzungsquote,
-
-                })
-
-                benzinverbrauch_gesamt = sum(vehicle['Benzinverbrauch (l/100km)'] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in st.session_state['vehicle_list'])
-                dieselverbrauch_gesamt = sum(vehicle['Dieselverbrauch (l/100km)'] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in st.session_state['vehicle_list'])
-                stromverbrauch_gesamt = sum(vehicle['Stromverbrauch (kWh/100km)'] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in st.session_state['vehicle_list'])
-
-                with st.container():
-                    
-                    st.write("**Fahrzeugleistung und -nutzung**")
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Kilometer (leer):")
-                    with col2:
-                        st.write(f"{fahrzeugkilometer_leer} km")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Kilometer (besetzt):")
-                    with col2:
-                        st.write(f"{fahrzeugkilometer_besetzt} km")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Fahrzeugkilometer (gesamt):")
-                    with col2:
-                        st.write(f"{fahrzeugkilometer_gesamt} km")
-
-                    st.write("**Durchschnittliche Fahrtdistanzen**")
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Durchschnittliche Fahrtdistanz je Buchung (einschl. Leerkilometer):")
-                    with col2:
-                        st.write(f"{durchschnittliche_fahrtdistanz_mit_lk} km")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Durchschnittliche Fahrtdistanz je Buchung (mit Fahrgast):")
-                    with col2:
-                        st.write(f"{durchschnittliche_fahrtdistanz_mit_bk} km")
-
-                    st.write("**Personenkilometer**")
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Personenkilometer (gefahren):")
-                    with col2:
-                        st.write(f"{personenkilometer_gefahren} km")
-
-                    st.write("**Leistungs-Kennzahlen**")
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Leerkilometeranteil:")
-                    with col2:
-                        st.write(f"{leerkilometeranteil} %")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Bündelungsquote (nach § 50 Absatz 3 PBefG):")
-                    with col2:
-                        st.write(f"{buendelungsquote:.2f}")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Besetzungsquote (nach H Kripoo, 2021)")
-                    with col2:
-                        st.write(f"{besetzungsquote}")
-
-                    st.write("**Verbrauchsdaten Fahrzeugflotte**")
-                    
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Benzinverbrauch des Ridepooling-Systems:")
-                    with col2:
-                        st.write(f"{benzinverbrauch_gesamt:.2f} l")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Dieselverbrauch des Ridepooling-Systems:")
-                    with col2:
-                        st.write(f"{dieselverbrauch_gesamt:.2f} l")
-
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("Stromverbrauch des Ridepooling-Systems:")
-                    with col2:
-                        st.write(f"{stromverbrauch_gesamt:.2f} kWh")
-
-                # Save the total consumptions to the session state
-                st.session_state.update({
-                    'benzinverbrauch_gesamt': benzinverbrauch_gesamt,
-                    'dieselverbrauch_gesamt': dieselverbrauch_gesamt,
-                    'stromverbrauch_gesamt': stromverbrauch_gesamt
-                })
-
-                # Speichern der berechneten Werte im Sitzungszustand
-                st.session_state.update({
-                    'fahrzeugkilometer_leer': fahrzeugkilometer_leer,
-                    'fahrzeugkilometer_besetzt': fahrzeugkilometer_besetzt,
-                    'fahrzeugkilometer_gesamt': fahrzeugkilometer_gesamt,
-                    'durchschnittliche_fahrtdistanz_mit_lk': durchschnittliche_fahrtdistanz_mit_lk,
-                    'durchschnittliche_fahrtdistanz_mit_bk': durchschnittliche_fahrtdistanz_mit_bk,
-                    'personenkilometer_gefahren': personenkilometer_gefahren,
-                    'leerkilometeranteil': leerkilometeranteil,
-                    'buendelungsquote': buendelungsquote,
-                    'besetzungsquote': besetzungsquote
-                })
-
-
-                #Zeige den Sitzungszustand
-                #st.write(st.session_state)
-
-                st.info("""
-                    **Hinweis:**
-                    Die folgenden Formeln wurden zur Berechnung der Fahrzeugflotten- und Fahrtleistungsdaten verwendet:
-                    - **Fahrzeugkilometer gesamt** = Kilometer leer + Kilometer besetzt
-                    - **Durchschnittliche Fahrtdistanz je Buchung (einschl. Leerkilometer)** = Fahrzeugkilometer gesamt / Abgeschlossene Buchungen
-                    - **Durchschnittliche Fahrtdistanz je Buchung (ohne Leerkilometer)** = Kilometer besetzt / Abgeschlossene Buchungen
-                    - **Personenkilometer gefahren** = (Kilometer besetzt / Abgeschlossene Buchungen) * Transportierte Fahrgäste      
-                    - **Leerkilometeranteil** = Kilometer leer / Fahrzeugkilometer gesamt
-                    - **Bündelungsquote (nach § 50 Absatz 3 PBefG)** = Personenkilometer gefahren / Fahrzeugkilometer gesamt
-                    - **Besetzungsquote (nach H Kripoo, 2021)** = Personenkilometer / Kilometer besetzt
-                    - **Benzinverbrauch des Ridepooling-Systems** = Σ (Benzinverbrauch * (Kilometer besetzt + Kilometer leer) / 100)
-                    - **Dieselverbrauch des Ridepooling-Systems** = Σ (Dieselverbrauch * (Kilometer besetzt + Kilometer leer) / 100)
-                    - **Stromverbrauch des Ridepooling-Systems** = Σ (Stromverbrauch * (Kilometer besetzt + Kilometer leer) / 100)
-                   
-                """)
-
-            except ValueError:
-                st.error("Bitte geben Sie gültige Zahlenwerte ein.")
-            
-
-def show_emissions_data():
-    with st.expander("**1.4 Emissionsdaten**"):
-        st.info("**Hinweis:** Bitte geben Sie die CO2eq-Emissionsdaten für Benzin, Diesel und Strom an. Sie können vorausgewählte Optionen wählen oder eigene Angaben tätigen. Optional können Sie auch den Anteil an selbst erzeugtem Strom aus Photovoltaikanlagen angeben, um den adjustierten CO2eq-Emissionsfaktor für Strom zu berechnen. Bitte berücksichtigen Sie die Betrachtungsweise/Analyseprinzip. Dieses Programm nutzt die Well-to-Wheel-Betrachtung (WTW).")
-
-        # CO2eq-Emissionsdaten (Benzin)
-        benzin_emissionsdaten_auswahl = st.selectbox("CO2eq-Emissionsdaten (Benzin):", 
-                                                      ["Helmholtz-Gemeinschaft Deutscher Forschungszentren [CO2eq]", "CO2eqonline [CO2eq]", "Eigene Angaben"])
-        if benzin_emissionsdaten_auswahl == "Helmholtz-Gemeinschaft Deutscher Forschungszentren [CO2eq]":
-            benzin_emissionsdaten = 3030  # g/l
-        elif benzin_emissionsdaten_auswahl == "CO2online [CO2eq]":
-            benzin_emissionsdaten = 2370  # g/l
-        else:  # Eigene Angaben
-            benzin_emissionsdaten = st.number_input("Geben Sie die CO2-Emissionsdaten (Benzin) [g/l] ein:", min_value=0, step=1)
-
-        # CO2eq-Emissionsdaten (Diesel)
-        diesel_emissionsdaten_auswahl = st.selectbox("CO2eq-Emissionsdaten (Diesel):", 
-                                                      ["Helmholtz-Gemeinschaft Deutscher Forschungszentren [CO2eq]", "CO2eqonline [CO2eq]", "Eigene Angaben"])
-        if diesel_emissionsdaten_auswahl == "Helmholtz-Gemeinschaft Deutscher Forschungszentren [CO2eq]":
-            diesel_emissionsdaten = 3410  # g/l
-        elif diesel_emissionsdaten_auswahl == "CO2eqonline [CO2eq]":
-            diesel_emissionsdaten = 2650  # g/l
-        else:  # Eigene Angaben
-            diesel_emissionsdaten = st.number_input("Geben Sie die CO2-Emissionsdaten (Diesel) [g/l] ein:", min_value=0, step=1)
-
-
-        # CO2eq-Emissionsdaten (Strom)
-        strom_emissionsdaten_auswahl = st.selectbox("CO2eq-Emissionsdaten (Strom):", 
-                                                     ["Umweltbundesamt: CO2eq-Äquivalente mit Vorketten (2022) [CO2eq]", 
-                                                      "Umweltbundesamt: CO2eq-Emissionsfaktor Strommix (2022)", 
-                                                      "Eigene Angaben"])
-        if strom_emissionsdaten_auswahl == "Umweltbundesamt: CO2eq-Äquivalente mit Vorketten (2022) [CO2eq]":
-            strom_emissionsdaten = 498  # g/kWh
-        elif strom_emissionsdaten_auswahl == "Umweltbundesamt: CO2eq-Emissionsfaktor Strommix (2022)":
-            strom_emissionsdaten = 434  # g/kWh
-        else:  # Eigene Angaben
-            strom_emissionsdaten = st.number_input("Geben Sie die CO2-Emissionsdaten (Strom) [g CO2eq/kWh] ein:", min_value=0, step=1)
-
-        # Anteil an selbst erzeugtem Strom aus Photovoltaikanlagen
-        oekostrom_anteil = st.slider("Anteil des selbst erzeugten Stroms aus Photovoltaikanlagen [%]:", min_value=0, max_value=100, value=0, step=1)
-        pv_emissionsdaten = st.number_input("Geben Sie die CO2eq-Emissionsdaten für selbst erzeugten Strom aus Photovoltaikanlagen [g/kWh] ein:", value=35.0, min_value=0.0, format='%.1f', step=0.1)
-
-        # Berechnung des adjustierten CO2eq-Emissionsfaktors für Strom
-        strom_emissionsdaten = round(strom_emissionsdaten * (1 - oekostrom_anteil / 100.0) + pv_emissionsdaten * (oekostrom_anteil / 100.0), 1)
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write(f"**CO2eq-Emissionsdaten (Benzin) ausgewählt:**")
-        with col2:
-            st.write(f"**{benzin_emissionsdaten} g/l**")
-
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write(f"**CO2eq-Emissionsdaten (Diesel) ausgewählt:**")
-        with col2:
-            st.write(f"**{diesel_emissionsdaten} g/l**")
-        
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write(f"**Adjustierter CO2eq-Emissionsdaten (Strom) basierend auf {oekostrom_anteil}% selbst erzeugtem Strom aus Photovoltaikanlagen:**")
-        with col2:
-            st.write(f"**{strom_emissionsdaten} g/kWh**")
-
-        st.info("Die Daten für den CO2eq-Wert aus Photovoltaikanlagen stammen von: [Electricity Maps](https://app.electricitymaps.com/zone/DE)")
-
-        # Speichern der globalen Variablen
-        st.session_state.update({
-            'benzin_emissionsdaten': benzin_emissionsdaten,
-            'diesel_emissionsdaten': diesel_emissionsdaten,
-            'strom_emissionsdaten': strom_emissionsdaten,
-            'oekostrom_anteil': oekostrom_anteil,
-            'pv_emissionsdaten': pv_emissionsdaten
-        })
-
-def show_environmental_impact_calculation():
-    with st.expander("**1.5 Berechnung Umweltwirkung Ridepooling-System**"):
-        st.info("**Hinweis:** Im Folgenden ist die Umweltwirkung des Ridepooling-Systems dargestellt. In der Abbildung wird der spezifische CO2-Ausstoß des Ridepooling-Systems denen anderer Verkehrsmittel gegenübergestellt. Die Daten der anderen Verkehrsmittel stammen vom Umweltbundesamt, Umweltfreundlich mobil! (2022).")
-
-        # Stellen Sie sicher, dass alle erforderlichen Werte vorhanden sind, bevor Sie fortfahren
-        required_keys = ['fahrzeugkilometer_gesamt', 'personenkilometer_gefahren', 'benzin_emissionsdaten', 'diesel_emissionsdaten', 'strom_emissionsdaten', 'oekostrom_anteil']
-        missing_keys = [key for key in required_keys if key not in st.session_state]
-        
-        if missing_keys:
-            st.error(f"Die folgenden Schlüssel fehlen: {', '.join(missing_keys)}")
-        else:
-            # Abrufen der Werte aus dem Sitzungszustand
-            fahrzeugkilometer_gesamt = st.session_state['fahrzeugkilometer_gesamt']
-            personenkilometer_gefahren = st.session_state['personenkilometer_gefahren']
-            benzinverbrauch_gesamt = float(st.session_state['benzinverbrauch_gesamt'])
-            dieselverbrauch_gesamt = float(st.session_state['dieselverbrauch_gesamt'])
-            stromverbrauch_gesamt = float(st.session_state['stromverbrauch_gesamt'])
-            benzin_emissionsdaten = st.session_state['benzin_emissionsdaten']
-            diesel_emissionsdaten = st.session_state['diesel_emissionsdaten']
-            strom_emissionsdaten = st.session_state['strom_emissionsdaten']
-            oekostrom_anteil = st.session_state['oekostrom_anteil']
-
-            benzin_emissionen = (benzinverbrauch_gesamt * benzin_emissionsdaten) / 1000  # kg CO2e
-            diesel_emissionen = (dieselverbrauch_gesamt * diesel_emissionsdaten) / 1000  # kg CO2e
-            strom_emissionen = (stromverbrauch_gesamt * strom_emissionsdaten) / 1000  # kg CO2e
-            strom_emissionen *= (1 - oekostrom_anteil / 100)  # Anpassung für Ökostrom
-
-            # Speichern als globale Variablen
-            st.session_state.update({
-                'benzin_emissionen': benzin_emissionen,
-                'diesel_emissionen': diesel_emissionen,
-                'strom_emissionen': strom_emissionen
-            })
-
-            CO2eq_emissionen_gesamt_rps = round(benzin_emissionen + diesel_emissionen + strom_emissionen, 4)
-            CO2eq_emissionen_pro_personenkilometer_rps = round(CO2eq_emissionen_gesamt_rps / personenkilometer_gefahren, 4) if personenkilometer_gefahren else 0
-
-            # Umrechnung in g CO2ee pro Pkm
-            CO2eq_emissionen_pro_personenkilometer_rps_g = CO2eq_emissionen_pro_personenkilometer_rps * 1000  # Umrechnung in g CO2ee/Pkm
-
-            # Speichern der berechneten Werte im Sitzungszustand
-            st.session_state.update({
-                'CO2eq_emissionen_gesamt_rps': CO2eq_emissionen_gesamt_rps,
-                'CO2eq_emissionen_pro_personenkilometer_rps_g': CO2eq_emissionen_pro_personenkilometer_rps_g
-            })
-
-            # Emissionen pro pkm für verschiedene Verkehrsträger
-            emissionen_data = {
-                st.session_state['name_ridepooling_system']: CO2eq_emissionen_pro_personenkilometer_rps_g,
-                'MIV (Fahrer)': 152.86,
-                'Bus': 80.54,
-                'Straßenbahn/U-Bahn': 59.30,
-                'E-Bike/Pedelecs': 3.9,
-                'E-Lastenrad': 3.9,
-                'Fahrrad': 0.0,
-                'Zu Fuß': 0.0
-            }
-
-            # Erstellung des ersten Diagramms
-            fig1 = go.Figure()
-            for verkehrsmittel, emissionen in emissionen_data.items():
-                fig1.add_trace(go.Bar(name=verkehrsmittel, x=[verkehrsmittel], y=[emissionen], marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
-            fig1.update_layout(
-                barmode='group',
-                title='Gegenüberstellung der Emissionen pro Personenkilometer nach Verkehrsmittel - Well-to-Wheel (WTW)*',
-                legend=dict(
-                orientation="v",  # vertikale Anordnung
-                y=0.6,  # Positionierung der Legende
-                x=1.02,  # Legende rechts vom Diagramm
-                xanchor='left',
-                yanchor='top'
-                ),
-                width=650,
-                height=650,
-                yaxis_title='Emissionen [g CO2e/pkm]',
-                xaxis_tickangle=-45
-            )
-            st.plotly_chart(fig1)
-
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write(f"**Gesamte CO2eq-Emissionen des Ridepooling-Systems:**")
-            with col2:
-                st.write(f"**{CO2eq_emissionen_gesamt_rps:.2f} kg CO2e**")
-
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write(f"**CO2eq-Emissionen pro Personenkilometer:**")
-            with col2:
-                st.write(f"**{CO2eq_emissionen_pro_personenkilometer_rps_g:.2f} g CO2e/pkm**")
-
-# Initialisiere Session State Variablen
-initialize_session_state()
-
-# Zeige Sidebar an
-show_sidebar()
-
-# Grundlegende Konfiguration
-st.title('Entwurf: Vergleich der CO2eq-Emissionen von Bus- und Ridepooling-System')
-
-show_methodik()
-
-st.subheader("1. Berechnung der CO2eq-Emissionen des Ridepooling-Systems")
-# Zeige Allgemeine Informationen an
-show_general_info()
-
-# Zeige Systemleistungs-Sektion an
-show_system_performance()
-
-# Zeige Fahrzeugflotten- und Fahrtleistungs-Sektion an
-show_vehicle_fleet_performance()
-
-# Zeige Emissionsdaten-Sektion an
-show_emissions_data()
-
-# Zeige Berechnung Umweltwirkung Ridepooling-System an
-show_environmental_impact_calculation()
-
-
-
-################################################################ Berechnung Bus ################################################################
-# Constants
-initial_CO2eq_wtw = 80.54  # g CO2eeg/Pkm (Well-to-Wheel)
-initial_occupancy = 18.7  # % (VDV Statistik 2022)
-
-# Function to calculate Platzausnutzung
-def calculate_platzausnutzung(personen_km, platz_km):
-    return (personen_km / platz_km) * 100
-
-# Function to calculate new CO2e emissions based on adjusted Platzausnutzung
-def calculate_new_CO2eq_wtw(initial_CO2eq, initial_occupancy, adjusted_occupancy):
-    return initial_CO2eq * (initial_occupancy / adjusted_occupancy)
-
-# Part 1: Calculate Platzausnutzung
-st.subheader('2. Berechnung CO2eq-Emissionen Bus')
-with st.expander('**2.1 Berechnung der durchschnittlichen Platzausnutzung des Bus-Systems**'):
-    st.info("**Hinweis:** Die vorausgefüllten Daten beziehen sich auf die durchschnittliche Platzausnutzung im deutschen Durchschnitt (VDV Statistik 2022). Sie können die durchschnittliche Platzausnutzung spezifisch für Ihr Bussystem berechnen. Sie können den errechneten Wert im folgenden Schritt einsetzen, um einen Vergleich der CO2eq-Emissionen zu erhalten.")
-    # Eingabefelder für Personen- und Platzkilometer
-    
-    Nutzwagen_km = st.number_input("Nutzwagenkilometer [Mio.]", min_value=0.0, value=1658.0, step=0.1, format="%.1f")
-    st.caption("Anzahl der Kilometer im Linienverkehr zurückgelegten Produktivkilometer. Dazu kommen dann noch die Leerkilometer (Einsatzfahrten etc.), die die Verkehrsleistung des Unternehmens beschreiben (Glossar des Nahverkehrs, RVM 2024)")
-    
-    Platzangebot= st.number_input("Platzangebot (Sitz- und Stehplätze) der einzelnen Fahrzeuge", min_value=0.0, value=78.5186, step=0.1, format="%.2f")
-    st.caption("Anzahl der durchschnittlichen Sitz- und Stehplätze der einzelnen Fahrzeuge.")
-
-    personen_km = st.number_input("Personenkilometer [Mio.]", min_value=0.0, value=24311.0, step=0.1, format="%.1f")
-    st.caption("Produkt aus beförderten Personen und der zurückgelegten Entfernung in Kilometern.")
-    
-    # Berechnung der Platzkilometer
-    platz_km = Nutzwagen_km * Platzangebot
-    col1, col2 = st.columns([3, 1])
-    # Anzeige der berechneten Platzkilometer
-    with col1:
-        st.write("**Berechnete Platzkilometer [Mio.]:**")
-    with col2:
-        st.write(f"{platz_km:.2f}")
-
-    st.caption("Produkt aus Nutzwagenkilometer und Platzangebot (Sitz- und Stehplätze) jeweils der einzelnen Fahrzeuge (Berechnung nach VDV-Richtlinien von 1990).")
-
-    # Berechnung der Platzausnutzung
-    calculated_occupancy = calculate_platzausnutzung(personen_km, platz_km)
-    col1, col2 = st.columns([3, 1])
-    # Anzeige der berechneten durchschnittlichen Platzausnutzung
-    with col1:
-        st.write("**Berechnete durchschnittliche Platzausnutzung:**")
-    with col2:
-        st.write(f"{calculated_occupancy:.2f}%")
-    st.caption("Berechnet als (Personenkilometer / Platzkilometer) * 100.")
-
-    # Erklärung der Berechnungen
-    st.info("""
-    **Berechnungen:**
-    - **Personenkilometer**: Das Produkt aus beförderten Personen und der zurückgelegten Entfernung in Kilometern.
-    - **Platzkilometer**: Das Produkt aus Nutzwagenkilometern und der Platzangebot (Sitz- und Stehplätze) der einzelnen Fahrzeuge.
-    - **Durchschnittliche Platzausnutzung**: Wird berechnet als (Personenkilometer / Platzkilometer) * 100.
-    - **CO2eq-Ausstoß (WTW)**: Basierend auf der durchschnittlichen Platzausnutzung in Deutschland (18.7 %, VDV Statistik 2022), wird der CO2eq-Wert (80.54 g CO2eq/Pkm, Umweltfreundlich mobil! Umweltbundesamt, 2021) auf Basis der WTW-Betrachtung angepasst.
-    """)
-
-    # Part 2: Adjust Platzausnutzung and calculate CO2e emissions
-with st.expander('**2.2 Anpassung der Platzausnutzung und CO2eq-Emissionen**'):
-    st.info("**Hinweis:** Passen Sie die durchschnittliche Platzausnutzung Ihres Bussystems an, um den neuen CO2eq-Wert zu berechnen. Dieser angepasste CO2eq-Wert wird anschließend mit dem CO2eq-Ausstoß des Ridepooling-Systems verglichen. Voreingestellt sind die bundesweiten Werte, welche bei der Berechnung des Umweltbundesamtes ('umweltfreundlich mobil!', 2022) hinterlegt sind.")
-    adjusted_occupancy = st.slider("Angepasste durchschnittliche Platzausnutzung (%)", min_value=0.1, max_value=100.0, value=initial_occupancy, step=0.1)
-    st.caption("Passen Sie die durchschnittliche Platzausnutzung an, um den neuen CO2eq-Wert zu berechnen.")
-
-    # Berechnung des neuen CO2eq-Wertes basierend auf der angepassten Platzausnutzung
-    new_CO2eq_wtw = calculate_new_CO2eq_wtw(initial_CO2eq_wtw, initial_occupancy, adjusted_occupancy)
-
-    # Erstelle zwei Spalten für die Anzeige
-    col1, col2 = st.columns([3, 1])
-
-    # Anzeige des angepassten CO2eq-Ausstoßes
-    with col1:
-        st.write(f"**Angepasster CO2eq-Ausstoß (WTW) bei {adjusted_occupancy:.2f}% Platzausnutzung:**")
-    with col2:
-        st.write(f"{new_CO2eq_wtw:.2f} g CO2eq/Pkm")
-
-
-    ################################################################ Vergleich ################################################################
-st.subheader('3. Vergleich der CO2eq-Emissionen')
-
-with st.expander("**3.1 Vergleich der CO2eq-Emissionen von Bus und Ridepooling-System**"):
-
-    def compare_emissions():
-        if 'CO2eq_emissionen_pro_personenkilometer_rps_g' not in st.session_state:
-            st.error("CO2eq-Emissionen des Ridepooling-Systems sind nicht verfügbar.")
-            return
-        st.info("**Hinweis:** Im Folgenden wird der CO2eq-Ausstoß des Bus-Systems mit dem CO2eq-Ausstoß des Ridepooling-Systems verglichen. Die Daten für das Bus-System werden in Kapitel 2 berechnet, die des Ridepooling-Systems in Abschnitt 1.")
-        #Nimm den Namen des Ridepooling-Systems aus dem Sitzungszustand
-        name_ridepooling_system = st.session_state['name_ridepooling_system']
-
-        # Erstellung des Diagramms
-        fig2 = go.Figure()
-        ridepooling_system_name = "Ridepooling-System"
-        fig2.add_trace(go.Bar(name=name_ridepooling_system, x=[name_ridepooling_system], y=[st.session_state['CO2eq_emissionen_pro_personenkilometer_rps_g']], marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
-        fig2.add_trace(go.Bar(name='Bus', x=['Bus'], y=[new_CO2eq_wtw], marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
-        fig2.update_layout(
-            barmode='group',
-            title='Vergleich der CO2eq-Emissionen pro Personenkilometer',
-            legend=dict(
-                orientation="v",  # vertikale Anordnung
-                y=0.6,  # Positionierung der Legende
-                x=1.02,  # Legende rechts vom Diagramm
-                xanchor='left',
-                yanchor='top'
-            ),
-            width=650,
-            height=650,
-            yaxis_title='Emissionen [g CO2eq/pkm]',
-            xaxis_tickangle=-45
-        )
-        st.plotly_chart(fig2)
-            # Erstelle zwei Spalten für jede Zeile
-        col1, col2 = st.columns([3, 1])  # Verhältnis 3:1 sorgt dafür, dass die linke Spalte breiter ist
-        
-        # Erste Zeile
-        with col1:
-            st.write("**CO2eq-Emissionen Bus (angepasst):**")
-        with col2:
-            st.write(f"{new_CO2eq_wtw:.2f} g CO2eq/Pkm")
-        
-        # Zweite Zeile
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("**Platzausnutzung Bus (angepasst):**")
-        with col2:
-            st.write(f"{adjusted_occupancy:.2f}%")
-        
-        # Dritte Zeile
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("**Prozentuale Differenz zur durchschnittlichen deutschen Platzausnutzung (18.7 %, VDV Statistik 2022):**")
-        with col2:
-            st.write(f"{(adjusted_occupancy - initial_occupancy) / initial_occupancy * 100:.2f}%")
-        
-        # Vierte Zeile
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("**CO2eq-Emissionen Ridepooling-System:**")
-        with col2:
-            st.write(f"{st.session_state['CO2eq_emissionen_pro_personenkilometer_rps_g']:.2f} g CO2eq/Pkm")
-
-        st.info("""
-        **Anmerkungen:**
-        - Die Berechnung der CO2eq-Emissionen des Ridepooling-Systems berücksichtigt ausschließlich monomodale Fahrten. Zu- oder Abfahrtswege vor oder nach einer Ridepooling-Fahrt können nicht berücksichtigt werden.
-        - Die Umweltwirkung wird anhand der CO2eq-Emissionen bewertet. Andere Umweltkategorien (z.B. Luftschadstoffe, Lärm) werden zur Zeit nicht berücksichtigt.
-        - Eine Berücksichtigung von E-Busfahrzeugen geschieht zwar indirekt über die Emissionsdaten des Umweltbundesamt ('umweltfreundlich mobil!', 2022). Die Datengrundlage kann zur Zeit nicht angepasst werden.
-        - Die durchschnittliche Platzausnutzung kann lediglich für den 24-Stunden-Betrieb angegeben werden (Umweltbundesamt, 'umweltfreundlich mobil!', 2022). Die Datengrundlage kann zur Zeit nicht angepasst werden.
-        """)
-    compare_emissions()
-
-# Footer
-st.markdown("---")
-st.write("***Entwurfsfassung***")
-st.write("Dieses Programm wurde  im Projekt 'Bewertung der ökologischen Effekte von Ridepooling-Systemen anhand von vier Fallbeispielen in NRW' entwickelt und durch das Ministerium für Umwelt, Naturschutz, und Verkehr des Landes Nordrhein-Westfalens gefördert. © 2024 [FH Münster](https://www.fh-muenster.de/)")
-st.write("Die Berechnungen basieren auf den Annahmen und Daten, die Sie in den verschiedenen Abschnitten des Programms eingegeben haben.")
-st.write("Die Ergebnisse dienen nur zu Informationszwecken und sind nicht verbindlich.")
-st.write("Für Fragen oder Anregungen wenden Sie sich bitte an [peter.bruder@fh-muenster.de](mailto:peter.bruder@fh-muenster.de).")
+import streamlit as st
+from datetime import date
+import plotly.graph_objects as go
+import pandas as pd
+import numpy as np
+import toml
+import json
+import os
+import sqlite3
+from collections import deque
+from urllib.parse import quote
+
+from oekorps.flotte import (
+    verbrauch_spalten, kilometer_spalten, empty_fleet, append_vehicle, read_fleet_file, vehicle_list_to_fleet,
+    calculate_fleet_km_table, calculate_fleet_consumption_table,
+)
+from oekorps.stromprofil import ladeprofile, load_grid_intensity, charging_profiles_from_daily, StromEmissionsreihe, calculate_strom_emissionen
+from oekorps.parameterstudie import calculate_CO2eq_pro_fahrzeugkilometer, calculate_sweep, sweep_axes
+from oekorps.cache import LRUCache, DiskCache, StufenCache, fingerprint, memoize, hit_rate, standard_cache_pfad
+from oekorps.referenzdaten import load_referenzdaten, referenzdaten_mtime, standard_pfad
+from oekorps.profil import Profil, messen, profil_aktiviert, summarize, chrome_trace
+from oekorps.zeitreihe import Zeitreihe, perioden_spalten, aggregationsstufen, aggregate_periods, read_period_file
+from oekorps.systemvergleich import system_spalten, fleet_to_system_row, preset_systems, compare_systems
+from oekorps.bericht import Exportdienst, exportformate
+from oekorps.belegungsprofil import tagtypen, aggregate_apc, aggregate_rides_by_hour, occupancy_by_line, compare_by_hour
+from oekorps.verlagerung import verlagerung_spalten, keine_fahrt, read_survey_file, calculate_mode_shift, sample_mode_shift
+from oekorps.sensitivitaet import stellgroessen, zielgroessen, basis_schluessel, standard_variation, default_ranges, calculate_tornado, calculate_sobol
+from oekorps.busflotte import busflotten_spalten, empty_bus_fleet, read_bus_fleet, read_bus_fleet_file, calculate_bus_fleet, aggregate_bus_fleet, bus_fleet_totals
+from oekorps.szenarien import save_scenario, load_scenario, list_scenarios, list_systems
+from oekorps.sitzungszustand import Sitzungszustand
+from oekorps.berechnung import (
+    bus_referenz, calculate_fleet_performance,
+    calculate_adjusted_strom_emissionsdaten, calculate_environmental_impact,
+    calculate_platzausnutzung, calculate_new_CO2eq_wtw,
+)
+
+# Custom CSS to hide the + and - buttons
+hide_buttons_css = """
+    <style>
+    .stNumberInput button.step-up, .stNumberInput button.step-down {
+        display: none;
+    }
+    </style>
+"""
+
+# Funktion zum Laden der Referenzdaten (einmal je Prozess, Invalidierung über den Änderungszeitpunkt der Datei)
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_referenzdaten_cached(pfad, mtime):
+    return load_referenzdaten(pfad)
+
+def get_referenzdaten():
+    return _load_referenzdaten_cached(standard_pfad, referenzdaten_mtime(standard_pfad))
+
+# Funktion zum Laden der Konfiguration und des Logos (einmal je Prozess statt bei jedem Durchlauf)
+@st.cache_resource(show_spinner=False)
+def load_config():
+    return toml.load(".streamlit/config.toml")
+
+logo_datei = "Logo_of_Fachhochschule_Münster.png"
+
+@st.cache_resource(show_spinner=False)
+def load_logo():
+    with open(os.path.join("static", logo_datei), "rb") as datei:
+        return datei.read()
+
+# Funktion zur Bestimmung der Quelle des Logos: bei aktivierter Auslieferung statischer Dateien (config.toml) die URL,
+# die der Browser zwischenspeichert, sonst der Dateiinhalt
+def logo_quelle():
+    if st.get_option('server.enableStaticServing'):
+        return f"/app/static/{quote(logo_datei)}"
+    return load_logo()
+
+# Funktion zum Öffnen des gemeinsamen Zwischenspeichers aller Prozesse und Sitzungen (einmal je Prozess)
+# Abschalten mit OEKORPS_CACHE="" (leer); ist die Datei nicht beschreibbar, gilt nur der Speicher der Sitzung.
+@st.cache_resource(show_spinner=False)
+def get_shared_cache():
+    if not standard_cache_pfad:
+        return None
+    try:
+        return DiskCache(standard_cache_pfad)
+    except (OSError, sqlite3.Error):
+        return None
+
+# Funktion zum Abrufen des Zwischenspeichers der Sitzung für Kennzahlen und Diagramme
+# Fehltreffer werden im gemeinsamen Zwischenspeicher nachgeschlagen, sodass gleiche Berechnungen (z.B. voreingestellte
+# Systeme) über alle Worker und Sitzungen hinweg nur einmal ausgeführt werden.
+def get_session_cache():
+    if '_kennzahlen_cache' not in st.session_state:
+        gemeinsam = get_shared_cache()
+        lokal = LRUCache(maxsize=32)
+        st.session_state['_kennzahlen_cache'] = StufenCache(lokal, gemeinsam) if gemeinsam is not None else lokal
+    return st.session_state['_kennzahlen_cache']
+
+# Funktion zum Abrufen des Speichers der Sitzung ohne gemeinsamen Speicher, für Ergebnisse aus hochgeladenen Dateien
+# (Befragungen, Busflotten, AFZS- und Telematikdaten), damit diese nicht für andere Sitzungen abgelegt werden
+def get_upload_cache():
+    sitzung = get_session_cache()
+    return sitzung.lokal if isinstance(sitzung, StufenCache) else sitzung
+
+# Funktion zum Abrufen des Sitzungszustands (Eingaben und Kennzahlen als je ein kompaktes Objekt statt Einzelschlüsseln)
+def get_zustand():
+    if 'zustand' not in st.session_state:
+        st.session_state['zustand'] = Sitzungszustand()
+    return st.session_state['zustand']
+
+# Funktion zur Erstellung des Diagramms "Emissionen pro Personenkilometer nach Verkehrsmittel" (Abschnitt 1.5)
+def build_emissions_figure(emissionen_data):
+    fig1 = go.Figure()
+    for verkehrsmittel, emissionen in emissionen_data.items():
+        fig1.add_trace(go.Bar(name=verkehrsmittel, x=[verkehrsmittel], y=[emissionen], marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
+    fig1.update_layout(
+        barmode='group',
+        title='Gegenüberstellung der Emissionen pro Personenkilometer nach Verkehrsmittel - Well-to-Wheel (WTW)*',
+        legend=dict(
+        orientation="v",  # vertikale Anordnung
+        y=0.6,  # Positionierung der Legende
+        x=1.02,  # Legende rechts vom Diagramm
+        xanchor='left',
+        yanchor='top'
+        ),
+        width=650,
+        height=650,
+        yaxis_title='Emissionen [g CO2e/pkm]',
+        xaxis_tickangle=-45
+    )
+    return fig1
+
+# Funktion zur Erstellung des Vergleichsdiagramms Bus / Ridepooling-System (Abschnitt 3.1)
+def build_comparison_figure(name_ridepooling_system, CO2eq_emissionen_pro_personenkilometer_rps_g, new_CO2eq_wtw):
+    fig2 = go.Figure()
+    fig2.add_trace(go.Bar(name=name_ridepooling_system, x=[name_ridepooling_system], y=[CO2eq_emissionen_pro_personenkilometer_rps_g], marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
+    fig2.add_trace(go.Bar(name='Bus', x=['Bus'], y=[new_CO2eq_wtw], marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
+    fig2.update_layout(
+        barmode='group',
+        title='Vergleich der CO2eq-Emissionen pro Personenkilometer',
+        legend=dict(
+            orientation="v",  # vertikale Anordnung
+            y=0.6,  # Positionierung der Legende
+            x=1.02,  # Legende rechts vom Diagramm
+            xanchor='left',
+            yanchor='top'
+        ),
+        width=650,
+        height=650,
+        yaxis_title='Emissionen [g CO2eq/pkm]',
+        xaxis_tickangle=-45
+    )
+    return fig2
+
+# Funktion zur Erstellung des Trenddiagramms je Zeitraum (Abschnitt 4.1)
+# Je Kennzahl ein Linienzug über alle Zeiträume (keine eigene Spur je Datenpunkt)
+def build_trend_figure(ergebnisse, new_CO2eq_wtw, fenster):
+    perioden = ergebnisse['Periode'].to_numpy()
+    fig4 = go.Figure()
+    fig4.add_trace(go.Scatter(name='Je Zeitraum', x=perioden, y=ergebnisse['CO2eq_emissionen_pro_personenkilometer_rps_g'].to_numpy(), mode='lines+markers', opacity=0.7))
+    fig4.add_trace(go.Scatter(name=f'Gleitend ({fenster} Zeiträume)', x=perioden, y=ergebnisse['CO2eq_pro_pkm_gleitend_g'].to_numpy(), mode='lines'))
+    fig4.add_trace(go.Scatter(name='Kumuliert', x=perioden, y=ergebnisse['CO2eq_pro_pkm_kumuliert_g'].to_numpy(), mode='lines', line=dict(dash='dash')))
+    fig4.add_trace(go.Scatter(name='Bus (angepasst)', x=[perioden[0], perioden[-1]], y=[new_CO2eq_wtw, new_CO2eq_wtw], mode='lines', line=dict(color='black', dash='dot')))
+    fig4.update_layout(
+        title='Entwicklung der CO2eq-Emissionen pro Personenkilometer',
+        xaxis_title='Zeitraum',
+        yaxis_title='Emissionen [g CO2eq/pkm]',
+        xaxis_type='category',
+        width=650,
+        height=500
+    )
+    return fig4
+
+# Funktion zur Erstellung des Diagramms der je Quartal oder Jahr aggregierten Werte (Abschnitt 4.1)
+def build_aggregate_figure(aggregiert, stufe):
+    fig5 = go.Figure()
+    fig5.add_trace(go.Bar(name='CO2eq-Emissionen [t]', x=aggregiert[stufe], y=aggregiert['CO2eq_emissionen_gesamt_rps'] / 1000, marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
+    fig5.add_trace(go.Scatter(name='g CO2eq/pkm', x=aggregiert[stufe], y=aggregiert['CO2eq_emissionen_pro_personenkilometer_rps_g'], mode='lines+markers', yaxis='y2'))
+    fig5.update_layout(
+        title=f'CO2eq-Emissionen je {stufe}',
+        xaxis_type='category',
+        yaxis_title='Emissionen [t CO2eq]',
+        yaxis2=dict(title='Emissionen [g CO2eq/pkm]', overlaying='y', side='right'),
+        legend=dict(orientation='h', y=-0.2),
+        width=650,
+        height=500
+    )
+    return fig5
+
+# Funktion zur Erstellung des Vergleichsdiagramms aller Systeme (Abschnitt 3.3)
+# Eine Spur je Kategorie (Ridepooling-System, lokaler Bus) mit allen Systemen, damit auch viele Systeme schnell dargestellt werden
+def build_systems_figure(ergebnisse):
+    systeme = ergebnisse['System'].to_numpy()
+    fig6 = go.Figure()
+    fig6.add_trace(go.Bar(name='Ridepooling-System', x=systeme, y=ergebnisse['CO2eq_emissionen_pro_personenkilometer_rps_g'].to_numpy(), marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
+    fig6.add_trace(go.Bar(name='Bus (lokal)', x=systeme, y=ergebnisse['new_CO2eq_wtw'].to_numpy(), marker_line_color='rgb(0,0,0)', marker_line_width=1.5, opacity=0.7))
+    fig6.update_layout(
+        barmode='group',
+        title='Vergleich der CO2eq-Emissionen pro Personenkilometer je System',
+        legend=dict(orientation='h', y=1.02, yanchor='bottom'),
+        width=max(650, 30 * len(systeme)),
+        height=650,
+        yaxis_title='Emissionen [g CO2eq/pkm]',
+        xaxis_type='category',
+        xaxis_tickangle=-45
+    )
+    return fig6
+
+# Funktion zur Erstellung des Vergleichsdiagramms je Stunde (Abschnitt 3.4)
+def build_hourly_figure(vergleich):
+    stunden = vergleich['Stunde'].to_numpy()
+    fig7 = go.Figure()
+    fig7.add_trace(go.Scatter(name='Bus', x=stunden, y=vergleich['CO2eq Bus (g/Pkm)'].to_numpy(), mode='lines+markers'))
+    fig7.add_trace(go.Scatter(name='Ridepooling-System', x=stunden, y=vergleich['CO2eq Ridepooling (g/Pkm)'].to_numpy(), mode='lines+markers'))
+    fig7.add_trace(go.Bar(name='Platzausnutzung Bus (%)', x=stunden, y=vergleich['Platzausnutzung Bus (%)'].to_numpy(), yaxis='y2', opacity=0.3))
+    fig7.update_layout(
+        title='CO2eq-Emissionen pro Personenkilometer je Stunde',
+        xaxis=dict(title='Stunde', tickmode='linear', dtick=2),
+        yaxis_title='Emissionen [g CO2eq/pkm]',
+        yaxis2=dict(title='Platzausnutzung Bus [%]', overlaying='y', side='right', rangemode='tozero'),
+        legend=dict(orientation='h', y=-0.2),
+        width=650,
+        height=500
+    )
+    return fig7
+
+# Funktion zur Erstellung des Tornado-Diagramms (Abschnitt 3.6): Abweichung vom Basiswert je Stellgröße, größte Wirkung oben
+def build_tornado_figure(tornado, titel):
+    tornado = tornado.iloc[::-1]
+    basiswert = float(tornado['Ergebnis Basis'].iloc[0])
+    fig8 = go.Figure()
+    for grenze, farbe in [('unten', 'rgb(31,119,180)'), ('oben', 'rgb(214,39,40)')]:
+        fig8.add_trace(go.Bar(name=f'Stellgröße {grenze}', y=tornado['Bezeichnung'], x=tornado[f'Ergebnis {grenze}'] - basiswert, base=basiswert,
+                              orientation='h', marker_color=farbe, customdata=tornado[f'Wert {grenze}'],
+                              hovertemplate='%{y}: %{customdata:.4g}<br>Ergebnis: %{x:.2f}<extra></extra>'))
+    fig8.add_vline(x=basiswert, line_color='black', line_width=1)
+    fig8.update_layout(
+        barmode='overlay',
+        title=f'Tornado-Diagramm: {titel}',
+        xaxis_title=titel,
+        legend=dict(orientation='h', y=-0.2),
+        width=650,
+        height=450
+    )
+    return fig8
+
+# Funktion zur Erstellung des Diagramms der Sobol-Indizes (Abschnitt 3.6)
+def build_sobol_figure(sobol, titel):
+    fig9 = go.Figure()
+    fig9.add_trace(go.Bar(name='Erste Ordnung (S1)', x=sobol['Bezeichnung'], y=sobol['S1'].clip(lower=0)))
+    fig9.add_trace(go.Bar(name='Totaleffekt (ST)', x=sobol['Bezeichnung'], y=sobol['ST'].clip(lower=0)))
+    fig9.update_layout(
+        barmode='group',
+        title=f'Sobol-Indizes: {titel}',
+        yaxis=dict(title='Anteil an der Varianz', range=[0, 1]),
+        legend=dict(orientation='h', y=-0.4),
+        width=650,
+        height=500
+    )
+    return fig9
+
+# Funktion zur Anzeige der Sidebar
+def show_sidebar():
+    st.sidebar.image(logo_quelle(), use_column_width=True)
+    st.sidebar.markdown("""
+        <style>
+            .css-18e3th9 {  
+                width: 50x;  
+                position: fixed;
+                right: 0;
+                top: 0;
+                height: 100%;
+                margin-top: 0;
+            }
+            .css-1l02zno {  
+                margin-left: auto;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+# Option für zeitaufgelöste Stromemissionsdaten (Abschnitt 1.4)
+zeitaufgeloest = "Zeitaufgelöst (stündliche Emissionsdaten aus Datei)"
+
+# Abhängigkeiten der Umweltwirkung (Abschnitt 1.5): Kennzahlen aus 1.3 und Emissionsdaten aus 1.4 sowie ihre Ergebnisse
+umweltwirkung_kennzahlen = ['benzinverbrauch_gesamt', 'dieselverbrauch_gesamt', 'stromverbrauch_gesamt', 'personenkilometer_gefahren']
+umweltwirkung_eingaben = ['benzin_emissionsdaten', 'diesel_emissionsdaten', 'strom_emissionsdaten', 'oekostrom_anteil']
+umweltwirkung_ergebnisse = ['benzin_emissionen', 'diesel_emissionen', 'strom_emissionen', 'CO2eq_emissionen_gesamt_rps', 'CO2eq_emissionen_pro_personenkilometer_rps_g']
+
+# Funktion zum Abrufen des zuletzt übernommenen Eingabewerts (z.B. aus einem geladenen Szenario, sonst Standardwert)
+# Dient als Startwert der Eingabefelder, damit Eingaben in zugeklappten Abschnitten erhalten bleiben.
+def eingabe_wert(key, standard):
+    return get_zustand().eingaben.get(key, standard)
+
+# Funktion zur Bildung der Widget-Schlüssel; nach dem Laden eines Szenarios werden die Eingabefelder neu angelegt
+def widget_key(name, *zusatz):
+    return '_'.join(['eingabe', name] + [str(wert) for wert in zusatz] + [str(st.session_state.get('szenario_version', 0))])
+
+# Funktion für Abschnitte, deren Inhalt nur im aufgeklappten Zustand ausgeführt wird (Abfrage über .open)
+def lazy_expander(label, key, on_change='rerun'):
+    return st.expander(label, key=key, on_change=on_change)
+
+# Funktion zum Wiederherstellen eines gespeicherten Szenarios (Eingaben, Fahrzeugflotte und Ergebnisse)
+# Die gespeicherten Kennzahlen werden übernommen und in den Zwischenspeicher der Sitzung eingetragen,
+# sodass die folgenden Abschnitte sie ohne erneute Berechnung anzeigen.
+def restore_scenario(szenario):
+    eingaben = dict(szenario['eingaben'])
+    if eingaben.get('strom_emissionsdaten_auswahl') == zeitaufgeloest:
+        # Die Zeitreihe selbst wird nicht gespeichert, der wirksame Emissionsfaktor wird als eigene Angabe übernommen
+        eingaben['strom_emissionsdaten_auswahl'] = "Eigene Angaben"
+    st.session_state['szenario_version'] = st.session_state.get('szenario_version', 0) + 1
+    zustand = get_zustand()
+    zustand.eingaben.update(eingaben)
+    zustand.uebernehmen(szenario['ergebnisse'])
+    update_fleet(vehicle_list_to_fleet(szenario['fahrzeugflotte']))
+
+    ergebnisse = zustand.ergebnisse
+    if 'CO2eq_emissionen_pro_personenkilometer_rps_g' in ergebnisse and not ergebnisse.fehlende(umweltwirkung_kennzahlen) and all(key in zustand.eingaben for key in umweltwirkung_eingaben):
+        zustand.vormerken('umweltwirkung', zustand.stand(umweltwirkung_eingaben, umweltwirkung_kennzahlen),
+                          {key: ergebnisse[key] for key in umweltwirkung_ergebnisse})
+
+# Funktion zur Zusammenstellung der aktuellen Eingaben und Ergebnisse als Szenario (wie oekorps.szenarien.load_scenario)
+def current_scenario(name=None):
+    return {
+        'name': name or get_zustand().eingaben.get('name_ridepooling_system') or "Ohne Namen",
+        'eingaben': get_zustand().eingaben.to_dict(),
+        'fahrzeugflotte': current_fleet().to_dict('records'),
+        'ergebnisse': get_zustand().ergebnisse.to_dict(),
+    }
+
+# Funktion zur Anzeige der gespeicherten Szenarien in der Sidebar (Speichern, Filtern und Laden)
+def show_scenario_store():
+    with st.sidebar.expander("**Szenarien**"):
+        szenario_name = st.text_input("Name des Szenarios:", key='szenario_name')
+        if st.button("Szenario speichern"):
+            if 'CO2eq_emissionen_pro_personenkilometer_rps_g' not in get_zustand().ergebnisse:
+                st.error("Bitte berechnen Sie zunächst die CO2eq-Emissionen des Ridepooling-Systems (Abschnitt 1.3).")
+            else:
+                szenario = current_scenario(szenario_name)
+                save_scenario(szenario['name'], szenario['eingaben'], szenario['fahrzeugflotte'], szenario['ergebnisse'])
+                st.success("Szenario gespeichert.")
+
+        # Filter nach Ridepooling-System (indizierte Abfrage, es werden nur die neuesten Szenarien geladen)
+        system = st.selectbox("Ridepooling-System:", ["Alle"] + list_systems())
+        szenarien = list_scenarios(system=None if system == "Alle" else system)
+        if not szenarien:
+            st.caption("Keine gespeicherten Szenarien vorhanden.")
+            return
+        szenario = st.selectbox("Gespeichertes Szenario:", szenarien,
+                                format_func=lambda eintrag: f"{eintrag['name']} ({eintrag['system'] or '-'}, {eintrag['periode']}, {eintrag['erstellt']})")
+        if st.button("Szenario laden"):
+            restore_scenario(load_scenario(szenario['id']))
+            st.rerun()
+
+# Exportdienst für Berichte (ein Prozesspool je Server-Prozess, von allen Sitzungen geteilt)
+@st.cache_resource(show_spinner=False)
+def get_exportdienst():
+    return Exportdienst(max_workers=2)
+
+def show_report_export():
+    with st.sidebar.expander("**Bericht exportieren**"):
+        aktuell = st.checkbox("Aktuelle Eingaben", value=True, key='bericht_aktuell')
+        gespeichert = st.multiselect("Gespeicherte Szenarien:", list_scenarios(), key='bericht_szenarien',
+                                     format_func=lambda eintrag: f"{eintrag['name']} ({eintrag['system'] or '-'}, {eintrag['periode']})")
+        exportformat = st.selectbox("Format:", list(exportformate), key='bericht_format',
+                              format_func=lambda eintrag: {'pdf': "PDF-Bericht", 'xlsx': "Excel-Arbeitsmappe", 'png': "Diagramme (PNG)", 'svg': "Diagramme (SVG)"}[eintrag])
+        if st.button("Bericht erstellen"):
+            szenarien = [load_scenario(eintrag['id']) for eintrag in gespeichert]
+            if aktuell:
+                if 'CO2eq_emissionen_pro_personenkilometer_rps_g' not in get_zustand().ergebnisse:
+                    st.error("Bitte berechnen Sie zunächst die CO2eq-Emissionen des Ridepooling-Systems (Abschnitt 1.3).")
+                    return
+                szenarien.insert(0, current_scenario())
+            if not szenarien:
+                st.error("Bitte wählen Sie mindestens ein Szenario aus.")
+                return
+            # Die Erstellung läuft im Prozesspool; bereits erstellte Berichte stehen sofort bereit
+            st.session_state['bericht_schluessel'] = get_exportdienst().submit(szenarien, exportformat)
+        show_report_download()
+
+# Funktion zur Anzeige des Bearbeitungsstands und des Downloads
+# Solange der Bericht erstellt wird, fragt ein Fragment den Status jede Sekunde ab, ohne die übrige Seite neu auszuführen.
+def show_report_download():
+    schluessel = st.session_state.get('bericht_schluessel')
+    if schluessel is None:
+        return
+    laeuft = get_exportdienst().status(schluessel) == 'laeuft'
+    st.fragment(show_report_status, run_every=1.0 if laeuft else None)(schluessel, laeuft)
+
+def show_report_status(schluessel, laeuft):
+    exportdienst = get_exportdienst()
+    status = exportdienst.status(schluessel)
+    if status == 'laeuft':
+        st.caption("Bericht wird erstellt ...")
+        return
+    if laeuft:
+        # Fertig: einmal die ganze Seite neu ausführen, damit die Statusabfrage endet
+        st.rerun()
+    if status is None:
+        st.session_state.pop('bericht_schluessel', None)
+        return
+    try:
+        bericht = exportdienst.result(schluessel)
+    except (ValueError, KeyError, OSError) as fehler:
+        st.error(f"Der Bericht konnte nicht erstellt werden: {fehler}")
+        st.session_state.pop('bericht_schluessel', None)
+        return
+    st.download_button("Bericht herunterladen", bericht['daten'], file_name=bericht['dateiname'], mime=bericht['mime'], key='bericht_download')
+
+# Funktion zum Start der Zeitmessung je Abschnitt (aktiv über OEKORPS_PROFIL=1 oder den Parameter ?profil=1)
+def start_profil(name='Durchlauf'):
+    if profil_aktiviert() or st.query_params.get('profil') in ('1', 'true'):
+        return Profil(name)
+    return None
+
+# Funktion zum Abschließen einer Messung (die letzten 50 Messungen der Sitzung werden aufbewahrt)
+def finish_profil(profil):
+    profil.beenden()
+    if '_profil_laeufe' not in st.session_state:
+        st.session_state['_profil_laeufe'] = deque(maxlen=50)
+    st.session_state['_profil_laeufe'].append(profil)
+    return st.session_state['_profil_laeufe']
+
+# Funktion zur Anzeige der Trefferquoten der Zwischenspeicher (Sitzung und gemeinsamer Speicher dieses Prozesses)
+def show_cache_statistik():
+    sitzung = get_session_cache()
+    zeilen = [{'Zwischenspeicher': 'Sitzung', 'Treffer': sitzung.hits, 'Fehltreffer': sitzung.misses, 'Trefferquote (%)': hit_rate(sitzung)}]
+    if isinstance(sitzung, StufenCache):
+        zeilen.append({'Zwischenspeicher': 'davon aus gemeinsamem Speicher', 'Treffer': sitzung.hits_gemeinsam, 'Fehltreffer': None, 'Trefferquote (%)': None})
+    gemeinsam = get_shared_cache()
+    if gemeinsam is not None:
+        zeilen.append({'Zwischenspeicher': 'Gemeinsam (dieser Prozess)', 'Treffer': gemeinsam.hits, 'Fehltreffer': gemeinsam.misses, 'Trefferquote (%)': hit_rate(gemeinsam)})
+    for zeile in zeilen:
+        if zeile['Trefferquote (%)'] is not None:
+            zeile['Trefferquote (%)'] *= 100
+    st.write("**Zwischenspeicher**")
+    st.dataframe(pd.DataFrame(zeilen), hide_index=True)
+    if gemeinsam is not None:
+        anzahl, groesse = gemeinsam.size()
+        st.caption(f"Gemeinsamer Speicher ({gemeinsam.pfad}): {anzahl} Einträge, {groesse / 1e6:.1f} MB, Zugriffsfehler: {gemeinsam.fehler}.")
+
+# Funktion zur Anzeige der Messergebnisse in einem Debug-Bereich am Ende der Seite
+def show_profil(profil):
+    if profil is None:
+        return
+    laeufe = finish_profil(profil)
+
+    with st.expander("**Profil (Debug)**"):
+        st.write(f"Letzter Durchlauf: {profil.dauer * 1000:.1f} ms")
+        st.dataframe(pd.DataFrame([{
+            'Abschnitt': eintrag['name'],
+            'Dauer (ms)': eintrag['dauer_s'] * 1000,
+            'Speicher netto (KB)': eintrag.get('speicher_netto_kb'),
+            'Speicher Spitze (KB)': eintrag.get('speicher_spitze_kb'),
+        } for eintrag in profil.abschnitte]), hide_index=True)
+        st.write(f"**Alle Durchläufe der Sitzung ({len(laeufe)})**")
+        st.dataframe(pd.DataFrame(summarize(laeufe)), hide_index=True)
+        show_cache_statistik()
+        st.download_button("Chrome-Trace exportieren", json.dumps(chrome_trace(laeufe)), file_name="oekorps_profil.json", mime="application/json")
+        st.caption("Die Datei kann in chrome://tracing, Perfetto (ui.perfetto.dev) oder speedscope (speedscope.app) geöffnet werden.")
+        if st.button("Messungen zurücksetzen"):
+            laeufe.clear()
+
+################################################################ Berechnung RPS ################################################################
+
+
+def show_methodik():
+    with st.expander("**Methodik**"):
+        st.write("Das Programm dient zur Bestimmung der CO2eq-Emissionen von Ridepooling-Systemen im Vergleich zu konventionellen Bussystemen. Ziel ist es, die CO2eq-Emissionen pro Personenkilometer (g CO2eq/Pkm) zu berechnen und diese gegenüberzustellen. Dabei wird auch der CO2eq-Ausstoß des Busses anhand seiner Platzausnutzung berechnet und dem des Ridepooling-Systems gegenübergestellt. Diese Auswertung ist besonders sinnvoll, um die ökologische Nachhaltigkeit verschiedener Verkehrssysteme fundiert zu bewerten. Durch den Vergleich der CO2eq-Emissionen beider Systeme kann aufgezeigt werden, wie effizient sie in Bezug auf Platzausnutzung und Emissionsvermeidung sind. Dies hilft, Potenziale zur Reduzierung von Emissionen durch optimierte Platzausnutzung oder alternative Mobilitätskonzepte zu identifizieren und somit fundierte Entscheidungen für eine umweltfreundlichere Mobilität zu treffen.")
+        
+        st.write("**Methodische Vorgehensweise:**")
+
+        st.write("""
+        - **Datenerhebung und Eingabe:** Der Benutzer gibt grundlegende Informationen zum Ridepooling-System, wie Betriebsdaten (Anzahl der Fahrten, transportierte Fahrgäste) und Fahrzeugflottendaten (Verbrauchsdaten, gefahrene Kilometer) ein.
+
+        - **Berechnung der Umweltwirkungen:** Basierend auf den Eingabedaten werden die Gesamtemissionen (Benzin, Diesel, Strom) des Ridepooling-Systems berechnet. Die Emissionen pro Personenkilometer werden ermittelt.
+
+        - **Vergleich mit Bussystem:** Das Programm berechnet die durchschnittliche Platzausnutzung eines Busses und den entsprechenden CO2eq-Ausstoß pro Personenkilometer, angepasst an unterschiedliche Platzausnutzungen. Diese Werte werden mit denen des Ridepooling-Systems verglichen.
+
+        """)
+
+
+# Funktion zur Initialisierung der Session State Variablen
+def initialize_session_state():
+    if 'fahrzeugflotte' not in st.session_state:
+        st.session_state['fahrzeugflotte'] = empty_fleet()
+        st.session_state['fahrzeugflotte_version'] = 0
+
+# Funktion zum Übernehmen der Änderungen aus der Fahrzeugtabelle (st.data_editor) in die gespeicherte Fahrzeugflotte
+def current_fleet():
+    fahrzeugflotte = st.session_state['fahrzeugflotte']
+    aenderungen = st.session_state.get(f"fahrzeug_editor_{st.session_state['fahrzeugflotte_version']}")
+    if not aenderungen:
+        return fahrzeugflotte
+    fahrzeugflotte = fahrzeugflotte.copy()
+    for zeile, werte in aenderungen.get('edited_rows', {}).items():
+        for spalte, wert in werte.items():
+            fahrzeugflotte.iat[int(zeile), fahrzeugflotte.columns.get_loc(spalte)] = wert
+    if aenderungen.get('deleted_rows'):
+        fahrzeugflotte = fahrzeugflotte.drop(fahrzeugflotte.index[aenderungen['deleted_rows']])
+    for zeile in aenderungen.get('added_rows', []):
+        fahrzeugflotte = append_vehicle(fahrzeugflotte, zeile.get('Fahrzeugtyp', ''), {spalte: wert for spalte, wert in zeile.items() if wert is not None})
+    return fahrzeugflotte.reset_index(drop=True)
+
+# Funktion zum Speichern einer neuen Fahrzeugflotte (setzt die Tabelle mit den neuen Daten zurück)
+def update_fleet(fahrzeugflotte):
+    st.session_state['fahrzeugflotte'] = fahrzeugflotte
+    st.session_state['fahrzeugflotte_version'] += 1
+
+# Funktion zur Validierung der Eingaben
+def validate_input(text):
+    return text.isdigit()
+
+def validate_input_int(text):
+    try:
+        value = int(text)
+        return 0 <= value <= 100
+    except ValueError:
+        return False
+
+# Funktion zur Darstellung der Allgemeinen Informationen
+# Funktion zur Darstellung der Allgemeinen Informationen
+def show_general_info():
+    with st.expander("**1.1 Allgemeine Informationen**"):
+        st.info("**Hinweis:** Bitte geben Sie zunächst allgemeine Informationen zum Ridepooling-System an. Bitte berücksichtigen Sie den Betrachtungszeitraum, auf welchen sich die folgenden Angaben beziehen.")
+        name_ridepooling_system = st.text_input("Name des Ridepooling-Systems:", eingabe_wert('name_ridepooling_system', ""), key=widget_key('name'))
+        start_date = st.date_input("Beginn Betrachtungszeitraum:", eingabe_wert('start_date', date(2022, 1, 1)), key=widget_key('start_date'))
+        end_date = st.date_input("Ende Betrachtungszeitraum:", eingabe_wert('end_date', date(2022, 12, 31)), key=widget_key('end_date'))
+
+        get_zustand().eingaben.update({
+            'name_ridepooling_system': name_ridepooling_system,
+            'start_date': start_date,
+            'end_date': end_date
+        })
+        # Das Startdatum muss vor dem Enddatum liegen
+        if start_date > end_date:
+            st.error("Das Startdatum muss vor dem Enddatum liegen.")
+        # Weder Start-Datum noch End-Datum dürfen in der Zukunft liegen
+        elif end_date > date.today():
+            st.error("Das Enddatum darf nicht in der Zukunft liegen.")
+        else:
+            get_zustand().eingaben.update({
+                'name_ridepooling_system': name_ridepooling_system,
+                'start_date': start_date,
+                'end_date': end_date
+            })
+    
+
+
+# Funktion zur Darstellung der Systemleistungs-Sektion
+def show_system_performance():
+    with st.expander("**1.2 Beförderungsleistung**"):
+        st.info("**Hinweis:** Bitte geben Sie die Beförderungsleistung des Ridepooling-Systems an. Hierzu zählen die Anzahl der abgeschlossenen Buchungen und die Anzahl der transportierten Fahrgäste im Betrachtungszeitraum. Optional können Sie auch ein Ridepooling-System auswählen, um vorausgefüllte Daten zu erhalten.")
+        
+        # Daten für das Dropdown-Menü
+        ridepooling_data = get_referenzdaten()['ridepooling_systeme']
+
+        # Dropdown-Menü zum Auswählen des Ridepooling-Systems
+        systeme = list(ridepooling_data.keys())
+        gespeichertes_system = eingabe_wert('selected_system', None)
+        selected_system = st.selectbox('Wählen Sie ein Ridepooling-System (Optional):', systeme,
+                                       index=systeme.index(gespeichertes_system) if gespeichertes_system in systeme else 0, key=widget_key('selected_system'))
+
+        # Eingabefelder mit vorausgefüllten Daten basierend auf der Auswahl (bzw. dem geladenen Szenario)
+        buchungen = ridepooling_data[selected_system]["Fahrten"]
+        fahrgaeste = ridepooling_data[selected_system]["Transportierte Fahrgäste"]
+        if selected_system == gespeichertes_system:
+            buchungen = eingabe_wert('abgeschlossene_buchungen', buchungen)
+            fahrgaeste = eingabe_wert('transportierte_fahrgaeste', fahrgaeste)
+        abgeschlossene_buchungen = st.number_input("Abgeschlossene Buchungen im Betrachtungszeitraum:", value=buchungen, min_value=0, step=0, key=widget_key('buchungen', selected_system))
+        transportierte_fahrgaeste = st.number_input("Transportierte Fahrgäste im Betrachtungszeitraum:", value=fahrgaeste, min_value=0, step=0, key=widget_key('fahrgaeste', selected_system))
+
+        # Speichern der Eingaben im Sitzungszustand
+        get_zustand().eingaben.update({
+            'selected_system': selected_system,
+            'abgeschlossene_buchungen': abgeschlossene_buchungen,
+            'transportierte_fahrgaeste': transportierte_fahrgaeste
+        })
+
+# Funktion zur Darstellung der Fahrzeugflotten- und Fahrtleistungs-Sektion
+# Beim Zuklappen von Abschnitt 1.3 werden die Änderungen aus der Fahrzeugtabelle übernommen, da die Tabelle
+# im zugeklappten Zustand nicht angezeigt wird und ihr Zustand sonst verloren ginge
+def commit_fleet_edits():
+    if not st.session_state.get('abschnitt_1_3'):
+        update_fleet(current_fleet())
+
+def show_vehicle_fleet_performance():
+    abschnitt = lazy_expander("**1.3 Fahrzeugflotte & Fahrtleistung**", key='abschnitt_1_3', on_change=commit_fleet_edits)
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        # Vordefinierte Fahrzeugtypen und deren Verbrauchsdaten
+        vehicle_types = get_referenzdaten()['fahrzeugtypen']
+
+        # Initialisierung der Fahrzeugtabelle im Session State, falls noch nicht vorhanden
+        initialize_session_state()
+
+        # Fahrzeugdaten durch Nutzereingaben modifizieren
+        with st.container():
+            st.info("**Hinweis:** Bitte geben Sie an, welche Fahrzeugtypen in Ihrer Flotte vorhanden sind. Bitte geben Sie für jeden Fahrzeugtyp die gefahrenen Kilometerleistungen (leer, besetzt) flottenbezogen an. Bitte beziehen Sie sich auf den Betrachtungszeitraum. Die vorgegebenen Verbrauchsdaten beziehen sich auf die WLTP-Methode (Deutsche Automobil Treuhand GmbH, Leitfaden CO2eq (2022)). Passen Sie ggf. Verbrauchsdaten an. Klicken Sie anschließend auf 'Daten übernehmen & berechnen'. Sie können andere Fahrzeugtypen abbilden, indem Sie ein leeres Feld auswählen und die entsprechenden Kilometer- & Verbrauchsdaten eingeben.")
+
+        with st.form("vehicle_form", clear_on_submit=True):
+            new_vehicle_type = st.selectbox("Wählen Sie einen Fahrzeugtyp", list(vehicle_types.keys()))
+            add_vehicle = st.form_submit_button("Fahrzeug hinzufügen")
+        if add_vehicle:
+            data = vehicle_types.get(new_vehicle_type, {})
+            update_fleet(append_vehicle(current_fleet(), new_vehicle_type, data))
+
+        # Import einer ganzen Fahrzeugflotte (Spalten: Fahrzeugtyp, Verbrauchsdaten, Kilometer leer, Kilometer besetzt)
+        fleet_file = st.file_uploader("Fahrzeugflotte importieren (CSV, Parquet oder Excel):", type=['csv', 'parquet', 'xlsx', 'xls'])
+        st.caption("Erforderliche Spalten: Fahrzeugtyp, Kilometer leer, Kilometer besetzt. Fehlende Verbrauchsdaten (Benzinverbrauch (l/100km), Dieselverbrauch (l/100km), Stromverbrauch (kWh/100km)) werden für bekannte Fahrzeugtypen aus den WLTP-Daten ergänzt. Die importierte Flotte ersetzt die bisherigen Eingaben.")
+        if fleet_file is not None and st.session_state.get('fahrzeugflotte_import') != fleet_file.file_id:
+            try:
+                update_fleet(read_fleet_file(fleet_file, fleet_file.name))
+                st.session_state['fahrzeugflotte_import'] = fleet_file.file_id
+            except ValueError as fehler:
+                st.error(str(fehler))
+
+        # Eine Tabelle für alle Fahrzeuge statt einzelner Eingabefelder je Fahrzeug
+        fahrzeugflotte = st.data_editor(
+            st.session_state['fahrzeugflotte'],
+            key=f"fahrzeug_editor_{st.session_state['fahrzeugflotte_version']}",
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={spalte: st.column_config.NumberColumn(spalte, min_value=0.0, default=0.0) for spalte in verbrauch_spalten + kilometer_spalten},
+        )
+        fahrzeugflotte = fahrzeugflotte.fillna({spalte: 0.0 for spalte in verbrauch_spalten + kilometer_spalten}).fillna({'Fahrzeugtyp': ''})
+
+        if st.button('Letztes Fahrzeug entfernen'):
+            if len(fahrzeugflotte):
+                fahrzeugflotte = fahrzeugflotte.iloc[:-1].reset_index(drop=True)
+                update_fleet(fahrzeugflotte)
+                st.rerun()
+
+        # Berechne die Kilometer leer und besetzt für die gesamte Flotte
+        fahrzeugkilometer_leer, fahrzeugkilometer_besetzt = calculate_fleet_km_table(fahrzeugflotte)
+
+        if st.button('Daten übernehmen & berechnen'):
+            try:
+                eingaben = get_zustand().eingaben
+                schluessel = fingerprint('flotte', fahrzeugflotte, eingaben['abgeschlossene_buchungen'], eingaben['transportierte_fahrgaeste'])
+                kennzahlen = memoize(get_session_cache(), schluessel + '_kennzahlen', calculate_fleet_performance,
+                                     fahrzeugkilometer_leer, fahrzeugkilometer_besetzt,
+                                     eingaben['abgeschlossene_buchungen'], eingaben['transportierte_fahrgaeste'])
+                verbrauch = memoize(get_session_cache(), schluessel + '_verbrauch', calculate_fleet_consumption_table, fahrzeugflotte)
+                fahrzeugkilometer_leer = kennzahlen['fahrzeugkilometer_leer']
+                fahrzeugkilometer_besetzt = kennzahlen['fahrzeugkilometer_besetzt']
+                fahrzeugkilometer_gesamt = kennzahlen['fahrzeugkilometer_gesamt']
+                durchschnittliche_fahrtdistanz_mit_lk = kennzahlen['durchschnittliche_fahrtdistanz_mit_lk']
+                durchschnittliche_fahrtdistanz_mit_bk = kennzahlen['durchschnittliche_fahrtdistanz_mit_bk']
+                personenkilometer_gefahren = kennzahlen['personenkilometer_gefahren']
+                leerkilometeranteil = kennzahlen['leerkilometeranteil']
+                buendelungsquote = kennzahlen['buendelungsquote']
+                besetzungsquote = kennzahlen['besetzungsquote']
+                benzinverbrauch_gesamt = verbrauch['benzinverbrauch_gesamt']
+                dieselverbrauch_gesamt = verbrauch['dieselverbrauch_gesamt']
+                stromverbrauch_gesamt = verbrauch['stromverbrauch_gesamt']
+
+                with st.container():
+                    
+                    st.write("**Fahrzeugleistung und -nutzung**")
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Kilometer (leer):")
+                    with col2:
+                        st.write(f"{fahrzeugkilometer_leer} km")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Kilometer (besetzt):")
+                    with col2:
+                        st.write(f"{fahrzeugkilometer_besetzt} km")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Fahrzeugkilometer (gesamt):")
+                    with col2:
+                        st.write(f"{fahrzeugkilometer_gesamt} km")
+
+                    st.write("**Durchschnittliche Fahrtdistanzen**")
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Durchschnittliche Fahrtdistanz je Buchung (einschl. Leerkilometer):")
+                    with col2:
+                        st.write(f"{durchschnittliche_fahrtdistanz_mit_lk} km")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Durchschnittliche Fahrtdistanz je Buchung (mit Fahrgast):")
+                    with col2:
+                        st.write(f"{durchschnittliche_fahrtdistanz_mit_bk} km")
+
+                    st.write("**Personenkilometer**")
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Personenkilometer (gefahren):")
+                    with col2:
+                        st.write(f"{personenkilometer_gefahren} km")
+
+                    st.write("**Leistungs-Kennzahlen**")
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Leerkilometeranteil:")
+                    with col2:
+                        st.write(f"{leerkilometeranteil} %")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Bündelungsquote (nach § 50 Absatz 3 PBefG):")
+                    with col2:
+                        st.write(f"{buendelungsquote:.2f}")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Besetzungsquote (nach H Kripoo, 2021)")
+                    with col2:
+                        st.write(f"{besetzungsquote}")
+
+                    st.write("**Verbrauchsdaten Fahrzeugflotte**")
+                    
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Benzinverbrauch des Ridepooling-Systems:")
+                    with col2:
+                        st.write(f"{benzinverbrauch_gesamt:.2f} l")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Dieselverbrauch des Ridepooling-Systems:")
+                    with col2:
+                        st.write(f"{dieselverbrauch_gesamt:.2f} l")
+
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write("Stromverbrauch des Ridepooling-Systems:")
+                    with col2:
+                        st.write(f"{stromverbrauch_gesamt:.2f} kWh")
+
+                # Speichern der berechneten Werte im Sitzungszustand
+                get_zustand().uebernehmen({**kennzahlen, **verbrauch})
+
+                st.info("""
+                    **Hinweis:**
+                    Die folgenden Formeln wurden zur Berechnung der Fahrzeugflotten- und Fahrtleistungsdaten verwendet:
+                    - **Fahrzeugkilometer gesamt** = Kilometer leer + Kilometer besetzt
+                    - **Durchschnittliche Fahrtdistanz je Buchung (einschl. Leerkilometer)** = Fahrzeugkilometer gesamt / Abgeschlossene Buchungen
+                    - **Durchschnittliche Fahrtdistanz je Buchung (ohne Leerkilometer)** = Kilometer besetzt / Abgeschlossene Buchungen
+                    - **Personenkilometer gefahren** = (Kilometer besetzt / Abgeschlossene Buchungen) * Transportierte Fahrgäste      
+                    - **Leerkilometeranteil** = Kilometer leer / Fahrzeugkilometer gesamt
+                    - **Bündelungsquote (nach § 50 Absatz 3 PBefG)** = Personenkilometer gefahren / Fahrzeugkilometer gesamt
+                    - **Besetzungsquote (nach H Kripoo, 2021)** = Personenkilometer / Kilometer besetzt
+                    - **Benzinverbrauch des Ridepooling-Systems** = Σ (Benzinverbrauch * (Kilometer besetzt + Kilometer leer) / 100)
+                    - **Dieselverbrauch des Ridepooling-Systems** = Σ (Dieselverbrauch * (Kilometer besetzt + Kilometer leer) / 100)
+                    - **Stromverbrauch des Ridepooling-Systems** = Σ (Stromverbrauch * (Kilometer besetzt + Kilometer leer) / 100)
+                   
+                """)
+
+            except ValueError:
+                st.error("Bitte geben Sie gültige Zahlenwerte ein.")
+            
+
+# Funktion zum Einlesen der stündlichen Emissionszeitreihe (einmal je hochgeladener Datei)
+def load_strom_intensitaet(datei_id, datei):
+    return memoize(get_upload_cache(), fingerprint('strom_intensitaet', datei_id), load_grid_intensity, datei)
+
+# Funktion zum Aufbau der kumulierten Emissionszeitreihe über die gesamte Datei (einmal je Datei und Ladeprofil)
+# Betrachtungszeitraum und Strombedarf der Flotte werden erst bei der Abfrage angegeben, sodass ein geänderter
+# Zeitraum oder eine geänderte Flotte die Reihe nicht neu aufbaut.
+def load_strom_emissionsreihe(datei_id, datei, ladeprofil):
+    def aufbauen():
+        beginn, intensitaet = load_strom_intensitaet(datei_id, datei)
+        return StromEmissionsreihe(beginn, intensitaet, charging_profiles_from_daily(ladeprofile[ladeprofil], len(intensitaet), beginn))
+    return memoize(get_upload_cache(), fingerprint('strom_emissionsreihe', datei_id, ladeprofil), aufbauen)
+
+# Funktion zur Berechnung des Strombedarfs je Fahrzeug der Flotte aus Abschnitt 1.3 (kWh im Betrachtungszeitraum)
+def vehicle_strom_consumption(fahrzeugflotte):
+    kilometer = fahrzeugflotte['Kilometer leer'].to_numpy(dtype=np.float64) + fahrzeugflotte['Kilometer besetzt'].to_numpy(dtype=np.float64)
+    return fahrzeugflotte['Stromverbrauch (kWh/100km)'].to_numpy(dtype=np.float64) * kilometer / 100
+
+# Funktion zur Bestimmung des effektiven CO2eq-Emissionsfaktors für Strom aus einer stündlichen Zeitreihe
+# Der Faktor ist der mit dem Strombedarf je Fahrzeug gewichtete Mittelwert. Rückgabe: Emissionsreihe und Faktor
+# (g/kWh), None ohne gültige Zeitreihe für den Betrachtungszeitraum.
+def show_hourly_strom_emissionsdaten():
+    intensitaet_datei = st.file_uploader("Stündliche CO2eq-Emissionsdaten des Stromnetzes (CSV oder Parquet, Spalten: Zeitpunkt, CO2eq (g/kWh)):", type=['csv', 'parquet'])
+    ladeprofil_optionen = list(ladeprofile.keys())
+    ladeprofil = st.selectbox("Ladeprofil der Fahrzeugflotte:", ladeprofil_optionen, index=auswahl_index(ladeprofil_optionen, 'ladeprofil'), key=widget_key('ladeprofil'))
+    get_zustand().eingaben.update(ladeprofil=ladeprofil)
+    if intensitaet_datei is None:
+        st.warning("Bitte laden Sie eine Datei mit stündlichen Emissionsdaten hoch.")
+        return None
+    start_date = eingabe_wert('start_date', date(2022, 1, 1))
+    end_date = eingabe_wert('end_date', date(2022, 12, 31))
+    stromverbrauch = vehicle_strom_consumption(current_fleet())
+    try:
+        reihe = load_strom_emissionsreihe(intensitaet_datei.file_id, intensitaet_datei, ladeprofil)
+        # Gewichteter Mittelwert über den Betrachtungszeitraum (Abschnitt 1.1); ohne Strombedarf der Flotte (noch keine
+        # Fahrzeuge oder nur Verbrenner) gilt der Faktor des Ladeprofils
+        faktor = round(reihe.effective_factor(start_date, end_date, stromverbrauch if stromverbrauch.sum() > 0 else None), 1)
+    except ValueError as fehler:
+        st.error(str(fehler))
+        return None
+    if not reihe.covers(start_date, end_date):
+        st.warning(f"Die Emissionszeitreihe ({np.datetime_as_string(reihe.beginn, unit='D')} bis {np.datetime_as_string(reihe.ende, unit='D')}) deckt den Betrachtungszeitraum nur teilweise ab. Der Strombedarf wird auf die abgedeckten Tage verteilt.")
+    return reihe, faktor
+
+# Funktion zur Anzeige der Stromemissionen je Fahrzeug (Skalarprodukt aus Ladeprofil und stündlicher Emissionsintensität)
+def show_vehicle_strom_emissionen(reihe, oekostrom_anteil, pv_emissionsdaten):
+    fahrzeugflotte = current_fleet()
+    stromverbrauch = vehicle_strom_consumption(fahrzeugflotte)
+    if not len(fahrzeugflotte) or not stromverbrauch.sum() > 0:
+        return
+    start_date = eingabe_wert('start_date', date(2022, 1, 1))
+    end_date = eingabe_wert('end_date', date(2022, 12, 31))
+    energie, emissionen = reihe.query(start_date, end_date, stromverbrauch)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        faktoren = np.where(energie > 0, emissionen * 1000 / energie, np.nan)
+    st.dataframe(pd.DataFrame({
+        'Fahrzeugtyp': fahrzeugflotte['Fahrzeugtyp'].to_numpy(),
+        'Stromverbrauch (kWh)': energie,
+        'Emissionsfaktor Netz (g/kWh)': faktoren,
+        'CO2eq-Emissionen Strom (kg)': calculate_strom_emissionen(reihe, start_date, end_date, stromverbrauch, oekostrom_anteil, pv_emissionsdaten),
+    }).round(2), hide_index=True)
+    st.caption("Vereinfachung: Alle Fahrzeuge laden nach demselben Tagesprofil. Der Emissionsfaktor ist daher für alle Fahrzeuge gleich; "
+               "die Emissionen unterscheiden sich nur über den Strombedarf. Fahrzeugspezifische Ladeprofile sind im Berechnungskern "
+               "(oekorps.stromprofil) möglich.")
+
+# Funktion zur Bestimmung der vorausgewählten Option einer Auswahlliste (aus dem geladenen Szenario)
+def auswahl_index(optionen, key):
+    auswahl = eingabe_wert(key, None)
+    return optionen.index(auswahl) if auswahl in optionen else 0
+
+def show_emissions_data():
+    with st.expander("**1.4 Emissionsdaten**"):
+        emissionsfaktoren = get_referenzdaten()['emissionsfaktoren']
+        benzin_emissionsfaktoren = emissionsfaktoren['benzin']
+        diesel_emissionsfaktoren = emissionsfaktoren['diesel']
+        strom_emissionsfaktoren = emissionsfaktoren['strom']
+        st.info("**Hinweis:** Bitte geben Sie die CO2eq-Emissionsdaten für Benzin, Diesel und Strom an. Sie können vorausgewählte Optionen wählen oder eigene Angaben tätigen. Optional können Sie auch den Anteil an selbst erzeugtem Strom aus Photovoltaikanlagen angeben, um den adjustierten CO2eq-Emissionsfaktor für Strom zu berechnen. Bitte berücksichtigen Sie die Betrachtungsweise/Analyseprinzip. Dieses Programm nutzt die Well-to-Wheel-Betrachtung (WTW).")
+
+        # CO2eq-Emissionsdaten (Benzin)
+        benzin_optionen = list(benzin_emissionsfaktoren.keys()) + ["Eigene Angaben"]
+        benzin_emissionsdaten_auswahl = st.selectbox("CO2eq-Emissionsdaten (Benzin):", benzin_optionen,
+                                                      index=auswahl_index(benzin_optionen, 'benzin_emissionsdaten_auswahl'), key=widget_key('benzin_auswahl'))
+        if benzin_emissionsdaten_auswahl in benzin_emissionsfaktoren:
+            benzin_emissionsdaten = benzin_emissionsfaktoren[benzin_emissionsdaten_auswahl]  # g/l
+        else:  # Eigene Angaben
+            benzin_emissionsdaten = st.number_input("Geben Sie die CO2-Emissionsdaten (Benzin) [g/l] ein:", value=int(eingabe_wert('benzin_emissionsdaten', 0)), min_value=0, step=1, key=widget_key('benzin'))
+
+        # CO2eq-Emissionsdaten (Diesel)
+        diesel_optionen = list(diesel_emissionsfaktoren.keys()) + ["Eigene Angaben"]
+        diesel_emissionsdaten_auswahl = st.selectbox("CO2eq-Emissionsdaten (Diesel):", diesel_optionen,
+                                                      index=auswahl_index(diesel_optionen, 'diesel_emissionsdaten_auswahl'), key=widget_key('diesel_auswahl'))
+        if diesel_emissionsdaten_auswahl in diesel_emissionsfaktoren:
+            diesel_emissionsdaten = diesel_emissionsfaktoren[diesel_emissionsdaten_auswahl]  # g/l
+        else:  # Eigene Angaben
+            diesel_emissionsdaten = st.number_input("Geben Sie die CO2-Emissionsdaten (Diesel) [g/l] ein:", value=int(eingabe_wert('diesel_emissionsdaten', 0)), min_value=0, step=1, key=widget_key('diesel'))
+
+
+        # CO2eq-Emissionsdaten (Strom)
+        strom_reihe = None
+        strom_optionen = list(strom_emissionsfaktoren.keys()) + [zeitaufgeloest, "Eigene Angaben"]
+        strom_emissionsdaten_auswahl = st.selectbox("CO2eq-Emissionsdaten (Strom):", strom_optionen,
+                                                     index=auswahl_index(strom_optionen, 'strom_emissionsdaten_auswahl'), key=widget_key('strom_auswahl'))
+        if strom_emissionsdaten_auswahl in strom_emissionsfaktoren:
+            strom_emissionsdaten = strom_emissionsfaktoren[strom_emissionsdaten_auswahl]  # g/kWh
+        elif strom_emissionsdaten_auswahl == zeitaufgeloest:
+            strom_zeitreihe = show_hourly_strom_emissionsdaten()
+            if strom_zeitreihe is not None:
+                strom_reihe, strom_emissionsdaten = strom_zeitreihe
+            else:
+                # Ohne gültige Zeitreihe gilt der jährliche Emissionsfaktor (erster Eintrag der Referenzdaten)
+                jahreswert = next(iter(strom_emissionsfaktoren))
+                strom_emissionsdaten = strom_emissionsfaktoren[jahreswert]
+                st.info(f"Es wird der jährliche Emissionsfaktor verwendet: {jahreswert} ({strom_emissionsdaten} g/kWh).")
+        else:  # Eigene Angaben
+            strom_emissionsdaten = st.number_input("Geben Sie die CO2-Emissionsdaten (Strom) [g CO2eq/kWh] ein:", value=int(round(eingabe_wert('strom_emissionsdaten_netz', 0))), min_value=0, step=1, key=widget_key('strom'))
+        strom_emissionsdaten_netz = strom_emissionsdaten
+
+        # Anteil an selbst erzeugtem Strom aus Photovoltaikanlagen
+        oekostrom_anteil = st.slider("Anteil des selbst erzeugten Stroms aus Photovoltaikanlagen [%]:", min_value=0, max_value=100, value=eingabe_wert('oekostrom_anteil', 0), step=1, key=widget_key('oekostrom_anteil'))
+        pv_emissionsdaten = st.number_input("Geben Sie die CO2eq-Emissionsdaten für selbst erzeugten Strom aus Photovoltaikanlagen [g/kWh] ein:", value=float(eingabe_wert('pv_emissionsdaten', emissionsfaktoren['pv'])), min_value=0.0, format='%.1f', step=0.1, key=widget_key('pv'))
+
+        # Berechnung des adjustierten CO2eq-Emissionsfaktors für Strom
+        strom_emissionsdaten = calculate_adjusted_strom_emissionsdaten(strom_emissionsdaten, oekostrom_anteil, pv_emissionsdaten)
+        if strom_reihe is not None:
+            show_vehicle_strom_emissionen(strom_reihe, oekostrom_anteil, pv_emissionsdaten)
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"**CO2eq-Emissionsdaten (Benzin) ausgewählt:**")
+        with col2:
+            st.write(f"**{benzin_emissionsdaten} g/l**")
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"**CO2eq-Emissionsdaten (Diesel) ausgewählt:**")
+        with col2:
+            st.write(f"**{diesel_emissionsdaten} g/l**")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"**Adjustierter CO2eq-Emissionsdaten (Strom) basierend auf {oekostrom_anteil}% selbst erzeugtem Strom aus Photovoltaikanlagen:**")
+        with col2:
+            st.write(f"**{strom_emissionsdaten} g/kWh**")
+
+        st.info("Die Daten für den CO2eq-Wert aus Photovoltaikanlagen stammen von: [Electricity Maps](https://app.electricitymaps.com/zone/DE)")
+
+        # Speichern der Eingaben im Sitzungszustand
+        get_zustand().eingaben.update({
+            'benzin_emissionsdaten_auswahl': benzin_emissionsdaten_auswahl,
+            'diesel_emissionsdaten_auswahl': diesel_emissionsdaten_auswahl,
+            'strom_emissionsdaten_auswahl': strom_emissionsdaten_auswahl,
+            'strom_emissionsdaten_netz': strom_emissionsdaten_netz,
+            'benzin_emissionsdaten': benzin_emissionsdaten,
+            'diesel_emissionsdaten': diesel_emissionsdaten,
+            'strom_emissionsdaten': strom_emissionsdaten,
+            'oekostrom_anteil': oekostrom_anteil,
+            'pv_emissionsdaten': pv_emissionsdaten
+        })
+
+def show_environmental_impact_calculation():
+    abschnitt = lazy_expander("**1.5 Berechnung Umweltwirkung Ridepooling-System**", key='abschnitt_1_5')
+
+    # Stellen Sie sicher, dass alle erforderlichen Werte vorhanden sind, bevor Sie fortfahren
+    zustand = get_zustand()
+    missing_keys = zustand.ergebnisse.fehlende(['fahrzeugkilometer_gesamt'] + umweltwirkung_kennzahlen) + [key for key in umweltwirkung_eingaben if key not in zustand.eingaben]
+    if not missing_keys:
+        # Berechnung der Umweltwirkung aus den Werten im Sitzungszustand; neu berechnet wird nur, wenn sich
+        # Verbrauch, Personenkilometer oder Emissionsdaten seit der letzten Berechnung geändert haben.
+        # Die Werte werden auch bei zugeklapptem Abschnitt berechnet, da Kapitel 3 sie verwendet
+        eingaben = [zustand.ergebnisse[key] for key in umweltwirkung_kennzahlen] + [zustand.eingaben[key] for key in umweltwirkung_eingaben]
+        umweltwirkung = zustand.berechnen('umweltwirkung', zustand.stand(umweltwirkung_eingaben, umweltwirkung_kennzahlen), calculate_environmental_impact, *eingaben)
+
+        # Speichern der berechneten Werte im Sitzungszustand
+        zustand.uebernehmen(umweltwirkung)
+
+    # Diagramm und Ausgaben nur bei aufgeklapptem Abschnitt
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        st.info("**Hinweis:** Im Folgenden ist die Umweltwirkung des Ridepooling-Systems dargestellt. In der Abbildung wird der spezifische CO2-Ausstoß des Ridepooling-Systems denen anderer Verkehrsmittel gegenübergestellt. Die Daten der anderen Verkehrsmittel stammen vom Umweltbundesamt, Umweltfreundlich mobil! (2022).")
+
+        if missing_keys:
+            st.error(f"Die folgenden Schlüssel fehlen: {', '.join(missing_keys)}")
+        else:
+            CO2eq_emissionen_gesamt_rps = umweltwirkung['CO2eq_emissionen_gesamt_rps']
+            CO2eq_emissionen_pro_personenkilometer_rps_g = umweltwirkung['CO2eq_emissionen_pro_personenkilometer_rps_g']
+
+            # Emissionen pro pkm für verschiedene Verkehrsträger
+            emissionen_data = {zustand.eingaben.get('name_ridepooling_system', ""): CO2eq_emissionen_pro_personenkilometer_rps_g}
+            emissionen_data.update(get_referenzdaten()['verkehrsmittel'])
+
+            # Erstellung des ersten Diagramms
+            fig1 = memoize(get_session_cache(), fingerprint('fig1', emissionen_data), build_emissions_figure, emissionen_data)
+            st.plotly_chart(fig1)
+
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**Gesamte CO2eq-Emissionen des Ridepooling-Systems:**")
+            with col2:
+                st.write(f"**{CO2eq_emissionen_gesamt_rps:.2f} kg CO2e**")
+
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**CO2eq-Emissionen pro Personenkilometer:**")
+            with col2:
+                st.write(f"**{CO2eq_emissionen_pro_personenkilometer_rps_g:.2f} g CO2e/pkm**")
+
+################################################################ Berechnung Bus ################################################################
+
+# Part 1: Calculate Platzausnutzung
+def show_bus_occupancy_calculation():
+    abschnitt = lazy_expander('**2.1 Berechnung der durchschnittlichen Platzausnutzung des Bus-Systems**', key='abschnitt_2_1')
+    if not abschnitt.open:
+        # Ergebnis aus den zuletzt eingegebenen Werten, ohne den Abschnitt darzustellen
+        return calculate_platzausnutzung(eingabe_wert('bus_personen_km', 24311.0), eingabe_wert('bus_nutzwagen_km', 1658.0) * eingabe_wert('bus_platzangebot', 78.5186))
+    with abschnitt:
+        st.info("**Hinweis:** Die vorausgefüllten Daten beziehen sich auf die durchschnittliche Platzausnutzung im deutschen Durchschnitt (VDV Statistik 2022). Sie können die durchschnittliche Platzausnutzung spezifisch für Ihr Bussystem berechnen. Sie können den errechneten Wert im folgenden Schritt einsetzen, um einen Vergleich der CO2eq-Emissionen zu erhalten.")
+        # Eingabefelder für Personen- und Platzkilometer
+        
+        Nutzwagen_km = st.number_input("Nutzwagenkilometer [Mio.]", min_value=0.0, value=eingabe_wert('bus_nutzwagen_km', 1658.0), step=0.1, format="%.1f", key=widget_key('nutzwagen_km'))
+        st.caption("Anzahl der Kilometer im Linienverkehr zurückgelegten Produktivkilometer. Dazu kommen dann noch die Leerkilometer (Einsatzfahrten etc.), die die Verkehrsleistung des Unternehmens beschreiben (Glossar des Nahverkehrs, RVM 2024)")
+        
+        Platzangebot= st.number_input("Platzangebot (Sitz- und Stehplätze) der einzelnen Fahrzeuge", min_value=0.0, value=eingabe_wert('bus_platzangebot', 78.5186), step=0.1, format="%.2f", key=widget_key('platzangebot'))
+        st.caption("Anzahl der durchschnittlichen Sitz- und Stehplätze der einzelnen Fahrzeuge.")
+
+        personen_km = st.number_input("Personenkilometer [Mio.]", min_value=0.0, value=eingabe_wert('bus_personen_km', 24311.0), step=0.1, format="%.1f", key=widget_key('personen_km'))
+        st.caption("Produkt aus beförderten Personen und der zurückgelegten Entfernung in Kilometern.")
+
+        # Speichern der Eingaben, damit sie beim Zuklappen des Abschnitts erhalten bleiben
+        get_zustand().eingaben.update({
+            'bus_nutzwagen_km': Nutzwagen_km,
+            'bus_platzangebot': Platzangebot,
+            'bus_personen_km': personen_km
+        })
+        
+        # Berechnung der Platzkilometer
+        platz_km = Nutzwagen_km * Platzangebot
+        col1, col2 = st.columns([3, 1])
+        # Anzeige der berechneten Platzkilometer
+        with col1:
+            st.write("**Berechnete Platzkilometer [Mio.]:**")
+        with col2:
+            st.write(f"{platz_km:.2f}")
+
+        st.caption("Produkt aus Nutzwagenkilometer und Platzangebot (Sitz- und Stehplätze) jeweils der einzelnen Fahrzeuge (Berechnung nach VDV-Richtlinien von 1990).")
+
+        # Berechnung der Platzausnutzung
+        calculated_occupancy = calculate_platzausnutzung(personen_km, platz_km)
+        col1, col2 = st.columns([3, 1])
+        # Anzeige der berechneten durchschnittlichen Platzausnutzung
+        with col1:
+            st.write("**Berechnete durchschnittliche Platzausnutzung:**")
+        with col2:
+            st.write(f"{calculated_occupancy:.2f}%")
+        st.caption("Berechnet als (Personenkilometer / Platzkilometer) * 100.")
+
+        # Erklärung der Berechnungen
+        st.info("""
+        **Berechnungen:**
+        - **Personenkilometer**: Das Produkt aus beförderten Personen und der zurückgelegten Entfernung in Kilometern.
+        - **Platzkilometer**: Das Produkt aus Nutzwagenkilometern und der Platzangebot (Sitz- und Stehplätze) der einzelnen Fahrzeuge.
+        - **Durchschnittliche Platzausnutzung**: Wird berechnet als (Personenkilometer / Platzkilometer) * 100.
+        - **CO2eq-Ausstoß (WTW)**: Basierend auf der durchschnittlichen Platzausnutzung in Deutschland (18.7 %, VDV Statistik 2022), wird der CO2eq-Wert (80.54 g CO2eq/Pkm, Umweltfreundlich mobil! Umweltbundesamt, 2021) auf Basis der WTW-Betrachtung angepasst.
+        """)
+    return calculated_occupancy
+
+# Part 2: Adjust Platzausnutzung and calculate CO2e emissions
+def show_bus_occupancy_adjustment():
+    with st.expander('**2.2 Anpassung der Platzausnutzung und CO2eq-Emissionen**'):
+        st.info("**Hinweis:** Passen Sie die durchschnittliche Platzausnutzung Ihres Bussystems an, um den neuen CO2eq-Wert zu berechnen. Dieser angepasste CO2eq-Wert wird anschließend mit dem CO2eq-Ausstoß des Ridepooling-Systems verglichen. Voreingestellt sind die bundesweiten Werte, welche bei der Berechnung des Umweltbundesamtes ('umweltfreundlich mobil!', 2022) hinterlegt sind.")
+        initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+        adjusted_occupancy = st.slider("Angepasste durchschnittliche Platzausnutzung (%)", min_value=0.1, max_value=100.0, value=float(eingabe_wert('adjusted_occupancy', initial_occupancy)), step=0.1, key=widget_key('adjusted_occupancy'))
+        st.caption("Passen Sie die durchschnittliche Platzausnutzung an, um den neuen CO2eq-Wert zu berechnen.")
+
+        # Berechnung des neuen CO2eq-Wertes basierend auf der angepassten Platzausnutzung
+        new_CO2eq_wtw = calculate_new_CO2eq_wtw(initial_CO2eq_wtw, initial_occupancy, adjusted_occupancy)
+
+        # Erstelle zwei Spalten für die Anzeige
+        col1, col2 = st.columns([3, 1])
+
+        # Anzeige des angepassten CO2eq-Ausstoßes
+        with col1:
+            st.write(f"**Angepasster CO2eq-Ausstoß (WTW) bei {adjusted_occupancy:.2f}% Platzausnutzung:**")
+        with col2:
+            st.write(f"{new_CO2eq_wtw:.2f} g CO2eq/Pkm")
+
+        get_zustand().eingaben.update({'adjusted_occupancy': adjusted_occupancy})
+        get_zustand().uebernehmen({'new_CO2eq_wtw': new_CO2eq_wtw})
+    return adjusted_occupancy, new_CO2eq_wtw
+
+# Funktion zur Berechnung der Busflotte (Zeilen je Linie/Fahrzeugklasse, Summen der Flotte)
+def calculate_bus_fleet_results(tabelle, diesel_emissionsdaten, strom_emissionsdaten, platzausnutzung):
+    ergebnis = calculate_bus_fleet(read_bus_fleet(tabelle), diesel_emissionsdaten, strom_emissionsdaten, platzausnutzung)
+    return ergebnis, bus_fleet_totals(ergebnis)
+
+# Funktion zum Speichern einer neuen Busflotte (setzt die Tabelle mit den neuen Daten zurück)
+def update_bus_fleet(busflotte):
+    st.session_state['busflotte'] = busflotte
+    st.session_state['busflotte_version'] = st.session_state.get('busflotte_version', 0) + 1
+
+# Beim Zuklappen von Abschnitt 2.3 wird die zuletzt bearbeitete Tabelle gespeichert
+def commit_bus_fleet_edits():
+    if not st.session_state.get('abschnitt_2_3') and '_busflotte_tabelle' in st.session_state:
+        update_bus_fleet(st.session_state['_busflotte_tabelle'])
+
+# Part 3: Busflotte mit Fahrzeugmix (optional, ersetzt die Werte aus 2.2 im Vergleich)
+def show_bus_fleet(adjusted_occupancy):
+    abschnitt = lazy_expander('**2.3 Busflotte mit Fahrzeugmix (optional)**', key='abschnitt_2_3', on_change=commit_bus_fleet_edits)
+    eingaben = get_zustand().eingaben
+    if 'diesel_emissionsdaten' not in eingaben or 'strom_emissionsdaten_netz' not in eingaben:
+        if abschnitt.open:
+            with abschnitt:
+                st.error("Bitte geben Sie zunächst die Emissionsdaten in Abschnitt 1.4 an.")
+        return None
+    verwenden = eingabe_wert('busflotte_verwenden', False)
+    tabelle = st.session_state.get('busflotte', empty_bus_fleet())
+    if abschnitt.open:
+        with abschnitt:
+            st.info("**Hinweis:** Statt des Durchschnittswerts des Umweltbundesamts können die CO2eq-Emissionen des Busses aus Ihrer Busflotte berechnet werden. Geben Sie je Linie und/oder Fahrzeugklasse die Nutzwagenkilometer, den Bustyp und optional Platzangebot, Verbrauch und Personenkilometer an. Fehlende Angaben werden aus den Bustypen der Referenzdaten ergänzt, fehlende Personenkilometer mit der Platzausnutzung aus Abschnitt 2.2 berechnet. Es gelten die Emissionsdaten für Diesel und Strom aus Abschnitt 1.4.")
+            verwenden = st.checkbox("Busflotte für den Vergleich verwenden", value=verwenden, key=widget_key('busflotte_verwenden'))
+            eingaben.update({'busflotte_verwenden': verwenden})
+
+            busflotte_datei = st.file_uploader("Busflotte importieren (CSV, Parquet oder Excel):", type=['csv', 'parquet', 'xlsx', 'xls'])
+            st.caption(f"Erforderliche Spalte: Nutzwagenkilometer. Weitere Spalten: {', '.join(busflotten_spalten[:3] + busflotten_spalten[4:])}. Die importierte Busflotte ersetzt die bisherigen Eingaben.")
+            if busflotte_datei is not None and st.session_state.get('busflotte_import') != busflotte_datei.file_id:
+                try:
+                    update_bus_fleet(read_bus_fleet_file(busflotte_datei, busflotte_datei.name))
+                    st.session_state['busflotte_import'] = busflotte_datei.file_id
+                    tabelle = st.session_state['busflotte']
+                except ValueError as fehler:
+                    st.error(str(fehler))
+
+            bustypen = list(get_referenzdaten().get('bustypen', {}))
+            tabelle = st.data_editor(
+                tabelle,
+                key=f"busflotte_editor_{st.session_state.get('busflotte_version', 0)}",
+                num_rows="dynamic",
+                hide_index=True,
+                column_config={'Linie': st.column_config.TextColumn('Linie'),
+                               'Bustyp': st.column_config.SelectboxColumn('Bustyp', options=bustypen),
+                               'Energieträger': st.column_config.SelectboxColumn('Energieträger', options=['Diesel', 'Hybrid', 'Elektro']),
+                               **{spalte: st.column_config.NumberColumn(spalte, min_value=0.0) for spalte in busflotten_spalten[3:]}},
+            )
+            st.session_state['_busflotte_tabelle'] = tabelle
+    if len(tabelle) == 0 or not (verwenden or abschnitt.open):
+        return None
+
+    try:
+        ergebnis, summen = memoize(get_upload_cache(), fingerprint('busflotte', tabelle, eingaben['diesel_emissionsdaten'], eingaben['strom_emissionsdaten_netz'], adjusted_occupancy),
+                                   calculate_bus_fleet_results, tabelle, eingaben['diesel_emissionsdaten'], eingaben['strom_emissionsdaten_netz'], adjusted_occupancy)
+    except ValueError as fehler:
+        if abschnitt.open:
+            with abschnitt:
+                st.error(str(fehler))
+        return None
+    if summen['bus_personen_km_gesamt'] <= 0:
+        return None
+
+    if abschnitt.open:
+        with abschnitt:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write("**CO2eq-Emissionen der Busflotte:**")
+            with col2:
+                st.write(f"{summen['new_CO2eq_wtw']:.2f} g CO2eq/Pkm")
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write("**Platzausnutzung der Busflotte:**")
+            with col2:
+                st.write(f"{summen['adjusted_occupancy']:.2f}%")
+            st.caption("Berechnet als Summe der CO2eq-Emissionen (Verbrauch * Emissionsdaten) / Summe der Personenkilometer sowie (Personenkilometer / Platzkilometer) * 100 über alle Zeilen.")
+
+            nach = st.radio("Aufteilung nach:", ['Energieträger', 'Linie', 'Bustyp'], horizontal=True, key=widget_key('busflotte_nach'))
+            st.dataframe(aggregate_bus_fleet(ergebnis, nach), hide_index=True)
+    return summen if verwenden else None
+
+
+################################################################ Vergleich ################################################################
+
+def compare_emissions(new_CO2eq_wtw, adjusted_occupancy):
+    abschnitt = lazy_expander("**3.1 Vergleich der CO2eq-Emissionen von Bus und Ridepooling-System**", key='abschnitt_3_1')
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        zustand = get_zustand()
+        if 'CO2eq_emissionen_pro_personenkilometer_rps_g' not in zustand.ergebnisse:
+            st.error("CO2eq-Emissionen des Ridepooling-Systems sind nicht verfügbar.")
+            return
+        st.info("**Hinweis:** Im Folgenden wird der CO2eq-Ausstoß des Bus-Systems mit dem CO2eq-Ausstoß des Ridepooling-Systems verglichen. Die Daten für das Bus-System werden in Kapitel 2 berechnet, die des Ridepooling-Systems in Abschnitt 1.")
+        #Nimm den Namen des Ridepooling-Systems aus dem Sitzungszustand
+        name_ridepooling_system = zustand.eingaben.get('name_ridepooling_system', "")
+        CO2eq_emissionen_pro_personenkilometer_rps_g = zustand.ergebnisse['CO2eq_emissionen_pro_personenkilometer_rps_g']
+
+        # Erstellung des Diagramms
+        fig2 = memoize(get_session_cache(), fingerprint('fig2', name_ridepooling_system, CO2eq_emissionen_pro_personenkilometer_rps_g, new_CO2eq_wtw),
+                       build_comparison_figure, name_ridepooling_system, CO2eq_emissionen_pro_personenkilometer_rps_g, new_CO2eq_wtw)
+        st.plotly_chart(fig2)
+        # Erstelle zwei Spalten für jede Zeile
+        col1, col2 = st.columns([3, 1])  # Verhältnis 3:1 sorgt dafür, dass die linke Spalte breiter ist
+        
+        # Erste Zeile
+        with col1:
+            st.write("**CO2eq-Emissionen Bus (angepasst):**")
+        with col2:
+            st.write(f"{new_CO2eq_wtw:.2f} g CO2eq/Pkm")
+        
+        # Zweite Zeile
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write("**Platzausnutzung Bus (angepasst):**")
+        with col2:
+            st.write(f"{adjusted_occupancy:.2f}%")
+        
+        # Dritte Zeile
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write("**Prozentuale Differenz zur durchschnittlichen deutschen Platzausnutzung (18.7 %, VDV Statistik 2022):**")
+        with col2:
+            initial_occupancy = bus_referenz()[1]
+            st.write(f"{(adjusted_occupancy - initial_occupancy) / initial_occupancy * 100:.2f}%")
+        
+        # Vierte Zeile
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write("**CO2eq-Emissionen Ridepooling-System:**")
+        with col2:
+            st.write(f"{CO2eq_emissionen_pro_personenkilometer_rps_g:.2f} g CO2eq/Pkm")
+
+        st.info("""
+        **Anmerkungen:**
+        - Die Berechnung der CO2eq-Emissionen des Ridepooling-Systems berücksichtigt ausschließlich monomodale Fahrten. Zu- oder Abfahrtswege vor oder nach einer Ridepooling-Fahrt können nicht berücksichtigt werden.
+        - Die Umweltwirkung wird anhand der CO2eq-Emissionen bewertet. Andere Umweltkategorien (z.B. Luftschadstoffe, Lärm) werden zur Zeit nicht berücksichtigt.
+        - Eine Berücksichtigung von E-Busfahrzeugen geschieht zwar indirekt über die Emissionsdaten des Umweltbundesamt ('umweltfreundlich mobil!', 2022). Eine eigene Busflotte mit Fahrzeugmix kann in Abschnitt 2.3 angegeben werden.
+        - Die durchschnittliche Platzausnutzung gilt für den 24-Stunden-Betrieb (Umweltbundesamt, 'umweltfreundlich mobil!', 2022). Ein Vergleich je Stunde und Linie aus Fahrgastzähldaten ist in Abschnitt 3.4 möglich.
+        """)
+
+
+# Gitter der Parameterstudie in der App (Platzausnutzung x Besetzungsquote x Leerkilometeranteil). Das Standardgitter
+# aus sweep_axes (1000 x 1000 x 50) belegt mit Differenzgitter rund 190 MB je Cache-Eintrag, und jede Heatmap überträgt
+# 1 Mio. Zellen (rund 5 MB JSON je Durchlauf) an den Browser. 200 x 200 Punkte reichen für die Darstellung; der
+# Leerkilometeranteil wird in 5-%-Schritten (0 bis 90 %) gewählt.
+sweep_gitter = (200, 200, 19)
+
+# Funktion zur Berechnung der Parameterstudie (einmal je Flotten-Emissionswert und Referenzwert des Busses, für alle
+# Sitzungen zwischengespeichert)
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_sweep(CO2eq_pro_fahrzeugkilometer, CO2eq_bus_referenz, platzausnutzung_referenz):
+    return calculate_sweep(CO2eq_pro_fahrzeugkilometer, *sweep_axes(*sweep_gitter),
+                           CO2eq_bus_referenz=CO2eq_bus_referenz, platzausnutzung_referenz=platzausnutzung_referenz)
+
+def show_break_even_analysis(adjusted_occupancy):
+    abschnitt = lazy_expander("**3.2 Break-even-Analyse Bus und Ridepooling-System**", key='abschnitt_3_2')
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        ergebnisse = get_zustand().ergebnisse
+        if ergebnisse.fehlende(['CO2eq_emissionen_gesamt_rps', 'fahrzeugkilometer_gesamt', 'besetzungsquote', 'leerkilometeranteil']):
+            st.error("CO2eq-Emissionen des Ridepooling-Systems sind nicht verfügbar.")
+            return
+        st.info("**Hinweis:** Die Abbildung zeigt die Differenz der CO2eq-Emissionen pro Personenkilometer (Ridepooling-System minus Bus) in Abhängigkeit von der Platzausnutzung des Busses und der Besetzungsquote des Ridepooling-Systems. Die Emissionen je Fahrzeugkilometer der Ridepooling-Flotte werden aus Abschnitt 1 übernommen. Entlang der schwarzen Linie emittieren beide Systeme gleich viel.")
+        CO2eq_pro_fahrzeugkilometer = calculate_CO2eq_pro_fahrzeugkilometer(ergebnisse['CO2eq_emissionen_gesamt_rps'], ergebnisse['fahrzeugkilometer_gesamt'])
+        sweep = load_sweep(CO2eq_pro_fahrzeugkilometer, *bus_referenz())
+
+        leerkilometeranteil = st.select_slider("Leerkilometeranteil des Ridepooling-Systems (%)", options=[float(wert) for wert in sweep['leerkilometeranteil']],
+                                               value=float(sweep['leerkilometeranteil'][np.abs(sweep['leerkilometeranteil'] - ergebnisse['leerkilometeranteil']).argmin()]))
+        k = int(np.abs(sweep['leerkilometeranteil'] - leerkilometeranteil).argmin())
+
+        fig3 = go.Figure()
+        fig3.add_trace(go.Heatmap(x=sweep['besetzungsquote'], y=sweep['platzausnutzung'], z=sweep['differenz_bus_rps'][:, :, k],
+                                  zmid=0, zmin=-100, zmax=100, colorscale='RdBu_r', colorbar=dict(title='Differenz [g CO2eq/Pkm]')))
+        fig3.add_trace(go.Scatter(name='Break-even', x=sweep['besetzungsquote'], y=sweep['break_even_platzausnutzung'][:, k], mode='lines', line=dict(color='black', width=2)))
+        fig3.add_trace(go.Scatter(name='Aktuelle Werte', x=[ergebnisse['besetzungsquote']], y=[adjusted_occupancy], mode='markers', marker=dict(color='black', size=10, symbol='x')))
+        fig3.update_layout(
+            title=f'Differenz der CO2eq-Emissionen bei {leerkilometeranteil:.0f}% Leerkilometeranteil',
+            xaxis_title='Besetzungsquote Ridepooling-System',
+            yaxis_title='Platzausnutzung Bus [%]',
+            yaxis_range=[0, 100],
+            width=650,
+            height=650,
+            showlegend=False
+        )
+        st.plotly_chart(fig3)
+
+        CO2eq_rps = CO2eq_pro_fahrzeugkilometer / (ergebnisse['besetzungsquote'] * (1 - ergebnisse['leerkilometeranteil'] / 100)) if ergebnisse['besetzungsquote'] > 0 and ergebnisse['leerkilometeranteil'] < 100 else 0
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write("**Platzausnutzung Bus, ab der der Bus weniger emittiert als das Ridepooling-System:**")
+        with col2:
+            initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+            st.write(f"{initial_CO2eq_wtw * initial_occupancy / CO2eq_rps:.2f}%" if CO2eq_rps > 0 else "-")
+
+# Funktion zur Zusammenstellung der Emissionsdaten aus Abschnitt 1.4 (wie compare_systems und Zeitreihe); None, solange sie fehlen
+def emission_factors():
+    eingaben = get_zustand().eingaben
+    if any(key not in eingaben for key in ['benzin_emissionsdaten', 'diesel_emissionsdaten', 'strom_emissionsdaten_netz', 'oekostrom_anteil', 'pv_emissionsdaten']):
+        return None
+    return {
+        'benzin_emissionsdaten': eingaben['benzin_emissionsdaten'],
+        'diesel_emissionsdaten': eingaben['diesel_emissionsdaten'],
+        'strom_emissionsdaten': eingaben['strom_emissionsdaten_netz'],
+        'oekostrom_anteil': eingaben['oekostrom_anteil'],
+        'pv_emissionsdaten': eingaben['pv_emissionsdaten'],
+    }
+
+# Funktion zur Bildung einer Zeile der Systemtabelle aus den aktuellen Eingaben der Abschnitte 1.1 bis 2.2
+def current_system_row():
+    eingaben = get_zustand().eingaben
+    return fleet_to_system_row(eingaben.get('name_ridepooling_system') or "Eigenes System", current_fleet(),
+                               eingaben.get('abgeschlossene_buchungen', 0), eingaben.get('transportierte_fahrgaeste', 0),
+                               eingaben.get('adjusted_occupancy'))
+
+# Funktion zur Bildung der Systemtabelle aus den gespeicherten Szenarien (je Szenario eine Zeile)
+def saved_system_rows(limit=50):
+    zeilen = []
+    for eintrag in list_scenarios(limit=limit):
+        szenario = load_scenario(eintrag['id'])
+        eingaben = szenario['eingaben']
+        fahrzeugflotte = vehicle_list_to_fleet(szenario['fahrzeugflotte'])
+        zeilen.append(fleet_to_system_row(f"{szenario['name']} ({eintrag['id']})", fahrzeugflotte,
+                                          eingaben.get('abgeschlossene_buchungen', 0), eingaben.get('transportierte_fahrgaeste', 0),
+                                          eingaben.get('adjusted_occupancy')))
+    return zeilen
+
+# Funktion zur Erstellung der Ausgangstabelle für den Systemvergleich (Voreinstellungen, aktuelles System, Szenarien)
+def initial_system_table(mit_szenarien):
+    zeilen = preset_systems(get_referenzdaten()).to_dict('records')
+    vorhanden = {zeile['System'] for zeile in zeilen}
+    aktuell = current_system_row()
+    if aktuell['Kilometer leer'] + aktuell['Kilometer besetzt'] > 0:
+        if aktuell['System'] in vorhanden:
+            # Ein Voreinstellungs-System wird durch die eigenen Eingaben ersetzt
+            zeilen = [zeile for zeile in zeilen if zeile['System'] != aktuell['System']]
+        zeilen.append(aktuell)
+    if mit_szenarien:
+        zeilen += saved_system_rows()
+    return pd.DataFrame(zeilen, columns=system_spalten)
+
+def show_system_comparison():
+    abschnitt = lazy_expander("**3.3 Vergleich mehrerer Ridepooling-Systeme**", key='abschnitt_3_3')
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        st.info("**Hinweis:** Vergleichen Sie mehrere Ridepooling-Systeme mit ihrem jeweiligen lokalen Bussystem. Die Tabelle enthält die voreingestellten Systeme, Ihr aktuelles System aus Abschnitt 1 und optional die gespeicherten Szenarien. Geben Sie je System die Fahrzeugkilometer, den durchschnittlichen Verbrauch der Flotte und die Platzausnutzung des lokalen Busses an. Für alle Systeme gelten die Emissionsdaten aus Abschnitt 1.4.")
+        if emission_factors() is None:
+            st.error("Bitte geben Sie zunächst die Emissionsdaten in Abschnitt 1.4 an.")
+            return
+
+        mit_szenarien = st.checkbox("Gespeicherte Szenarien einbeziehen", key='systemvergleich_szenarien')
+        if st.button("Tabelle aus aktuellen Eingaben neu aufbauen") or st.session_state.get('_systemvergleich_szenarien') != mit_szenarien:
+            st.session_state['systemvergleich_tabelle'] = initial_system_table(mit_szenarien)
+            st.session_state['systemvergleich_version'] = st.session_state.get('systemvergleich_version', 0) + 1
+            st.session_state['_systemvergleich_szenarien'] = mit_szenarien
+
+        systeme = st.data_editor(
+            st.session_state['systemvergleich_tabelle'],
+            key=f"systemvergleich_editor_{st.session_state['systemvergleich_version']}",
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={'System': st.column_config.TextColumn('System', required=True),
+                           **{spalte: st.column_config.NumberColumn(spalte, min_value=0.0, default=0.0) for spalte in system_spalten[1:]}},
+        )
+        faktoren = emission_factors()
+        try:
+            ergebnisse = memoize(get_session_cache(), fingerprint('systemvergleich', systeme, faktoren, bus_referenz()), compare_systems, systeme, **faktoren)
+        except ValueError as fehler:
+            st.error(str(fehler))
+            return
+
+        # Systeme ohne Fahrzeugkilometer werden nicht dargestellt
+        dargestellt = ergebnisse[ergebnisse['fahrzeugkilometer_gesamt'] > 0]
+        if len(dargestellt) < len(ergebnisse):
+            st.caption(f"Ohne Fahrzeugkilometer nicht dargestellt: {', '.join(ergebnisse.loc[ergebnisse['fahrzeugkilometer_gesamt'] <= 0, 'System'])}")
+        if dargestellt.empty:
+            return
+        fig6 = memoize(get_session_cache(), fingerprint('fig6', dargestellt[['System', 'CO2eq_emissionen_pro_personenkilometer_rps_g', 'new_CO2eq_wtw']]),
+                       build_systems_figure, dargestellt)
+        st.plotly_chart(fig6)
+        st.dataframe(dargestellt[['System', 'CO2eq_emissionen_pro_personenkilometer_rps_g', 'new_CO2eq_wtw', 'differenz_bus_rps',
+                                  'personenkilometer_gefahren', 'leerkilometeranteil', 'besetzungsquote', 'adjusted_occupancy']].rename(columns={
+                         'CO2eq_emissionen_pro_personenkilometer_rps_g': 'Ridepooling [g CO2eq/Pkm]',
+                         'new_CO2eq_wtw': 'Bus (lokal) [g CO2eq/Pkm]',
+                         'differenz_bus_rps': 'Differenz [g CO2eq/Pkm]',
+                         'personenkilometer_gefahren': 'Personenkilometer',
+                         'leerkilometeranteil': 'Leerkilometeranteil (%)',
+                         'besetzungsquote': 'Besetzungsquote',
+                         'adjusted_occupancy': 'Platzausnutzung Bus (%)'}), hide_index=True)
+
+
+# Funktion zur Aggregation der AFZS-Daten (einmal je Datei und Platzangebot, Ergebnis als vorgebinntes Stundenraster)
+def load_belegungsprofil(datei_id, datei, platzangebot):
+    return memoize(get_upload_cache(), fingerprint('belegungsprofil', datei_id, platzangebot), aggregate_apc, datei, platzangebot)
+
+# Funktion zur Aggregation der Telematikdaten des Ridepooling-Systems je Stunde (einmal je Datei)
+def load_fahrtenprofil(datei_id, datei):
+    return memoize(get_upload_cache(), fingerprint('fahrtenprofil', datei_id), aggregate_rides_by_hour, datei)
+
+def show_hourly_comparison(new_CO2eq_wtw, adjusted_occupancy):
+    abschnitt = lazy_expander("**3.4 Vergleich nach Tageszeit und Linie**", key='abschnitt_3_4')
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        st.info("**Hinweis:** Die Platzausnutzung aus Kapitel 2 gilt für den 24-Stunden-Betrieb. Ridepooling-Systeme verkehren häufig in Zeiten schwacher Nachfrage, in denen auch der Bus gering ausgelastet ist. Laden Sie Daten aus automatischen Fahrgastzählsystemen (AFZS) hoch, um Platzausnutzung und CO2eq-Emissionen des Busses je Linie, Tagtyp und Stunde zu berechnen. Die CO2eq-Emissionen des Busses werden wie in Abschnitt 2.2 mit der Platzausnutzung skaliert.")
+        ergebnisse = get_zustand().ergebnisse
+        if 'CO2eq_emissionen_pro_personenkilometer_rps_g' not in ergebnisse:
+            st.error("CO2eq-Emissionen des Ridepooling-Systems sind nicht verfügbar.")
+            return
+
+        afzs_datei = st.file_uploader("AFZS-Daten (CSV oder Parquet, Spalten: Linie, Zeitpunkt, Kilometer, Fahrgäste, optional Platzangebot):", type=['csv', 'parquet'])
+        st.caption("Ein Zählereignis je Haltestellenabfahrt: Fahrgäste ist die Besetzung nach der Abfahrt, Kilometer die Entfernung bis zur nächsten Haltestelle.")
+        platzangebot = st.number_input("Platzangebot für Ereignisse ohne Angabe:", min_value=1.0, value=float(eingabe_wert('bus_platzangebot', 78.5186)), step=0.1, format="%.2f", key=widget_key('afzs_platzangebot'))
+        fahrten_datei = st.file_uploader("Optional: Telematikdaten des Ridepooling-Systems (CSV oder Parquet, Spalten: Fahrzeugtyp, Zeitpunkt, Kilometer, Fahrgäste):", type=['csv', 'parquet'])
+        st.caption("Ohne Telematikdaten gilt der Jahreswert des Ridepooling-Systems aus Abschnitt 1.5 für alle Stunden.")
+        if afzs_datei is None:
+            return
+        try:
+            with st.spinner("AFZS-Daten werden aggregiert..."):
+                bus = load_belegungsprofil(afzs_datei.file_id, afzs_datei, platzangebot)
+                rps = load_fahrtenprofil(fahrten_datei.file_id, fahrten_datei) if fahrten_datei is not None else None
+        except ValueError as fehler:
+            st.error(str(fehler))
+            return
+        if not len(bus):
+            st.warning("Die AFZS-Daten enthalten keine Zählereignisse.")
+            return
+
+        auswahl_tagtypen = st.multiselect("Tagtypen:", tagtypen, default=tagtypen, key=widget_key('afzs_tagtypen'))
+        linien = st.multiselect("Linien (leer: alle Linien):", bus.gruppen, key=widget_key('afzs_linien'))
+        if not auswahl_tagtypen:
+            st.warning("Bitte wählen Sie mindestens einen Tagtyp.")
+            return
+
+        CO2eq_pro_fahrzeugkilometer = calculate_CO2eq_pro_fahrzeugkilometer(ergebnisse['CO2eq_emissionen_gesamt_rps'], ergebnisse['fahrzeugkilometer_gesamt'])
+        vergleich = compare_by_hour(bus, ergebnisse['CO2eq_emissionen_pro_personenkilometer_rps_g'], rps, CO2eq_pro_fahrzeugkilometer,
+                                    new_CO2eq_wtw, adjusted_occupancy, linien or None, auswahl_tagtypen)
+        st.plotly_chart(build_hourly_figure(vergleich))
+
+        # Stundenbereich, z.B. die Betriebszeit des Ridepooling-Systems (Bereiche über Mitternacht mit Beginn > Ende)
+        col1, col2 = st.columns(2)
+        with col1:
+            von = st.number_input("Betriebszeit von (Stunde):", min_value=0, max_value=23, value=int(eingabe_wert('afzs_von', 0)), step=1, key=widget_key('afzs_von'))
+        with col2:
+            bis = st.number_input("bis (Stunde, ausschließlich):", min_value=1, max_value=24, value=int(eingabe_wert('afzs_bis', 24)), step=1, key=widget_key('afzs_bis'))
+        get_zustand().eingaben.update({'afzs_von': von, 'afzs_bis': bis})
+        je_linie = occupancy_by_line(bus, von, bis, auswahl_tagtypen)
+        je_linie['CO2eq Bus (g/Pkm)'] = new_CO2eq_wtw * adjusted_occupancy / je_linie['Platzausnutzung (%)'].replace(0.0, np.nan)
+        if linien:
+            je_linie = je_linie[je_linie['Linie'].isin(linien)]
+        personen_km, platz_km = je_linie['Personenkilometer'].sum(), je_linie['Platzkilometer'].sum()
+        if platz_km > 0 and personen_km > 0:
+            platzausnutzung = calculate_platzausnutzung(personen_km, platz_km)
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**Platzausnutzung Bus von {von} bis {bis} Uhr:**")
+            with col2:
+                st.write(f"{platzausnutzung:.2f}%")
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**CO2eq-Emissionen Bus von {von} bis {bis} Uhr:**")
+            with col2:
+                st.write(f"{new_CO2eq_wtw * adjusted_occupancy / platzausnutzung:.2f} g CO2eq/Pkm")
+        st.dataframe(je_linie, hide_index=True)
+
+
+# Funktion zur Zusammenstellung der Ergebnisse je System: aktuelles System aus Kapitel 1 und die Systeme aus Abschnitt 3.3
+def mode_shift_systems():
+    zustand = get_zustand()
+    systeme = pd.DataFrame([{
+        'System': zustand.eingaben.get('name_ridepooling_system', ""),
+        'personenkilometer_gefahren': zustand.ergebnisse['personenkilometer_gefahren'],
+        'CO2eq_emissionen_gesamt_rps': zustand.ergebnisse['CO2eq_emissionen_gesamt_rps'],
+    }])
+    if 'systemvergleich_tabelle' in st.session_state:
+        faktoren = emission_factors()
+        tabelle = st.session_state['systemvergleich_tabelle']
+        try:
+            weitere = memoize(get_session_cache(), fingerprint('systemvergleich', tabelle, faktoren, bus_referenz()), compare_systems, tabelle, **faktoren)
+            systeme = pd.concat([systeme, weitere[systeme.columns]], ignore_index=True)
+        except ValueError:
+            pass
+    return systeme.drop_duplicates('System')
+
+def show_mode_shift(new_CO2eq_wtw):
+    abschnitt = lazy_expander("**3.5 Netto-Wirkung durch Verkehrsverlagerung**", key='abschnitt_3_5')
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        st.info(f"**Hinweis:** Die Verkehrsmittel in Abschnitt 1.5 dienen nur als Referenz. Für die Netto-Wirkung des Ridepooling-Systems ist entscheidend, welche Verkehrsmittel die Fahrgäste ohne das Angebot genutzt hätten. Laden Sie die Antworten einer Fahrgastbefragung hoch (eine Zeile je Antwort oder je Anteil). Die Personenkilometer je System werden nach Fahrtweite und Verlagerungsanteilen auf die ersetzten Verkehrsmittel verteilt. Für den Bus gilt der Wert aus Kapitel 2, für '{keine_fahrt}' 0 g CO2eq/Pkm.")
+        if get_zustand().ergebnisse.fehlende(['CO2eq_emissionen_gesamt_rps', 'personenkilometer_gefahren']):
+            st.error("CO2eq-Emissionen des Ridepooling-Systems sind nicht verfügbar.")
+            return
+
+        emissionsfaktoren = dict(get_referenzdaten()['verkehrsmittel'])
+        emissionsfaktoren['Bus'] = new_CO2eq_wtw
+        befragung_datei = st.file_uploader("Fahrgastbefragung (CSV, Parquet oder Excel):", type=['csv', 'parquet', 'xlsx', 'xls'])
+        st.caption(f"Spalten: {', '.join(verlagerung_spalten)} (Entfernung in km, Gewicht und Antworten optional). Verkehrsmittel: {', '.join(list(emissionsfaktoren) + [keine_fahrt])}. Die Systeme werden über ihren Namen dem aktuellen System und den Systemen aus Abschnitt 3.3 zugeordnet.")
+        if befragung_datei is None:
+            return
+        try:
+            umfrage = memoize(get_upload_cache(), fingerprint('befragung', befragung_datei.file_id, list(emissionsfaktoren)),
+                              read_survey_file, befragung_datei, list(emissionsfaktoren), befragung_datei.name)
+            systeme = mode_shift_systems()
+            ergebnisse = calculate_mode_shift(umfrage, systeme, emissionsfaktoren)
+        except ValueError as fehler:
+            st.error(str(fehler))
+            return
+        ohne_ergebnisse = [system for system in umfrage.systeme if system not in set(ergebnisse['System'])]
+        if ohne_ergebnisse:
+            st.caption(f"Ohne Ergebnisse aus Kapitel 1 oder Abschnitt 3.3 nicht ausgewertet: {', '.join(ohne_ergebnisse)}")
+        if ergebnisse.empty:
+            return
+
+        st.dataframe(ergebnisse.rename(columns={
+            'personenkilometer_gefahren': 'Personenkilometer',
+            'CO2eq_emissionen_gesamt_rps': 'CO2eq Ridepooling [kg]',
+            'CO2eq_ersetzt_pro_personenkilometer_g': 'Ersetzte Verkehrsmittel [g CO2eq/Pkm]',
+            'CO2eq_vermieden': 'Vermieden [kg CO2eq]',
+            'CO2eq_netto': 'Netto [kg CO2eq]',
+            'CO2eq_netto_pro_personenkilometer_g': 'Netto [g CO2eq/Pkm]'}), hide_index=True)
+        st.caption("Netto = CO2eq-Emissionen des Ridepooling-Systems - Emissionen der ersetzten Fahrten. Negative Werte bedeuten eine Einsparung.")
+
+        faktor_unsicherheit = st.slider("Unsicherheit der Emissionsfaktoren (± %):", min_value=0, max_value=50, value=int(eingabe_wert('verlagerung_unsicherheit', 10)), step=5, key=widget_key('verlagerung_unsicherheit'))
+        get_zustand().eingaben.update({'verlagerung_unsicherheit': faktor_unsicherheit})
+        unsicherheit = memoize(get_upload_cache(), fingerprint('verlagerung_unsicherheit', befragung_datei.file_id, systeme, emissionsfaktoren, faktor_unsicherheit),
+                               sample_mode_shift, umfrage, systeme, emissionsfaktoren, n=10_000, faktor_unsicherheit=faktor_unsicherheit / 100, perzentile=(5, 50, 95))
+        st.dataframe(unsicherheit.rename(columns={
+            'CO2eq_netto_mittelwert': 'Netto Mittelwert [kg CO2eq]',
+            'CO2eq_netto_standardabweichung': 'Standardabweichung [kg CO2eq]',
+            'anteil_netto_einsparung': 'Wahrscheinlichkeit Einsparung',
+            'CO2eq_netto_p5': '5 %-Perzentil [kg CO2eq]',
+            'CO2eq_netto_p50': 'Median [kg CO2eq]',
+            'CO2eq_netto_p95': '95 %-Perzentil [kg CO2eq]'}), hide_index=True)
+        st.caption("10.000 Ziehungen der Verlagerungsanteile (Dirichlet-Verteilung mit der effektiven Anzahl an Antworten je System und Entfernungsklasse) und der Emissionsfaktoren.")
+
+
+# Funktion zur Zusammenstellung der Basiswerte der Sensitivitätsanalyse aus dem Sitzungszustand (None, solange sie fehlen)
+def sensitivity_basis(new_CO2eq_wtw):
+    zustand = get_zustand()
+    werte = {**zustand.eingaben.to_dict(), **zustand.ergebnisse.to_dict(), 'new_CO2eq_wtw': new_CO2eq_wtw}
+    if any(key not in werte for key in basis_schluessel):
+        return None
+    return {key: float(werte[key]) for key in basis_schluessel}
+
+def show_sensitivity(new_CO2eq_wtw):
+    abschnitt = lazy_expander("**3.6 Sensitivitätsanalyse**", key='abschnitt_3_6')
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        st.info("**Hinweis:** Welche Stellgröße beeinflusst das Ergebnis am stärksten? Das Tornado-Diagramm verändert jede Größe einzeln bis an die Grenzen ihres Bereichs, alle übrigen bleiben auf den Werten aus Kapitel 1. Die Sobol-Indizes geben an, welcher Anteil der Varianz bei gleichzeitiger Variation aller Größen auf eine Größe allein (S1) bzw. einschließlich ihrer Wechselwirkungen (ST) zurückgeht. Für den Bus gilt der Wert aus Kapitel 2.")
+        basis = sensitivity_basis(new_CO2eq_wtw)
+        if basis is None:
+            st.error("CO2eq-Emissionen des Ridepooling-Systems sind nicht verfügbar.")
+            return
+
+        variation = st.slider("Variationsbreite (± %, Leerkilometer- und Ökostromanteil ± Prozentpunkte):", min_value=5, max_value=50,
+                              value=int(eingabe_wert('sensitivitaet_variation', standard_variation)), step=5, key=widget_key('sensitivitaet_variation'))
+        get_zustand().eingaben.update({'sensitivitaet_variation': variation})
+        ziel = st.radio("Kennzahl:", list(zielgroessen), format_func=zielgroessen.get, horizontal=True, key=widget_key('sensitivitaet_ziel'))
+        st.caption("Die Emissionsfaktoren werden zwischen dem kleinsten und größten Wert der Referenzdaten variiert.")
+
+        # Ergebnisse je Szenario im Zwischenspeicher (Sitzung und gemeinsam), sodass die Diagramme sofort wieder erscheinen
+        bereiche = default_ranges(basis, variation)
+        tornado = memoize(get_session_cache(), fingerprint('tornado', basis, bereiche), calculate_tornado, basis, bereiche)
+        sobol = memoize(get_session_cache(), fingerprint('sobol', basis, bereiche), calculate_sobol, basis, bereiche, n=4096)
+        tornado, sobol = tornado[tornado['Zielgröße'] == ziel], sobol[sobol['Zielgröße'] == ziel]
+
+        st.plotly_chart(build_tornado_figure(tornado, zielgroessen[ziel]))
+        st.dataframe(tornado[['Bezeichnung', 'Wert unten', 'Wert oben', 'Ergebnis unten', 'Ergebnis oben', 'Spannweite']], hide_index=True)
+        st.plotly_chart(build_sobol_figure(sobol, zielgroessen[ziel]))
+        st.dataframe(sobol[['Bezeichnung', 'S1', 'ST']], hide_index=True)
+        st.caption(f"{int(sobol['n'].iloc[0]) * (len(stellgroessen) + 2):,} Auswertungen (Sobol-Folge, Saltelli-Schema) mit gleichverteilten Stellgrößen.".replace(',', '.'))
+
+
+################################################################ Zeitreihe ################################################################
+
+# Funktion zur Bildung eines Zeitraums aus den aktuellen Eingaben der Abschnitte 1.1 bis 1.3 (Verbrauch je 100 km der Flotte)
+def current_period():
+    zeile = current_system_row()
+    zeile['Periode'] = eingabe_wert('start_date', date.today()).strftime('%Y-%m')
+    return pd.DataFrame([zeile], columns=perioden_spalten)
+
+# Funktion zum Abrufen der Zeitreihe der Sitzung; bei geänderten Emissionsfaktoren wird sie neu aufgebaut
+def get_zeitreihe(fenster):
+    faktoren = {**emission_factors(), 'adjusted_occupancy': eingabe_wert('adjusted_occupancy', bus_referenz()[1])}
+    schluessel = fingerprint('zeitreihe', faktoren, fenster, bus_referenz())
+    if st.session_state.get('_zeitreihe_schluessel') != schluessel:
+        st.session_state['_zeitreihe'] = Zeitreihe(fenster, **faktoren)
+        st.session_state['_zeitreihe_schluessel'] = schluessel
+    return st.session_state['_zeitreihe']
+
+# Funktion zum Speichern einer neuen Zeitraumtabelle (setzt die Tabelle mit den neuen Daten zurück)
+def update_period_table(tabelle):
+    st.session_state['zeitreihe_tabelle'] = tabelle
+    st.session_state['zeitreihe_version'] = st.session_state.get('zeitreihe_version', 0) + 1
+
+# Beim Zuklappen von Abschnitt 4.1 wird die zuletzt übernommene Tabelle gespeichert
+def commit_period_edits():
+    if not st.session_state.get('abschnitt_4_1') and '_zeitreihe' in st.session_state:
+        update_period_table(st.session_state['_zeitreihe'].tabelle)
+
+def show_time_series():
+    abschnitt = lazy_expander("**4.1 Kennzahlen und Trends je Zeitraum**", key='abschnitt_4_1', on_change=commit_period_edits)
+    if not abschnitt.open:
+        return
+    with abschnitt:
+        st.info("**Hinweis:** Geben Sie Fahrzeugkilometer, Buchungen, Fahrgäste und den durchschnittlichen Verbrauch der Flotte je Zeitraum an (z.B. je Monat im Format JJJJ-MM). Die Kennzahlen werden für alle Zeiträume mit den Emissionsdaten aus Abschnitt 1.4 berechnet. Beim Anfügen oder Ändern eines Zeitraums werden nur dieser Zeitraum neu berechnet und die kumulierten und gleitenden Werte fortgeschrieben.")
+        if emission_factors() is None:
+            st.error("Bitte geben Sie zunächst die Emissionsdaten in Abschnitt 1.4 an.")
+            return
+
+        fenster = st.number_input("Zeiträume für gleitende Werte:", min_value=1, max_value=120, value=int(eingabe_wert('zeitreihe_fenster', 12)), step=1, key=widget_key('zeitreihe_fenster'))
+        get_zustand().eingaben.update({'zeitreihe_fenster': fenster})
+        zeitreihe = get_zeitreihe(fenster)
+
+        periode_datei = st.file_uploader("Zeitreihe importieren (CSV, Parquet oder Excel):", type=['csv', 'parquet', 'xlsx', 'xls'])
+        st.caption(f"Erforderliche Spalten: {', '.join(perioden_spalten[:5])}. Fehlende Verbrauchsspalten werden mit 0 ergänzt. Die importierte Zeitreihe ersetzt die bisherigen Eingaben.")
+        if periode_datei is not None and st.session_state.get('zeitreihe_import') != periode_datei.file_id:
+            try:
+                update_period_table(read_period_file(periode_datei, periode_datei.name))
+                st.session_state['zeitreihe_import'] = periode_datei.file_id
+            except ValueError as fehler:
+                st.error(str(fehler))
+
+        if st.button('Aktuellen Zeitraum anfügen'):
+            # Ein bereits vorhandener Zeitraum wird durch die aktuellen Eingaben ersetzt
+            try:
+                zeitreihe.update(st.session_state.get('zeitreihe_tabelle', pd.DataFrame(columns=perioden_spalten)))
+                zeitreihe.append(current_period())
+                update_period_table(zeitreihe.tabelle)
+            except ValueError as fehler:
+                st.error(str(fehler))
+
+        tabelle = st.data_editor(
+            st.session_state.get('zeitreihe_tabelle', pd.DataFrame(columns=perioden_spalten)),
+            key=f"zeitreihe_editor_{st.session_state.get('zeitreihe_version', 0)}",
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={'Periode': st.column_config.TextColumn('Periode', required=True),
+                           **{spalte: st.column_config.NumberColumn(spalte, min_value=0.0, default=0.0) for spalte in perioden_spalten[1:]}},
+        )
+        try:
+            ergebnisse = zeitreihe.update(tabelle)
+        except ValueError as fehler:
+            st.error(str(fehler))
+            return
+        if ergebnisse.empty:
+            return
+        st.caption(f"Neu berechnet: {zeitreihe.berechnet} von {len(zeitreihe)} Zeiträumen, kumulierte Werte fortgeschrieben: {zeitreihe.fortgeschrieben}.")
+
+        new_CO2eq_wtw = get_zustand().ergebnisse.get('new_CO2eq_wtw', bus_referenz()[0])
+        fig4 = memoize(get_upload_cache(), fingerprint('fig4', ergebnisse['Periode'], ergebnisse['CO2eq_emissionen_pro_personenkilometer_rps_g'], ergebnisse['CO2eq_pro_pkm_gleitend_g'], new_CO2eq_wtw, fenster),
+                       build_trend_figure, ergebnisse, new_CO2eq_wtw, fenster)
+        st.plotly_chart(fig4)
+
+        stufe = st.radio("Aggregation:", aggregationsstufen, index=1, horizontal=True, key=widget_key('zeitreihe_stufe'))
+        try:
+            aggregiert = aggregate_periods(ergebnisse, stufe)
+        except ValueError as fehler:
+            st.error(str(fehler))
+            return
+        st.plotly_chart(build_aggregate_figure(aggregiert, stufe))
+        st.dataframe(aggregiert, hide_index=True)
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write("**CO2eq-Emissionen Ridepooling-System (alle Zeiträume):**")
+        with col2:
+            st.write(f"{ergebnisse['CO2eq_pro_pkm_kumuliert_g'].iloc[-1]:.2f} g CO2eq/Pkm")
+
+# Kapitel 2 und 3 werden als Fragment ausgeführt: Eingaben in 2.1 bis 2.3 und 3.2 bis 3.6 führen nur diesen Teil erneut aus,
+# Kapitel 1 wird dabei nicht neu berechnet. Die Ergebnisse aus Kapitel 1 werden aus dem Sitzungszustand gelesen.
+@st.fragment
+def show_bus_and_comparison():
+    profil = start_profil('Fragment Bus und Vergleich')
+
+    st.subheader('2. Berechnung CO2eq-Emissionen Bus')
+    with messen(profil, '2.1 Platzausnutzung Bus'):
+        show_bus_occupancy_calculation()
+    with messen(profil, '2.2 Anpassung Platzausnutzung'):
+        adjusted_occupancy, new_CO2eq_wtw = show_bus_occupancy_adjustment()
+    with messen(profil, '2.3 Busflotte'):
+        busflotte = show_bus_fleet(adjusted_occupancy)
+    if busflotte is not None:
+        # Die Werte der Busflotte ersetzen die angepasste Platzausnutzung und den CO2eq-Wert aus 2.2
+        adjusted_occupancy, new_CO2eq_wtw = busflotte['adjusted_occupancy'], busflotte['new_CO2eq_wtw']
+
+    st.subheader('3. Vergleich der CO2eq-Emissionen')
+    with messen(profil, '3.1 Vergleich Bus / Ridepooling-System'):
+        compare_emissions(new_CO2eq_wtw, adjusted_occupancy)
+    with messen(profil, '3.2 Break-even-Analyse'):
+        show_break_even_analysis(adjusted_occupancy)
+    with messen(profil, '3.3 Vergleich mehrerer Systeme'):
+        show_system_comparison()
+    with messen(profil, '3.4 Vergleich nach Tageszeit'):
+        show_hourly_comparison(new_CO2eq_wtw, adjusted_occupancy)
+    with messen(profil, '3.5 Verkehrsverlagerung'):
+        show_mode_shift(new_CO2eq_wtw)
+    with messen(profil, '3.6 Sensitivitätsanalyse'):
+        show_sensitivity(new_CO2eq_wtw)
+
+    if profil is not None:
+        finish_profil(profil)
+
+def main():
+    st.set_page_config(page_title="OekoRPS")
+
+    # Inject the custom CSS into the Streamlit app
+    st.markdown(hide_buttons_css, unsafe_allow_html=True)
+
+    # Zeitmessung je Abschnitt (nur wenn aktiviert)
+    profil = start_profil()
+
+    # Setze das Thema aus der config.toml Datei
+    with messen(profil, 'Konfiguration'):
+        config = load_config()
+
+    # Initialisiere Session State Variablen
+    initialize_session_state()
+
+    # Zeige Sidebar an
+    with messen(profil, 'Sidebar und Szenarien'):
+        show_sidebar()
+        show_scenario_store()
+        show_report_export()
+
+    # Grundlegende Konfiguration
+    st.title('Entwurf: Vergleich der CO2eq-Emissionen von Bus- und Ridepooling-System')
+
+    show_methodik()
+
+    st.subheader("1. Berechnung der CO2eq-Emissionen des Ridepooling-Systems")
+    # Zeige Allgemeine Informationen an
+    with messen(profil, '1.1 Allgemeine Informationen'):
+        show_general_info()
+
+    # Zeige Systemleistungs-Sektion an
+    with messen(profil, '1.2 Beförderungsleistung'):
+        show_system_performance()
+
+    # Zeige Fahrzeugflotten- und Fahrtleistungs-Sektion an
+    with messen(profil, '1.3 Fahrzeugflotte & Fahrtleistung'):
+        show_vehicle_fleet_performance()
+
+    # Zeige Emissionsdaten-Sektion an
+    with messen(profil, '1.4 Emissionsdaten'):
+        show_emissions_data()
+
+    # Zeige Berechnung Umweltwirkung Ridepooling-System an
+    with messen(profil, '1.5 Umweltwirkung Ridepooling-System'):
+        show_environmental_impact_calculation()
+
+    # Kapitel 2 und 3 als Fragment (Eingaben dort führen nur das Fragment erneut aus)
+    with messen(profil, '2./3. Bus und Vergleich'):
+        show_bus_and_comparison()
+
+    # Zeige Zeitreihe über mehrere Betrachtungszeiträume an
+    st.subheader('4. Zeitreihe über mehrere Betrachtungszeiträume')
+    with messen(profil, '4.1 Zeitreihe'):
+        show_time_series()
+
+    # Footer
+    st.markdown("---")
+    st.write("***Entwurfsfassung***")
+    st.write("Dieses Programm wurde  im Projekt 'Bewertung der ökologischen Effekte von Ridepooling-Systemen anhand von vier Fallbeispielen in NRW' entwickelt und durch das Ministerium für Umwelt, Naturschutz, und Verkehr des Landes Nordrhein-Westfalens gefördert. © 2024 [FH Münster](https://www.fh-muenster.de/)")
+    st.write("Die Berechnungen basieren auf den Annahmen und Daten, die Sie in den verschiedenen Abschnitten des Programms eingegeben haben.")
+    st.write("Die Ergebnisse dienen nur zu Informationszwecken und sind nicht verbindlich.")
+    st.write("Für Fragen oder Anregungen wenden Sie sich bitte an [peter.bruder@fh-muenster.de](mailto:peter.bruder@fh-muenster.de).")
+
+    # Debug-Bereich mit den Messergebnissen
+    show_profil(profil)
+
+
+if __name__ == "__main__":
+    main()
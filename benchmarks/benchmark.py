@@ -0,0 +1,200 @@
+# Benchmarks für Berechnungskern, Diagramme und einen vollständigen Durchlauf der Streamlit-App
+# Aufruf (aus dem Projektverzeichnis):  python benchmarks/benchmark.py [-o benchmark_ergebnisse.json] [--schnell]
+# Je Fall werden Laufzeit (Median und Minimum über mehrere Wiederholungen) und der Spitzenspeicher eines
+# zusätzlichen Durchlaufs mit tracemalloc in eine JSON-Datei geschrieben, damit Versionen verglichen werden können.
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+projektverzeichnis = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, projektverzeichnis)
+
+from oekorps.batch import calculate_batch, vehicle_list_to_frame  # noqa: E402
+from oekorps.berechnung import calculate_all  # noqa: E402
+from oekorps.flotte import vehicle_list_to_fleet, calculate_fleet_km_table, calculate_fleet_consumption_table  # noqa: E402
+from oekorps.montecarlo import basis_from_vehicle_list, run_monte_carlo  # noqa: E402
+from oekorps.parameterstudie import calculate_sweep, sweep_axes  # noqa: E402
+from oekorps.dateien import read_toml  # noqa: E402
+from oekorps.referenzdaten import load_referenzdaten, standard_pfad  # noqa: E402
+
+flottengroessen = [1, 10, 100, 1_000, 10_000, 100_000]
+app_datei = os.path.join(projektverzeichnis, 'Vergleich_Bus_und_RPS.py')
+
+
+# Funktion zur Erstellung einer Flotte aus den Fahrzeugtypen des Katalogs (reproduzierbare Kilometerleistungen)
+def example_fleet(anzahl):
+    fahrzeugtypen = list(load_referenzdaten()['fahrzeugtypen'].items())
+    vehicle_list = []
+    for i in range(anzahl):
+        typ, verbrauch = fahrzeugtypen[i % len(fahrzeugtypen)]
+        vehicle = {'Fahrzeugtyp': typ, **verbrauch}
+        vehicle.update({'Kilometer leer': 1000.0 + i % 97, 'Kilometer besetzt': 2000.0 + i % 89})
+        vehicle_list.append(vehicle)
+    return vehicle_list
+
+
+# Funktion zur Messung eines Falls: Laufzeiten über mehrere Wiederholungen, Spitzenspeicher in einem eigenen Durchlauf
+def measure(name, funktion, wiederholungen, **parameter):
+    zeiten = []
+    for _ in range(wiederholungen):
+        gc.collect()
+        beginn = time.perf_counter()
+        funktion()
+        zeiten.append(time.perf_counter() - beginn)
+    gc.collect()
+    tracemalloc.start()
+    funktion()
+    _, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ergebnis = {
+        'name': name,
+        'parameter': parameter,
+        'wiederholungen': wiederholungen,
+        'median_s': statistics.median(zeiten),
+        'min_s': min(zeiten),
+        'spitzenspeicher_mb': spitze / 2**20,
+    }
+    print(f"{name:<40} {str(parameter):<28} {ergebnis['median_s'] * 1000:10.3f} ms {ergebnis['spitzenspeicher_mb']:10.2f} MB", file=sys.stderr)
+    return ergebnis
+
+
+# Funktion zum Laden der App als Modul (ohne main() auszuführen), um die Diagrammfunktionen zu messen
+def _load_app_module():
+    spezifikation = importlib.util.spec_from_file_location('vergleich_bus_und_rps', app_datei)
+    modul = importlib.util.module_from_spec(spezifikation)
+    spezifikation.loader.exec_module(modul)
+    return modul
+
+
+def benchmark_kern(wiederholungen, groessen):
+    ergebnisse = []
+    for anzahl in groessen:
+        vehicle_list = example_fleet(anzahl)
+        fahrzeuge = vehicle_list_to_fleet(vehicle_list)
+        rahmen = vehicle_list_to_frame(vehicle_list, system='Benchmark', periode='2022')
+        buchungen = pd.DataFrame({'System': ['Benchmark'], 'Periode': ['2022'], 'Fahrten': [60045.0], 'Transportierte Fahrgäste': [74556.0]})
+        ergebnisse.append(measure('calculate_all (vehicle_list)', lambda: calculate_all(vehicle_list, 60045, 74556, 3030, 3410, 498), wiederholungen, fahrzeuge=anzahl))
+        ergebnisse.append(measure('Flottentabelle (km und Verbrauch)', lambda: (calculate_fleet_km_table(fahrzeuge), calculate_fleet_consumption_table(fahrzeuge)), wiederholungen, fahrzeuge=anzahl))
+        ergebnisse.append(measure('calculate_batch', lambda: calculate_batch(rahmen, buchungen), wiederholungen, fahrzeuge=anzahl))
+    return ergebnisse
+
+
+def benchmark_analysen(wiederholungen, schnell):
+    basis = basis_from_vehicle_list(example_fleet(4), 60045, 74556)
+    n = 100_000 if schnell else 1_000_000
+    return [
+        measure('run_monte_carlo', lambda: run_monte_carlo(basis, n=n, max_workers=1), wiederholungen, ziehungen=n),
+        measure('calculate_sweep (App-Gitter)', lambda: calculate_sweep(150.0, *sweep_axes(200, 200, 19)), wiederholungen, gitter='200x200x19'),
+        measure('calculate_sweep (Standardgitter)', lambda: calculate_sweep(150.0, *sweep_axes(), volle_differenz=not schnell), wiederholungen, gitter='1000x1000x50'),
+    ]
+
+
+def benchmark_laden(wiederholungen):
+    import toml
+
+    konfiguration = os.path.join(projektverzeichnis, '.streamlit', 'config.toml')
+    logo = os.path.join(projektverzeichnis, 'static', 'Logo_of_Fachhochschule_Münster.png')
+
+    def logo_lesen():
+        with open(logo, 'rb') as datei:
+            return datei.read()
+
+    ergebnisse = [measure('Referenzdaten (TOML lesen)', lambda: read_toml(standard_pfad), wiederholungen)]
+    if os.path.exists(konfiguration):
+        ergebnisse.append(measure('toml.load (.streamlit/config.toml)', lambda: toml.load(konfiguration), wiederholungen))
+    ergebnisse.append(measure('Logo lesen', logo_lesen, wiederholungen))
+    return ergebnisse
+
+
+def benchmark_diagramme(wiederholungen):
+    app = _load_app_module()
+    emissionen_data = {'Benchmark': 190.9}
+    emissionen_data.update(load_referenzdaten()['verkehrsmittel'])
+    return [
+        measure('build_emissions_figure (fig1)', lambda: app.build_emissions_figure(emissionen_data), wiederholungen),
+        measure('build_comparison_figure (fig2)', lambda: app.build_comparison_figure('Benchmark', 190.9, 80.54), wiederholungen),
+    ]
+
+
+# Vollständiger Durchlauf der App ohne Browser (streamlit.testing.v1.AppTest)
+def benchmark_app(wiederholungen):
+    from streamlit.testing.v1 import AppTest
+
+    arbeitsverzeichnis = os.getcwd()
+    os.chdir(projektverzeichnis)  # config.toml und Logo werden relativ zum Projektverzeichnis geladen
+    try:
+        def erster_durchlauf(offene_abschnitte=()):
+            at = AppTest.from_file(app_datei, default_timeout=120)
+            for key in offene_abschnitte:
+                at.session_state[key] = True  # Abschnitte werden erst beim Aufklappen dargestellt
+            return at.run()
+
+        def berechnung():
+            at = erster_durchlauf(['abschnitt_1_3', 'abschnitt_1_5', 'abschnitt_3_1'])
+            [auswahl for auswahl in at.selectbox if auswahl.label.startswith('Wählen Sie ein Ridepooling')][0].select('bussi').run()
+            [knopf for knopf in at.button if knopf.label == 'Fahrzeug hinzufügen'][0].click().run()
+            flotte = at.session_state['fahrzeugflotte'].copy()
+            flotte.loc[0, ['Kilometer leer', 'Kilometer besetzt']] = [50422.0, 40063.0]
+            at.session_state['fahrzeugflotte'] = flotte
+            at.session_state['fahrzeugflotte_version'] += 1
+            [knopf for knopf in at.button if knopf.label == 'Daten übernehmen & berechnen'][0].click().run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            return at
+
+        return [
+            measure('AppTest: erster Durchlauf', erster_durchlauf, wiederholungen),
+            measure('AppTest: Eingabe und Berechnung (5 Durchläufe)', berechnung, wiederholungen),
+        ]
+    finally:
+        os.chdir(arbeitsverzeichnis)
+
+
+# Funktion zur Bestimmung des Versionsstands (git), falls verfügbar
+def _version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=projektverzeichnis, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für OekoRPS (Laufzeit und Spitzenspeicher).")
+    parser.add_argument('-o', '--output', default='benchmark_ergebnisse.json', help="Ausgabedatei (JSON)")
+    parser.add_argument('-n', '--wiederholungen', type=int, default=5)
+    parser.add_argument('--schnell', action='store_true', help="kleinere Flotten und Ziehungen, ohne AppTest")
+    argumente = parser.parse_args(argv)
+
+    groessen = [anzahl for anzahl in flottengroessen if not argumente.schnell or anzahl <= 10_000]
+    ergebnisse = []
+    ergebnisse += benchmark_kern(argumente.wiederholungen, groessen)
+    ergebnisse += benchmark_analysen(max(1, argumente.wiederholungen // 2), argumente.schnell)
+    ergebnisse += benchmark_laden(argumente.wiederholungen)
+    ergebnisse += benchmark_diagramme(argumente.wiederholungen)
+    if not argumente.schnell:
+        ergebnisse += benchmark_app(max(1, argumente.wiederholungen // 2))
+
+    with open(argumente.output, 'w', encoding='utf-8') as datei:
+        json.dump({
+            'version': _version(),
+            'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plattform': platform.platform(),
+            'ergebnisse': ergebnisse,
+        }, datei, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# Lasttest der Streamlit-App mit mehreren gleichzeitigen Sitzungen (ohne Browser, streamlit.testing.v1.AppTest)
+# Aufruf (aus dem Projektverzeichnis):  python benchmarks/lasttest.py [-s 1 5 10] [-o lasttest_ergebnisse.json]
+# Jede simulierte Sitzung durchläuft den typischen Ablauf: Ridepooling-System in 1.2 wählen, Fahrzeuge im Formular
+# hinzufügen, "Daten übernehmen & berechnen" drücken und den Schieberegler in 2.2 ziehen. Da AppTest je Durchlauf eine
+# prozessweite Runtime-Instanz setzt, läuft jede Sitzung in einem eigenen Prozess; gemeinsam genutzt wird nur der
+# Ergebnis-Cache auf der Festplatte (OEKORPS_CACHE), st.cache_resource gilt je Prozess.
+# Ausgegeben werden Durchsatz, Perzentile der Laufzeit je Durchlauf (Rerun) und der Speicherbedarf je Sitzung.
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+projektverzeichnis = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, projektverzeichnis)
+
+from benchmark import app_datei, _version  # noqa: E402
+
+standard_sitzungen = [1, 5, 10]
+perzentile = [50, 90, 95, 99]
+# Abschnitte, die im Ablauf aufgeklappt sind (Inhalte werden erst beim Aufklappen ausgeführt)
+offene_abschnitte = ['abschnitt_1_3', 'abschnitt_1_5', 'abschnitt_2_1', 'abschnitt_3_1', 'abschnitt_3_2']
+# Kilometerleistungen der hinzugefügten Fahrzeuge (Beispiel "bussi")
+kilometer_leer, kilometer_besetzt = 50422.0, 40063.0
+
+
+# Funktion zur Suche eines Widgets über seine Beschriftung
+def _widget(elemente, beschriftung):
+    treffer = [element for element in elemente if element.label.startswith(beschriftung)]
+    if not treffer:
+        raise RuntimeError(f"Widget '{beschriftung}' nicht gefunden.")
+    return treffer[0]
+
+
+# Funktion zum Ausführen eines Durchlaufs mit Zeitmessung; Ausnahmen der App werden als Fehler gemeldet
+def _durchlauf(at, schritt, messungen, aktion):
+    beginn = time.perf_counter()
+    aktion()
+    messungen.append((schritt, time.perf_counter() - beginn))
+    if at.exception:
+        raise RuntimeError(f"{schritt}: {at.exception[0].message}")
+
+
+# Funktion für eine simulierte Sitzung; gibt die Laufzeiten je Durchlauf und die AppTest-Instanz zurück
+def simulate_session(fahrzeuge=2, schritte_regler=5, denkzeit=0.0, timeout=120):
+    from streamlit.testing.v1 import AppTest
+
+    messungen = []
+    at = AppTest.from_file(app_datei, default_timeout=timeout)
+    for key in offene_abschnitte:
+        at.session_state[key] = True
+    _durchlauf(at, 'erster Durchlauf', messungen, at.run)
+    time.sleep(denkzeit)
+
+    _durchlauf(at, 'Auswahl 1.2', messungen, _widget(at.selectbox, 'Wählen Sie ein Ridepooling').select('bussi').run)
+    for _ in range(fahrzeuge):
+        time.sleep(denkzeit)
+        _durchlauf(at, 'Fahrzeug hinzufügen', messungen, _widget(at.button, 'Fahrzeug hinzufügen').click().run)
+    # Eingaben im Formular (data_editor) werden wie nach dem Bearbeiten direkt in die Flotte übernommen
+    flotte = at.session_state['fahrzeugflotte'].copy()
+    flotte[['Kilometer leer', 'Kilometer besetzt']] = [kilometer_leer, kilometer_besetzt]
+    at.session_state['fahrzeugflotte'] = flotte
+    at.session_state['fahrzeugflotte_version'] += 1
+    time.sleep(denkzeit)
+    _durchlauf(at, 'Daten übernehmen & berechnen', messungen, _widget(at.button, 'Daten übernehmen & berechnen').click().run)
+
+    # Ziehen des Schiebereglers in 2.2: jede Position löst einen eigenen Durchlauf aus
+    for wert in np.linspace(10.0, 40.0, schritte_regler):
+        time.sleep(denkzeit)
+        _durchlauf(at, 'Regler 2.2', messungen, _widget(at.slider, 'Angepasste durchschnittliche Platzausnutzung').set_value(round(float(wert), 1)).run)
+    return messungen, at
+
+
+# Funktion zur Zusammenfassung von Laufzeiten (Millisekunden)
+def _statistik(zeiten):
+    zeiten_ms = np.asarray(zeiten, dtype=np.float64) * 1000
+    statistik = {'anzahl': int(zeiten_ms.size), 'mittel_ms': float(zeiten_ms.mean()), 'max_ms': float(zeiten_ms.max())}
+    statistik.update({f'p{p}_ms': float(wert) for p, wert in zip(perzentile, np.percentile(zeiten_ms, perzentile))})
+    return statistik
+
+
+# Funktion für einen Prozess der Laststufe: Aufwärmen (Importe, st.cache_resource), gemeinsamer Start, eine Sitzung
+def _sitzung_prozess(start, warteschlange, optionen):
+    ergebnis = {'messungen': [], 'fehler': None}
+    try:
+        simulate_session(**optionen)
+        start.wait()
+        ergebnis['messungen'] = simulate_session(**optionen)[0]
+    except Exception as ausnahme:  # noqa: BLE001 - Fehler einer Sitzung sollen die übrigen nicht abbrechen
+        ergebnis['fehler'] = str(ausnahme)
+        start.abort()
+    ergebnis['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10  # Linux: Kilobyte
+    warteschlange.put(ergebnis)
+
+
+# Funktion für eine Laststufe: anzahl Sitzungen gleichzeitig, Durchsatz und Perzentile über alle Durchläufe
+def run_load_stage(anzahl, **optionen):
+    start = multiprocessing.Barrier(anzahl + 1)
+    warteschlange = multiprocessing.Queue()
+    prozesse = [multiprocessing.Process(target=_sitzung_prozess, args=(start, warteschlange, optionen)) for _ in range(anzahl)]
+    for prozess in prozesse:
+        prozess.start()
+    try:
+        start.wait()
+    except threading.BrokenBarrierError:
+        pass  # eine Sitzung ist beim Aufwärmen gescheitert; der Fehler wird mit den Ergebnissen gemeldet
+    beginn = time.perf_counter()
+    ergebnisse = [warteschlange.get() for _ in prozesse]
+    dauer = time.perf_counter() - beginn
+    for prozess in prozesse:
+        prozess.join()
+
+    fehler = [ergebnis['fehler'] for ergebnis in ergebnisse if ergebnis['fehler']]
+    messungen = [tuple(messung) for ergebnis in ergebnisse for messung in ergebnis['messungen']]
+    stufe = {
+        'sitzungen': anzahl,
+        'dauer_s': dauer,
+        'fehler': fehler,
+        'durchlaeufe': len(messungen),
+        'durchsatz_durchlaeufe_pro_s': len(messungen) / dauer,
+        'durchsatz_sitzungen_pro_s': (anzahl - len(fehler)) / dauer,
+        'max_rss_mb_pro_prozess': max(ergebnis['max_rss_mb'] for ergebnis in ergebnisse),
+    }
+    if messungen:
+        stufe['gesamt'] = _statistik([zeit for _, zeit in messungen])
+        stufe['schritte'] = {schritt: _statistik([zeit for name, zeit in messungen if name == schritt]) for schritt in dict.fromkeys(name for name, _ in messungen)}
+        print(f"{anzahl:>4} Sitzungen {stufe['durchsatz_durchlaeufe_pro_s']:8.2f} Durchläufe/s  p50 {stufe['gesamt']['p50_ms']:8.1f} ms  p95 {stufe['gesamt']['p95_ms']:8.1f} ms  p99 {stufe['gesamt']['p99_ms']:8.1f} ms  Fehler {len(fehler)}", file=sys.stderr)
+    return stufe
+
+
+# Funktion zur Messung des Speicherbedarfs je Sitzung: Sitzungen nacheinander in diesem Prozess ausführen und offen
+# halten (tracemalloc). Caches werden von der ersten Sitzung gefüllt; der Wert je Sitzung ist der Zuwachs danach.
+def measure_session_memory(anzahl, **optionen):
+    sitzungen = [simulate_session(**optionen)[1]]
+    gc.collect()
+    tracemalloc.start()
+    basis, _ = tracemalloc.get_traced_memory()
+    for _ in range(anzahl):
+        sitzungen.append(simulate_session(**optionen)[1])
+    gc.collect()
+    aktuell, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    speicher = {'sitzungen': anzahl, 'mb_pro_sitzung': (aktuell - basis) / anzahl / 2**20, 'spitzenspeicher_mb': spitze / 2**20}
+    print(f"Speicher je Sitzung {speicher['mb_pro_sitzung']:8.2f} MB (Spitze {speicher['spitzenspeicher_mb']:.1f} MB)", file=sys.stderr)
+    return speicher
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest der Streamlit-App mit gleichzeitigen simulierten Sitzungen.")
+    parser.add_argument('-o', '--output', default='lasttest_ergebnisse.json', help="Ausgabedatei (JSON)")
+    parser.add_argument('-s', '--sitzungen', type=int, nargs='+', default=standard_sitzungen, help="Anzahl gleichzeitiger Sitzungen je Laststufe")
+    parser.add_argument('--fahrzeuge', type=int, default=2, help="hinzugefügte Fahrzeuge je Sitzung")
+    parser.add_argument('--regler', type=int, default=5, help="Positionen des Schiebereglers in 2.2 je Sitzung")
+    parser.add_argument('--denkzeit', type=float, default=0.0, help="Pause zwischen den Eingaben (s)")
+    parser.add_argument('--speicher-sitzungen', type=int, default=3, help="Sitzungen für die Speichermessung (0: keine)")
+    argumente = parser.parse_args(argv)
+
+    arbeitsverzeichnis = os.getcwd()
+    os.chdir(os.path.dirname(app_datei))  # config.toml und Logo werden relativ zum Projektverzeichnis geladen
+    try:
+        optionen = {'fahrzeuge': argumente.fahrzeuge, 'schritte_regler': argumente.regler, 'denkzeit': argumente.denkzeit}
+        stufen = [run_load_stage(anzahl, **optionen) for anzahl in argumente.sitzungen]
+        speicher = measure_session_memory(argumente.speicher_sitzungen, **optionen) if argumente.speicher_sitzungen > 0 else None
+    finally:
+        os.chdir(arbeitsverzeichnis)
+
+    with open(argumente.output, 'w', encoding='utf-8') as datei:
+        json.dump({
+            'version': _version(),
+            'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+            'optionen': optionen,
+            'laststufen': stufen,
+            'speicher': speicher,
+        }, datei, ensure_ascii=False, indent=2)
+    return 1 if any(stufe['fehler'] for stufe in stufen) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# OekoRPS: Berechnungskern für den Vergleich der CO2eq-Emissionen von Bus- und Ridepooling-Systemen.
+# Das Paket ist bewusst frei von Streamlit- und Plotly-Importen, damit es auch in Batch-Jobs schnell importiert werden kann.
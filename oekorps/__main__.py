@@ -0,0 +1,7 @@
+# Einstiegspunkt für die Stapelverarbeitung: python -m oekorps szenario.toml -o ergebnisse.csv
+import sys
+
+from oekorps.kommandozeile import main
+
+if __name__ == '__main__':
+    sys.exit(main())
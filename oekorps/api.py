@@ -0,0 +1,180 @@
+# Lokaler HTTP/JSON-Dienst für die Berechnungen (Starlette, Start mit: python -m oekorps.api --port 8000)
+# Alle Berechnungsendpunkte nehmen eine Liste von Objekten entgegen (oder ein einzelnes Objekt), sodass ein Aufruf
+# viele Systeme auswertet. Die Eingaben entsprechen den Szenariodateien der Stapelverarbeitung (oekorps.kommandozeile);
+# Fehler werden je Eintrag zurückgegeben, ohne die übrigen Einträge zu verwerfen.
+#
+#   GET  /emissionsfaktoren  Emissionsfaktoren, Verkehrsmittel und Fahrzeugtypen aus den Referenzdaten
+#   POST /emissionsfaktoren  adjustierter Emissionsfaktor Strom (strom_emissionsdaten, oekostrom_anteil, pv_emissionsdaten)
+#   POST /kennzahlen         Fahrzeugflotten- und Fahrtleistungskennzahlen mit Verbrauch (Abschnitt 1.3)
+#   POST /bus                Platzausnutzung und angepasster CO2eq-Ausstoß des Busses (Abschnitte 2.1 und 2.2)
+#   POST /vergleich          alle Kennzahlen einschließlich Vergleich Bus / Ridepooling-System (Abschnitte 1.3 bis 3.1)
+#   GET  /stats              Anzahl der Anfragen und Antwortzeiten (p50/p99 in ms) je Endpunkt
+import argparse
+import json
+import time
+from collections import deque
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from oekorps.berechnung import (
+    bus_referenz, calculate_fleet_performance, calculate_adjusted_strom_emissionsdaten, calculate_new_CO2eq_wtw,
+    calculate_scenario_fleet_totals, calculate_scenario_occupancy, parse_number,
+)
+from oekorps.kommandozeile import calculate_scenario
+from oekorps.referenzdaten import load_referenzdaten, resolve_emissionsfaktor
+
+# Anzahl der Antwortzeiten je Endpunkt, aus denen die Perzentile berechnet werden
+latenz_fenster = 10_000
+
+
+class Latenzmessung:
+    # ASGI-Middleware zur Erfassung der Antwortzeiten je Endpunkt (gleitendes Fenster der letzten Anfragen)
+    # Erfasst werden nur die Endpunkte der App; alle übrigen Anfragen (z.B. 404) zählen gemeinsam unter "andere",
+    # damit unbekannte Pfade die Statistik nicht unbegrenzt wachsen lassen.
+
+    def __init__(self, app):
+        self.app = app
+        self.endpunkte = {f"{methode} {route.path}" for route in app.routes for methode in (route.methods or ())}
+        self.zeiten = {}
+        self.anzahl = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        beginn = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            endpunkt = f"{scope['method']} {scope['path']}"
+            if endpunkt not in self.endpunkte:
+                endpunkt = 'andere'
+            self.zeiten.setdefault(endpunkt, deque(maxlen=latenz_fenster)).append(time.perf_counter() - beginn)
+            self.anzahl[endpunkt] = self.anzahl.get(endpunkt, 0) + 1
+
+    def statistik(self):
+        ergebnis = {}
+        for endpunkt, zeiten in self.zeiten.items():
+            p50, p99 = np.percentile(np.fromiter(zeiten, dtype=np.float64), [50, 99]) * 1000
+            ergebnis[endpunkt] = {'anfragen': self.anzahl[endpunkt], 'p50_ms': round(float(p50), 3), 'p99_ms': round(float(p99), 3)}
+        return ergebnis
+
+
+# Funktion zum Einlesen des Anfragekörpers als Liste von Objekten
+async def _eintraege(request):
+    try:
+        daten = await request.json()
+    except json.JSONDecodeError:
+        return None
+    if isinstance(daten, dict):
+        daten = [daten]
+    if not isinstance(daten, list) or not all(isinstance(eintrag, dict) for eintrag in daten):
+        return None
+    return daten
+
+
+# Funktion zur Auswertung aller Einträge; Fehler einzelner Einträge werden als {'fehler': ...} zurückgegeben
+def _evaluate(funktion, eintraege):
+    ergebnisse = []
+    for eintrag in eintraege:
+        try:
+            ergebnisse.append(funktion(eintrag))
+        except (ValueError, KeyError, TypeError, ZeroDivisionError) as fehler:
+            ergebnisse.append({'fehler': str(fehler) if not isinstance(fehler, KeyError) else f"Fehlender Wert: {fehler}"})
+    return ergebnisse
+
+
+# Funktion zur Erstellung eines Berechnungsendpunkts (Auswertung im Threadpool, damit die Ereignisschleife frei bleibt)
+def _endpunkt(funktion):
+    async def verarbeiten(request):
+        eintraege = await _eintraege(request)
+        if eintraege is None:
+            return JSONResponse({'fehler': "Erwartet wird ein JSON-Objekt oder eine Liste von JSON-Objekten."}, status_code=400)
+        return JSONResponse({'ergebnisse': await run_in_threadpool(_evaluate, funktion, eintraege)})
+    return verarbeiten
+
+
+# Eingaben mit Dateipfaden werden im Dienst nicht gelesen (nur Fahrzeuglisten im Anfragekörper)
+def _check_fleet(eintrag):
+    if isinstance(eintrag.get('fahrzeugflotte'), str):
+        raise ValueError("Flottendateien werden nicht unterstützt, bitte 'fahrzeuge' als Liste angeben.")
+
+
+def strom_emissionsdaten(eintrag):
+    emissionsfaktoren = load_referenzdaten()['emissionsfaktoren']
+    strom = resolve_emissionsfaktor(eintrag.get('strom_emissionsdaten', 0), emissionsfaktoren['strom'], 'Strom')
+    oekostrom_anteil = parse_number(eintrag.get('oekostrom_anteil', 0), 'oekostrom_anteil')
+    pv_emissionsdaten = parse_number(eintrag.get('pv_emissionsdaten', emissionsfaktoren['pv']), 'pv_emissionsdaten')
+    return {'strom_emissionsdaten': calculate_adjusted_strom_emissionsdaten(strom, oekostrom_anteil, pv_emissionsdaten)}
+
+
+def kennzahlen(eintrag):
+    _check_fleet(eintrag)
+    fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, verbrauch = calculate_scenario_fleet_totals(eintrag)
+    ergebnis = calculate_fleet_performance(fahrzeugkilometer_leer, fahrzeugkilometer_besetzt,
+                                           parse_number(eintrag.get('abgeschlossene_buchungen', 0), 'abgeschlossene_buchungen'),
+                                           parse_number(eintrag.get('transportierte_fahrgaeste', 0), 'transportierte_fahrgaeste'))
+    ergebnis.update(verbrauch)
+    return ergebnis
+
+
+def bus(eintrag):
+    if 'bus' not in eintrag and 'adjusted_occupancy' not in eintrag and 'personen_km' in eintrag:
+        eintrag = {'bus': eintrag}  # Angaben zum Bus (Abschnitt 2.1) direkt im Eintrag
+    adjusted_occupancy = calculate_scenario_occupancy(eintrag)
+    return {'adjusted_occupancy': adjusted_occupancy, 'new_CO2eq_wtw': calculate_new_CO2eq_wtw(*bus_referenz(), adjusted_occupancy)}
+
+
+def vergleich(eintrag):
+    _check_fleet(eintrag)
+    return calculate_scenario(eintrag)
+
+
+async def emissionsfaktoren(request):
+    referenzdaten = load_referenzdaten()
+    return JSONResponse({
+        'emissionsfaktoren': referenzdaten['emissionsfaktoren'],
+        'verkehrsmittel': referenzdaten['verkehrsmittel'],
+        'fahrzeugtypen': referenzdaten['fahrzeugtypen'],
+        'bus': referenzdaten['bus'],
+    })
+
+
+async def stats(request):
+    return JSONResponse(request.app.state.latenzmessung.statistik())
+
+
+def create_app():
+    app = Starlette(routes=[
+        Route('/emissionsfaktoren', emissionsfaktoren, methods=['GET']),
+        Route('/emissionsfaktoren', _endpunkt(strom_emissionsdaten), methods=['POST']),
+        Route('/kennzahlen', _endpunkt(kennzahlen), methods=['POST']),
+        Route('/bus', _endpunkt(bus), methods=['POST']),
+        Route('/vergleich', _endpunkt(vergleich), methods=['POST']),
+        Route('/stats', stats, methods=['GET']),
+    ])
+    # Referenzdaten einmal beim Start laden; danach liefert load_referenzdaten den Prozess-Zwischenspeicher
+    load_referenzdaten()
+    app.state.latenzmessung = Latenzmessung(app)
+    return app.state.latenzmessung
+
+
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog='python -m oekorps.api', description="Lokaler HTTP/JSON-Dienst für den Vergleich der CO2eq-Emissionen von Bus- und Ridepooling-System.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    argumente = parser.parse_args(argv)
+    uvicorn.run(app, host=argumente.host, port=argumente.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
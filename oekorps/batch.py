@@ -0,0 +1,136 @@
+# Batch-Auswertung vieler Ridepooling-Systeme und Betrachtungszeiträume
+# Die Formeln entsprechen oekorps.berechnung, werden aber spaltenweise mit NumPy/pandas über alle
+# Fahrzeuge gerechnet und je System und Zeitraum per groupby aggregiert.
+import numpy as np
+import pandas as pd
+
+from oekorps.berechnung import bus_referenz, referenz_emissionsfaktoren
+
+# Vorausgewählte Emissionsfaktoren aus den Referenzdaten, wenn beim Aufruf keine angegeben sind
+standard_emissionsdaten = {
+    'benzin_emissionsdaten': ('benzin', "Helmholtz-Gemeinschaft Deutscher Forschungszentren [CO2eq]"),
+    'diesel_emissionsdaten': ('diesel', "Helmholtz-Gemeinschaft Deutscher Forschungszentren [CO2eq]"),
+    'strom_emissionsdaten': ('strom', "Umweltbundesamt: CO2eq-Äquivalente mit Vorketten (2022) [CO2eq]"),
+}
+
+# Schlüsselspalten und Spalten der Fahrzeugtabelle (wie in st.session_state['vehicle_list'])
+schluessel_spalten = ['System', 'Periode']
+verbrauch_spalten = ['Benzinverbrauch (l/100km)', 'Dieselverbrauch (l/100km)', 'Stromverbrauch (kWh/100km)']
+kilometer_spalten = ['Kilometer leer', 'Kilometer besetzt']
+
+# Spalten der Buchungstabelle (wie in ridepooling_data); die optionale Spalte 'Personenkilometer' enthält
+# gemessene Personenkilometer (z.B. aus oekorps.telematik) und ersetzt die Näherung über die Buchungen.
+buchungs_spalten = ['Fahrten', 'Transportierte Fahrgäste']
+
+
+# Funktion zur Division mit 0 als Ergebnis bei Nenner 0 (wie "... if x > 0 else 0" im Berechnungskern)
+# Wird auch von den Modulen für Zeitreihen, Systemvergleich, Busflotte, Fahrgastprofile und Verlagerung verwendet.
+def safe_divide(zaehler, nenner):
+    ergebnis = np.zeros(np.broadcast(zaehler, nenner).shape)
+    np.divide(zaehler, nenner, out=ergebnis, where=nenner > 0)
+    return ergebnis
+
+
+# Funktion zur Aggregation von Kilometern und Verbräuchen je System und Zeitraum
+def aggregate_fleet(fahrzeuge, schluessel=schluessel_spalten):
+    kilometer_leer = fahrzeuge['Kilometer leer'].to_numpy(dtype=np.float64)
+    kilometer_besetzt = fahrzeuge['Kilometer besetzt'].to_numpy(dtype=np.float64)
+    kilometer_gesamt_100 = (kilometer_leer + kilometer_besetzt) / 100
+
+    je_fahrzeug = pd.DataFrame({
+        'fahrzeugkilometer_leer': kilometer_leer,
+        'fahrzeugkilometer_besetzt': kilometer_besetzt,
+        'benzinverbrauch_gesamt': fahrzeuge['Benzinverbrauch (l/100km)'].to_numpy(dtype=np.float64) * kilometer_gesamt_100,
+        'dieselverbrauch_gesamt': fahrzeuge['Dieselverbrauch (l/100km)'].to_numpy(dtype=np.float64) * kilometer_gesamt_100,
+        'stromverbrauch_gesamt': fahrzeuge['Stromverbrauch (kWh/100km)'].to_numpy(dtype=np.float64) * kilometer_gesamt_100,
+    })
+    for spalte in schluessel:
+        je_fahrzeug[spalte] = fahrzeuge[spalte].to_numpy()
+    return je_fahrzeug.groupby(list(schluessel), sort=True, observed=True).sum()
+
+
+# Funktion zur Berechnung aller Kennzahlen für viele Systeme und Zeiträume in einem Durchlauf
+# fahrzeuge: eine Zeile je Fahrzeug(typ), System und Zeitraum; buchungen: eine Zeile je System und Zeitraum.
+# Emissionsfaktoren können als Skalar übergeben oder als Spalte in buchungen je Zeile überschrieben werden;
+# ohne Angabe gelten die Werte aus den Referenzdaten (standard_emissionsdaten, PV, Platzausnutzung des Busses).
+def calculate_batch(fahrzeuge, buchungen, benzin_emissionsdaten=None, diesel_emissionsdaten=None, strom_emissionsdaten=None,
+                    oekostrom_anteil=0, pv_emissionsdaten=None, adjusted_occupancy=None, schluessel=schluessel_spalten):
+    schluessel = list(schluessel)
+    initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+    emissionsfaktoren = referenz_emissionsfaktoren()
+    benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten = (
+        emissionsfaktoren[katalog][bezeichnung] if wert is None else wert
+        for wert, (katalog, bezeichnung) in zip((benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten), standard_emissionsdaten.values()))
+    if pv_emissionsdaten is None:
+        pv_emissionsdaten = emissionsfaktoren['pv']
+    if adjusted_occupancy is None:
+        adjusted_occupancy = initial_occupancy
+    flotte = aggregate_fleet(fahrzeuge, schluessel)
+    ergebnis = flotte.join(buchungen.set_index(schluessel), how='left')
+
+    standardwerte = {
+        'benzin_emissionsdaten': benzin_emissionsdaten,
+        'diesel_emissionsdaten': diesel_emissionsdaten,
+        'strom_emissionsdaten': strom_emissionsdaten,
+        'oekostrom_anteil': oekostrom_anteil,
+        'pv_emissionsdaten': pv_emissionsdaten,
+        'adjusted_occupancy': adjusted_occupancy,
+    }
+    faktoren = {}
+    for spalte, standardwert in standardwerte.items():
+        if spalte in ergebnis.columns:
+            faktoren[spalte] = ergebnis[spalte].fillna(standardwert).to_numpy(dtype=np.float64)
+        else:
+            faktoren[spalte] = np.full(len(ergebnis), standardwert, dtype=np.float64)
+
+    abgeschlossene_buchungen = ergebnis['Fahrten'].fillna(0).to_numpy(dtype=np.float64)
+    transportierte_fahrgaeste = ergebnis['Transportierte Fahrgäste'].fillna(0).to_numpy(dtype=np.float64)
+    fahrzeugkilometer_leer = ergebnis['fahrzeugkilometer_leer'].to_numpy()
+    fahrzeugkilometer_besetzt = ergebnis['fahrzeugkilometer_besetzt'].to_numpy()
+
+    # Fahrzeugflotte & Fahrtleistung (Abschnitt 1.3)
+    fahrzeugkilometer_gesamt = np.round(fahrzeugkilometer_leer + fahrzeugkilometer_besetzt, 2)
+    personenkilometer_gefahren = np.round(safe_divide(fahrzeugkilometer_besetzt, abgeschlossene_buchungen) * transportierte_fahrgaeste, 2)
+    if 'Personenkilometer' in ergebnis.columns:
+        gemessen = ergebnis['Personenkilometer'].to_numpy(dtype=np.float64)
+        personenkilometer_gefahren = np.where(np.isnan(gemessen), personenkilometer_gefahren, np.round(gemessen, 2))
+    ergebnis['fahrzeugkilometer_gesamt'] = fahrzeugkilometer_gesamt
+    ergebnis['durchschnittliche_fahrtdistanz_mit_lk'] = np.round(safe_divide(fahrzeugkilometer_gesamt, abgeschlossene_buchungen), 2)
+    ergebnis['durchschnittliche_fahrtdistanz_mit_bk'] = np.round(safe_divide(fahrzeugkilometer_besetzt, abgeschlossene_buchungen), 2)
+    ergebnis['personenkilometer_gefahren'] = personenkilometer_gefahren
+    ergebnis['leerkilometeranteil'] = np.round(safe_divide(fahrzeugkilometer_leer, fahrzeugkilometer_gesamt) * 100, 2)
+    ergebnis['buendelungsquote'] = np.round(safe_divide(personenkilometer_gefahren, fahrzeugkilometer_gesamt), 2)
+    ergebnis['besetzungsquote'] = np.round(safe_divide(personenkilometer_gefahren, fahrzeugkilometer_besetzt), 2)
+
+    # Emissionsdaten (Abschnitt 1.4)
+    anteil = faktoren['oekostrom_anteil'] / 100.0
+    strom_adjustiert = np.round(faktoren['strom_emissionsdaten'] * (1 - anteil) + faktoren['pv_emissionsdaten'] * anteil, 1)
+    for spalte in ['benzin_emissionsdaten', 'diesel_emissionsdaten', 'oekostrom_anteil', 'pv_emissionsdaten']:
+        ergebnis[spalte] = faktoren[spalte]
+    ergebnis['strom_emissionsdaten'] = strom_adjustiert
+
+    # Umweltwirkung Ridepooling-System (Abschnitt 1.5)
+    benzin_emissionen = ergebnis['benzinverbrauch_gesamt'].to_numpy() * faktoren['benzin_emissionsdaten'] / 1000
+    diesel_emissionen = ergebnis['dieselverbrauch_gesamt'].to_numpy() * faktoren['diesel_emissionsdaten'] / 1000
+    strom_emissionen = ergebnis['stromverbrauch_gesamt'].to_numpy() * strom_adjustiert / 1000 * (1 - anteil)
+    CO2eq_emissionen_gesamt_rps = np.round(benzin_emissionen + diesel_emissionen + strom_emissionen, 4)
+    ergebnis['benzin_emissionen'] = benzin_emissionen
+    ergebnis['diesel_emissionen'] = diesel_emissionen
+    ergebnis['strom_emissionen'] = strom_emissionen
+    ergebnis['CO2eq_emissionen_gesamt_rps'] = CO2eq_emissionen_gesamt_rps
+    ergebnis['CO2eq_emissionen_pro_personenkilometer_rps_g'] = np.round(safe_divide(CO2eq_emissionen_gesamt_rps, personenkilometer_gefahren), 4) * 1000
+
+    # Vergleich mit dem Bus (Abschnitte 2.2 und 3.1)
+    ergebnis['adjusted_occupancy'] = faktoren['adjusted_occupancy']
+    ergebnis['new_CO2eq_wtw'] = initial_CO2eq_wtw * (initial_occupancy / faktoren['adjusted_occupancy'])
+    ergebnis['differenz_bus_rps'] = ergebnis['CO2eq_emissionen_pro_personenkilometer_rps_g'] - ergebnis['new_CO2eq_wtw']
+
+    return ergebnis.reset_index()
+
+
+# Funktion zur Umwandlung einer vehicle_list (Liste von Dictionaries) in eine Fahrzeugtabelle für calculate_batch
+def vehicle_list_to_frame(vehicle_list, system='', periode=''):
+    fahrzeuge = pd.DataFrame(list(vehicle_list), columns=['Fahrzeugtyp'] + verbrauch_spalten + kilometer_spalten)
+    fahrzeuge['System'] = system
+    fahrzeuge['Periode'] = periode
+    return fahrzeuge
@@ -0,0 +1,229 @@
+# Belegungsprofile je Linie, Tagtyp und Stunde aus automatischen Fahrgastzählsystemen (AFZS)
+# Die Platzausnutzung des Busses aus Abschnitt 2.1 liegt nur als Jahreswert für den 24-Stunden-Betrieb vor.
+# Aus den Zählereignissen (eines je Haltestellenabfahrt) werden blockweise Personen- und Platzkilometer je
+# Linie x Tagtyp x Stunde in ein festes Zahlenraster summiert. Der Speicherbedarf hängt nur von der Anzahl der
+# Linien ab; über die Stunden kumulierte Summen machen die Abfrage beliebiger Stundenbereiche zu Indexzugriffen.
+#
+# Erwartete Spalten je Zählereignis:
+#   Linie         Linienbezeichnung
+#   Zeitpunkt     Abfahrt an der Haltestelle
+#   Kilometer     Entfernung bis zur nächsten Haltestelle in km
+#   Fahrgäste     Besetzung des Fahrzeugs nach der Abfahrt
+#   Platzangebot  Sitz- und Stehplätze des Fahrzeugs (optional, sonst einheitliches Platzangebot)
+#
+# Für das Ridepooling-System werden Fahrzeug- und Personenkilometer je Stunde aus den Telematikdaten
+# (oekorps.telematik) auf dasselbe Raster summiert.
+import numpy as np
+import pandas as pd
+
+from oekorps.batch import safe_divide
+from oekorps.berechnung import bus_referenz
+from oekorps.dateien import detect_separator, iter_trip_blocks
+
+tagtypen = ['Werktag', 'Samstag', 'Sonn- und Feiertag']
+afzs_spalten = ['Linie', 'Zeitpunkt', 'Kilometer', 'Fahrgäste', 'Platzangebot']
+afzs_blockgroesse = 1_000_000
+
+_stunden = 24
+
+
+# Funktion zur Bestimmung von Tagtyp (Index in tagtypen) und Stunde je Zeitpunkt (ganzzahlig über Stunden seit 1970)
+# feiertage: Datumsangaben, die wie Sonntage behandelt werden
+def _day_type_and_hour(zeitpunkte, feiertage=()):
+    stunden = pd.to_datetime(zeitpunkte).to_numpy(dtype='datetime64[h]').astype(np.int64)
+    tage = stunden // _stunden
+    wochentag = (tage + 3) % 7  # 01.01.1970 war ein Donnerstag, 0 = Montag
+    tagtyp = np.where(wochentag < 5, 0, np.where(wochentag == 5, 1, 2))
+    if len(feiertage):
+        feiertag_tage = pd.to_datetime(list(feiertage)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+        tagtyp = np.where(np.isin(tage, feiertag_tage), 2, tagtyp)
+    return tagtyp, stunden - tage * _stunden
+
+
+class Stundenprofil:
+    # Summen je Gruppe (z.B. Linie) x Tagtyp x Stunde für mehrere Größen (z.B. Personen- und Platzkilometer)
+
+    def __init__(self, gruppen, summen):
+        # gruppen: Bezeichnungen der Gruppen, summen: {Größe: Array der Form (Gruppen, Tagtypen, 24)}
+        self.gruppen = list(gruppen)
+        self.groessen = list(summen)
+        self._kumuliert = {}
+        for groesse, werte in summen.items():
+            werte = np.asarray(werte, dtype=np.float64).reshape(len(self.gruppen), len(tagtypen), _stunden)
+            kumuliert = np.zeros(werte.shape[:2] + (_stunden + 1,))
+            np.cumsum(werte, axis=2, out=kumuliert[:, :, 1:])
+            self._kumuliert[groesse] = kumuliert
+
+    def __len__(self):
+        return len(self.gruppen)
+
+    # Summen je Stunde (Array der Form (Gruppen, Tagtypen, 24))
+    def hourly(self, groesse):
+        return np.diff(self._kumuliert[groesse], axis=2)
+
+    # Auswahl der Gruppen und Tagtypen als Indizes (None: alle)
+    def _auswahl(self, gruppen, auswahl_tagtypen):
+        gruppen_index = np.arange(len(self.gruppen)) if gruppen is None else pd.Index(self.gruppen).get_indexer(list(gruppen))
+        tagtyp_index = np.arange(len(tagtypen)) if auswahl_tagtypen is None else pd.Index(tagtypen).get_indexer(list(auswahl_tagtypen))
+        if (gruppen_index < 0).any() or (tagtyp_index < 0).any():
+            raise ValueError("Unbekannte Linie oder unbekannter Tagtyp in der Auswahl.")
+        return gruppen_index, tagtyp_index
+
+    # Summe einer Größe je Gruppe im Stundenbereich [von, bis) über die gewählten Tagtypen
+    # Bereiche über Mitternacht (z.B. von=22, bis=6) werden aus zwei Teilbereichen gebildet.
+    def range_sums(self, groesse, von=0, bis=24, gruppen=None, auswahl_tagtypen=None):
+        if not (0 <= von <= _stunden and 0 <= bis <= _stunden):
+            raise ValueError("Stunden müssen zwischen 0 und 24 liegen.")
+        gruppen_index, tagtyp_index = self._auswahl(gruppen, auswahl_tagtypen)
+        kumuliert = self._kumuliert[groesse][np.ix_(gruppen_index, tagtyp_index)]
+        if von <= bis:
+            werte = kumuliert[:, :, bis] - kumuliert[:, :, von]
+        else:
+            werte = kumuliert[:, :, _stunden] - kumuliert[:, :, von] + kumuliert[:, :, bis]
+        return werte.sum(axis=1)
+
+    # Summe einer Größe je Stunde (24 Werte) über die gewählten Gruppen und Tagtypen
+    def hour_sums(self, groesse, gruppen=None, auswahl_tagtypen=None):
+        gruppen_index, tagtyp_index = self._auswahl(gruppen, auswahl_tagtypen)
+        return self.hourly(groesse)[np.ix_(gruppen_index, tagtyp_index)].sum(axis=(0, 1))
+
+    # Speichern als komprimierte NumPy-Datei (.npz), damit große Zähldaten nur einmal aggregiert werden
+    def save(self, pfad):
+        np.savez_compressed(pfad, gruppen=np.asarray(self.gruppen, dtype=str),
+                            **{groesse: self.hourly(groesse) for groesse in self.groessen})
+
+    @classmethod
+    def load(cls, pfad):
+        with np.load(pfad, allow_pickle=False) as daten:
+            return cls(daten['gruppen'].tolist(), {groesse: daten[groesse] for groesse in daten.files if groesse != 'gruppen'})
+
+
+# Funktion zum blockweisen Summieren von Werten auf das Raster Gruppe x Tagtyp x Stunde
+# bloecke liefert je Block (Gruppen, Tagtypen, Stunden, {Größe: Werte}); neue Gruppen erweitern das Raster.
+def _bin_blocks(bloecke, groessen):
+    gruppen = pd.Index([], dtype=object)
+    summen = {groesse: np.zeros((0, len(tagtypen), _stunden)) for groesse in groessen}
+    for gruppe, tagtyp, stunde, werte in bloecke:
+        codes, werte_gruppen = pd.factorize(gruppe)
+        neu = pd.Index(werte_gruppen).difference(gruppen)
+        if len(neu):
+            gruppen = gruppen.append(neu)
+            for groesse in groessen:
+                summen[groesse] = np.concatenate([summen[groesse], np.zeros((len(neu), len(tagtypen), _stunden))])
+        zelle = (gruppen.get_indexer(werte_gruppen)[codes] * len(tagtypen) + tagtyp) * _stunden + stunde
+        for groesse in groessen:
+            summen[groesse] += np.bincount(zelle, weights=werte[groesse], minlength=summen[groesse].size).reshape(summen[groesse].shape)
+    reihenfolge = np.argsort(gruppen.to_numpy(dtype=str), kind='stable')
+    return Stundenprofil(gruppen.to_numpy(dtype=str)[reihenfolge], {groesse: summen[groesse][reihenfolge] for groesse in groessen})
+
+
+# Generator für die Blöcke einer CSV- oder Parquet-Datei mit Zählereignissen (oder eines Datei-Objekts)
+def _iter_apc_blocks(datei, dateiname, blockgroesse):
+    endung = dateiname.lower().rsplit('.', 1)[-1]
+    if endung == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_datei = pq.ParquetFile(datei, memory_map=isinstance(datei, str))
+        spalten = [spalte for spalte in afzs_spalten if spalte in parquet_datei.schema_arrow.names]
+        for batch in parquet_datei.iter_batches(batch_size=blockgroesse, columns=spalten):
+            yield batch.to_pandas()
+    elif endung == 'csv':
+        trennzeichen = detect_separator(datei)
+        yield from pd.read_csv(datei, chunksize=blockgroesse, sep=trennzeichen, decimal=',' if trennzeichen == ';' else '.',
+                               usecols=lambda spalte: spalte in afzs_spalten, dtype={'Linie': str})
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: .{endung} (erlaubt sind CSV und Parquet).")
+
+
+# Funktion zum Einlesen von AFZS-Daten: Personen- und Platzkilometer je Linie x Tagtyp x Stunde
+# dateien: Pfad, Datei-Objekt oder Liste davon; platzangebot gilt für Ereignisse ohne eigenes Platzangebot.
+def aggregate_apc(dateien, platzangebot=78.5186, feiertage=(), blockgroesse=afzs_blockgroesse):
+    if isinstance(dateien, str) or hasattr(dateien, 'read'):
+        dateien = [dateien]
+
+    def bloecke():
+        for datei in dateien:
+            dateiname = getattr(datei, 'name', str(datei))
+            for block in _iter_apc_blocks(datei, dateiname, blockgroesse):
+                fehlende = [spalte for spalte in afzs_spalten[:4] if spalte not in block.columns]
+                if fehlende:
+                    raise ValueError(f"Die folgenden Spalten fehlen in der Datei {dateiname}: {', '.join(fehlende)}")
+                block = block[block['Zeitpunkt'].notna()]
+                kilometer = pd.to_numeric(block['Kilometer'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+                fahrgaeste = pd.to_numeric(block['Fahrgäste'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+                plaetze = np.full(len(block), float(platzangebot))
+                if 'Platzangebot' in block.columns:
+                    plaetze = pd.to_numeric(block['Platzangebot'], errors='coerce').fillna(float(platzangebot)).to_numpy(dtype=np.float64)
+                if (kilometer < 0).any() or (fahrgaeste < 0).any():
+                    raise ValueError(f"Negative Kilometer oder Fahrgäste in der Datei {dateiname}.")
+                tagtyp, stunde = _day_type_and_hour(block['Zeitpunkt'], feiertage)
+                yield (block['Linie'].fillna('').astype(str).to_numpy(), tagtyp, stunde,
+                       {'Personenkilometer': kilometer * fahrgaeste, 'Platzkilometer': kilometer * plaetze})
+
+    return _bin_blocks(bloecke(), ['Personenkilometer', 'Platzkilometer'])
+
+
+# Funktion zum Einlesen von Telematikdaten des Ridepooling-Systems: Fahrzeug- und Personenkilometer je
+# Fahrzeugtyp x Tagtyp x Stunde (Spalten wie in oekorps.telematik, Spalte 'Zeitpunkt' erforderlich)
+# pfade: Pfad, Datei-Objekt oder Liste davon
+def aggregate_rides_by_hour(pfade, feiertage=(), blockgroesse=afzs_blockgroesse):
+    if isinstance(pfade, str) or hasattr(pfade, 'read'):
+        pfade = [pfade]
+
+    def bloecke():
+        for pfad in pfade:
+            for block in iter_trip_blocks(pfad, blockgroesse):
+                fehlende = [spalte for spalte in ['Fahrzeugtyp', 'Zeitpunkt', 'Kilometer', 'Fahrgäste'] if spalte not in block.columns]
+                if fehlende:
+                    raise ValueError(f"Die folgenden Spalten fehlen in der Datei {getattr(pfad, 'name', pfad)}: {', '.join(fehlende)}")
+                kilometer = pd.to_numeric(block['Kilometer'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+                fahrgaeste = pd.to_numeric(block['Fahrgäste'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+                tagtyp, stunde = _day_type_and_hour(block['Zeitpunkt'], feiertage)
+                yield (block['Fahrzeugtyp'].astype(str).to_numpy(), tagtyp, stunde,
+                       {'Fahrzeugkilometer': kilometer, 'Personenkilometer': kilometer * fahrgaeste})
+
+    return _bin_blocks(bloecke(), ['Fahrzeugkilometer', 'Personenkilometer'])
+
+
+# Funktion zur Berechnung der Platzausnutzung des Busses je Linie im Stundenbereich [von, bis)
+def occupancy_by_line(bus, von=0, bis=24, auswahl_tagtypen=None):
+    personen_km = bus.range_sums('Personenkilometer', von, bis, auswahl_tagtypen=auswahl_tagtypen)
+    platz_km = bus.range_sums('Platzkilometer', von, bis, auswahl_tagtypen=auswahl_tagtypen)
+    return pd.DataFrame({
+        'Linie': bus.gruppen,
+        'Personenkilometer': personen_km,
+        'Platzkilometer': platz_km,
+        'Platzausnutzung (%)': safe_divide(personen_km, platz_km) * 100,
+    })
+
+
+# Funktion zum Vergleich je Stunde: Platzausnutzung und CO2eq-Emissionen des Busses und des Ridepooling-Systems
+# Die Emissionen des Busses werden wie in Abschnitt 2.2 mit der Platzausnutzung skaliert, ausgehend von
+# CO2eq_bus_referenz (g/Pkm) bei platzausnutzung_referenz (%), ohne Angabe die Werte aus den Referenzdaten. Für das Ridepooling-System werden mit einem
+# Stundenprofil (rps) die Fahrzeugkilometer je Stunde mit CO2eq_pro_fahrzeugkilometer bewertet, sonst gilt
+# der Jahreswert CO2eq_rps_g für alle Stunden. Stunden ohne Personenkilometer erhalten NaN.
+def compare_by_hour(bus, CO2eq_rps_g=0.0, rps=None, CO2eq_pro_fahrzeugkilometer=0.0, CO2eq_bus_referenz=None,
+                    platzausnutzung_referenz=None, linien=None, auswahl_tagtypen=None):
+    if CO2eq_bus_referenz is None or platzausnutzung_referenz is None:
+        referenz = bus_referenz()
+        CO2eq_bus_referenz = referenz[0] if CO2eq_bus_referenz is None else CO2eq_bus_referenz
+        platzausnutzung_referenz = referenz[1] if platzausnutzung_referenz is None else platzausnutzung_referenz
+    personen_km = bus.hour_sums('Personenkilometer', linien, auswahl_tagtypen)
+    platz_km = bus.hour_sums('Platzkilometer', linien, auswahl_tagtypen)
+    platzausnutzung = np.where(platz_km > 0, safe_divide(personen_km, platz_km) * 100, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        CO2eq_bus = np.where(platzausnutzung > 0, CO2eq_bus_referenz * platzausnutzung_referenz / platzausnutzung, np.nan)
+    if rps is not None:
+        rps_personen_km = rps.hour_sums('Personenkilometer', auswahl_tagtypen=auswahl_tagtypen)
+        rps_fahrzeug_km = rps.hour_sums('Fahrzeugkilometer', auswahl_tagtypen=auswahl_tagtypen)
+        CO2eq_rps = np.where(rps_personen_km > 0, safe_divide(rps_fahrzeug_km * CO2eq_pro_fahrzeugkilometer, rps_personen_km), np.nan)
+    else:
+        CO2eq_rps = np.full(_stunden, float(CO2eq_rps_g))
+    return pd.DataFrame({
+        'Stunde': np.arange(_stunden),
+        'Personenkilometer Bus': personen_km,
+        'Platzausnutzung Bus (%)': platzausnutzung,
+        'CO2eq Bus (g/Pkm)': CO2eq_bus,
+        'CO2eq Ridepooling (g/Pkm)': CO2eq_rps,
+        'Differenz Bus - Ridepooling (g/Pkm)': CO2eq_bus - CO2eq_rps,
+    })
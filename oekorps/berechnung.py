@@ -0,0 +1,220 @@
+# Berechnungskern ohne Benutzeroberfläche
+# Alle Formeln aus Vergleich_Bus_und_RPS.py sind hier als reine Funktionen abgelegt. Die Ergebnisse
+# werden als Dictionaries mit denselben Schlüsseln zurückgegeben, die die App im st.session_state ablegt.
+import os
+
+from oekorps.referenzdaten import load_referenzdaten, verbrauch_spalten
+
+# Die Referenzwerte (Bus, Emissionsfaktoren) werden bei jedem Aufruf über load_referenzdaten() gelesen, damit
+# Änderungen an oekorps/daten/referenzdaten.toml ohne Neustart des Prozesses übernommen werden. Der Abruf ist ein
+# Wörterbuchzugriff; die Datei wird höchstens alle referenzdaten.pruef_intervall Sekunden auf Änderungen geprüft.
+
+
+# Funktion zum Abruf der Referenzwerte des Busses (Umweltbundesamt, 'umweltfreundlich mobil!', 2022; VDV Statistik 2022)
+# Rückgabe: CO2eq-Ausstoß in g/Pkm (Well-to-Wheel) und durchschnittliche Platzausnutzung in %
+def bus_referenz():
+    bus = load_referenzdaten()['bus']
+    return bus['initial_CO2eq_wtw'], bus['initial_occupancy']
+
+
+# Funktion zum Abruf der vorausgewählten Emissionsfaktoren (benzin/diesel in g/l, strom in g/kWh, pv in g/kWh)
+def referenz_emissionsfaktoren():
+    return load_referenzdaten()['emissionsfaktoren']
+
+
+# Funktion zur Berechnung der Kilometer leer und besetzt für die gesamte Flotte
+def calculate_fleet_km(vehicle_list):
+    fahrzeugkilometer_leer = sum(vehicle['Kilometer leer'] for vehicle in vehicle_list)
+    fahrzeugkilometer_besetzt = sum(vehicle['Kilometer besetzt'] for vehicle in vehicle_list)
+    return fahrzeugkilometer_leer, fahrzeugkilometer_besetzt
+
+
+# Funktion zur Berechnung der Fahrzeugflotten- und Fahrtleistungskennzahlen (Abschnitt 1.3)
+# Liegen gemessene Personenkilometer vor (z.B. aus Telematikdaten), ersetzen sie die Näherung über die Buchungen.
+def calculate_fleet_performance(fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, abgeschlossene_buchungen, transportierte_fahrgaeste, personenkilometer_gefahren=None):
+    abgeschlossene_buchungen = float(abgeschlossene_buchungen)
+    transportierte_fahrgaeste = float(transportierte_fahrgaeste)
+    fahrzeugkilometer_leer = float(fahrzeugkilometer_leer)
+    fahrzeugkilometer_besetzt = float(fahrzeugkilometer_besetzt)
+    fahrzeugkilometer_gesamt = round(fahrzeugkilometer_leer + fahrzeugkilometer_besetzt, 2)
+    durchschnittliche_fahrtdistanz_mit_lk = round(fahrzeugkilometer_gesamt / abgeschlossene_buchungen, 2) if abgeschlossene_buchungen > 0 else 0
+    durchschnittliche_fahrtdistanz_mit_bk = round(fahrzeugkilometer_besetzt / abgeschlossene_buchungen, 2) if abgeschlossene_buchungen > 0 else 0
+    if personenkilometer_gefahren is None:
+        personenkilometer_gefahren = round((fahrzeugkilometer_besetzt / abgeschlossene_buchungen) * transportierte_fahrgaeste, 2) if abgeschlossene_buchungen > 0 else 0
+    else:
+        personenkilometer_gefahren = round(float(personenkilometer_gefahren), 2)
+
+    # Berechnungen der neuen Kennzahlen
+    leerkilometeranteil = round((fahrzeugkilometer_leer / fahrzeugkilometer_gesamt) * 100, 2) if fahrzeugkilometer_gesamt > 0 else 0
+    buendelungsquote = round(personenkilometer_gefahren / fahrzeugkilometer_gesamt, 2) if fahrzeugkilometer_gesamt > 0 else 0
+    besetzungsquote = round(personenkilometer_gefahren / fahrzeugkilometer_besetzt, 2) if fahrzeugkilometer_besetzt > 0 else 0
+
+    return {
+        'fahrzeugkilometer_leer': fahrzeugkilometer_leer,
+        'fahrzeugkilometer_besetzt': fahrzeugkilometer_besetzt,
+        'fahrzeugkilometer_gesamt': fahrzeugkilometer_gesamt,
+        'durchschnittliche_fahrtdistanz_mit_lk': durchschnittliche_fahrtdistanz_mit_lk,
+        'durchschnittliche_fahrtdistanz_mit_bk': durchschnittliche_fahrtdistanz_mit_bk,
+        'personenkilometer_gefahren': personenkilometer_gefahren,
+        'leerkilometeranteil': leerkilometeranteil,
+        'buendelungsquote': buendelungsquote,
+        'besetzungsquote': besetzungsquote
+    }
+
+
+# Funktion zur Berechnung des Kraftstoff- und Stromverbrauchs der Fahrzeugflotte
+def calculate_fleet_consumption(vehicle_list):
+    benzinverbrauch_gesamt = sum(vehicle['Benzinverbrauch (l/100km)'] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in vehicle_list)
+    dieselverbrauch_gesamt = sum(vehicle['Dieselverbrauch (l/100km)'] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in vehicle_list)
+    stromverbrauch_gesamt = sum(vehicle['Stromverbrauch (kWh/100km)'] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in vehicle_list)
+    return {
+        'benzinverbrauch_gesamt': benzinverbrauch_gesamt,
+        'dieselverbrauch_gesamt': dieselverbrauch_gesamt,
+        'stromverbrauch_gesamt': stromverbrauch_gesamt
+    }
+
+
+# Funktion zur Berechnung des adjustierten CO2eq-Emissionsfaktors für Strom (Abschnitt 1.4)
+def calculate_adjusted_strom_emissionsdaten(strom_emissionsdaten, oekostrom_anteil, pv_emissionsdaten=None):
+    if pv_emissionsdaten is None:
+        pv_emissionsdaten = referenz_emissionsfaktoren()['pv']
+    return round(strom_emissionsdaten * (1 - oekostrom_anteil / 100.0) + pv_emissionsdaten * (oekostrom_anteil / 100.0), 1)
+
+
+# Funktion zur Berechnung der Umweltwirkung des Ridepooling-Systems (Abschnitt 1.5)
+def calculate_environmental_impact(benzinverbrauch_gesamt, dieselverbrauch_gesamt, stromverbrauch_gesamt, personenkilometer_gefahren,
+                                   benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten, oekostrom_anteil):
+    benzin_emissionen = (float(benzinverbrauch_gesamt) * benzin_emissionsdaten) / 1000  # kg CO2e
+    diesel_emissionen = (float(dieselverbrauch_gesamt) * diesel_emissionsdaten) / 1000  # kg CO2e
+    strom_emissionen = (float(stromverbrauch_gesamt) * strom_emissionsdaten) / 1000  # kg CO2e
+    strom_emissionen *= (1 - oekostrom_anteil / 100)  # Anpassung für Ökostrom
+
+    CO2eq_emissionen_gesamt_rps = round(benzin_emissionen + diesel_emissionen + strom_emissionen, 4)
+    CO2eq_emissionen_pro_personenkilometer_rps = round(CO2eq_emissionen_gesamt_rps / personenkilometer_gefahren, 4) if personenkilometer_gefahren else 0
+
+    # Umrechnung in g CO2e pro Pkm
+    CO2eq_emissionen_pro_personenkilometer_rps_g = CO2eq_emissionen_pro_personenkilometer_rps * 1000
+
+    return {
+        'benzin_emissionen': benzin_emissionen,
+        'diesel_emissionen': diesel_emissionen,
+        'strom_emissionen': strom_emissionen,
+        'CO2eq_emissionen_gesamt_rps': CO2eq_emissionen_gesamt_rps,
+        'CO2eq_emissionen_pro_personenkilometer_rps_g': CO2eq_emissionen_pro_personenkilometer_rps_g
+    }
+
+
+# Funktion zur Berechnung der Platzausnutzung (Abschnitt 2.1)
+def calculate_platzausnutzung(personen_km, platz_km):
+    return (personen_km / platz_km) * 100
+
+
+# Funktion zur Berechnung der neuen CO2e-Emissionen basierend auf der angepassten Platzausnutzung (Abschnitt 2.2)
+def calculate_new_CO2eq_wtw(initial_CO2eq, initial_occupancy, adjusted_occupancy):
+    return initial_CO2eq * (initial_occupancy / adjusted_occupancy)
+
+
+# Funktion zur Umwandlung eines Eingabewerts (Szenariodatei oder JSON-Anfrage) in eine Zahl
+# Ungültige Werte (Text, Listen, ...) werden als ValueError mit der Bezeichnung des Werts gemeldet.
+def parse_number(wert, bezeichnung):
+    if isinstance(wert, bool):
+        raise ValueError(f"Ungültiger Zahlenwert für '{bezeichnung}': {wert!r}")
+    try:
+        return float(wert)
+    except (TypeError, ValueError):
+        raise ValueError(f"Ungültiger Zahlenwert für '{bezeichnung}': {wert!r}") from None
+
+
+# Funktion zur Bestimmung der Flottensummen eines Szenarios (Schlüssel wie in den Szenariodateien von
+# oekorps.kommandozeile) aus einer Flottendatei relativ zu verzeichnis oder einer Liste von Fahrzeugen
+def calculate_scenario_fleet_totals(szenario, verzeichnis=''):
+    if isinstance(szenario.get('fahrzeugflotte'), str):
+        from oekorps.flotte import read_fleet_file, calculate_fleet_km_table, calculate_fleet_consumption_table
+
+        fahrzeuge = read_fleet_file(os.path.join(verzeichnis, szenario['fahrzeugflotte']))
+        return (*calculate_fleet_km_table(fahrzeuge), calculate_fleet_consumption_table(fahrzeuge))
+
+    fahrzeuge = szenario.get('fahrzeuge', [])
+    if not isinstance(fahrzeuge, list) or not all(isinstance(fahrzeug, dict) for fahrzeug in fahrzeuge):
+        raise ValueError("'fahrzeuge' muss eine Liste von Fahrzeugen (je ein Objekt mit Fahrzeugtyp und Kilometern) sein.")
+    fahrzeugtypen = load_referenzdaten()['fahrzeugtypen']
+    vehicle_list = []
+    for fahrzeug in fahrzeuge:
+        # Fehlende Verbrauchsdaten werden wie beim Import aus dem Fahrzeugkatalog ergänzt
+        vehicle = {spalte: wert for spalte, wert in fahrzeugtypen.get(str(fahrzeug.get('Fahrzeugtyp', '')), {}).items()}
+        vehicle.update(fahrzeug)
+        for spalte in verbrauch_spalten + ['Kilometer leer', 'Kilometer besetzt']:
+            vehicle[spalte] = parse_number(vehicle.get(spalte) or 0.0, spalte)
+        vehicle_list.append(vehicle)
+    return (*calculate_fleet_km(vehicle_list), calculate_fleet_consumption(vehicle_list))
+
+
+# Funktion zur Bestimmung der Platzausnutzung des Busses eines Szenarios (Abschnitt 2.1/2.2): adjusted_occupancy,
+# ein [bus]-Block mit Personen- und Platzkilometern oder die durchschnittliche Platzausnutzung aus den Referenzdaten
+# Die Platzausnutzung muss größer als 0 sein, da der CO2eq-Ausstoß des Busses durch sie geteilt wird.
+def calculate_scenario_occupancy(szenario):
+    if 'adjusted_occupancy' in szenario:
+        adjusted_occupancy = parse_number(szenario['adjusted_occupancy'], 'adjusted_occupancy')
+    elif not szenario.get('bus'):
+        return bus_referenz()[1]
+    else:
+        bus = szenario['bus']
+        if not isinstance(bus, dict):
+            raise ValueError("'bus' muss ein Objekt mit personen_km und platz_km (oder nutzwagen_km und platzangebot) sein.")
+        if 'platz_km' in bus:
+            platz_km = parse_number(bus['platz_km'], 'platz_km')
+        else:
+            platz_km = parse_number(bus['nutzwagen_km'], 'nutzwagen_km') * parse_number(bus['platzangebot'], 'platzangebot')
+        if not platz_km > 0:
+            raise ValueError(f"Die Platzkilometer des Busses müssen größer als 0 sein (angegeben: {platz_km}).")
+        adjusted_occupancy = calculate_platzausnutzung(parse_number(bus['personen_km'], 'personen_km'), platz_km)
+    if not adjusted_occupancy > 0:
+        raise ValueError(f"Die Platzausnutzung des Busses muss größer als 0 sein (angegeben: {adjusted_occupancy} %).")
+    return adjusted_occupancy
+
+
+# Funktion zur Berechnung aller Kennzahlen aus Flotten-, Buchungs- und Emissionsdaten
+# Entspricht dem Durchlauf der Abschnitte 1.3 bis 3.1 ohne Benutzeroberfläche. Ohne Angabe gelten der
+# PV-Emissionsfaktor und die Platzausnutzung des Busses aus den Referenzdaten.
+def calculate_all(vehicle_list, abgeschlossene_buchungen, transportierte_fahrgaeste,
+                  benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten,
+                  oekostrom_anteil=0, pv_emissionsdaten=None, adjusted_occupancy=None):
+    fahrzeugkilometer_leer, fahrzeugkilometer_besetzt = calculate_fleet_km(vehicle_list)
+    return calculate_all_from_totals(fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, calculate_fleet_consumption(vehicle_list),
+                                     abgeschlossene_buchungen, transportierte_fahrgaeste,
+                                     benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten,
+                                     oekostrom_anteil, pv_emissionsdaten, adjusted_occupancy)
+
+
+# Funktion zur Berechnung aller Kennzahlen aus den Summen der Flotte (Kilometer leer/besetzt und Verbrauch wie in
+# calculate_fleet_consumption), z.B. für Flotten, die als Tabelle vorliegen (oekorps.flotte)
+def calculate_all_from_totals(fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, verbrauch, abgeschlossene_buchungen, transportierte_fahrgaeste,
+                              benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten,
+                              oekostrom_anteil=0, pv_emissionsdaten=None, adjusted_occupancy=None):
+    initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+    if pv_emissionsdaten is None:
+        pv_emissionsdaten = referenz_emissionsfaktoren()['pv']
+    if adjusted_occupancy is None:
+        adjusted_occupancy = initial_occupancy
+    ergebnis = calculate_fleet_performance(fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, abgeschlossene_buchungen, transportierte_fahrgaeste)
+    ergebnis.update(verbrauch)
+
+    strom_emissionsdaten = calculate_adjusted_strom_emissionsdaten(strom_emissionsdaten, oekostrom_anteil, pv_emissionsdaten)
+    ergebnis.update({
+        'benzin_emissionsdaten': benzin_emissionsdaten,
+        'diesel_emissionsdaten': diesel_emissionsdaten,
+        'strom_emissionsdaten': strom_emissionsdaten,
+        'oekostrom_anteil': oekostrom_anteil,
+        'pv_emissionsdaten': pv_emissionsdaten
+    })
+    ergebnis.update(calculate_environmental_impact(
+        ergebnis['benzinverbrauch_gesamt'], ergebnis['dieselverbrauch_gesamt'], ergebnis['stromverbrauch_gesamt'],
+        ergebnis['personenkilometer_gefahren'], benzin_emissionsdaten, diesel_emissionsdaten, strom_emissionsdaten, oekostrom_anteil))
+
+    new_CO2eq_wtw = calculate_new_CO2eq_wtw(initial_CO2eq_wtw, initial_occupancy, adjusted_occupancy)
+    ergebnis.update({
+        'adjusted_occupancy': adjusted_occupancy,
+        'new_CO2eq_wtw': new_CO2eq_wtw,
+        'differenz_bus_rps': ergebnis['CO2eq_emissionen_pro_personenkilometer_rps_g'] - new_CO2eq_wtw
+    })
+    return ergebnis
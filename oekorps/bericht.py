@@ -0,0 +1,250 @@
+# Export von Berichten (PDF, PNG/SVG-Diagramme, Excel) für ein oder mehrere Szenarien
+# Ein Szenario ist ein Dictionary wie in oekorps.szenarien.load_scenario ('name', 'eingaben', 'fahrzeugflotte',
+# 'ergebnisse'). Die Diagramme werden mit matplotlib (ohne Bildschirm) erstellt. Der Exportdienst erstellt die
+# Berichte in einem Prozesspool, damit die Streamlit-App währenddessen weiter reagiert; fertige Berichte werden
+# je Fingerabdruck der Szenarien zwischengespeichert.
+import io
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from oekorps.cache import LRUCache, fingerprint
+from oekorps.referenzdaten import load_referenzdaten
+
+exportformate = {
+    'pdf': ('application/pdf', 'pdf'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'png': ('application/zip', 'zip'),
+    'svg': ('application/zip', 'zip'),
+}
+
+# Bezeichnungen der Eingaben und Kennzahlen im Bericht (Schlüssel wie im st.session_state)
+bezeichnungen = {
+    'name_ridepooling_system': "Ridepooling-System",
+    'start_date': "Beginn Betrachtungszeitraum",
+    'end_date': "Ende Betrachtungszeitraum",
+    'abgeschlossene_buchungen': "Abgeschlossene Buchungen",
+    'transportierte_fahrgaeste': "Transportierte Fahrgäste",
+    'benzin_emissionsdaten': "Emissionsfaktor Benzin [g/l]",
+    'diesel_emissionsdaten': "Emissionsfaktor Diesel [g/l]",
+    'strom_emissionsdaten_netz': "Emissionsfaktor Strom (Netz) [g/kWh]",
+    'oekostrom_anteil': "Ökostromanteil [%]",
+    'pv_emissionsdaten': "Emissionsfaktor PV-Strom [g/kWh]",
+    'strom_emissionsdaten': "Emissionsfaktor Strom (adjustiert) [g/kWh]",
+    'fahrzeugkilometer_leer': "Kilometer (leer) [km]",
+    'fahrzeugkilometer_besetzt': "Kilometer (besetzt) [km]",
+    'fahrzeugkilometer_gesamt': "Fahrzeugkilometer (gesamt) [km]",
+    'durchschnittliche_fahrtdistanz_mit_lk': "Fahrtdistanz je Buchung (einschl. Leerkilometer) [km]",
+    'durchschnittliche_fahrtdistanz_mit_bk': "Fahrtdistanz je Buchung (mit Fahrgast) [km]",
+    'personenkilometer_gefahren': "Personenkilometer [Pkm]",
+    'leerkilometeranteil': "Leerkilometeranteil [%]",
+    'buendelungsquote': "Bündelungsquote",
+    'besetzungsquote': "Besetzungsquote",
+    'benzinverbrauch_gesamt': "Benzinverbrauch [l]",
+    'dieselverbrauch_gesamt': "Dieselverbrauch [l]",
+    'stromverbrauch_gesamt': "Stromverbrauch [kWh]",
+    'benzin_emissionen': "Emissionen Benzin [kg CO2eq]",
+    'diesel_emissionen': "Emissionen Diesel [kg CO2eq]",
+    'strom_emissionen': "Emissionen Strom [kg CO2eq]",
+    'CO2eq_emissionen_gesamt_rps': "CO2eq-Emissionen gesamt [kg]",
+    'CO2eq_emissionen_pro_personenkilometer_rps_g': "CO2eq-Emissionen Ridepooling [g/Pkm]",
+    'adjusted_occupancy': "Platzausnutzung Bus [%]",
+    'new_CO2eq_wtw': "CO2eq-Emissionen Bus [g/Pkm]",
+}
+
+
+# Funktion zur Erstellung der Kennzahlentabelle (eine Zeile je Eingabe/Kennzahl, eine Spalte je Szenario)
+def report_table(szenarien):
+    spalten = {}
+    for szenario in szenarien:
+        werte = {**szenario.get('eingaben', {}), **szenario.get('ergebnisse', {})}
+        spalten[szenario['name']] = [werte.get(key) for key in bezeichnungen]
+    return pd.DataFrame(spalten, index=list(bezeichnungen.values())).rename_axis('Kennzahl')
+
+
+# Funktion zur Erstellung der Excel-Arbeitsmappe (Kennzahlen, Fahrzeugflotten, Vergleichswerte des Umweltbundesamts)
+def build_excel(szenarien):
+    fahrzeugflotten = [pd.DataFrame(szenario.get('fahrzeugflotte', [])).assign(Szenario=szenario['name']) for szenario in szenarien]
+    fahrzeugflotte = pd.concat(fahrzeugflotten, ignore_index=True) if fahrzeugflotten else pd.DataFrame()
+    verkehrsmittel = pd.DataFrame(list(load_referenzdaten()['verkehrsmittel'].items()), columns=['Verkehrsmittel', 'Emissionen [g CO2eq/Pkm]'])
+
+    puffer = io.BytesIO()
+    with pd.ExcelWriter(puffer, engine='openpyxl') as writer:
+        report_table(szenarien).to_excel(writer, sheet_name='Kennzahlen')
+        fahrzeugflotte[['Szenario'] + [spalte for spalte in fahrzeugflotte.columns if spalte != 'Szenario']].to_excel(writer, sheet_name='Fahrzeugflotte', index=False)
+        verkehrsmittel.to_excel(writer, sheet_name='Verkehrsmittel', index=False)
+    return puffer.getvalue()
+
+
+# Funktion zur Erstellung einer matplotlib-Abbildung ohne pyplot (threadsicher, ohne Bildschirm)
+def _figure(breite=8.27, hoehe=5.5):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    abbildung = Figure(figsize=(breite, hoehe))
+    FigureCanvasAgg(abbildung)
+    return abbildung
+
+
+# Diagramm Ridepooling-System / Bus je Szenario (eine Balkenreihe je Kategorie)
+def _comparison_chart(szenarien):
+    import numpy as np
+
+    abbildung = _figure()
+    achse = abbildung.add_subplot()
+    namen = [szenario['name'] for szenario in szenarien]
+    x = np.arange(len(namen))
+    rps = [szenario['ergebnisse'].get('CO2eq_emissionen_pro_personenkilometer_rps_g', 0.0) for szenario in szenarien]
+    bus = [szenario['ergebnisse'].get('new_CO2eq_wtw', 0.0) for szenario in szenarien]
+    achse.bar(x - 0.2, rps, width=0.4, label='Ridepooling-System', edgecolor='black', alpha=0.7)
+    achse.bar(x + 0.2, bus, width=0.4, label='Bus', edgecolor='black', alpha=0.7)
+    achse.set_xticks(x, namen, rotation=45, ha='right')
+    achse.set_ylabel('Emissionen [g CO2eq/Pkm]')
+    achse.set_title('Vergleich der CO2eq-Emissionen pro Personenkilometer')
+    achse.legend()
+    abbildung.tight_layout()
+    return abbildung
+
+
+# Diagramm der Szenarien im Vergleich mit den Verkehrsmitteln des Umweltbundesamts
+def _transport_modes_chart(szenarien):
+    abbildung = _figure()
+    achse = abbildung.add_subplot()
+    verkehrsmittel = load_referenzdaten()['verkehrsmittel']
+    namen = list(verkehrsmittel) + [szenario['name'] for szenario in szenarien]
+    werte = list(verkehrsmittel.values()) + [szenario['ergebnisse'].get('CO2eq_emissionen_pro_personenkilometer_rps_g', 0.0) for szenario in szenarien]
+    farben = ['tab:gray'] * len(verkehrsmittel) + ['tab:blue'] * len(szenarien)
+    achse.bar(range(len(namen)), werte, color=farben, edgecolor='black', alpha=0.7)
+    achse.set_xticks(range(len(namen)), namen, rotation=45, ha='right')
+    achse.set_ylabel('Emissionen [g CO2eq/Pkm]')
+    achse.set_title('Emissionen pro Personenkilometer nach Verkehrsmittel (WTW)')
+    abbildung.tight_layout()
+    return abbildung
+
+
+# Funktion zur Erstellung der Diagramme als PNG oder SVG (Dateiname -> Inhalt)
+def build_charts(szenarien, format='png'):
+    diagramme = {}
+    for name, abbildung in [('vergleich_bus_rps', _comparison_chart(szenarien)), ('verkehrsmittel', _transport_modes_chart(szenarien))]:
+        puffer = io.BytesIO()
+        abbildung.savefig(puffer, format=format, dpi=150)
+        diagramme[f'{name}.{format}'] = puffer.getvalue()
+    return diagramme
+
+
+# Funktion zur Formatierung eines Tabellenwerts im PDF-Bericht
+def _format_value(wert):
+    if wert is None or (isinstance(wert, float) and wert != wert):
+        return '-'
+    if isinstance(wert, float):
+        return f"{wert:,.2f}".replace(',', ' ').replace('.', ',')
+    return str(wert)
+
+
+# Funktion zur Erstellung des PDF-Berichts (Kennzahlentabelle und Diagramme, A4)
+def build_pdf(szenarien, titel="OekoRPS-Bericht"):
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    tabelle = report_table(szenarien)
+    puffer = io.BytesIO()
+    with PdfPages(puffer) as pdf:
+        # Je Seite höchstens vier Szenarien, damit die Tabelle lesbar bleibt
+        for beginn in range(0, max(len(szenarien), 1), 4):
+            teil = tabelle.iloc[:, beginn:beginn + 4]
+            abbildung = _figure(8.27, 11.69)
+            achse = abbildung.add_axes([0.05, 0.05, 0.9, 0.85])
+            achse.axis('off')
+            abbildung.suptitle(f"{titel} ({datetime.now():%d.%m.%Y})", fontsize=14)
+            zellen = [[_format_value(wert) for wert in zeile] for zeile in teil.itertuples(index=False)]
+            darstellung = achse.table(cellText=zellen, rowLabels=list(teil.index), colLabels=list(teil.columns), loc='upper right', colWidths=[0.14] * len(teil.columns))
+            darstellung.auto_set_font_size(False)
+            darstellung.set_fontsize(7)
+            pdf.savefig(abbildung)
+        pdf.savefig(_comparison_chart(szenarien))
+        pdf.savefig(_transport_modes_chart(szenarien))
+    return puffer.getvalue()
+
+
+# Funktion zur Erstellung eines Berichts im gewünschten Format; Rückgabe mit Dateiname, MIME-Typ und Inhalt
+def build_report(szenarien, format='pdf', titel="OekoRPS-Bericht"):
+    if format not in exportformate:
+        raise ValueError(f"Nicht unterstütztes Exportformat: {format} (erlaubt sind {', '.join(exportformate)}).")
+    if not szenarien:
+        raise ValueError("Der Bericht enthält keine Szenarien.")
+    mime, endung = exportformate[format]
+    if format == 'pdf':
+        daten = build_pdf(szenarien, titel)
+    elif format == 'xlsx':
+        daten = build_excel(szenarien)
+    else:
+        puffer = io.BytesIO()
+        with zipfile.ZipFile(puffer, 'w', zipfile.ZIP_DEFLATED) as archiv:
+            for dateiname, inhalt in build_charts(szenarien, format).items():
+                archiv.writestr(dateiname, inhalt)
+        daten = puffer.getvalue()
+    return {'dateiname': f"oekorps_bericht.{endung}" if format in ('pdf', 'xlsx') else f"oekorps_diagramme_{format}.{endung}", 'mime': mime, 'daten': daten}
+
+
+class Exportdienst:
+    # Erstellung von Berichten in einem Prozesspool mit Warteschlange; fertige Berichte werden je Fingerabdruck
+    # (Format und Szenarien) zwischengespeichert, sodass wiederholte Downloads sofort bereitstehen.
+
+    def __init__(self, max_workers=2, cache_groesse=32):
+        self.max_workers = max_workers
+        self._executor = None
+        self._auftraege = {}
+        self._cache = LRUCache(maxsize=cache_groesse)
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            # 'spawn', da die App mehrere Threads verwendet (fork ist dann nicht sicher)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    # Einreihen eines Berichts; Rückgabe ist der Schlüssel für status() und result()
+    def submit(self, szenarien, format='pdf', titel="OekoRPS-Bericht"):
+        schluessel = fingerprint('bericht', format, titel, szenarien)
+        with self._lock:
+            if schluessel not in self._cache and schluessel not in self._auftraege:
+                self._auftraege[schluessel] = self._pool().submit(build_report, szenarien, format, titel)
+        return schluessel
+
+    # Status eines Berichts: 'fertig', 'laeuft', 'fehler' oder None (unbekannt)
+    def status(self, schluessel):
+        with self._lock:
+            if schluessel in self._cache:
+                return 'fertig'
+            auftrag = self._auftraege.get(schluessel)
+        if auftrag is None:
+            return None
+        if not auftrag.done():
+            return 'laeuft'
+        return 'fehler' if auftrag.exception() is not None else 'fertig'
+
+    # Ergebnis eines Berichts (wartet bis zur Fertigstellung); Fehler der Erstellung werden weitergegeben
+    def result(self, schluessel, timeout=None):
+        with self._lock:
+            if schluessel in self._cache:
+                return self._cache.get(schluessel)
+            auftrag = self._auftraege.get(schluessel)
+        if auftrag is None:
+            raise KeyError(f"Kein Bericht für Schlüssel {schluessel}.")
+        try:
+            bericht = auftrag.result(timeout)
+        finally:
+            if auftrag.done():
+                with self._lock:
+                    self._auftraege.pop(schluessel, None)
+        with self._lock:
+            self._cache.put(schluessel, bericht)
+        return bericht
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
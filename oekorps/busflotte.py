@@ -0,0 +1,128 @@
+# Busflotte mit Fahrzeugmix (Abschnitt 2.3)
+# Statt des skalierten Durchschnittswerts des Umweltbundesamts werden die Emissionen des Busses aus einer Tabelle
+# je Linie und/oder Fahrzeugklasse berechnet (Nutzwagenkilometer, Platzangebot, Energieträger und Verbrauch).
+# Die Berechnung erfolgt spaltenweise mit NumPy, die Aggregation je Linie oder Energieträger per groupby.
+import numpy as np
+import pandas as pd
+
+from oekorps.batch import safe_divide
+from oekorps.berechnung import bus_referenz
+from oekorps.dateien import detect_separator
+from oekorps.referenzdaten import load_referenzdaten
+
+energietraeger = ['Diesel', 'Hybrid', 'Elektro']
+bus_verbrauch_spalten = ['Dieselverbrauch (l/100km)', 'Stromverbrauch (kWh/100km)']
+# Nutzwagenkilometer in km, Personenkilometer in Pkm (leer: Platzausnutzung aus Abschnitt 2.2)
+busflotten_spalten = ['Linie', 'Bustyp', 'Energieträger', 'Nutzwagenkilometer', 'Platzangebot', 'Personenkilometer'] + bus_verbrauch_spalten
+
+# Summen je Zeile, aus denen die Kennzahlen je Linie, Energieträger oder Flotte gebildet werden
+bus_summen_spalten = ['Nutzwagenkilometer', 'Platzkilometer', 'Personenkilometer', 'Dieselverbrauch (l)', 'Stromverbrauch (kWh)', 'CO2eq-Emissionen (kg)']
+
+
+# Funktion zum Erstellen einer leeren Busflotte
+def empty_bus_fleet():
+    busse = pd.DataFrame({spalte: pd.Series(dtype=object) for spalte in ['Linie', 'Bustyp', 'Energieträger']})
+    for spalte in busflotten_spalten[3:]:
+        busse[spalte] = pd.Series(dtype=np.float64)
+    return busse
+
+
+# Funktion zur Prüfung einer Busflotte; fehlende Angaben (Energieträger, Platzangebot, Verbrauch) werden aus den Bustypen ergänzt
+def read_bus_fleet(tabelle, bustypen=None):
+    bustypen = load_referenzdaten().get('bustypen', {}) if bustypen is None else bustypen
+    tabelle = tabelle.rename(columns=lambda spalte: str(spalte).strip())
+    if 'Nutzwagenkilometer' not in tabelle.columns:
+        raise ValueError("Die Spalte 'Nutzwagenkilometer' fehlt in der Busflotte.")
+
+    busse = pd.DataFrame(index=range(len(tabelle)))
+    for spalte in ['Linie', 'Bustyp', 'Energieträger']:
+        werte = tabelle[spalte] if spalte in tabelle.columns else pd.Series([None] * len(tabelle))
+        busse[spalte] = werte.fillna('').astype(str).str.strip().to_numpy(dtype=object)
+    # Katalogwerte je Zeile über den Bustyp (eine Tabelle statt eines Nachschlagens je Zeile)
+    katalog = pd.DataFrame.from_dict(bustypen, orient='index').reindex(columns=['Energieträger', 'Platzangebot'] + bus_verbrauch_spalten).reindex(busse['Bustyp'])
+    busse['Energieträger'] = np.where(busse['Energieträger'] != '', busse['Energieträger'], katalog['Energieträger'].fillna('').to_numpy(dtype=object))
+
+    for spalte in busflotten_spalten[3:]:
+        werte = pd.to_numeric(tabelle[spalte], errors='coerce').to_numpy(dtype=np.float64) if spalte in tabelle.columns else np.full(len(tabelle), np.nan)
+        if spalte == 'Platzangebot' and (np.isnan(werte) & katalog['Platzangebot'].isna().to_numpy()).any():
+            zeile = int(np.argmax(np.isnan(werte) & katalog['Platzangebot'].isna().to_numpy()))
+            raise ValueError(f"Unbekannter Bustyp '{busse['Bustyp'].iloc[zeile]}' ohne Platzangebot (Zeile {zeile + 1}).")
+        if spalte in ['Platzangebot'] + bus_verbrauch_spalten:
+            werte = np.where(np.isnan(werte), katalog[spalte].fillna(0.0).to_numpy(dtype=np.float64), werte)
+        if spalte != 'Personenkilometer':
+            werte = np.nan_to_num(werte, nan=0.0)
+        if (werte < 0).any():
+            raise ValueError(f"Negativer Wert in Spalte '{spalte}' (Zeile {int(np.argmax(werte < 0)) + 1}).")
+        busse[spalte] = werte
+    unbekannt = sorted(set(busse['Energieträger']) - set(energietraeger) - {''})
+    if unbekannt:
+        raise ValueError(f"Unbekannter Energieträger: {', '.join(unbekannt)} (erlaubt sind {', '.join(energietraeger)}).")
+    return busse
+
+
+# Funktion zum Einlesen einer Busflotte aus einer CSV-, Parquet- oder Excel-Datei (oder einem Datei-Objekt)
+def read_bus_fleet_file(datei, dateiname=None):
+    dateiname = dateiname or getattr(datei, 'name', str(datei))
+    endung = dateiname.lower().rsplit('.', 1)[-1]
+    if endung == 'csv':
+        trennzeichen = detect_separator(datei)
+        tabelle = pd.read_csv(datei, sep=trennzeichen, decimal=',' if trennzeichen == ';' else '.', dtype={'Linie': str})
+    elif endung == 'parquet':
+        tabelle = pd.read_parquet(datei)
+    elif endung in ('xlsx', 'xls'):
+        tabelle = pd.read_excel(datei, dtype={'Linie': str})
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: .{endung} (erlaubt sind CSV, Parquet und Excel).")
+    return read_bus_fleet(tabelle)
+
+
+# Funktion zur Berechnung von Platzkilometern, Personenkilometern, Verbrauch und Emissionen je Zeile
+# Zeilen ohne Personenkilometer erhalten die Platzausnutzung platzausnutzung (%), z.B. aus Abschnitt 2.2
+# (ohne Angabe die durchschnittliche Platzausnutzung aus den Referenzdaten).
+def calculate_bus_fleet(busse, diesel_emissionsdaten, strom_emissionsdaten, platzausnutzung=None):
+    if platzausnutzung is None:
+        platzausnutzung = bus_referenz()[1]
+    nutzwagen_km = busse['Nutzwagenkilometer'].to_numpy(dtype=np.float64)
+    platz_km = nutzwagen_km * busse['Platzangebot'].to_numpy(dtype=np.float64)
+    personen_km = busse['Personenkilometer'].to_numpy(dtype=np.float64)
+    personen_km = np.where(np.isnan(personen_km) | (personen_km <= 0), platz_km * platzausnutzung / 100, personen_km)
+    dieselverbrauch = busse['Dieselverbrauch (l/100km)'].to_numpy(dtype=np.float64) * nutzwagen_km / 100
+    stromverbrauch = busse['Stromverbrauch (kWh/100km)'].to_numpy(dtype=np.float64) * nutzwagen_km / 100
+
+    ergebnis = busse[['Linie', 'Bustyp', 'Energieträger']].copy()
+    ergebnis['Nutzwagenkilometer'] = nutzwagen_km
+    ergebnis['Platzkilometer'] = platz_km
+    ergebnis['Personenkilometer'] = personen_km
+    ergebnis['Dieselverbrauch (l)'] = dieselverbrauch
+    ergebnis['Stromverbrauch (kWh)'] = stromverbrauch
+    ergebnis['CO2eq-Emissionen (kg)'] = (dieselverbrauch * diesel_emissionsdaten + stromverbrauch * strom_emissionsdaten) / 1000
+    return ergebnis
+
+
+# Funktion zur Bildung der Kennzahlen aus Summen (Platzausnutzung in %, Emissionen in g CO2eq/Pkm)
+def _add_ratios(summen):
+    summen['Platzausnutzung (%)'] = safe_divide(summen['Personenkilometer'].to_numpy(), summen['Platzkilometer'].to_numpy()) * 100
+    summen['CO2eq-Emissionen (g/Pkm)'] = safe_divide(summen['CO2eq-Emissionen (kg)'].to_numpy(), summen['Personenkilometer'].to_numpy()) * 1000
+    return summen
+
+
+# Funktion zur Aggregation der Busflotte je Linie, Bustyp oder Energieträger
+def aggregate_bus_fleet(ergebnis, nach='Linie'):
+    summen = ergebnis.groupby(nach, sort=True)[bus_summen_spalten].sum()
+    return _add_ratios(summen).reset_index()
+
+
+# Funktion zur Berechnung der Kennzahlen der gesamten Busflotte (Schlüssel wie im st.session_state)
+# new_CO2eq_wtw und adjusted_occupancy ersetzen die Werte aus Abschnitt 2.2 im Vergleich (Abschnitt 3.1).
+def bus_fleet_totals(ergebnis):
+    summen = _add_ratios(ergebnis[bus_summen_spalten].sum().to_frame().T)
+    return {
+        'bus_nutzwagen_km_gesamt': float(summen['Nutzwagenkilometer'].iloc[0]),
+        'bus_platz_km_gesamt': float(summen['Platzkilometer'].iloc[0]),
+        'bus_personen_km_gesamt': float(summen['Personenkilometer'].iloc[0]),
+        'bus_dieselverbrauch_gesamt': float(summen['Dieselverbrauch (l)'].iloc[0]),
+        'bus_stromverbrauch_gesamt': float(summen['Stromverbrauch (kWh)'].iloc[0]),
+        'CO2eq_emissionen_gesamt_bus': float(summen['CO2eq-Emissionen (kg)'].iloc[0]),
+        'adjusted_occupancy': float(summen['Platzausnutzung (%)'].iloc[0]),
+        'new_CO2eq_wtw': float(summen['CO2eq-Emissionen (g/Pkm)'].iloc[0]),
+    }
@@ -0,0 +1,257 @@
+# Zwischenspeicher für berechnete Kennzahlen und Diagramme
+# Eingaben werden über einen Fingerabdruck (Hash der Eingabewerte) identifiziert. Solange sich die relevanten
+# Eingaben nicht ändern, werden die gespeicherten Ergebnisse wiederverwendet. Die Anzahl der Einträge ist begrenzt
+# (least recently used), damit der Speicherbedarf je Sitzung nicht wächst.
+# DiskCache legt Ergebnisse in einer lokalen SQLite-Datei ab, die sich alle Prozesse (Worker hinter einem
+# Load Balancer) und Sitzungen teilen; StufenCache verbindet beide Ebenen. Ergebnisse aus hochgeladenen Dateien
+# gehören nur in den Speicher der Sitzung (LRUCache), nicht in den gemeinsamen Speicher.
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from oekorps.referenzdaten import referenzdaten_mtime
+
+standard_cache_pfad = os.environ.get('OEKORPS_CACHE', os.path.join('.cache', 'oekorps_cache.db'))
+
+# Formatversion der Einträge im gemeinsamen Speicher (bei inkompatiblen Änderungen erhöhen)
+cache_version = 1
+
+_code_version = None
+
+_fehlt = object()
+
+
+# Funktion zur Umwandlung von Eingabewerten in eine stabile, hashbare Darstellung
+def _normalize(objekt):
+    if isinstance(objekt, dict):
+        return {str(k): _normalize(v) for k, v in sorted(objekt.items(), key=lambda item: str(item[0]))}
+    if isinstance(objekt, (list, tuple)):
+        return [_normalize(v) for v in objekt]
+    if isinstance(objekt, float):
+        return repr(objekt)
+    if hasattr(objekt, 'columns'):  # pandas.DataFrame
+        import pandas as pd
+
+        werte = pd.util.hash_pandas_object(objekt, index=True).to_numpy()
+        return {'spalten': [str(c) for c in objekt.columns], 'hash': hashlib.sha1(werte.tobytes()).hexdigest()}
+    if hasattr(objekt, 'tobytes'):  # numpy.ndarray
+        return {'dtype': str(objekt.dtype), 'shape': list(objekt.shape), 'hash': hashlib.sha1(objekt.tobytes()).hexdigest()}
+    return objekt
+
+
+# Funktion zur Berechnung des Fingerabdrucks beliebiger Eingabewerte
+def fingerprint(*eingaben):
+    daten = json.dumps(_normalize(list(eingaben)), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(daten.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    # Zwischenspeicher mit begrenzter Anzahl von Einträgen (zuletzt genutzte Einträge bleiben erhalten)
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.eintraege = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, schluessel, standard=None):
+        if schluessel in self.eintraege:
+            self.eintraege.move_to_end(schluessel)
+            self.hits += 1
+            return self.eintraege[schluessel]
+        self.misses += 1
+        return standard
+
+    def put(self, schluessel, wert):
+        self.eintraege[schluessel] = wert
+        self.eintraege.move_to_end(schluessel)
+        while len(self.eintraege) > self.maxsize:
+            self.eintraege.popitem(last=False)
+
+    def __contains__(self, schluessel):
+        return schluessel in self.eintraege
+
+    def __len__(self):
+        return len(self.eintraege)
+
+
+_cache_schema = """
+CREATE TABLE IF NOT EXISTS eintraege (
+    schluessel TEXT PRIMARY KEY,
+    wert BLOB NOT NULL,
+    groesse INTEGER NOT NULL,
+    zugriff REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS eintraege_zugriff ON eintraege (zugriff);
+"""
+
+
+# Funktion zur Bestimmung der Codeversion (Hash der Quelltexte von oekorps, einmal je Prozess)
+def code_version():
+    global _code_version
+    if _code_version is None:
+        verzeichnis = os.path.dirname(os.path.abspath(__file__))
+        inhalt = hashlib.sha1()
+        for datei in sorted(os.listdir(verzeichnis)):
+            if datei.endswith('.py'):
+                with open(os.path.join(verzeichnis, datei), 'rb') as quelltext:
+                    inhalt.update(datei.encode('utf-8') + quelltext.read())
+        _code_version = inhalt.hexdigest()[:12]
+    return _code_version
+
+
+# Funktion zur Bestimmung der Version der Einträge im gemeinsamen Speicher: Formatversion, Codeversion und
+# Änderungszeitpunkt der Referenzdaten. Nach einem Update oder einer Änderung an referenzdaten.toml werden
+# ältere Einträge nicht mehr gefunden und nach und nach verdrängt.
+def standard_version():
+    return f"v{cache_version}-{code_version()}-{'-'.join(map(str, referenzdaten_mtime()))}"
+
+
+class DiskCache:
+    # Gemeinsamer Zwischenspeicher mehrerer Prozesse in einer SQLite-Datei (Werte als pickle)
+    # Bei mehr als max_eintraege Einträgen werden die am längsten nicht genutzten entfernt. Fehler beim Zugriff
+    # (z.B. gesperrte Datei oder nicht serialisierbare Werte) gelten als Fehltreffer, die Berechnung läuft dann normal.
+    # Jeder Schlüssel wird um die Version (version: Zeichenkette oder Funktion, Standard standard_version) ergänzt.
+    # Die Datei ist nur für den Benutzer des Dienstes lesbar, da die Werte beim Lesen entpickelt werden.
+
+    def __init__(self, pfad=None, max_eintraege=5000, max_wert_bytes=20_000_000, version=standard_version):
+        self.pfad = pfad or standard_cache_pfad
+        self.max_eintraege = max_eintraege
+        self.max_wert_bytes = max_wert_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.fehler = 0
+        self._lock = threading.Lock()  # Streamlit führt die Sitzungen in mehreren Threads aus
+        verzeichnis = os.path.dirname(self.pfad)
+        if verzeichnis:
+            os.makedirs(verzeichnis, exist_ok=True)
+        self._verbindung = sqlite3.connect(self.pfad, timeout=5, check_same_thread=False, isolation_level=None)
+        self._verbindung.execute('PRAGMA journal_mode=WAL')
+        self._verbindung.execute('PRAGMA synchronous=NORMAL')
+        self._verbindung.executescript(_cache_schema)
+        try:
+            os.chmod(self.pfad, 0o600)
+        except OSError:
+            pass
+
+    # Funktion zur Bildung des gespeicherten Schlüssels aus Version und Fingerabdruck
+    def _schluessel(self, schluessel):
+        version = self.version() if callable(self.version) else self.version
+        return f"{version}:{schluessel}"
+
+    def get(self, schluessel, standard=None):
+        schluessel = self._schluessel(schluessel)
+        try:
+            with self._lock:
+                zeile = self._verbindung.execute('SELECT wert FROM eintraege WHERE schluessel = ?', (schluessel,)).fetchone()
+                if zeile is not None:
+                    self._verbindung.execute('UPDATE eintraege SET zugriff = ? WHERE schluessel = ?', (time.time(), schluessel))
+            if zeile is not None:
+                wert = pickle.loads(zeile[0])
+                self.hits += 1
+                return wert
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, EOFError, ImportError):
+            self.fehler += 1
+        self.misses += 1
+        return standard
+
+    def put(self, schluessel, wert):
+        try:
+            daten = pickle.dumps(wert, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self.fehler += 1
+            return
+        if len(daten) > self.max_wert_bytes:
+            return
+        schluessel = self._schluessel(schluessel)
+        try:
+            with self._lock:
+                self._verbindung.execute('INSERT OR REPLACE INTO eintraege (schluessel, wert, groesse, zugriff) VALUES (?, ?, ?, ?)',
+                                         (schluessel, daten, len(daten), time.time()))
+                # Entfernen der ältesten Einträge über der Obergrenze
+                self._verbindung.execute('DELETE FROM eintraege WHERE schluessel IN (SELECT schluessel FROM eintraege ORDER BY zugriff DESC LIMIT -1 OFFSET ?)',
+                                         (self.max_eintraege,))
+        except sqlite3.Error:
+            self.fehler += 1
+
+    def __contains__(self, schluessel):
+        try:
+            with self._lock:
+                return self._verbindung.execute('SELECT 1 FROM eintraege WHERE schluessel = ?', (self._schluessel(schluessel),)).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def __len__(self):
+        with self._lock:
+            return self._verbindung.execute('SELECT COUNT(*) FROM eintraege').fetchone()[0]
+
+    # Anzahl der Einträge und belegter Speicher (Bytes) aller Prozesse
+    def size(self):
+        with self._lock:
+            anzahl, groesse = self._verbindung.execute('SELECT COUNT(*), COALESCE(SUM(groesse), 0) FROM eintraege').fetchone()
+        return anzahl, groesse
+
+    def clear(self):
+        with self._lock:
+            self._verbindung.execute('DELETE FROM eintraege')
+
+
+class StufenCache:
+    # Zweistufiger Zwischenspeicher: zuerst der Speicher der Sitzung (lokal), dann der gemeinsame Speicher
+    # Treffer im gemeinsamen Speicher werden in den lokalen Speicher übernommen. Die Zähler gelten je StufenCache.
+
+    def __init__(self, lokal, gemeinsam):
+        self.lokal = lokal
+        self.gemeinsam = gemeinsam
+        self.hits_lokal = 0
+        self.hits_gemeinsam = 0
+        self.misses = 0
+
+    @property
+    def hits(self):
+        return self.hits_lokal + self.hits_gemeinsam
+
+    def get(self, schluessel, standard=None):
+        wert = self.lokal.get(schluessel, _fehlt)
+        if wert is not _fehlt:
+            self.hits_lokal += 1
+            return wert
+        wert = self.gemeinsam.get(schluessel, _fehlt)
+        if wert is _fehlt:
+            self.misses += 1
+            return standard
+        self.hits_gemeinsam += 1
+        self.lokal.put(schluessel, wert)
+        return wert
+
+    def put(self, schluessel, wert):
+        self.lokal.put(schluessel, wert)
+        self.gemeinsam.put(schluessel, wert)
+
+    def __contains__(self, schluessel):
+        return schluessel in self.lokal or schluessel in self.gemeinsam
+
+    def __len__(self):
+        return len(self.lokal)
+
+
+# Funktion zur Trefferquote eines Zwischenspeichers (0 bis 1, None ohne Zugriffe)
+def hit_rate(cache):
+    zugriffe = cache.hits + cache.misses
+    return cache.hits / zugriffe if zugriffe else None
+
+
+# Funktion zum Abrufen eines gespeicherten Ergebnisses oder zur Berechnung und Speicherung bei Fehltreffer
+def memoize(cache, schluessel, funktion, *args, **kwargs):
+    wert = cache.get(schluessel, _fehlt)
+    if wert is not _fehlt:
+        return wert
+    wert = funktion(*args, **kwargs)
+    cache.put(schluessel, wert)
+    return wert
@@ -0,0 +1,48 @@
+# Gemeinsame Dateileser (TOML, CSV-Trennzeichen, blockweise Fahrtabschnitte)
+# Werden von mehreren Modulen verwendet (Referenzdaten, Flotten-, Zeitreihen-, Fahrgast- und Telematikimport,
+# Kommandozeile und Benchmarks) und sind deshalb hier an einer Stelle öffentlich zusammengefasst.
+# pandas wird nur in iter_trip_blocks importiert, damit oekorps.referenzdaten und oekorps.berechnung leicht bleiben.
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+    import toml
+
+# Spalten einer Telematikdatei (siehe oekorps.telematik); weitere Spalten werden beim Einlesen übersprungen
+telematik_spalten = ['Fahrzeugtyp', 'Zeitpunkt', 'Periode', 'Kilometer', 'Fahrgäste', 'Buchungen', 'Einstiege']
+
+
+# Funktion zum Lesen einer TOML-Datei
+def read_toml(pfad):
+    if tomllib is not None:
+        with open(pfad, 'rb') as datei:
+            return tomllib.load(datei)
+    return toml.load(pfad)
+
+
+# Funktion zur Erkennung des Trennzeichens einer CSV-Datei anhand der Kopfzeile
+def detect_separator(datei):
+    if isinstance(datei, str):
+        with open(datei, 'rb') as csv_datei:
+            kopfzeile = csv_datei.readline()
+    else:
+        kopfzeile = datei.readline()
+        datei.seek(0)
+    if isinstance(kopfzeile, str):
+        kopfzeile = kopfzeile.encode('utf-8')
+    return ';' if kopfzeile.count(b';') > kopfzeile.count(b',') else ','
+
+
+# Generator für die Blöcke einer CSV- oder Parquet-Datei mit Fahrtabschnitten
+def iter_trip_blocks(pfad, blockgroesse):
+    import pandas as pd
+
+    if str(getattr(pfad, 'name', pfad)).lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_datei = pq.ParquetFile(pfad, memory_map=isinstance(pfad, str))
+        spalten = [spalte for spalte in telematik_spalten if spalte in parquet_datei.schema_arrow.names]
+        for batch in parquet_datei.iter_batches(batch_size=blockgroesse, columns=spalten):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(pfad, chunksize=blockgroesse, usecols=lambda spalte: spalte in telematik_spalten)
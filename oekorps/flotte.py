@@ -0,0 +1,130 @@
+# Fahrzeugflotte als spaltenweise Tabelle (pandas.DataFrame)
+# Ersetzt die Liste von Dictionaries (vehicle_list) und erlaubt den Import ganzer Flotten aus CSV-, Parquet-
+# oder Excel-Dateien. CSV- und Parquet-Dateien werden blockweise gelesen und geprüft.
+import numpy as np
+import pandas as pd
+
+from oekorps.dateien import detect_separator
+from oekorps.referenzdaten import load_referenzdaten
+
+verbrauch_spalten = ['Benzinverbrauch (l/100km)', 'Dieselverbrauch (l/100km)', 'Stromverbrauch (kWh/100km)']
+kilometer_spalten = ['Kilometer leer', 'Kilometer besetzt']
+fahrzeug_spalten = ['Fahrzeugtyp'] + verbrauch_spalten + kilometer_spalten
+
+# Pflichtspalten beim Import; fehlende Verbrauchsspalten werden aus dem Fahrzeugkatalog ergänzt
+pflicht_spalten = ['Fahrzeugtyp'] + kilometer_spalten
+
+import_blockgroesse = 100_000
+
+
+# Funktion zum Erstellen einer leeren Fahrzeugtabelle
+def empty_fleet():
+    fahrzeuge = pd.DataFrame({'Fahrzeugtyp': pd.Series(dtype=object)})
+    for spalte in verbrauch_spalten + kilometer_spalten:
+        fahrzeuge[spalte] = pd.Series(dtype=np.float64)
+    return fahrzeuge
+
+
+# Funktion zum Anhängen eines Fahrzeugs (Dictionary wie in vehicle_types) an die Fahrzeugtabelle
+def append_vehicle(fahrzeuge, fahrzeugtyp, daten):
+    zeile = {'Fahrzeugtyp': fahrzeugtyp}
+    zeile.update({spalte: float(daten.get(spalte, 0.0)) for spalte in verbrauch_spalten + kilometer_spalten})
+    neu = pd.DataFrame([zeile], columns=fahrzeug_spalten)
+    if fahrzeuge.empty:
+        return neu.astype({spalte: np.float64 for spalte in verbrauch_spalten + kilometer_spalten})
+    return pd.concat([fahrzeuge, neu], ignore_index=True)
+
+
+# Funktion zur Umwandlung einer vehicle_list (Liste von Dictionaries) in eine Fahrzeugtabelle
+def vehicle_list_to_fleet(vehicle_list):
+    fahrzeuge = empty_fleet()
+    if not vehicle_list:
+        return fahrzeuge
+    fahrzeuge = pd.DataFrame(list(vehicle_list), columns=fahrzeug_spalten)
+    return fahrzeuge.astype({spalte: np.float64 for spalte in verbrauch_spalten + kilometer_spalten})
+
+
+# Funktion zur Berechnung der Kilometer leer und besetzt für die gesamte Flotte (Tabellenvariante von calculate_fleet_km)
+def calculate_fleet_km_table(fahrzeuge):
+    return float(fahrzeuge['Kilometer leer'].to_numpy().sum()), float(fahrzeuge['Kilometer besetzt'].to_numpy().sum())
+
+
+# Funktion zur Berechnung des Verbrauchs der Fahrzeugflotte (Tabellenvariante von calculate_fleet_consumption)
+def calculate_fleet_consumption_table(fahrzeuge):
+    kilometer_gesamt_100 = (fahrzeuge['Kilometer besetzt'].to_numpy() + fahrzeuge['Kilometer leer'].to_numpy()) / 100
+    return {
+        'benzinverbrauch_gesamt': float(np.dot(fahrzeuge['Benzinverbrauch (l/100km)'].to_numpy(), kilometer_gesamt_100)),
+        'dieselverbrauch_gesamt': float(np.dot(fahrzeuge['Dieselverbrauch (l/100km)'].to_numpy(), kilometer_gesamt_100)),
+        'stromverbrauch_gesamt': float(np.dot(fahrzeuge['Stromverbrauch (kWh/100km)'].to_numpy(), kilometer_gesamt_100))
+    }
+
+
+# Funktion zur Prüfung und Typumwandlung eines eingelesenen Blocks
+# zeilen_offset dient nur dazu, in Fehlermeldungen die Zeilennummer der Datei anzugeben.
+def _validate_block(block, fahrzeugtypen, zeilen_offset=0):
+    block = block.rename(columns=lambda spalte: str(spalte).strip())
+    fehlende = [spalte for spalte in pflicht_spalten if spalte not in block.columns]
+    if fehlende:
+        raise ValueError(f"Die folgenden Spalten fehlen in der Datei: {', '.join(fehlende)}")
+
+    ergebnis = pd.DataFrame({'Fahrzeugtyp': block['Fahrzeugtyp'].fillna('').astype(str).str.strip().to_numpy(dtype=object)})
+    for spalte in verbrauch_spalten + kilometer_spalten:
+        if spalte in block.columns:
+            werte = pd.to_numeric(block[spalte], errors='coerce').to_numpy(dtype=np.float64)
+            ungueltig = np.isnan(werte) & block[spalte].notna().to_numpy()
+            if ungueltig.any():
+                zeile = zeilen_offset + int(np.argmax(ungueltig)) + 2  # Kopfzeile + 1-basierte Zählung
+                raise ValueError(f"Ungültiger Zahlenwert in Spalte '{spalte}' (Zeile {zeile}).")
+        else:
+            werte = np.full(len(block), np.nan)
+
+        if spalte in verbrauch_spalten:
+            # Fehlende Verbrauchswerte aus dem Fahrzeugkatalog ergänzen
+            fehlt = np.isnan(werte)
+            if fehlt.any():
+                katalog = ergebnis['Fahrzeugtyp'].map(lambda typ: fahrzeugtypen.get(typ, {}).get(spalte, 0.0)).to_numpy(dtype=np.float64)
+                werte = np.where(fehlt, katalog, werte)
+        else:
+            werte = np.nan_to_num(werte, nan=0.0)
+
+        if (werte < 0).any():
+            zeile = zeilen_offset + int(np.argmax(werte < 0)) + 2
+            raise ValueError(f"Negativer Wert in Spalte '{spalte}' (Zeile {zeile}).")
+        ergebnis[spalte] = werte
+    return ergebnis
+
+
+# Generator für die Blöcke einer CSV-, Parquet- oder Excel-Datei
+def _iter_blocks(datei, dateiname, blockgroesse):
+    endung = dateiname.lower().rsplit('.', 1)[-1]
+    if endung == 'csv':
+        trennzeichen = detect_separator(datei)
+        # Bei Semikolon-getrennten Dateien (deutsches Excel) wird das Komma als Dezimaltrennzeichen verwendet
+        yield from pd.read_csv(datei, chunksize=blockgroesse, sep=trennzeichen, decimal=',' if trennzeichen == ';' else '.')
+    elif endung == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_datei = pq.ParquetFile(datei, memory_map=isinstance(datei, str))
+        spalten = [spalte for spalte in fahrzeug_spalten if spalte in parquet_datei.schema_arrow.names]
+        for batch in parquet_datei.iter_batches(batch_size=blockgroesse, columns=spalten):
+            yield batch.to_pandas()
+    elif endung in ('xlsx', 'xls'):
+        # Excel-Dateien lassen sich nicht blockweise lesen
+        yield pd.read_excel(datei)
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: .{endung} (erlaubt sind CSV, Parquet und Excel).")
+
+
+# Funktion zum Einlesen einer Fahrzeugflotte aus einer Datei oder einem Datei-Objekt (z.B. st.file_uploader)
+# Löst bei fehlenden Spalten oder ungültigen Werten einen ValueError mit einer Meldung für den Benutzer aus.
+def read_fleet_file(datei, dateiname=None, blockgroesse=import_blockgroesse):
+    dateiname = dateiname or getattr(datei, 'name', str(datei))
+    fahrzeugtypen = load_referenzdaten()['fahrzeugtypen']
+    bloecke = []
+    zeilen_offset = 0
+    for block in _iter_blocks(datei, dateiname, blockgroesse):
+        bloecke.append(_validate_block(block, fahrzeugtypen, zeilen_offset))
+        zeilen_offset += len(block)
+    if not bloecke:
+        return empty_fleet()
+    return pd.concat(bloecke, ignore_index=True)
@@ -0,0 +1,226 @@
+# Stapelverarbeitung von Szenariodateien über die Kommandozeile (Abschnitte 1.3 bis 3.1 ohne Benutzeroberfläche)
+# Aufruf:  python -m oekorps szenario.toml [weitere Dateien oder Verzeichnisse] [-o ergebnisse.csv|.parquet|.json|.jsonl]
+# Die Szenarien werden auf einen Prozesspool verteilt; jede Ergebniszeile wird geschrieben, sobald sie vorliegt.
+# Streamlit und Plotly werden nicht importiert, pandas/pyarrow nur für Flottendateien und Parquet-Ausgabe.
+#
+# Aufbau einer Szenariodatei (TOML oder JSON, Schlüssel wie im st.session_state der App):
+#   name = "bussi 2022"
+#   name_ridepooling_system = "bussi"
+#   start_date = 2022-01-01
+#   end_date = 2022-12-31
+#   abgeschlossene_buchungen = 60045
+#   transportierte_fahrgaeste = 74556
+#   benzin_emissionsdaten = "CO2eqonline [CO2eq]"  # Zahl (g/l) oder Bezeichnung aus den Referenzdaten
+#   diesel_emissionsdaten = 2650
+#   strom_emissionsdaten = 498
+#   oekostrom_anteil = 0
+#   fahrzeugflotte = "flotte.csv"                   # alternativ [[fahrzeuge]]-Tabellen wie in vehicle_list
+#   [bus]                                           # alternativ adjusted_occupancy = 18.7
+#   nutzwagen_km = 1658.0
+#   platzangebot = 78.5186
+#   personen_km = 24311.0
+# Aus der Szenariodatenbank exportierte Szenarien (oekorps.szenarien.load_scenario als JSON) werden ebenfalls gelesen.
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from oekorps.berechnung import calculate_all_from_totals, calculate_scenario_fleet_totals, calculate_scenario_occupancy, parse_number
+from oekorps.dateien import read_toml
+from oekorps.referenzdaten import load_referenzdaten, resolve_emissionsfaktor
+
+szenario_endungen = ('.toml', '.json')
+parquet_blockgroesse = 1000
+
+
+# Funktion zum Einlesen einer Szenariodatei (TOML oder JSON)
+def load_scenario_file(pfad):
+    if pfad.lower().endswith('.json'):
+        with open(pfad, encoding='utf-8') as datei:
+            szenario = json.load(datei)
+    else:
+        szenario = read_toml(pfad)
+    if not isinstance(szenario, dict) or not isinstance(szenario.get('eingaben', {}), dict):
+        raise ValueError("Die Szenariodatei muss ein Objekt mit den Eingaben des Szenarios enthalten.")
+    if 'eingaben' in szenario:
+        # Export aus der Szenariodatenbank
+        szenario = dict(szenario['eingaben'], name=szenario.get('name'), fahrzeuge=szenario.get('fahrzeugflotte', []))
+    return szenario
+
+
+# Funktion zur Berechnung eines Szenarios; Ergebnis: eine Zeile mit Kopfspalten und allen Kennzahlen aus calculate_all
+def calculate_scenario(szenario, pfad=''):
+    fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, verbrauch = calculate_scenario_fleet_totals(szenario, os.path.dirname(pfad))
+    emissionsfaktoren = load_referenzdaten()['emissionsfaktoren']
+    ergebnis = calculate_all_from_totals(
+        fahrzeugkilometer_leer, fahrzeugkilometer_besetzt, verbrauch,
+        parse_number(szenario.get('abgeschlossene_buchungen', 0), 'abgeschlossene_buchungen'),
+        parse_number(szenario.get('transportierte_fahrgaeste', 0), 'transportierte_fahrgaeste'),
+        resolve_emissionsfaktor(szenario.get('benzin_emissionsdaten', 0), emissionsfaktoren['benzin'], 'Benzin'),
+        resolve_emissionsfaktor(szenario.get('diesel_emissionsdaten', 0), emissionsfaktoren['diesel'], 'Diesel'),
+        resolve_emissionsfaktor(szenario.get('strom_emissionsdaten', 0), emissionsfaktoren['strom'], 'Strom'),
+        parse_number(szenario.get('oekostrom_anteil', 0), 'oekostrom_anteil'),
+        parse_number(szenario.get('pv_emissionsdaten', emissionsfaktoren['pv']), 'pv_emissionsdaten'),
+        calculate_scenario_occupancy(szenario))
+
+    zeile = {
+        'Szenario': szenario.get('name') or os.path.splitext(os.path.basename(pfad))[0],
+        'Datei': pfad,
+        'name_ridepooling_system': szenario.get('name_ridepooling_system', ''),
+        'start_date': str(szenario.get('start_date', '')),
+        'end_date': str(szenario.get('end_date', '')),
+        'abgeschlossene_buchungen': szenario.get('abgeschlossene_buchungen', 0),
+        'transportierte_fahrgaeste': szenario.get('transportierte_fahrgaeste', 0),
+    }
+    zeile.update(ergebnis)
+    return zeile
+
+
+# Funktion für die Prozesse des Pools: Einlesen und Berechnen einer Szenariodatei
+def run_scenario_file(pfad):
+    return calculate_scenario(load_scenario_file(pfad), pfad)
+
+
+# Generator für alle Szenariodateien aus Dateien und Verzeichnissen (Verzeichnisse werden rekursiv durchsucht)
+def iter_scenario_files(pfade):
+    for pfad in pfade:
+        if os.path.isdir(pfad):
+            for verzeichnis, _, dateien in sorted(os.walk(pfad)):
+                for datei in sorted(dateien):
+                    if datei.lower().endswith(szenario_endungen):
+                        yield os.path.join(verzeichnis, datei)
+        else:
+            yield pfad
+
+
+# Generator für die Ergebnisse (Pfad, Zeile, Fehler) in der Reihenfolge ihrer Fertigstellung
+def iter_results(pfade, max_workers=None):
+    if max_workers == 1:
+        for pfad in pfade:
+            try:
+                yield pfad, run_scenario_file(pfad), None
+            except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError) as fehler:
+                yield pfad, None, fehler
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        auftraege = {pool.submit(run_scenario_file, pfad): pfad for pfad in pfade}
+        for auftrag in as_completed(auftraege):
+            try:
+                yield auftraege[auftrag], auftrag.result(), None
+            except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError) as fehler:
+                yield auftraege[auftrag], None, fehler
+
+
+class _CsvAusgabe:
+    def __init__(self, datei):
+        self.datei = datei
+        self.writer = None
+
+    def write(self, zeile):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.datei, fieldnames=list(zeile))
+            self.writer.writeheader()
+        self.writer.writerow(zeile)
+        self.datei.flush()
+
+    def close(self):
+        pass
+
+
+class _JsonAusgabe:
+    # JSON Lines (.jsonl) oder ein JSON-Array (.json), das zeilenweise geschrieben wird
+    def __init__(self, datei, zeilenweise):
+        self.datei = datei
+        self.zeilenweise = zeilenweise
+        self.anzahl = 0
+
+    def write(self, zeile):
+        text = json.dumps(zeile, ensure_ascii=False)
+        if self.zeilenweise:
+            self.datei.write(text + '\n')
+        else:
+            self.datei.write(('[\n' if self.anzahl == 0 else ',\n') + text)
+        self.anzahl += 1
+        self.datei.flush()
+
+    def close(self):
+        if not self.zeilenweise:
+            self.datei.write('[\n]\n' if self.anzahl == 0 else '\n]\n')
+
+
+class _ParquetAusgabe:
+    # Ergebnisse werden in Zeilengruppen zu parquet_blockgroesse Zeilen geschrieben
+    def __init__(self, pfad):
+        self.pfad = pfad
+        self.puffer = []
+        self.writer = None
+
+    def write(self, zeile):
+        self.puffer.append(zeile)
+        if len(self.puffer) >= parquet_blockgroesse:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self.puffer:
+            return
+        tabelle = pa.Table.from_pylist(self.puffer, schema=self.writer.schema if self.writer else None)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.pfad, tabelle.schema)
+        self.writer.write_table(tabelle)
+        self.puffer = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Funktion zur Auswahl des Ausgabeformats anhand der Dateiendung (oder --format)
+def _open_output(pfad, format):
+    format = format or (os.path.splitext(pfad)[1].lstrip('.').lower() if pfad else 'csv')
+    if format == 'parquet':
+        if not pfad:
+            raise ValueError("Für die Ausgabe als Parquet muss eine Ausgabedatei angegeben werden.")
+        return _ParquetAusgabe(pfad), None
+    datei = open(pfad, 'w', encoding='utf-8', newline='') if pfad else sys.stdout
+    if format == 'csv':
+        return _CsvAusgabe(datei), datei
+    if format in ('json', 'jsonl'):
+        return _JsonAusgabe(datei, zeilenweise=format == 'jsonl'), datei
+    raise ValueError(f"Nicht unterstütztes Ausgabeformat: {format} (erlaubt sind csv, parquet, json und jsonl).")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m oekorps', description="Vergleich der CO2eq-Emissionen von Bus- und Ridepooling-System für Szenariodateien (TOML/JSON).")
+    parser.add_argument('pfade', nargs='+', help="Szenariodateien oder Verzeichnisse mit Szenariodateien")
+    parser.add_argument('-o', '--output', help="Ausgabedatei (.csv, .parquet, .json, .jsonl); ohne Angabe CSV auf der Standardausgabe")
+    parser.add_argument('-f', '--format', choices=['csv', 'parquet', 'json', 'jsonl'], help="Ausgabeformat (sonst aus der Dateiendung)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Anzahl der Prozesse (1 = ohne Prozesspool)")
+    argumente = parser.parse_args(argv)
+
+    pfade = list(iter_scenario_files(argumente.pfade))
+    if not pfade:
+        parser.error("Keine Szenariodateien gefunden.")
+    try:
+        ausgabe, datei = _open_output(argumente.output, argumente.format)
+    except ValueError as fehler:
+        parser.error(str(fehler))
+
+    fehlerhaft = 0
+    try:
+        for pfad, zeile, fehler in iter_results(pfade, argumente.workers if len(pfade) > 1 else 1):
+            if fehler is not None:
+                fehlerhaft += 1
+                print(f"{pfad}: {fehler}", file=sys.stderr)
+            else:
+                ausgabe.write(zeile)
+    finally:
+        ausgabe.close()
+        if datei is not None and datei is not sys.stdout:
+            datei.close()
+    return 1 if fehlerhaft else 0
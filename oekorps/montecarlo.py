@@ -0,0 +1,219 @@
+# Monte-Carlo-Unsicherheitsanalyse der CO2eq-Emissionen pro Personenkilometer
+# Emissionsfaktoren, Verbräuche und Kilometerleistungen werden als Verteilungen gezogen. Die Ziehungen
+# erfolgen in Blöcken (chunk_size) mit je eigenem, aus dem Seed abgeleiteten Zufallsgenerator, sodass das
+# Ergebnis unabhängig von der Anzahl der Prozesse reproduzierbar ist. Perzentile werden über feste
+# Histogramme fortlaufend aktualisiert, der Speicherbedarf hängt daher nicht von der Anzahl der Ziehungen ab.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from oekorps.berechnung import bus_referenz, referenz_emissionsfaktoren, calculate_fleet_km, calculate_fleet_consumption
+
+# Verteilungen werden als Tupel (Name der numpy.random.Generator-Methode, Parameter...) angegeben,
+# z.B. ('normal', 498, 25), ('uniform', 434, 498) oder ('triangular', 20, 35, 50). Zahlen gelten als fest.
+# Die Faktoren für Verbrauch und Kilometer wirken multiplikativ auf die Eingabewerte.
+# Funktion zur Bestimmung der Standardverteilungen aus den aktuellen Referenzdaten (Spannweite der Emissionsfaktoren)
+def default_distributions():
+    emissionsfaktoren = referenz_emissionsfaktoren()
+    return {
+        'benzin_emissionsdaten': ('uniform', min(emissionsfaktoren['benzin'].values()), max(emissionsfaktoren['benzin'].values())),
+        'diesel_emissionsdaten': ('uniform', min(emissionsfaktoren['diesel'].values()), max(emissionsfaktoren['diesel'].values())),
+        'strom_emissionsdaten': ('uniform', min(emissionsfaktoren['strom'].values()), max(emissionsfaktoren['strom'].values())),
+        'pv_emissionsdaten': emissionsfaktoren['pv'],
+        'benzinverbrauch_faktor': 1.0,
+        'dieselverbrauch_faktor': 1.0,
+        'stromverbrauch_faktor': 1.0,
+        'kilometer_leer_faktor': 1.0,
+        'kilometer_besetzt_faktor': 1.0,
+        'adjusted_occupancy': bus_referenz()[1],
+    }
+
+
+# Ausgewertete Kennzahlen
+kennzahlen = ['CO2eq_emissionen_pro_personenkilometer_rps_g', 'new_CO2eq_wtw', 'differenz_bus_rps']
+
+standard_perzentile = (2.5, 5, 25, 50, 75, 95, 97.5)
+histogramm_klassen = 20000
+
+
+# Funktion zum Erstellen der Basisdaten aus einer vehicle_list und den Buchungsdaten
+def basis_from_vehicle_list(vehicle_list, abgeschlossene_buchungen, transportierte_fahrgaeste, oekostrom_anteil=0):
+    fahrzeugkilometer_leer, fahrzeugkilometer_besetzt = calculate_fleet_km(vehicle_list)
+    basis = {
+        'fahrzeugkilometer_leer': float(fahrzeugkilometer_leer),
+        'fahrzeugkilometer_besetzt': float(fahrzeugkilometer_besetzt),
+        'abgeschlossene_buchungen': float(abgeschlossene_buchungen),
+        'transportierte_fahrgaeste': float(transportierte_fahrgaeste),
+        'oekostrom_anteil': float(oekostrom_anteil),
+    }
+    basis.update(calculate_fleet_consumption(vehicle_list))
+    return basis
+
+
+# Funktion zum Ziehen von n Werten je Parameter
+def draw_samples(verteilungen, n, rng):
+    proben = {}
+    for name, verteilung in verteilungen.items():
+        if isinstance(verteilung, tuple):
+            proben[name] = np.maximum(getattr(rng, verteilung[0])(*verteilung[1:], size=n), 0.0)
+        else:
+            proben[name] = np.full(n, float(verteilung))
+    return proben
+
+
+# Funktion zur vektorisierten Auswertung der Formeln aus Abschnitt 1.3 bis 3.1 für alle Ziehungen
+# Die Verbräuche werden proportional zur gezogenen Fahrzeugkilometerleistung skaliert.
+def evaluate_samples(basis, proben):
+    kilometer_leer = basis['fahrzeugkilometer_leer'] * proben['kilometer_leer_faktor']
+    kilometer_besetzt = basis['fahrzeugkilometer_besetzt'] * proben['kilometer_besetzt_faktor']
+    kilometer_basis = basis['fahrzeugkilometer_leer'] + basis['fahrzeugkilometer_besetzt']
+    kilometer_skalierung = (kilometer_leer + kilometer_besetzt) / kilometer_basis if kilometer_basis > 0 else 0.0
+
+    buchungen = basis['abgeschlossene_buchungen']
+    personenkilometer_gefahren = kilometer_besetzt / buchungen * basis['transportierte_fahrgaeste'] if buchungen > 0 else np.zeros_like(kilometer_besetzt)
+
+    anteil = basis['oekostrom_anteil'] / 100.0
+    strom_emissionsdaten = proben['strom_emissionsdaten'] * (1 - anteil) + proben['pv_emissionsdaten'] * anteil
+
+    benzin_emissionen = basis['benzinverbrauch_gesamt'] * proben['benzinverbrauch_faktor'] * kilometer_skalierung * proben['benzin_emissionsdaten'] / 1000
+    diesel_emissionen = basis['dieselverbrauch_gesamt'] * proben['dieselverbrauch_faktor'] * kilometer_skalierung * proben['diesel_emissionsdaten'] / 1000
+    strom_emissionen = basis['stromverbrauch_gesamt'] * proben['stromverbrauch_faktor'] * kilometer_skalierung * strom_emissionsdaten / 1000
+    strom_emissionen *= (1 - anteil)  # Anpassung für Ökostrom
+
+    CO2eq_emissionen_gesamt_rps = benzin_emissionen + diesel_emissionen + strom_emissionen
+    CO2eq_emissionen_pro_personenkilometer_rps_g = np.zeros_like(CO2eq_emissionen_gesamt_rps)
+    np.divide(CO2eq_emissionen_gesamt_rps * 1000, personenkilometer_gefahren, out=CO2eq_emissionen_pro_personenkilometer_rps_g, where=personenkilometer_gefahren > 0)
+
+    initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+    new_CO2eq_wtw = initial_CO2eq_wtw * (initial_occupancy / proben['adjusted_occupancy'])
+    return {
+        'CO2eq_emissionen_pro_personenkilometer_rps_g': CO2eq_emissionen_pro_personenkilometer_rps_g,
+        'new_CO2eq_wtw': new_CO2eq_wtw,
+        'differenz_bus_rps': CO2eq_emissionen_pro_personenkilometer_rps_g - new_CO2eq_wtw,
+    }
+
+
+# Funktion zur Auswertung eines Blocks mit eigenem Zufallsgenerator
+def _simulate_chunk(basis, verteilungen, seed_sequence, n):
+    return evaluate_samples(basis, draw_samples(verteilungen, n, np.random.default_rng(seed_sequence)))
+
+
+# Funktion zur Auswertung mehrerer Blöcke als Histogramm (wird auch in den Worker-Prozessen ausgeführt)
+def _simulate_chunks_histogram(basis, verteilungen, seed_sequences, groessen, grenzen):
+    zaehler = {name: np.zeros(histogramm_klassen + 2, dtype=np.int64) for name in kennzahlen}
+    summen = {name: np.zeros(2) for name in kennzahlen}
+    rps_unter_bus = 0
+    for seed_sequence, n in zip(seed_sequences, groessen):
+        ergebnis = _simulate_chunk(basis, verteilungen, seed_sequence, n)
+        for name in kennzahlen:
+            werte = ergebnis[name]
+            klassen = np.searchsorted(grenzen[name], werte, side='right')  # 0 = Unterlauf, histogramm_klassen + 1 = Überlauf
+            zaehler[name] += np.bincount(klassen, minlength=histogramm_klassen + 2)
+            summen[name] += (werte.sum(), np.square(werte).sum())
+        rps_unter_bus += int(np.count_nonzero(ergebnis['differenz_bus_rps'] < 0))
+    return zaehler, summen, rps_unter_bus
+
+
+# Funktion zur Berechnung der Perzentile aus einem Histogramm (lineare Interpolation innerhalb der Klasse)
+def _histogram_percentiles(zaehler, grenzen, perzentile):
+    kumuliert = np.cumsum(zaehler)
+    gesamt = kumuliert[-1]
+    ergebnis = {}
+    for p in perzentile:
+        ziel = p / 100.0 * gesamt
+        klasse = int(np.searchsorted(kumuliert, ziel, side='left'))
+        if klasse == 0:
+            ergebnis[p] = grenzen[0]
+        elif klasse > histogramm_klassen:
+            ergebnis[p] = grenzen[-1]
+        else:
+            vorher = kumuliert[klasse - 1]
+            anteil = (ziel - vorher) / zaehler[klasse] if zaehler[klasse] else 0.0
+            ergebnis[p] = grenzen[klasse - 1] + anteil * (grenzen[klasse] - grenzen[klasse - 1])
+    return ergebnis
+
+
+# Funktion zur Zusammenfassung der Zwischenstände als Ergebnis-Dictionary
+def _summarize(zaehler, summen, rps_unter_bus, n_gesamt, grenzen, perzentile):
+    ergebnis = {'n': n_gesamt, 'anteil_rps_unter_bus': rps_unter_bus / n_gesamt if n_gesamt else 0.0}
+    for name in kennzahlen:
+        mittelwert = summen[name][0] / n_gesamt
+        varianz = max(summen[name][1] / n_gesamt - mittelwert ** 2, 0.0)
+        ergebnis[name] = {
+            'mittelwert': float(mittelwert),
+            'standardabweichung': float(np.sqrt(varianz)),
+            'perzentile': {p: float(wert) for p, wert in _histogram_percentiles(zaehler[name], grenzen[name], perzentile).items()},
+        }
+    return ergebnis
+
+
+# Funktion zur Festlegung der Histogrammgrenzen anhand eines Vorlaufs
+# Werte außerhalb der Grenzen werden als Unter-/Überlauf gezählt und auf die Grenze gesetzt.
+def _histogram_limits(basis, verteilungen, seed_sequence, n):
+    vorlauf = _simulate_chunk(basis, verteilungen, seed_sequence, n)
+    grenzen = {}
+    for name in kennzahlen:
+        unten, oben = np.percentile(vorlauf[name], [0.001, 99.999])
+        spanne = max(oben - unten, 1e-9)
+        grenzen[name] = np.linspace(unten - 0.5 * spanne, oben + 0.5 * spanne, histogramm_klassen + 1)
+    return grenzen
+
+
+# Funktion zur Aufteilung von n Ziehungen auf Blöcke mit je eigenem SeedSequence
+def _chunks(n, chunk_size, seed):
+    if n < 1 or chunk_size < 1:
+        raise ValueError("Anzahl der Ziehungen (n) und Blockgröße (chunk_size) müssen mindestens 1 sein.")
+    groessen = [chunk_size] * (n // chunk_size)
+    if n % chunk_size:
+        groessen.append(n % chunk_size)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(groessen) + 1)
+    return seed_sequences[0], seed_sequences[1:], groessen
+
+
+# Generator für fortlaufend aktualisierte Perzentilbänder (ein Zwischenstand je Block)
+def iter_monte_carlo(basis, verteilungen=None, n=1_000_000, chunk_size=250_000, seed=0, perzentile=standard_perzentile):
+    verteilungen = {**default_distributions(), **(verteilungen or {})}
+    vorlauf_seed, seed_sequences, groessen = _chunks(n, chunk_size, seed)
+    grenzen = _histogram_limits(basis, verteilungen, vorlauf_seed, min(chunk_size, 100_000))
+
+    zaehler = {name: np.zeros(histogramm_klassen + 2, dtype=np.int64) for name in kennzahlen}
+    summen = {name: np.zeros(2) for name in kennzahlen}
+    rps_unter_bus = 0
+    n_gesamt = 0
+    for seed_sequence, groesse in zip(seed_sequences, groessen):
+        block_zaehler, block_summen, block_unter_bus = _simulate_chunks_histogram(basis, verteilungen, [seed_sequence], [groesse], grenzen)
+        for name in kennzahlen:
+            zaehler[name] += block_zaehler[name]
+            summen[name] += block_summen[name]
+        rps_unter_bus += block_unter_bus
+        n_gesamt += groesse
+        yield _summarize(zaehler, summen, rps_unter_bus, n_gesamt, grenzen, perzentile)
+
+
+# Funktion zur Durchführung der Monte-Carlo-Simulation, optional verteilt auf mehrere Prozesse
+# Bei gleichem Seed und gleicher chunk_size sind die Perzentile unabhängig von max_workers.
+def run_monte_carlo(basis, verteilungen=None, n=1_000_000, chunk_size=250_000, seed=0, perzentile=standard_perzentile, max_workers=None):
+    if not max_workers or max_workers <= 1:
+        for ergebnis in iter_monte_carlo(basis, verteilungen, n, chunk_size, seed, perzentile):
+            pass
+        return ergebnis
+
+    verteilungen = {**default_distributions(), **(verteilungen or {})}
+    vorlauf_seed, seed_sequences, groessen = _chunks(n, chunk_size, seed)
+    grenzen = _histogram_limits(basis, verteilungen, vorlauf_seed, min(chunk_size, 100_000))
+
+    zaehler = {name: np.zeros(histogramm_klassen + 2, dtype=np.int64) for name in kennzahlen}
+    summen = {name: np.zeros(2) for name in kennzahlen}
+    rps_unter_bus = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        auftraege = [
+            executor.submit(_simulate_chunks_histogram, basis, verteilungen, seed_sequences[i::max_workers], groessen[i::max_workers], grenzen)
+            for i in range(max_workers)
+        ]
+        for auftrag in auftraege:
+            block_zaehler, block_summen, block_unter_bus = auftrag.result()
+            for name in kennzahlen:
+                zaehler[name] += block_zaehler[name]
+                summen[name] += block_summen[name]
+            rps_unter_bus += block_unter_bus
+    return _summarize(zaehler, summen, rps_unter_bus, n, grenzen, perzentile)
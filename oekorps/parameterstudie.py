@@ -0,0 +1,60 @@
+# Parameterstudie und Break-even-Fläche Bus / Ridepooling-System
+# Die Emissionen des Ridepooling-Systems pro Pkm hängen bei gegebener Flotte nur von der Besetzungsquote und dem
+# Leerkilometeranteil ab, die des Busses nur von der Platzausnutzung:
+#   CO2eq_rps = CO2eq pro Fahrzeugkilometer / (Besetzungsquote * (1 - Leerkilometeranteil))
+#   CO2eq_bus = initial_CO2eq_wtw * initial_occupancy / Platzausnutzung
+# Das Gitter Platzausnutzung x Besetzungsquote x Leerkilometeranteil wird daher per Broadcasting in einem
+# Durchlauf berechnet, ohne die skalaren Funktionen in Schleifen aufzurufen.
+import numpy as np
+
+from oekorps.berechnung import bus_referenz
+
+
+# Funktion zur Berechnung der CO2eq-Emissionen pro Fahrzeugkilometer (g/Fzg-km) aus den Ergebnissen von Abschnitt 1
+def calculate_CO2eq_pro_fahrzeugkilometer(CO2eq_emissionen_gesamt_rps, fahrzeugkilometer_gesamt):
+    return CO2eq_emissionen_gesamt_rps * 1000 / fahrzeugkilometer_gesamt if fahrzeugkilometer_gesamt > 0 else 0.0
+
+
+# Funktion zur Berechnung der Emissionen beider Systeme über das gesamte Parametergitter
+# platzausnutzung in %, besetzungsquote in Pkm/Fzg-km besetzt, leerkilometeranteil in %.
+# Mit volle_differenz=False wird das dreidimensionale Differenzgitter nicht angelegt (nur Break-even-Fläche).
+# Die Emissionen des Busses werden ausgehend von CO2eq_bus_referenz (g/Pkm) bei platzausnutzung_referenz (%)
+# skaliert, ohne Angabe mit den Werten aus den Referenzdaten.
+def calculate_sweep(CO2eq_pro_fahrzeugkilometer, platzausnutzung, besetzungsquote, leerkilometeranteil,
+                    volle_differenz=True, dtype=np.float32, CO2eq_bus_referenz=None, platzausnutzung_referenz=None):
+    platzausnutzung = np.asarray(platzausnutzung, dtype=dtype)
+    besetzungsquote = np.asarray(besetzungsquote, dtype=dtype)
+    leerkilometeranteil = np.asarray(leerkilometeranteil, dtype=dtype)
+    initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+    initial_CO2eq_wtw = initial_CO2eq_wtw if CO2eq_bus_referenz is None else CO2eq_bus_referenz
+    initial_occupancy = initial_occupancy if platzausnutzung_referenz is None else platzausnutzung_referenz
+
+    CO2eq_bus = (initial_CO2eq_wtw * initial_occupancy / platzausnutzung).astype(dtype)  # (P,)
+    pkm_pro_fahrzeugkilometer = besetzungsquote[:, None] * (1 - leerkilometeranteil[None, :] / 100)  # (B, L)
+    with np.errstate(divide='ignore'):
+        CO2eq_rps = (CO2eq_pro_fahrzeugkilometer / pkm_pro_fahrzeugkilometer).astype(dtype)  # (B, L)
+        # Platzausnutzung, bei der der Bus genauso viel emittiert wie das Ridepooling-System
+        break_even_platzausnutzung = (initial_CO2eq_wtw * initial_occupancy / CO2eq_rps).astype(dtype)  # (B, L)
+
+    ergebnis = {
+        'platzausnutzung': platzausnutzung,
+        'besetzungsquote': besetzungsquote,
+        'leerkilometeranteil': leerkilometeranteil,
+        'CO2eq_bus': CO2eq_bus,
+        'CO2eq_rps': CO2eq_rps,
+        'break_even_platzausnutzung': break_even_platzausnutzung,
+    }
+    if volle_differenz:
+        # Positive Werte: Ridepooling-System emittiert mehr als der Bus (g CO2eq/Pkm), Form (P, B, L)
+        ergebnis['differenz_bus_rps'] = np.subtract(CO2eq_rps[None, :, :], CO2eq_bus[:, None, None], dtype=dtype)
+    return ergebnis
+
+
+# Funktion zur Erstellung der Standardachsen der Parameterstudie
+def sweep_axes(punkte_platzausnutzung=1000, punkte_besetzungsquote=1000, punkte_leerkilometeranteil=50,
+               max_besetzungsquote=4.0, max_leerkilometeranteil=90.0):
+    return (
+        np.linspace(1.0, 100.0, punkte_platzausnutzung),
+        np.linspace(max_besetzungsquote / punkte_besetzungsquote, max_besetzungsquote, punkte_besetzungsquote),
+        np.linspace(0.0, max_leerkilometeranteil, punkte_leerkilometeranteil),
+    )
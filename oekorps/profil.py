@@ -0,0 +1,87 @@
+# Zeitmessung je Abschnitt und Durchlauf der App (optional, z.B. über OEKORPS_PROFIL=1 oder ?profil=1)
+# Je Abschnitt werden Laufzeit sowie mit tracemalloc die netto belegte und die maximal zusätzlich belegte
+# Speichermenge erfasst. Die Durchläufe lassen sich im Chrome-Trace-Format exportieren (chrome://tracing,
+# Perfetto oder speedscope). Ist die Messung deaktiviert, wird nur ein leerer Kontextmanager verwendet.
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_nullkontext = nullcontext()
+
+
+# Funktion zur Prüfung, ob die Messung über die Umgebungsvariable aktiviert ist
+def profil_aktiviert():
+    return os.environ.get('OEKORPS_PROFIL', '').lower() in ('1', 'true', 'ja')
+
+
+class Profil:
+    # Messung eines Durchlaufs (oder eines Fragments); abschnitte enthält je Abschnitt ein Dictionary mit Beginn, Dauer und Speicher
+
+    def __init__(self, name='Durchlauf', speicher=True):
+        self.name = name
+        self.speicher = speicher
+        self.abschnitte = []
+        self.tiefe = 0
+        self.beginn = time.perf_counter()
+        self.dauer = None
+        # tracemalloc nur für die Dauer der Messung aktivieren, wenn es nicht bereits läuft
+        self._tracemalloc_gestartet = speicher and not tracemalloc.is_tracing()
+        if self._tracemalloc_gestartet:
+            tracemalloc.start()
+
+    @contextmanager
+    def abschnitt(self, name):
+        if self.speicher:
+            speicher_vorher, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        beginn = time.perf_counter()
+        self.tiefe += 1
+        try:
+            yield
+        finally:
+            self.tiefe -= 1
+            eintrag = {'name': name, 'beginn_s': beginn - self.beginn, 'dauer_s': time.perf_counter() - beginn, 'tiefe': self.tiefe}
+            if self.speicher:
+                speicher_nachher, spitze = tracemalloc.get_traced_memory()
+                eintrag['speicher_netto_kb'] = (speicher_nachher - speicher_vorher) / 1024
+                eintrag['speicher_spitze_kb'] = max(spitze - speicher_vorher, 0) / 1024
+            self.abschnitte.append(eintrag)
+
+    def beenden(self):
+        self.dauer = time.perf_counter() - self.beginn
+        if self._tracemalloc_gestartet:
+            tracemalloc.stop()
+            self._tracemalloc_gestartet = False
+        return self
+
+
+# Funktion für Abschnitte, die nur bei aktiver Messung erfasst werden (sonst ohne Mehraufwand)
+def messen(profil, name):
+    return profil.abschnitt(name) if profil is not None else _nullkontext
+
+
+# Funktion zur Zusammenfassung mehrerer Durchläufe je Abschnitt (Anzahl, Mittelwert und Maximum in ms)
+def summarize(laeufe):
+    zusammenfassung = {}
+    for lauf in laeufe:
+        for eintrag in lauf.abschnitte:
+            werte = zusammenfassung.setdefault(eintrag['name'], [])
+            werte.append(eintrag['dauer_s'] * 1000)
+    return [{'Abschnitt': name, 'Durchläufe': len(werte), 'Mittelwert (ms)': sum(werte) / len(werte), 'Maximum (ms)': max(werte)}
+            for name, werte in zusammenfassung.items()]
+
+
+# Funktion zur Umwandlung der Durchläufe in das Chrome-Trace-Format (Zeitangaben in Mikrosekunden)
+def chrome_trace(laeufe):
+    ereignisse = []
+    versatz = 0.0
+    for nummer, lauf in enumerate(laeufe, start=1):
+        ereignisse.append({'name': f"{lauf.name} {nummer}", 'ph': 'X', 'pid': 1, 'tid': 1, 'ts': versatz * 1e6, 'dur': (lauf.dauer or 0.0) * 1e6})
+        for eintrag in lauf.abschnitte:
+            argumente = {key: round(wert, 1) for key, wert in eintrag.items() if key.startswith('speicher')}
+            ereignisse.append({'name': eintrag['name'], 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': (versatz + eintrag['beginn_s']) * 1e6, 'dur': eintrag['dauer_s'] * 1e6, 'args': argumente})
+        # Durchläufe werden ohne Pausen hintereinander dargestellt
+        versatz += (lauf.dauer or 0.0) + 0.001
+    return {'traceEvents': ereignisse, 'displayTimeUnit': 'ms'}
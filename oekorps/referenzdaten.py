@@ -0,0 +1,94 @@
+# Referenzdaten (Fahrzeugkatalog, Ridepooling-Voreinstellungen, Emissionsfaktoren)
+# Die Daten liegen in einer versionierten TOML-Datei und werden einmal je Prozess geladen. Ändert sich der
+# Änderungszeitpunkt der Datei (oder einer eingebundenen Katalogdatei), wird neu geladen. Der Änderungszeitpunkt
+# wird höchstens alle pruef_intervall Sekunden geprüft, damit Schleifen über viele Berechnungen (Batch, API,
+# Kommandozeile, Zeitreihen) nicht bei jedem Aufruf os.stat ausführen und auf die Sperre warten.
+import os
+import threading
+import time
+
+from oekorps.dateien import read_toml
+
+standard_pfad = os.environ.get('OEKORPS_REFERENZDATEN', os.path.join(os.path.dirname(__file__), 'daten', 'referenzdaten.toml'))
+
+verbrauch_spalten = ['Benzinverbrauch (l/100km)', 'Dieselverbrauch (l/100km)', 'Stromverbrauch (kWh/100km)']
+
+# Sekunden zwischen zwei Prüfungen des Änderungszeitpunkts (0 = bei jedem Aufruf prüfen)
+pruef_intervall = 1.0
+
+_cache = {}
+_lock = threading.Lock()
+
+
+# Funktion zum Auflösen der eingebundenen Katalogdateien (relativ zur TOML-Datei)
+def _linked_files(pfad, daten):
+    verzeichnis = os.path.dirname(os.path.abspath(pfad))
+    return {name: os.path.join(verzeichnis, datei) for name, datei in daten.get('dateien', {}).items()}
+
+
+# Funktion zum Einlesen eines Fahrzeugkatalogs aus einer CSV- oder Parquet-Datei
+def _read_fahrzeugtypen(pfad):
+    import pandas as pd
+
+    if pfad.endswith('.parquet'):
+        tabelle = pd.read_parquet(pfad, columns=['Fahrzeugtyp'] + verbrauch_spalten)
+    else:
+        tabelle = pd.read_csv(pfad, usecols=['Fahrzeugtyp'] + verbrauch_spalten)
+    tabelle = tabelle.fillna(0.0).drop_duplicates('Fahrzeugtyp', keep='last')
+    fahrzeugtypen = {}
+    for zeile in tabelle.itertuples(index=False):
+        daten = dict(zip(verbrauch_spalten, map(float, zeile[1:])))
+        daten.update({'Kilometer leer': 0, 'Kilometer besetzt': 0})
+        fahrzeugtypen[zeile[0]] = daten
+    return fahrzeugtypen
+
+
+# Funktion zur Bestimmung der Änderungszeitpunkte einer TOML-Datei und ihrer eingebundenen Dateien
+def _mtimes(pfad, dateien):
+    return tuple(os.stat(datei).st_mtime_ns for datei in [pfad] + list(dateien.values()))
+
+
+# Funktion zur Bestimmung des Änderungszeitpunkts der Referenzdaten einschließlich eingebundener Dateien
+# Dient als Schlüssel für die Invalidierung (auch für st.cache_resource in der App).
+def referenzdaten_mtime(pfad=None):
+    pfad = pfad or standard_pfad
+    eintrag = _cache.get(pfad)
+    return _mtimes(pfad, eintrag[2] if eintrag else {})
+
+
+# Funktion zum Laden der Referenzdaten (einmal je Prozess, erneut bei geänderter Datei)
+# Das zurückgegebene Dictionary wird von allen Aufrufern geteilt und darf nicht verändert werden.
+def load_referenzdaten(pfad=None):
+    pfad = pfad or standard_pfad
+    eintrag = _cache.get(pfad)
+    if eintrag is not None and time.monotonic() - eintrag[3] < pruef_intervall:
+        return eintrag[1]
+    with _lock:
+        eintrag = _cache.get(pfad)
+        if eintrag is not None and eintrag[0] == referenzdaten_mtime(pfad):
+            _cache[pfad] = (*eintrag[:3], time.monotonic())
+            return eintrag[1]
+
+        daten = read_toml(pfad)
+        dateien = _linked_files(pfad, daten)
+        if 'fahrzeugtypen' in dateien:
+            fahrzeugtypen = _read_fahrzeugtypen(dateien['fahrzeugtypen'])
+            # "Anderer Fahrzeugtyp" bleibt als leere Vorlage am Ende der Auswahl
+            andere = daten.get('fahrzeugtypen', {}).pop('Anderer Fahrzeugtyp', None)
+            daten.setdefault('fahrzeugtypen', {}).update(fahrzeugtypen)
+            if andere is not None:
+                daten['fahrzeugtypen']['Anderer Fahrzeugtyp'] = andere
+
+        _cache[pfad] = (_mtimes(pfad, dateien), daten, dateien, time.monotonic())
+        return daten
+
+
+# Funktion zur Auflösung eines Emissionsfaktors (Zahl oder Bezeichnung aus den Referenzdaten)
+def resolve_emissionsfaktor(wert, faktoren, bezeichnung):
+    if isinstance(wert, str):
+        if wert not in faktoren:
+            raise ValueError(f"Unbekannte CO2eq-Emissionsdaten ({bezeichnung}): {wert}")
+        return faktoren[wert]
+    if isinstance(wert, bool) or not isinstance(wert, (int, float)):
+        raise ValueError(f"Ungültige CO2eq-Emissionsdaten ({bezeichnung}): {wert!r}")
+    return float(wert)
@@ -0,0 +1,183 @@
+# Sensitivitätsanalyse der CO2eq-Emissionen des Ridepooling-Systems (Abschnitt 3.6)
+# Untersucht wird, welche Stellgröße das Ergebnis am stärksten beeinflusst: Leerkilometeranteil, Besetzungsquote,
+# Stromverbrauch, Ökostromanteil und die Emissionsfaktoren. Das Tornado-Diagramm verändert jede Größe einzeln bis an
+# die Grenzen ihres Bereichs, die Sobol-Indizes (Saltelli-Schema) zerlegen die Varianz bei gleichzeitiger Variation
+# aller Größen. Die Stichprobenmatrizen stammen aus einer Quasi-Zufallsfolge (scipy.stats.qmc.Sobol, ohne SciPy eine
+# zufällig verschobene Halton-Folge) und werden blockweise vektorisiert ausgewertet, optional in mehreren Prozessen.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.stats import qmc
+except ImportError:  # SciPy ist optional
+    qmc = None
+
+from oekorps.berechnung import referenz_emissionsfaktoren
+
+# Stellgrößen (Spalten der Stichprobenmatrix) mit Bezeichnung für Diagramme und Tabellen
+stellgroessen = {
+    'leerkilometeranteil': 'Leerkilometeranteil (%)',
+    'besetzungsquote': 'Besetzungsquote',
+    'stromverbrauch_faktor': 'Stromverbrauch (Faktor)',
+    'oekostrom_anteil': 'Ökostromanteil (%)',
+    'strom_emissionsdaten_netz': 'Emissionsfaktor Strom (g/kWh)',
+    'benzin_emissionsdaten': 'Emissionsfaktor Benzin (g/l)',
+    'diesel_emissionsdaten': 'Emissionsfaktor Diesel (g/l)',
+}
+
+# Ausgewertete Kennzahlen (Differenz positiv: das Ridepooling-System emittiert mehr als der Bus)
+zielgroessen = {
+    'CO2eq_emissionen_pro_personenkilometer_rps_g': 'CO2eq Ridepooling-System (g/Pkm)',
+    'differenz_bus_rps': 'Differenz Ridepooling-System - Bus (g/Pkm)',
+}
+
+# Basiswerte (Schlüssel wie im Sitzungszustand); new_CO2eq_wtw ist der Wert des Busses aus Kapitel 2
+basis_schluessel = [
+    'benzinverbrauch_gesamt', 'dieselverbrauch_gesamt', 'stromverbrauch_gesamt', 'personenkilometer_gefahren',
+    'leerkilometeranteil', 'besetzungsquote', 'benzin_emissionsdaten', 'diesel_emissionsdaten', 'strom_emissionsdaten_netz',
+    'oekostrom_anteil', 'pv_emissionsdaten', 'new_CO2eq_wtw',
+]
+
+standard_variation = 20
+_primzahlen = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53)
+
+
+# Funktion zur Festlegung der Bereiche je Stellgröße um den Basiswert
+# Besetzungsquote und Stromverbrauch ± variation %, Leerkilometer- und Ökostromanteil ± variation Prozentpunkte,
+# Emissionsfaktoren zwischen dem kleinsten und größten Wert der Referenzdaten (einschließlich des Basiswerts).
+def default_ranges(basis, variation=standard_variation):
+    relativ = variation / 100
+    emissionsfaktoren = referenz_emissionsfaktoren()
+
+    def katalog(faktoren, wert):
+        return min(min(faktoren.values()), wert), max(max(faktoren.values()), wert)
+
+    return {
+        'leerkilometeranteil': (max(basis['leerkilometeranteil'] - variation, 0.0), min(basis['leerkilometeranteil'] + variation, 95.0)),
+        'besetzungsquote': (basis['besetzungsquote'] * (1 - relativ), basis['besetzungsquote'] * (1 + relativ)),
+        'stromverbrauch_faktor': (1 - relativ, 1 + relativ),
+        'oekostrom_anteil': (max(basis['oekostrom_anteil'] - variation, 0.0), min(basis['oekostrom_anteil'] + variation, 100.0)),
+        'strom_emissionsdaten_netz': katalog(emissionsfaktoren['strom'], basis['strom_emissionsdaten_netz']),
+        'benzin_emissionsdaten': katalog(emissionsfaktoren['benzin'], basis['benzin_emissionsdaten']),
+        'diesel_emissionsdaten': katalog(emissionsfaktoren['diesel'], basis['diesel_emissionsdaten']),
+    }
+
+
+# Funktion zur Bildung der Basiszeile (Werte der Stellgrößen im aktuellen Szenario)
+def _basis_row(basis):
+    return np.array([1.0 if name == 'stromverbrauch_faktor' else float(basis[name]) for name in stellgroessen])
+
+
+# Funktion zur vektorisierten Auswertung der Formeln aus Abschnitt 1.3 bis 1.5 für alle Zeilen einer Matrix (n, k)
+# Die Fahrzeugkilometer bleiben fest: Die Personenkilometer ändern sich proportional zur Besetzungsquote und zum
+# Anteil der besetzten Kilometer, der Stromverbrauch mit seinem Faktor. Ökostrom wie in calculate_environmental_impact.
+def evaluate_levers(basis, werte):
+    spalten = dict(zip(stellgroessen, np.atleast_2d(werte).T))
+    anteil = spalten['oekostrom_anteil'] / 100
+    strom_emissionsdaten = spalten['strom_emissionsdaten_netz'] * (1 - anteil) + basis['pv_emissionsdaten'] * anteil
+    CO2eq_emissionen_gesamt_rps = (basis['benzinverbrauch_gesamt'] * spalten['benzin_emissionsdaten']
+                                   + basis['dieselverbrauch_gesamt'] * spalten['diesel_emissionsdaten']
+                                   + basis['stromverbrauch_gesamt'] * spalten['stromverbrauch_faktor'] * strom_emissionsdaten * (1 - anteil)) / 1000
+
+    besetzt_basis = 1 - basis['leerkilometeranteil'] / 100
+    skalierung = spalten['besetzungsquote'] / basis['besetzungsquote'] if basis['besetzungsquote'] > 0 else np.zeros_like(anteil)
+    skalierung = skalierung * (1 - spalten['leerkilometeranteil'] / 100) / besetzt_basis if besetzt_basis > 0 else np.zeros_like(anteil)
+    personenkilometer = basis['personenkilometer_gefahren'] * skalierung
+
+    CO2eq_emissionen_pro_personenkilometer_rps_g = np.zeros_like(CO2eq_emissionen_gesamt_rps)
+    np.divide(CO2eq_emissionen_gesamt_rps * 1000, personenkilometer, out=CO2eq_emissionen_pro_personenkilometer_rps_g, where=personenkilometer > 0)
+    return {
+        'CO2eq_emissionen_pro_personenkilometer_rps_g': CO2eq_emissionen_pro_personenkilometer_rps_g,
+        'differenz_bus_rps': CO2eq_emissionen_pro_personenkilometer_rps_g - basis['new_CO2eq_wtw'],
+    }
+
+
+# Funktion zur blockweisen Auswertung einer großen Matrix, optional verteilt auf mehrere Prozesse
+def _evaluate_blocks(basis, werte, chunk_size, max_workers):
+    bloecke = [werte[beginn:beginn + chunk_size] for beginn in range(0, len(werte), chunk_size)]
+    if max_workers and max_workers > 1 and len(bloecke) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            ergebnisse = list(executor.map(evaluate_levers, [basis] * len(bloecke), bloecke))
+    else:
+        ergebnisse = [evaluate_levers(basis, block) for block in bloecke]
+    return {name: np.concatenate([ergebnis[name] for ergebnis in ergebnisse]) for name in zielgroessen}
+
+
+# Funktion zur Berechnung des Tornado-Diagramms: jede Stellgröße einzeln an der unteren und oberen Bereichsgrenze
+# Rückgabe je Zielgröße und Stellgröße, sortiert nach der Spannweite (größte Wirkung zuerst)
+def calculate_tornado(basis, bereiche=None):
+    bereiche = bereiche or default_ranges(basis)
+    basiszeile = _basis_row(basis)
+    k = len(stellgroessen)
+    werte = np.tile(basiszeile, (2 * k + 1, 1))  # Zeile 0: Basis, danach je Stellgröße unten und oben
+    for i, name in enumerate(stellgroessen):
+        werte[1 + 2 * i, i], werte[2 + 2 * i, i] = bereiche[name]
+    ergebnisse = evaluate_levers(basis, werte)
+
+    zeilen = []
+    for ziel in zielgroessen:
+        werte_ziel = ergebnisse[ziel]
+        for i, name in enumerate(stellgroessen):
+            unten, oben = werte_ziel[1 + 2 * i], werte_ziel[2 + 2 * i]
+            zeilen.append({
+                'Zielgröße': ziel, 'Stellgröße': name, 'Bezeichnung': stellgroessen[name],
+                'Basiswert': basiszeile[i], 'Wert unten': bereiche[name][0], 'Wert oben': bereiche[name][1],
+                'Ergebnis Basis': werte_ziel[0], 'Ergebnis unten': unten, 'Ergebnis oben': oben, 'Spannweite': abs(oben - unten),
+            })
+    tabelle = pd.DataFrame(zeilen)
+    return tabelle.sort_values(['Zielgröße', 'Spannweite'], ascending=[True, False], kind='stable').reset_index(drop=True)
+
+
+# Funktion zur Erzeugung einer Halton-Folge (n, d) mit zufälliger Verschiebung (Cranley-Patterson) je Seed
+def _halton(n, d, seed):
+    if d > len(_primzahlen):
+        raise ValueError(f"Die Halton-Folge unterstützt höchstens {len(_primzahlen)} Dimensionen.")
+    index = np.arange(1, n + 1)
+    punkte = np.zeros((n, d))
+    for j in range(d):
+        basis, faktor, rest = _primzahlen[j], 1.0, index.copy()
+        while rest.any():
+            faktor /= basis
+            punkte[:, j] += faktor * (rest % basis)
+            rest //= basis
+    return (punkte + np.random.default_rng(seed).random(d)) % 1.0
+
+
+# Funktion zur Erzeugung von n Quasi-Zufallspunkten im Einheitswürfel [0, 1)^d (n wird auf eine Zweierpotenz aufgerundet)
+def quasi_random(n, d, seed=0):
+    m = max(int(np.ceil(np.log2(max(n, 2)))), 1)
+    if qmc is not None:
+        return qmc.Sobol(d, scramble=True, seed=seed).random_base2(m)
+    return _halton(2 ** m, d, seed)
+
+
+# Funktion zur Berechnung der Sobol-Indizes erster Ordnung (S1, Saltelli 2010) und der Totaleffekte (ST, Jansen 1999)
+# Die Matrizen A, B und AB_i ((k + 2) * n Zeilen) werden gemeinsam ausgewertet; Stellgrößen gleichverteilt im Bereich.
+def calculate_sobol(basis, bereiche=None, n=4096, seed=0, chunk_size=65_536, max_workers=None):
+    bereiche = bereiche or default_ranges(basis)
+    k = len(stellgroessen)
+    unten = np.array([bereiche[name][0] for name in stellgroessen])
+    spanne = np.array([bereiche[name][1] for name in stellgroessen]) - unten
+
+    punkte = quasi_random(n, 2 * k, seed)
+    n = len(punkte)
+    A = unten + punkte[:, :k] * spanne
+    B = unten + punkte[:, k:] * spanne
+    AB = np.repeat(A[None, :, :], k, axis=0)  # AB_i: A mit Spalte i aus B
+    AB[np.arange(k), :, np.arange(k)] = B.T
+    ergebnisse = _evaluate_blocks(basis, np.concatenate([A, B, AB.reshape(k * n, k)]), chunk_size, max_workers)
+
+    zeilen = []
+    for ziel in zielgroessen:
+        werte = ergebnisse[ziel]
+        f_A, f_B, f_AB = werte[:n], werte[n:2 * n], werte[2 * n:].reshape(k, n)
+        varianz = np.var(np.concatenate([f_A, f_B]))
+        erste_ordnung = np.mean(f_B * (f_AB - f_A), axis=1) / varianz if varianz > 0 else np.zeros(k)
+        total = 0.5 * np.mean(np.square(f_A - f_AB), axis=1) / varianz if varianz > 0 else np.zeros(k)
+        for i, name in enumerate(stellgroessen):
+            zeilen.append({'Zielgröße': ziel, 'Stellgröße': name, 'Bezeichnung': stellgroessen[name],
+                           'S1': float(erste_ordnung[i]), 'ST': float(total[i]), 'Varianz': float(varianz), 'n': n})
+    tabelle = pd.DataFrame(zeilen)
+    return tabelle.sort_values(['Zielgröße', 'ST'], ascending=[True, False], kind='stable').reset_index(drop=True)
@@ -0,0 +1,149 @@
+# Kompakter Sitzungszustand der App: Eingaben und berechnete Kennzahlen je ein Objekt statt vieler Einzelschlüssel
+# Die Eingaben liegen in einem Objekt mit festen Feldern und einem Versionszähler je Feld, die Kennzahlen in einem
+# unveränderlichen Objekt über einem NumPy-Array (NaN: noch nicht berechnet). Abschnitte merken sich den Stand der
+# Felder, von denen sie abhängen, und werden nur neu berechnet, wenn sich eines davon geändert hat.
+import numpy as np
+
+from oekorps.szenarien import eingabe_schluessel, ergebnis_schluessel
+
+# Eingaben der Abschnitte 2.1 bis 4.1, die nicht im Szenario gespeichert werden
+weitere_eingaben = [
+    'bus_nutzwagen_km', 'bus_platzangebot', 'bus_personen_km', 'busflotte_verwenden',
+    'afzs_von', 'afzs_bis', 'verlagerung_unsicherheit', 'sensitivitaet_variation', 'zeitreihe_fenster',
+]
+eingabe_felder = eingabe_schluessel + weitere_eingaben
+
+_eingabe_index = {key: i for i, key in enumerate(eingabe_felder)}
+_ergebnis_index = {key: i for i, key in enumerate(ergebnis_schluessel)}
+_fehlt = object()
+
+
+class Eingaben:
+    # Eingaben der Sitzung (Schlüssel wie in oekorps.szenarien), je Feld mit einem Versionszähler für die Abschnitte
+
+    __slots__ = ('_werte', '_versionen')
+
+    def __init__(self, werte=None, versionen=None):
+        self._werte = [_fehlt] * len(eingabe_felder)
+        self._versionen = np.zeros(len(eingabe_felder), dtype=np.int64)
+        if werte:
+            self.update(werte)
+        if versionen is not None:
+            self._versionen[:] = versionen
+
+    def __reduce__(self):
+        return Eingaben, (self.to_dict(), self._versionen.copy())
+
+    def __contains__(self, key):
+        return key in _eingabe_index and self._werte[_eingabe_index[key]] is not _fehlt
+
+    def __getitem__(self, key):
+        wert = self._werte[_eingabe_index[key]]
+        if wert is _fehlt:
+            raise KeyError(key)
+        return wert
+
+    def get(self, key, standard=None):
+        wert = self._werte[_eingabe_index[key]]
+        return standard if wert is _fehlt else wert
+
+    # Übernahme neuer Werte; nur tatsächlich geänderte Felder erhalten eine neue Version (Rückgabe: geänderte Felder)
+    def update(self, werte=None, **weitere):
+        geaendert = []
+        for key, wert in {**(werte or {}), **weitere}.items():
+            i = _eingabe_index[key]
+            alt = self._werte[i]
+            if alt is _fehlt or type(alt) is not type(wert) or alt != wert:
+                self._werte[i] = wert
+                self._versionen[i] += 1
+                geaendert.append(key)
+        return geaendert
+
+    # Stand der angegebenen Felder (Versionszähler), z.B. als Bedingung für die Neuberechnung eines Abschnitts
+    def stand(self, *keys):
+        return tuple(int(self._versionen[_eingabe_index[key]]) for key in keys)
+
+    def to_dict(self):
+        return {key: wert for key, wert in zip(eingabe_felder, self._werte) if wert is not _fehlt}
+
+
+class Ergebnisse:
+    # Berechnete Kennzahlen (Abschnitte 1.3 bis 2.2) als unveränderliches Objekt; Änderungen über replace()
+
+    __slots__ = ('_werte',)
+
+    def __init__(self, werte=None):
+        array = np.full(len(ergebnis_schluessel), np.nan)
+        for key, wert in (werte or {}).items():
+            array[_ergebnis_index[key]] = wert
+        array.flags.writeable = False
+        object.__setattr__(self, '_werte', array)
+
+    def __setattr__(self, name, wert):
+        raise AttributeError("Ergebnisse sind unveränderlich, neue Werte über replace().")
+
+    def __reduce__(self):
+        return Ergebnisse, (self.to_dict(),)
+
+    def __contains__(self, key):
+        return key in _ergebnis_index and not np.isnan(self._werte[_ergebnis_index[key]])
+
+    def __getitem__(self, key):
+        wert = self._werte[_ergebnis_index[key]]
+        if np.isnan(wert):
+            raise KeyError(key)
+        return float(wert)
+
+    def get(self, key, standard=None):
+        return self[key] if key in self else standard
+
+    # Neues Objekt mit den geänderten Werten (dasselbe Objekt, wenn sich nichts ändert)
+    def replace(self, werte=None, **weitere):
+        werte = {**(werte or {}), **weitere}
+        if all(key in self and self[key] == wert for key, wert in werte.items()):
+            return self
+        return Ergebnisse({**self.to_dict(), **werte})
+
+    # Werte der angegebenen Kennzahlen (NaN, falls nicht berechnet), z.B. als Bedingung für die Neuberechnung
+    def auswahl(self, *keys):
+        return tuple(float(self._werte[_ergebnis_index[key]]) for key in keys)
+
+    def fehlende(self, keys):
+        return [key for key in keys if key not in self]
+
+    def to_dict(self):
+        return {key: float(wert) for key, wert in zip(ergebnis_schluessel, self._werte) if not np.isnan(wert)}
+
+
+class Sitzungszustand:
+    # Eingaben, Kennzahlen und die zuletzt berechneten Abschnittsergebnisse einer Sitzung
+
+    __slots__ = ('eingaben', 'ergebnisse', '_abschnitte', 'berechnungen')
+
+    def __init__(self, eingaben=None, ergebnisse=None):
+        self.eingaben = Eingaben(eingaben)
+        self.ergebnisse = Ergebnisse(ergebnisse)
+        self._abschnitte = {}
+        self.berechnungen = 0
+
+    def uebernehmen(self, werte):
+        self.ergebnisse = self.ergebnisse.replace(werte)
+
+    # Stand eines Abschnitts aus den Versionen seiner Eingaben und den Werten der verwendeten Kennzahlen
+    # (NaN wird als Zeichenkette abgelegt, damit der Vergleich mit dem gespeicherten Stand gelingt)
+    def stand(self, eingaben=(), ergebnisse=(), *zusatz):
+        return self.eingaben.stand(*eingaben), tuple(map(repr, self.ergebnisse.auswahl(*ergebnisse))), zusatz
+
+    # Ergebnis eines Abschnitts; berechnet wird nur, wenn sich der Stand seit der letzten Berechnung geändert hat
+    def berechnen(self, abschnitt, stand, funktion, *args, **kwargs):
+        gespeichert = self._abschnitte.get(abschnitt)
+        if gespeichert is not None and gespeichert[0] == stand:
+            return gespeichert[1]
+        ergebnis = funktion(*args, **kwargs)
+        self._abschnitte[abschnitt] = (stand, ergebnis)
+        self.berechnungen += 1
+        return ergebnis
+
+    # Vormerken eines bekannten Ergebnisses (z.B. aus einem geladenen Szenario), ohne den Abschnitt zu berechnen
+    def vormerken(self, abschnitt, stand, ergebnis):
+        self._abschnitte[abschnitt] = (stand, ergebnis)
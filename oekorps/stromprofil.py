@@ -0,0 +1,146 @@
+# Zeitaufgelöste CO2eq-Emissionsfaktoren für Strom
+# Eine stündliche Zeitreihe der Emissionsintensität des Stromnetzes (g CO2eq/kWh) wird mit stündlichen
+# Ladeprofilen kombiniert (ein Profil für die Flotte oder je Fahrzeug). Die Emissionen ergeben sich als Skalarprodukt
+# aus geladener Energie und Intensität über alle Stunden. Kumulierte Summen je Profil werden einmal je Zeitreihe und
+# Ladeprofil vorberechnet, sodass die Abfrage eines beliebigen Betrachtungszeitraums (start_date/end_date) nur zwei
+# Indexzugriffe benötigt.
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from oekorps.berechnung import referenz_emissionsfaktoren
+
+# Tagesprofile für die Verteilung der Ladeenergie auf die Stunden 0-23 (Anteile werden normiert)
+ladeprofile = {
+    'Gleichmäßig über den Tag': [1.0] * 24,
+    'Nachtladung (22–6 Uhr)': [1.0 if stunde >= 22 or stunde < 6 else 0.0 for stunde in range(24)],
+    'Tagladung (10–16 Uhr)': [1.0 if 10 <= stunde < 16 else 0.0 for stunde in range(24)],
+}
+
+_stunde = np.timedelta64(1, 'h')
+
+
+# Funktion zum Einlesen einer stündlichen Zeitreihe (CSV oder Parquet, Spalten: Zeitpunkt, CO2eq (g/kWh))
+# Lücken werden mit dem letzten bekannten Wert aufgefüllt, damit die Reihe ein lückenloses Stundenraster bildet.
+def load_grid_intensity(pfad, wert_spalte='CO2eq (g/kWh)', zeit_spalte='Zeitpunkt'):
+    if str(getattr(pfad, 'name', pfad)).lower().endswith('.parquet'):
+        reihe = pd.read_parquet(pfad)
+    else:
+        reihe = pd.read_csv(pfad, usecols=lambda spalte: spalte in (zeit_spalte, wert_spalte), sep=None, engine='python')
+    fehlende = [spalte for spalte in [zeit_spalte, wert_spalte] if spalte not in reihe.columns]
+    if fehlende:
+        raise ValueError(f"Die folgenden Spalten fehlen in der Datei: {', '.join(fehlende)}")
+    zeitpunkte = pd.to_datetime(reihe[zeit_spalte]).dt.floor('h')
+    werte = pd.to_numeric(reihe[wert_spalte], errors='coerce')
+    stuendlich = pd.Series(werte.to_numpy(), index=zeitpunkte)
+    stuendlich = stuendlich[stuendlich.index.notna()].dropna().groupby(level=0).mean().sort_index()
+    if stuendlich.empty:
+        raise ValueError("Die Datei enthält keine gültigen stündlichen Emissionsdaten.")
+    stuendlich = stuendlich.reindex(pd.date_range(stuendlich.index[0], stuendlich.index[-1], freq='h')).ffill()
+    return stuendlich.index[0].to_datetime64(), stuendlich.to_numpy(dtype=np.float64)
+
+
+# Funktion zur Umrechnung eines Datums oder Zeitpunkts in eine volle Stunde (Datum: Beginn des Tages)
+def _stunde_von(zeitpunkt):
+    if isinstance(zeitpunkt, date) and not isinstance(zeitpunkt, datetime):
+        zeitpunkt = datetime(zeitpunkt.year, zeitpunkt.month, zeitpunkt.day)
+    return np.datetime64(zeitpunkt, 'h')
+
+
+# Funktion zur Umrechnung eines Datums in den Stundenindex eines Rasters ab beginn (auf das Raster begrenzt)
+def _stundenindex(beginn, stunden, zeitpunkt, verschiebung=0):
+    index = int((_stunde_von(zeitpunkt) - np.datetime64(beginn, 'h')) // _stunde) + verschiebung
+    return min(max(index, 0), stunden)
+
+
+# Funktion zur Erstellung stündlicher Ladeprofile aus Tagesprofilen (Matrix Profile x Stunden, relative Ladeleistung)
+# tagesprofil: 24 Werte (ein Profil für alle Fahrzeuge) oder eine Matrix Fahrzeuge x 24 (je Fahrzeug ein eigenes
+# Tagesprofil, z.B. aus den Standzeiten der Telematikdaten). Jeder Tag eines Profils wird auf 1 normiert.
+# beginn: erster Zeitpunkt der Emissionszeitreihe, damit das Tagesprofil an der richtigen Uhrzeit ansetzt.
+# Der Energiebedarf wird erst bei der Abfrage (StromEmissionsreihe.query) auf den Betrachtungszeitraum verteilt,
+# die Profile hängen daher weder vom Zeitraum noch vom Strombedarf der Flotte ab.
+def charging_profiles_from_daily(tagesprofil, stunden, beginn=None):
+    anteile = np.atleast_2d(np.asarray(tagesprofil, dtype=np.float64))
+    if anteile.ndim != 2 or anteile.shape[1] != 24:
+        raise ValueError("Ein Tagesprofil muss 24 Stundenwerte (0 bis 23 Uhr) enthalten.")
+    summe = anteile.sum(axis=1, keepdims=True)
+    if not (summe > 0).all():
+        raise ValueError("Jedes Tagesprofil muss mindestens eine Ladestunde enthalten.")
+    anteile = anteile / summe
+    if beginn is not None:
+        anteile = np.roll(anteile, -pd.Timestamp(beginn).hour, axis=1)
+    return np.tile(anteile, (1, -(-stunden // 24)))[:, :stunden]
+
+
+class StromEmissionsreihe:
+    # Vorberechnete kumulierte Ladeanteile und intensitätsgewichtete Ladeanteile je Ladeprofil über ein lückenloses
+    # Stundenraster. Ein Betrachtungszeitraum wird über die Differenz zweier Einträge abgefragt (O(1) je Profil),
+    # der Strombedarf je Fahrzeug wird erst bei der Abfrage angegeben.
+
+    def __init__(self, beginn, intensitaet, ladeprofile):
+        # beginn: erster Zeitpunkt (numpy.datetime64), intensitaet: g CO2eq/kWh je Stunde,
+        # ladeprofile: Matrix Profile x Stunden mit relativer Ladeleistung (charging_profiles_from_daily);
+        # ein Profil gilt für alle Fahrzeuge, sonst eine Zeile je Fahrzeug
+        ladeprofile = np.atleast_2d(np.asarray(ladeprofile, dtype=np.float64))
+        if ladeprofile.shape[1] != len(intensitaet):
+            raise ValueError("Die Ladeprofile müssen dieselbe Anzahl an Stunden wie die Emissionszeitreihe haben.")
+        self.beginn = np.datetime64(beginn, 'h')
+        self.stunden = len(intensitaet)
+        self.profile = ladeprofile.shape[0]
+        self.anteile_kumuliert = np.zeros((self.profile, self.stunden + 1))
+        self.gewichtet_kumuliert = np.zeros((self.profile, self.stunden + 1))
+        np.cumsum(ladeprofile, axis=1, out=self.anteile_kumuliert[:, 1:])
+        np.cumsum(ladeprofile * np.asarray(intensitaet, dtype=np.float64), axis=1, out=self.gewichtet_kumuliert[:, 1:])
+
+    # Letzter Zeitpunkt der Zeitreihe (Beginn der letzten Stunde)
+    @property
+    def ende(self):
+        return self.beginn + (self.stunden - 1) * _stunde
+
+    # Prüfung, ob die Zeitreihe den Zeitraum von start_date bis einschließlich end_date vollständig abdeckt
+    def covers(self, start_date, end_date):
+        return _stunde_von(start_date) >= self.beginn and _stunde_von(end_date) + 23 * _stunde <= self.ende
+
+    # Emissionsfaktor je Ladeprofil (g CO2eq/kWh) von start_date bis einschließlich end_date
+    # Liegt der Zeitraum vollständig außerhalb der Zeitreihe oder lädt ein Profil darin nicht, wird ein ValueError ausgelöst.
+    def factors(self, start_date, end_date):
+        a = _stundenindex(self.beginn, self.stunden, start_date)
+        b = _stundenindex(self.beginn, self.stunden, end_date, verschiebung=24)
+        if a >= b:
+            raise ValueError(f"Der Betrachtungszeitraum ({start_date} bis {end_date}) liegt außerhalb der Emissionszeitreihe "
+                             f"({np.datetime_as_string(self.beginn, unit='D')} bis {np.datetime_as_string(self.ende, unit='D')}).")
+        anteile = self.anteile_kumuliert[:, b] - self.anteile_kumuliert[:, a]
+        if not (anteile > 0).all():
+            raise ValueError("Das Ladeprofil enthält im Betrachtungszeitraum keine Ladestunden.")
+        return (self.gewichtet_kumuliert[:, b] - self.gewichtet_kumuliert[:, a]) / anteile
+
+    # Abfrage je Fahrzeug: geladene Energie (kWh) und Emissionen (kg CO2eq) von start_date bis einschließlich end_date
+    # stromverbrauch: Energiebedarf je Fahrzeug im Zeitraum (kWh), verteilt nach dem jeweiligen Ladeprofil auf die
+    # von der Zeitreihe abgedeckten Stunden des Zeitraums
+    def query(self, start_date, end_date, stromverbrauch):
+        energie = np.atleast_1d(np.asarray(stromverbrauch, dtype=np.float64))
+        if self.profile not in (1, len(energie)):
+            raise ValueError("Die Anzahl der Ladeprofile muss 1 sein oder der Anzahl der Fahrzeuge entsprechen.")
+        return energie, energie * self.factors(start_date, end_date) / 1000
+
+    # Effektiver Emissionsfaktor der Flotte im Zeitraum (g CO2eq/kWh), entspricht strom_emissionsdaten
+    # Ohne Strombedarf (stromverbrauch=None) werden alle Ladeprofile gleich gewichtet.
+    # Ohne geladene Energie im Zeitraum ist der Faktor nicht bestimmt (ValueError statt 0 g/kWh).
+    def effective_factor(self, start_date, end_date, stromverbrauch=None):
+        energie, emissionen = self.query(start_date, end_date, np.ones(self.profile) if stromverbrauch is None else stromverbrauch)
+        gesamt = energie.sum()
+        if not gesamt > 0:
+            raise ValueError("Im Betrachtungszeitraum wird laut Ladeprofil keine Energie geladen.")
+        return float(emissionen.sum() * 1000 / gesamt)
+
+
+# Funktion zur Berechnung der Stromemissionen je Fahrzeug mit zeitaufgelösten Faktoren
+# Der PV-Anteil wird wie in calculate_environmental_impact berücksichtigt.
+def calculate_strom_emissionen(reihe, start_date, end_date, stromverbrauch, oekostrom_anteil=0, pv_emissionsdaten=None):
+    if pv_emissionsdaten is None:
+        pv_emissionsdaten = referenz_emissionsfaktoren()['pv']
+    energie, emissionen = reihe.query(start_date, end_date, stromverbrauch)
+    anteil = oekostrom_anteil / 100.0
+    strom_emissionen = (emissionen * (1 - anteil) + energie * pv_emissionsdaten / 1000 * anteil) * (1 - anteil)
+    return strom_emissionen
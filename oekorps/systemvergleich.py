@@ -0,0 +1,74 @@
+# Vergleich mehrerer Ridepooling-Systeme mit ihrem jeweiligen lokalen Bussystem
+# Je System eine Zeile mit Fahrzeugkilometern, Buchungen, Fahrgästen, dem durchschnittlichen Verbrauch der Flotte
+# und der Platzausnutzung des lokalen Busses. Alle Systeme werden mit oekorps.batch in einem Durchlauf berechnet.
+import numpy as np
+import pandas as pd
+
+from oekorps.batch import calculate_batch, safe_divide, buchungs_spalten, kilometer_spalten, verbrauch_spalten
+from oekorps.berechnung import bus_referenz
+from oekorps.referenzdaten import load_referenzdaten
+
+# Spalten der Systemtabelle
+system_spalten = ['System'] + kilometer_spalten + buchungs_spalten + verbrauch_spalten + ['Platzausnutzung Bus (%)']
+
+
+# Funktion zur Bildung einer Zeile der Systemtabelle aus einer Fahrzeugtabelle (Verbrauch je 100 km der Flotte)
+# Ohne Angabe gilt die durchschnittliche Platzausnutzung des Busses aus den Referenzdaten.
+def fleet_to_system_row(system, fahrzeuge, abgeschlossene_buchungen, transportierte_fahrgaeste, platzausnutzung=None):
+    kilometer_leer = fahrzeuge['Kilometer leer'].to_numpy(dtype=np.float64)
+    kilometer_besetzt = fahrzeuge['Kilometer besetzt'].to_numpy(dtype=np.float64)
+    kilometer_gesamt = kilometer_leer + kilometer_besetzt
+    zeile = {
+        'System': system,
+        'Kilometer leer': float(kilometer_leer.sum()),
+        'Kilometer besetzt': float(kilometer_besetzt.sum()),
+        'Fahrten': float(abgeschlossene_buchungen),
+        'Transportierte Fahrgäste': float(transportierte_fahrgaeste),
+    }
+    for spalte in verbrauch_spalten:
+        # Mit den Kilometern gewichteter Durchschnitt, ergibt denselben Gesamtverbrauch wie die Fahrzeugtabelle
+        zeile[spalte] = float(safe_divide(np.dot(fahrzeuge[spalte].to_numpy(dtype=np.float64), kilometer_gesamt), kilometer_gesamt.sum()))
+    zeile['Platzausnutzung Bus (%)'] = float(bus_referenz()[1] if platzausnutzung is None else platzausnutzung)
+    return zeile
+
+
+# Funktion zur Erstellung der Systemtabelle aus den Voreinstellungen der Referenzdaten (ohne "Eigene Angaben")
+# Systeme ohne hinterlegte Flottendaten erhalten 0 km und müssen ergänzt werden.
+def preset_systems(referenzdaten=None):
+    referenzdaten = referenzdaten or load_referenzdaten()
+    initial_occupancy = referenzdaten['bus']['initial_occupancy']
+    zeilen = []
+    for system, daten in referenzdaten['ridepooling_systeme'].items():
+        if system == "Eigene Angaben":
+            continue
+        zeile = {'System': system, 'Platzausnutzung Bus (%)': float(daten.get('Platzausnutzung Bus (%)', initial_occupancy))}
+        zeile.update({spalte: float(daten.get(spalte, 0.0)) for spalte in kilometer_spalten + buchungs_spalten + verbrauch_spalten})
+        zeilen.append(zeile)
+    return pd.DataFrame(zeilen, columns=system_spalten)
+
+
+# Funktion zur Berechnung aller Kennzahlen für alle Systeme (Reihenfolge der Systemtabelle bleibt erhalten)
+# faktoren werden an calculate_batch übergeben (Emissionsfaktoren und Ökostromanteil für alle Systeme).
+def compare_systems(systeme, **faktoren):
+    fehlend = [spalte for spalte in ['System'] + kilometer_spalten + buchungs_spalten if spalte not in systeme.columns]
+    if fehlend:
+        raise ValueError(f"Fehlende Spalten in der Systemtabelle: {', '.join(fehlend)}")
+    systeme = systeme[systeme['System'].notna()].copy()
+    systeme['System'] = systeme['System'].astype(str).str.strip()
+    systeme = systeme[systeme['System'] != '']
+    if systeme['System'].duplicated().any():
+        doppelt = sorted(set(systeme.loc[systeme['System'].duplicated(), 'System']))
+        raise ValueError(f"Systeme mehrfach angegeben: {', '.join(doppelt)}")
+    for spalte in verbrauch_spalten:
+        if spalte not in systeme.columns:
+            systeme[spalte] = 0.0
+    zahlen = kilometer_spalten + buchungs_spalten + verbrauch_spalten
+    systeme[zahlen] = systeme[zahlen].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+
+    buchungen = systeme[['System'] + buchungs_spalten].copy()
+    if 'Platzausnutzung Bus (%)' in systeme.columns:
+        platzausnutzung = pd.to_numeric(systeme['Platzausnutzung Bus (%)'], errors='coerce')
+        # Platzausnutzung 0 ist nicht definiert, dann gilt der bundesweite Wert
+        buchungen['adjusted_occupancy'] = platzausnutzung.where(platzausnutzung > 0).to_numpy()
+    ergebnis = calculate_batch(systeme[['System'] + kilometer_spalten + verbrauch_spalten], buchungen, schluessel=['System'], **faktoren)
+    return ergebnis.set_index('System').loc[systeme['System'].to_numpy()].reset_index()
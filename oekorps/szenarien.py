@@ -0,0 +1,172 @@
+# Speicherung von Szenarien (Eingaben und berechnete Kennzahlen) in einer lokalen SQLite-Datenbank
+# Eingaben und Ergebnisse werden als JSON abgelegt; System und Zeitraum stehen zusätzlich in eigenen,
+# indizierten Spalten, damit auch bei vielen gespeicherten Szenarien schnell gefiltert werden kann.
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+standard_pfad = os.environ.get('OEKORPS_SZENARIEN', 'szenarien.db')
+
+# Eingaben, die für ein Szenario gespeichert werden (Schlüssel wie im st.session_state)
+eingabe_schluessel = [
+    'name_ridepooling_system', 'start_date', 'end_date', 'selected_system',
+    'abgeschlossene_buchungen', 'transportierte_fahrgaeste',
+    'benzin_emissionsdaten_auswahl', 'diesel_emissionsdaten_auswahl', 'strom_emissionsdaten_auswahl', 'ladeprofil',
+    'benzin_emissionsdaten', 'diesel_emissionsdaten', 'strom_emissionsdaten_netz', 'strom_emissionsdaten', 'oekostrom_anteil',
+    'pv_emissionsdaten', 'adjusted_occupancy',
+]
+
+# Berechnete Kennzahlen (Abschnitte 1.3 bis 3.1)
+ergebnis_schluessel = [
+    'fahrzeugkilometer_leer', 'fahrzeugkilometer_besetzt', 'fahrzeugkilometer_gesamt',
+    'durchschnittliche_fahrtdistanz_mit_lk', 'durchschnittliche_fahrtdistanz_mit_bk', 'personenkilometer_gefahren',
+    'leerkilometeranteil', 'buendelungsquote', 'besetzungsquote',
+    'benzinverbrauch_gesamt', 'dieselverbrauch_gesamt', 'stromverbrauch_gesamt',
+    'benzin_emissionen', 'diesel_emissionen', 'strom_emissionen',
+    'CO2eq_emissionen_gesamt_rps', 'CO2eq_emissionen_pro_personenkilometer_rps_g', 'new_CO2eq_wtw',
+]
+
+_schema = """
+CREATE TABLE IF NOT EXISTS szenarien (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    system TEXT NOT NULL,
+    periode TEXT NOT NULL,
+    erstellt TEXT NOT NULL,
+    CO2eq_pro_pkm REAL,
+    eingaben TEXT NOT NULL,
+    fahrzeugflotte TEXT NOT NULL,
+    ergebnisse TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS szenarien_system_periode ON szenarien (system, periode);
+CREATE INDEX IF NOT EXISTS szenarien_erstellt ON szenarien (erstellt);
+"""
+
+
+# Eine gemeinsame Verbindung je Datenbankdatei und Prozess (wie oekorps.cache.DiskCache); Zugriffe aus den
+# Threads der Streamlit-Sitzungen werden über _lock nacheinander ausgeführt. Die Verbindungen werden beim Beenden
+# des Prozesses geschlossen (close_connections).
+_verbindungen = {}
+_lock = threading.RLock()
+
+
+# Funktion zum Abruf der Verbindung zur Datenbank; Tabelle, Indizes und WAL-Modus werden nur beim ersten Öffnen
+# einer Datei im Prozess eingerichtet (nach einem fork wird eine neue Verbindung geöffnet)
+def connect(pfad=None):
+    pfad = os.path.abspath(pfad or standard_pfad)
+    with _lock:
+        eintrag = _verbindungen.get(pfad)
+        if eintrag is not None and eintrag[0] == os.getpid():
+            return eintrag[1]
+        verbindung = sqlite3.connect(pfad, timeout=30, check_same_thread=False)
+        verbindung.execute('PRAGMA journal_mode=WAL')
+        verbindung.executescript(_schema)
+        _verbindungen[pfad] = (os.getpid(), verbindung)
+        return verbindung
+
+
+# Kontextmanager für eine Transaktion auf der gemeinsamen Verbindung (Commit bzw. Rollback bei Fehlern)
+@contextmanager
+def _transaktion(pfad):
+    with _lock:
+        verbindung = connect(pfad)
+        with verbindung:
+            yield verbindung
+
+
+# Funktion zum Schließen aller Verbindungen dieses Prozesses
+@atexit.register
+def close_connections():
+    with _lock:
+        for prozess, verbindung in _verbindungen.values():
+            if prozess == os.getpid():
+                verbindung.close()
+        _verbindungen.clear()
+
+
+# Funktion zur Umwandlung von Datums- und NumPy-Werten für JSON
+def _json_default(wert):
+    if isinstance(wert, (date, datetime)):
+        return wert.isoformat()
+    if hasattr(wert, 'item'):
+        return wert.item()
+    return str(wert)
+
+
+# Funktion zur Bildung des Zeitraums aus Beginn und Ende des Betrachtungszeitraums
+def format_periode(start_date, end_date):
+    return f"{_json_default(start_date)}/{_json_default(end_date)}"
+
+
+# Funktion zum Speichern eines Szenarios; fahrzeugflotte als Liste von Dictionaries oder DataFrame
+def save_scenario(name, eingaben, fahrzeugflotte, ergebnisse, pfad=None):
+    if hasattr(fahrzeugflotte, 'to_dict'):
+        fahrzeugflotte = fahrzeugflotte.to_dict('records')
+    eingaben = {key: eingaben[key] for key in eingabe_schluessel if key in eingaben}
+    ergebnisse = {key: ergebnisse[key] for key in ergebnis_schluessel if key in ergebnisse}
+    with _transaktion(pfad) as verbindung:
+        cursor = verbindung.execute(
+            'INSERT INTO szenarien (name, system, periode, erstellt, CO2eq_pro_pkm, eingaben, fahrzeugflotte, ergebnisse) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                name,
+                eingaben.get('name_ridepooling_system', ''),
+                format_periode(eingaben.get('start_date', ''), eingaben.get('end_date', '')),
+                datetime.now().isoformat(timespec='seconds'),
+                ergebnisse.get('CO2eq_emissionen_pro_personenkilometer_rps_g'),
+                json.dumps(eingaben, default=_json_default, ensure_ascii=False),
+                json.dumps(fahrzeugflotte, default=_json_default, ensure_ascii=False),
+                json.dumps(ergebnisse, default=_json_default, ensure_ascii=False),
+            ))
+        return cursor.lastrowid
+
+
+# Funktion zum Laden eines Szenarios; Datumswerte werden wieder in date umgewandelt
+def load_scenario(szenario_id, pfad=None):
+    with _transaktion(pfad) as verbindung:
+        zeile = verbindung.execute('SELECT name, eingaben, fahrzeugflotte, ergebnisse FROM szenarien WHERE id = ?', (szenario_id,)).fetchone()
+    if zeile is None:
+        raise KeyError(f"Szenario {szenario_id} nicht gefunden.")
+    eingaben = json.loads(zeile[1])
+    for key in ['start_date', 'end_date']:
+        if eingaben.get(key):
+            eingaben[key] = date.fromisoformat(eingaben[key])
+    return {'name': zeile[0], 'eingaben': eingaben, 'fahrzeugflotte': json.loads(zeile[2]), 'ergebnisse': json.loads(zeile[3])}
+
+
+# Funktion zum Auflisten der gespeicherten Szenarien (ohne Eingaben und Ergebnisse), neueste zuerst
+def list_scenarios(system=None, periode=None, limit=200, pfad=None):
+    bedingungen, parameter = [], []
+    if system:
+        bedingungen.append('system = ?')
+        parameter.append(system)
+    if periode:
+        bedingungen.append('periode = ?')
+        parameter.append(periode)
+    sql = 'SELECT id, name, system, periode, erstellt, CO2eq_pro_pkm FROM szenarien'
+    if bedingungen:
+        sql += ' WHERE ' + ' AND '.join(bedingungen)
+    sql += ' ORDER BY id DESC LIMIT ?'
+    parameter.append(limit)
+    if not os.path.exists(pfad or standard_pfad):
+        return []
+    with _transaktion(pfad) as verbindung:
+        zeilen = verbindung.execute(sql, parameter).fetchall()
+    return [dict(zip(['id', 'name', 'system', 'periode', 'erstellt', 'CO2eq_pro_pkm'], zeile)) for zeile in zeilen]
+
+
+# Funktion zum Auflisten der Systeme mit gespeicherten Szenarien (für Filter)
+def list_systems(pfad=None):
+    if not os.path.exists(pfad or standard_pfad):
+        return []
+    with _transaktion(pfad) as verbindung:
+        return [zeile[0] for zeile in verbindung.execute('SELECT DISTINCT system FROM szenarien ORDER BY system')]
+
+
+# Funktion zum Löschen eines Szenarios
+def delete_scenario(szenario_id, pfad=None):
+    with _transaktion(pfad) as verbindung:
+        verbindung.execute('DELETE FROM szenarien WHERE id = ?', (szenario_id,))
@@ -0,0 +1,96 @@
+# Einlesen von Fahrtdaten (Telematik) auf Ebene einzelner Fahrtabschnitte
+# Aus den Rohdaten werden je Fahrzeugtyp und Zeitraum die Kilometer leer/besetzt, die gemessenen
+# Personenkilometer sowie Buchungen und Fahrgäste aggregiert. Die Dateien werden blockweise gelesen
+# (Parquet über Memory-Mapping), der Speicherbedarf hängt daher nur von der Anzahl der Gruppen ab.
+#
+# Erwartete Spalten je Fahrtabschnitt:
+#   Fahrzeugtyp   Fahrzeugtyp wie im Fahrzeugkatalog
+#   Zeitpunkt     Beginn des Abschnitts (alternativ Spalte 'Periode' mit fertigem Zeitraum)
+#   Kilometer     Länge des Abschnitts in km
+#   Fahrgäste     Anzahl Fahrgäste an Bord (0 = Leerfahrt)
+#   Buchungen     Anzahl der in diesem Abschnitt begonnenen Buchungen (optional, Standard 0)
+#   Einstiege     Anzahl der in diesem Abschnitt eingestiegenen Fahrgäste (optional, Standard 0)
+import numpy as np
+import pandas as pd
+
+from oekorps.batch import calculate_batch, verbrauch_spalten
+from oekorps.dateien import iter_trip_blocks
+from oekorps.referenzdaten import load_referenzdaten
+
+summen_spalten = ['Kilometer leer', 'Kilometer besetzt', 'Personenkilometer', 'Fahrten', 'Transportierte Fahrgäste']
+
+telematik_blockgroesse = 1_000_000
+
+# Gruppe für Abschnitte ohne Fahrzeugtyp bzw. ohne Zeitpunkt/Periode; ihre Kilometer bleiben in den Summen erhalten
+# (Fahrzeugtyp "Unbekannt" hat keine Verbrauchsdaten im Fahrzeugkatalog und kann über verbrauchsdaten ergänzt werden)
+unbekannt = 'Unbekannt'
+
+
+# Funktion zur Aggregation eines Blocks von Fahrtabschnitten je Fahrzeugtyp und Zeitraum
+# periode: pandas-Frequenz für die Zeiträume (z.B. 'M' für Monate, 'Y' für Jahre)
+# Abschnitte ohne Fahrzeugtyp oder Zeitpunkt werden der Gruppe unbekannt zugeordnet statt verworfen.
+def _aggregate_block(block, periode):
+    if 'Periode' in block.columns:
+        zeitraum = block['Periode'].astype(str).where(block['Periode'].notna(), unbekannt).to_numpy()
+    else:
+        zeitraum = pd.to_datetime(block['Zeitpunkt']).dt.to_period(periode).array  # Umwandlung in Text erst nach der Aggregation
+
+    kilometer = pd.to_numeric(block['Kilometer'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+    fahrgaeste = pd.to_numeric(block['Fahrgäste'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+    besetzt = fahrgaeste > 0
+
+    teil = pd.DataFrame({
+        'Fahrzeugtyp': block['Fahrzeugtyp'].fillna(unbekannt).to_numpy(),
+        'Periode': zeitraum,
+        'Kilometer leer': np.where(besetzt, 0.0, kilometer),
+        'Kilometer besetzt': np.where(besetzt, kilometer, 0.0),
+        'Personenkilometer': kilometer * fahrgaeste,
+        'Fahrten': pd.to_numeric(block['Buchungen'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64) if 'Buchungen' in block.columns else 0.0,
+        'Transportierte Fahrgäste': pd.to_numeric(block['Einstiege'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64) if 'Einstiege' in block.columns else 0.0,
+    })
+    teil = teil.groupby(['Fahrzeugtyp', 'Periode'], sort=False, dropna=False).sum().reset_index()
+    # Zeiträume als Text (nur für die wenigen Gruppen des Blocks), fehlende Zeitpunkte (NaT) als unbekannt
+    teil['Periode'] = teil['Periode'].astype(str).where(teil['Periode'].notna(), unbekannt)
+    return teil.set_index(['Fahrzeugtyp', 'Periode'])
+
+
+# Funktion zum blockweisen Einlesen und Aggregieren einer oder mehrerer Telematikdateien
+# Ergebnis: eine Zeile je Fahrzeugtyp und Zeitraum mit den Spalten aus summen_spalten.
+def aggregate_trips(pfade, periode='M', blockgroesse=telematik_blockgroesse):
+    if isinstance(pfade, str):
+        pfade = [pfade]
+    aggregat = None
+    for pfad in pfade:
+        for block in iter_trip_blocks(pfad, blockgroesse):
+            fehlende = [spalte for spalte in ['Fahrzeugtyp', 'Kilometer', 'Fahrgäste'] if spalte not in block.columns]
+            if 'Zeitpunkt' not in block.columns and 'Periode' not in block.columns:
+                fehlende.append('Zeitpunkt')
+            if fehlende:
+                raise ValueError(f"Die folgenden Spalten fehlen in der Datei {pfad}: {', '.join(fehlende)}")
+            teil = _aggregate_block(block, periode)
+            aggregat = teil if aggregat is None else aggregat.add(teil, fill_value=0.0)
+    if aggregat is None:
+        return pd.DataFrame(columns=['Fahrzeugtyp', 'Periode'] + summen_spalten)
+    return aggregat.sort_index().reset_index()
+
+
+# Funktion zur Umwandlung der Aggregate in Fahrzeug- und Buchungstabelle für oekorps.batch.calculate_batch
+# Die Verbrauchsdaten werden je Fahrzeugtyp aus dem Fahrzeugkatalog übernommen (oder aus verbrauchsdaten überschrieben).
+def trips_to_batch_input(aggregat, system='', verbrauchsdaten=None):
+    fahrzeugtypen = dict(load_referenzdaten()['fahrzeugtypen'])
+    fahrzeugtypen.update(verbrauchsdaten or {})
+
+    fahrzeuge = aggregat[['Fahrzeugtyp', 'Periode', 'Kilometer leer', 'Kilometer besetzt']].copy()
+    for spalte in verbrauch_spalten:
+        fahrzeuge[spalte] = fahrzeuge['Fahrzeugtyp'].map(lambda typ: float(fahrzeugtypen.get(typ, {}).get(spalte, 0.0)))
+    fahrzeuge['System'] = system
+
+    buchungen = aggregat.groupby('Periode', sort=True)[['Fahrten', 'Transportierte Fahrgäste', 'Personenkilometer']].sum().reset_index()
+    buchungen['System'] = system
+    return fahrzeuge, buchungen
+
+
+# Funktion zur Berechnung aller Kennzahlen je Zeitraum direkt aus Telematikdateien
+def calculate_from_trips(pfade, system='', periode='M', verbrauchsdaten=None, blockgroesse=telematik_blockgroesse, **emissionsdaten):
+    fahrzeuge, buchungen = trips_to_batch_input(aggregate_trips(pfade, periode, blockgroesse), system, verbrauchsdaten)
+    return calculate_batch(fahrzeuge, buchungen, **emissionsdaten)
@@ -0,0 +1,211 @@
+# Netto-Wirkung des Ridepooling-Systems durch Verkehrsverlagerung
+# Aus Fahrgastbefragungen ("Wie wären Sie ohne das Ridepooling-Angebot gefahren?") werden Verlagerungsanteile je
+# System x Entfernungsklasse x Verkehrsmittel gebildet. Die Personenkilometer des Ridepooling-Systems werden mit
+# diesen Anteilen auf die ersetzten Verkehrsmittel verteilt und mit deren Emissionen pro Pkm (Referenzdaten
+# [verkehrsmittel]) bewertet. Netto-Emissionen = Emissionen Ridepooling - vermiedene Emissionen der ersetzten Fahrten.
+#
+# Erwartete Spalten je Antwort:
+#   System          Ridepooling-System
+#   Verkehrsmittel  Ersetztes Verkehrsmittel (Bezeichnung aus [verkehrsmittel] oder keine_fahrt)
+#   Entfernung      Fahrtweite in km (optional, sonst eine Entfernungsklasse)
+#   Gewicht         Gewichtungsfaktor der Antwort (optional, Standard 1)
+#   Antworten       Anzahl der Antworten, die die Zeile zusammenfasst (optional, Standard 1; für aggregierte Anteile)
+#
+# Alle Antworten werden in einem Durchlauf per np.bincount auf das Raster System x Klasse x Verkehrsmittel summiert.
+# Die Unsicherheit der Anteile wird über Dirichlet-Ziehungen mit der effektiven Stichprobengröße (Kish) je System
+# und Entfernungsklasse abgebildet, optional zusammen mit einer relativen Unsicherheit der Emissionsfaktoren.
+import numpy as np
+import pandas as pd
+
+from oekorps.batch import safe_divide
+from oekorps.dateien import detect_separator
+from oekorps.montecarlo import standard_perzentile
+
+verlagerung_spalten = ['System', 'Verkehrsmittel', 'Entfernung', 'Gewicht', 'Antworten']
+keine_fahrt = 'Keine Fahrt (induziert)'
+
+# Untergrenzen der Entfernungsklassen in km (die letzte Klasse ist nach oben offen)
+standard_entfernungsklassen = (0, 2, 5, 10, 20)
+
+
+class Verlagerungsumfrage:
+    # Gewichtete Antworten je System x Entfernungsklasse x Verkehrsmittel
+
+    def __init__(self, systeme, verkehrsmittel, grenzen, gewichte, quadratgewichte, entfernungen):
+        # gewichte, quadratgewichte: Summen der Gewichte bzw. ihrer Quadrate (Form (Systeme, Klassen, Verkehrsmittel))
+        # entfernungen: Summe Gewicht * Entfernung je System und Klasse (Form (Systeme, Klassen))
+        self.systeme = list(systeme)
+        self.verkehrsmittel = list(verkehrsmittel)
+        self.grenzen = list(grenzen)
+        self.gewichte = np.asarray(gewichte, dtype=np.float64)
+        self.quadratgewichte = np.asarray(quadratgewichte, dtype=np.float64)
+        self.entfernungen = np.asarray(entfernungen, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.systeme)
+
+    # Bezeichnungen der Entfernungsklassen, z.B. '2–5 km' und 'ab 20 km'
+    @property
+    def klassen(self):
+        return [f"{unten:g}–{oben:g} km" for unten, oben in zip(self.grenzen[:-1], self.grenzen[1:])] + [f"ab {self.grenzen[-1]:g} km"]
+
+    # Verlagerungsanteile je System und Klasse (Summe über die Verkehrsmittel = 1, Klassen ohne Antworten = 0)
+    def shares(self):
+        return safe_divide(self.gewichte, self.gewichte.sum(axis=2, keepdims=True))
+
+    # Anteil der Klassen an den Personenkilometern je System (über die Fahrtweiten, ohne Fahrtweiten über die Antworten)
+    def distance_shares(self):
+        gewichte = self.gewichte.sum(axis=2)
+        basis = np.where(self.entfernungen.sum(axis=1, keepdims=True) > 0, self.entfernungen, gewichte)
+        return safe_divide(basis, basis.sum(axis=1, keepdims=True))
+
+    # Effektive Anzahl Antworten je Verkehrsmittel (Stichprobengröße nach Kish: (Summe Gewichte)^2 / Summe Gewichte^2)
+    def effective_counts(self):
+        summe = self.gewichte.sum(axis=2, keepdims=True)
+        effektiv = safe_divide(np.square(summe), self.quadratgewichte.sum(axis=2, keepdims=True))
+        return self.shares() * effektiv
+
+    # Anteile als Tabelle (eine Zeile je System, Entfernungsklasse und Verkehrsmittel mit Antworten)
+    def to_frame(self):
+        s, k, m = np.nonzero(self.gewichte)
+        return pd.DataFrame({
+            'System': np.asarray(self.systeme, dtype=object)[s],
+            'Entfernungsklasse': np.asarray(self.klassen, dtype=object)[k],
+            'Verkehrsmittel': np.asarray(self.verkehrsmittel, dtype=object)[m],
+            'Anteil (%)': self.shares()[s, k, m] * 100,
+            'Antworten (gewichtet)': self.gewichte[s, k, m],
+        })
+
+
+# Funktion zur Aggregation der Antworten einer Befragung (ein Durchlauf über alle Antworten)
+# verkehrsmittel: zulässige Verkehrsmittel in fester Reihenfolge (keine_fahrt wird ergänzt)
+def aggregate_survey(tabelle, verkehrsmittel, grenzen=standard_entfernungsklassen):
+    tabelle = tabelle.rename(columns=lambda spalte: str(spalte).strip())
+    fehlend = [spalte for spalte in verlagerung_spalten[:2] if spalte not in tabelle.columns]
+    if fehlend:
+        raise ValueError(f"Fehlende Spalten in der Befragung: {', '.join(fehlend)}")
+    verkehrsmittel = [name for name in verkehrsmittel if name != keine_fahrt] + [keine_fahrt]
+    grenzen = sorted(float(grenze) for grenze in grenzen)
+    if not grenzen or grenzen[0] != 0:
+        grenzen = [0.0] + grenzen
+
+    tabelle = tabelle[tabelle['System'].notna() & tabelle['Verkehrsmittel'].notna()]
+    system_codes, systeme = pd.factorize(tabelle['System'].astype(str).str.strip(), sort=True)
+    verkehrsmittel_codes = pd.Index(verkehrsmittel).get_indexer(tabelle['Verkehrsmittel'].astype(str).str.strip())
+    if (verkehrsmittel_codes < 0).any():
+        unbekannt = sorted(set(tabelle['Verkehrsmittel'].astype(str).str.strip().to_numpy()[verkehrsmittel_codes < 0]))
+        raise ValueError(f"Unbekannte Verkehrsmittel in der Befragung: {', '.join(unbekannt)} (erlaubt sind {', '.join(verkehrsmittel)}).")
+
+    anzahl = len(tabelle)
+    gewicht = pd.to_numeric(tabelle['Gewicht'], errors='coerce').fillna(1.0).to_numpy(dtype=np.float64) if 'Gewicht' in tabelle.columns else np.ones(anzahl)
+    entfernung = pd.to_numeric(tabelle['Entfernung'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64) if 'Entfernung' in tabelle.columns else np.zeros(anzahl)
+    antworten = pd.to_numeric(tabelle['Antworten'], errors='coerce').fillna(1.0).to_numpy(dtype=np.float64) if 'Antworten' in tabelle.columns else np.ones(anzahl)
+    if (gewicht < 0).any() or (entfernung < 0).any() or (antworten <= 0).any():
+        raise ValueError("Negative Gewichte oder Entfernungen und Zeilen ohne Antworten sind in der Befragung nicht zulässig.")
+    klasse = np.searchsorted(np.asarray(grenzen[1:]), entfernung, side='right')
+
+    form = (len(systeme), len(grenzen), len(verkehrsmittel))
+    zelle = (system_codes * form[1] + klasse) * form[2] + verkehrsmittel_codes
+    gewichte = np.bincount(zelle, weights=gewicht, minlength=np.prod(form)).reshape(form)
+    # Eine Zeile mit a Antworten entspricht a Antworten mit dem Gewicht Gewicht / a
+    quadratgewichte = np.bincount(zelle, weights=np.square(gewicht) / antworten, minlength=np.prod(form)).reshape(form)
+    entfernungen = np.bincount(system_codes * form[1] + klasse, weights=gewicht * entfernung, minlength=form[0] * form[1]).reshape(form[:2])
+    return Verlagerungsumfrage(systeme.astype(str), verkehrsmittel, grenzen, gewichte, quadratgewichte, entfernungen)
+
+
+# Funktion zum Einlesen einer Befragung aus einer CSV-, Parquet- oder Excel-Datei (oder einem Datei-Objekt)
+def read_survey_file(datei, verkehrsmittel, dateiname=None, grenzen=standard_entfernungsklassen):
+    dateiname = dateiname or getattr(datei, 'name', str(datei))
+    endung = dateiname.lower().rsplit('.', 1)[-1]
+    if endung == 'csv':
+        trennzeichen = detect_separator(datei)
+        tabelle = pd.read_csv(datei, sep=trennzeichen, decimal=',' if trennzeichen == ';' else '.', dtype={'System': str})
+    elif endung == 'parquet':
+        tabelle = pd.read_parquet(datei)
+    elif endung in ('xlsx', 'xls'):
+        tabelle = pd.read_excel(datei)
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: .{endung} (erlaubt sind CSV, Parquet und Excel).")
+    return aggregate_survey(tabelle, verkehrsmittel, grenzen)
+
+
+# Funktion zur Zuordnung der Systeme der Befragung zu den Ergebnissen je System
+# systeme: Tabelle mit den Spalten System, personenkilometer_gefahren und CO2eq_emissionen_gesamt_rps (kg)
+def _match_systems(umfrage, systeme):
+    systeme = systeme.drop_duplicates('System').set_index('System')
+    gemeinsam = [system for system in umfrage.systeme if system in systeme.index]
+    index = pd.Index(umfrage.systeme).get_indexer(gemeinsam)
+    return gemeinsam, index, systeme.loc[gemeinsam]
+
+
+# Funktion zum Vektor der Emissionen pro Pkm je Verkehrsmittel der Befragung (keine_fahrt = 0)
+def _emission_vector(umfrage, emissionsfaktoren):
+    fehlend = [name for name in umfrage.verkehrsmittel if name != keine_fahrt and name not in emissionsfaktoren]
+    if fehlend:
+        raise ValueError(f"Keine Emissionsdaten für: {', '.join(fehlend)}")
+    return np.array([0.0 if name == keine_fahrt else float(emissionsfaktoren[name]) for name in umfrage.verkehrsmittel])
+
+
+# Funktion zur Berechnung der vermiedenen und zusätzlichen CO2eq-Emissionen für alle Systeme in einem Durchlauf
+# emissionsfaktoren: g CO2eq/Pkm je Verkehrsmittel (z.B. Referenzdaten [verkehrsmittel] mit dem lokalen Bus)
+# Systeme ohne Antworten in der Befragung werden nicht ausgewertet.
+def calculate_mode_shift(umfrage, systeme, emissionsfaktoren):
+    gemeinsam, index, werte = _match_systems(umfrage, systeme)
+    faktoren = _emission_vector(umfrage, emissionsfaktoren)
+    # Anteil der Personenkilometer je Verkehrsmittel: Summe über die Klassen (Pkm-Anteil der Klasse * Verlagerungsanteil)
+    verkehrsmittel_anteile = np.einsum('sk,skm->sm', umfrage.distance_shares()[index], umfrage.shares()[index])
+    personen_km = werte['personenkilometer_gefahren'].to_numpy(dtype=np.float64)
+    CO2eq_rps = werte['CO2eq_emissionen_gesamt_rps'].to_numpy(dtype=np.float64)
+    ersetzt_g_pro_pkm = verkehrsmittel_anteile @ faktoren
+    vermieden = personen_km * ersetzt_g_pro_pkm / 1000
+
+    ergebnis = pd.DataFrame({
+        'System': gemeinsam,
+        'personenkilometer_gefahren': personen_km,
+        'CO2eq_emissionen_gesamt_rps': CO2eq_rps,
+        'CO2eq_ersetzt_pro_personenkilometer_g': ersetzt_g_pro_pkm,
+        'CO2eq_vermieden': vermieden,
+        'CO2eq_netto': CO2eq_rps - vermieden,
+        'CO2eq_netto_pro_personenkilometer_g': safe_divide(CO2eq_rps - vermieden, personen_km) * 1000,
+    })
+    for position, name in enumerate(umfrage.verkehrsmittel):
+        ergebnis[f'Anteil {name} (%)'] = verkehrsmittel_anteile[:, position] * 100
+    return ergebnis
+
+
+# Funktion zur Unsicherheitsanalyse der Netto-Emissionen (kg CO2eq) je System
+# Je Ziehung werden die Verlagerungsanteile je System und Klasse aus einer Dirichlet-Verteilung mit den effektiven
+# Antworten gezogen; faktor_unsicherheit (z.B. 0.1) variiert die Emissionsfaktoren gleichverteilt um +/- 10 %.
+# Die Ziehungen erfolgen in Blöcken mit je eigenem, aus dem Seed abgeleiteten Zufallsgenerator.
+def sample_mode_shift(umfrage, systeme, emissionsfaktoren, n=10_000, seed=0, faktor_unsicherheit=0.0, chunk_size=2_000,
+                      perzentile=standard_perzentile):
+    gemeinsam, index, werte = _match_systems(umfrage, systeme)
+    faktoren = _emission_vector(umfrage, emissionsfaktoren)
+    antworten = umfrage.effective_counts()[index]
+    entfernungsanteile = umfrage.distance_shares()[index]
+    personen_km = werte['personenkilometer_gefahren'].to_numpy(dtype=np.float64)
+    CO2eq_rps = werte['CO2eq_emissionen_gesamt_rps'].to_numpy(dtype=np.float64)
+
+    netto = np.empty((n, len(gemeinsam)))
+    groessen = [min(chunk_size, n - beginn) for beginn in range(0, n, chunk_size)]
+    beginn = 0
+    for seed_sequence, groesse in zip(np.random.SeedSequence(seed).spawn(len(groessen)), groessen):
+        rng = np.random.default_rng(seed_sequence)
+        # Dirichlet-Ziehung über normierte Gamma-Ziehungen (Verkehrsmittel ohne Antworten bleiben 0)
+        ziehung = rng.standard_gamma(np.broadcast_to(antworten, (groesse,) + antworten.shape))
+        anteile = safe_divide(ziehung, ziehung.sum(axis=3, keepdims=True))
+        gezogene_faktoren = faktoren * rng.uniform(1 - faktor_unsicherheit, 1 + faktor_unsicherheit, size=(groesse, len(faktoren)))
+        ersetzt_g_pro_pkm = np.einsum('sk,nskm,nm->ns', entfernungsanteile, anteile, gezogene_faktoren)
+        netto[beginn:beginn + groesse] = CO2eq_rps - personen_km * ersetzt_g_pro_pkm / 1000
+        beginn += groesse
+
+    ergebnis = pd.DataFrame({
+        'System': gemeinsam,
+        'CO2eq_netto_mittelwert': netto.mean(axis=0) if n else np.nan,
+        'CO2eq_netto_standardabweichung': netto.std(axis=0) if n else np.nan,
+        'anteil_netto_einsparung': (netto < 0).mean(axis=0) if n else np.nan,
+    })
+    if n:
+        for p, werte_p in zip(perzentile, np.percentile(netto, perzentile, axis=0)):
+            ergebnis[f'CO2eq_netto_p{p:g}'] = werte_p
+    return ergebnis
@@ -0,0 +1,160 @@
+# Zeitreihen über mehrere Betrachtungszeiträume (z.B. Monate über mehrere Jahre)
+# Je Zeitraum werden Fahrzeugkilometer, Buchungen, Fahrgäste und der durchschnittliche Verbrauch der Flotte angegeben.
+# Die Kennzahlen werden mit oekorps.batch für alle Zeiträume in einem Durchlauf berechnet. Beim Anfügen oder Ändern
+# von Zeiträumen werden nur diese Zeiträume neu berechnet; kumulierte und gleitende Summen werden ab dem ersten
+# geänderten Zeitraum aus den bisherigen Summen fortgeschrieben.
+import numpy as np
+import pandas as pd
+
+from oekorps.batch import calculate_batch, safe_divide, buchungs_spalten, kilometer_spalten, verbrauch_spalten
+from oekorps.dateien import detect_separator
+
+# Spalten der Zeitraumtabelle; Zeiträume als sortierbare Zeichenketten (z.B. '2023-01')
+perioden_spalten = ['Periode'] + kilometer_spalten + buchungs_spalten + verbrauch_spalten
+
+# Summen je Zeitraum, aus denen kumulierte und gleitende Werte gebildet werden
+summen_spalten = ['fahrzeugkilometer_leer', 'fahrzeugkilometer_besetzt', 'fahrzeugkilometer_gesamt', 'personenkilometer_gefahren', 'CO2eq_emissionen_gesamt_rps']
+
+# Aggregationsstufen für Trenddiagramme (Zuordnung Zeitraum -> Gruppe)
+aggregationsstufen = ['Quartal', 'Jahr']
+
+
+# Funktion zur Prüfung und Vereinheitlichung einer Zeitraumtabelle (eine Zeile je Zeitraum, nach Zeitraum sortiert)
+# Fehlende Verbrauchsspalten werden mit 0 ergänzt.
+def read_period_table(tabelle):
+    fehlend = [spalte for spalte in ['Periode'] + kilometer_spalten + buchungs_spalten if spalte not in tabelle.columns]
+    if fehlend:
+        raise ValueError(f"Fehlende Spalten in der Zeitreihe: {', '.join(fehlend)}")
+    tabelle = tabelle.copy()
+    for spalte in verbrauch_spalten:
+        if spalte not in tabelle.columns:
+            tabelle[spalte] = 0.0
+    tabelle = tabelle[tabelle['Periode'].notna()]
+    if pd.api.types.is_datetime64_any_dtype(tabelle['Periode']):
+        tabelle['Periode'] = tabelle['Periode'].dt.strftime('%Y-%m')  # Datumsangaben (z.B. aus Excel) als Monat
+    tabelle['Periode'] = tabelle['Periode'].astype(str).str.strip()
+    tabelle = tabelle[tabelle['Periode'] != '']
+    if tabelle['Periode'].duplicated().any():
+        doppelt = sorted(set(tabelle.loc[tabelle['Periode'].duplicated(), 'Periode']))
+        raise ValueError(f"Zeiträume mehrfach angegeben: {', '.join(doppelt)}")
+    zahlen = kilometer_spalten + buchungs_spalten + verbrauch_spalten
+    try:
+        tabelle[zahlen] = tabelle[zahlen].apply(pd.to_numeric).fillna(0.0).astype(np.float64)
+    except ValueError:
+        raise ValueError("Die Zeitreihe enthält ungültige Zahlenwerte.") from None
+    if (tabelle[zahlen] < 0).any().any():
+        raise ValueError("Negative Werte sind in der Zeitreihe nicht zulässig.")
+    return tabelle[perioden_spalten].sort_values('Periode').reset_index(drop=True)
+
+
+# Funktion zum Einlesen einer Zeitraumtabelle aus einer CSV-, Parquet- oder Excel-Datei (oder einem Datei-Objekt)
+def read_period_file(datei, dateiname=None):
+    dateiname = dateiname or getattr(datei, 'name', str(datei))
+    endung = dateiname.lower().rsplit('.', 1)[-1]
+    if endung == 'csv':
+        trennzeichen = detect_separator(datei)
+        tabelle = pd.read_csv(datei, sep=trennzeichen, decimal=',' if trennzeichen == ';' else '.', dtype={'Periode': str})
+    elif endung == 'parquet':
+        tabelle = pd.read_parquet(datei)
+    elif endung in ('xlsx', 'xls'):
+        tabelle = pd.read_excel(datei)
+    else:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: .{endung} (erlaubt sind CSV, Parquet und Excel).")
+    return read_period_table(tabelle.rename(columns=lambda spalte: str(spalte).strip()))
+
+
+# Funktion zur Fortschreibung kumulierter und gleitender Summen ab Position beginn
+# Die Werte vor beginn bleiben unverändert; gleitende Summen ergeben sich als Differenz der kumulierten Summen.
+def _update_totals(ergebnisse, beginn, fenster):
+    anzahl = len(ergebnisse)
+    for spalte in summen_spalten:
+        werte = ergebnisse[spalte].to_numpy(dtype=np.float64)
+        kumuliert = np.empty(anzahl)
+        if beginn > 0:
+            kumuliert[:beginn] = ergebnisse[f'{spalte}_kumuliert'].to_numpy(dtype=np.float64)[:beginn]
+        kumuliert[beginn:] = np.cumsum(werte[beginn:]) + (kumuliert[beginn - 1] if beginn > 0 else 0.0)
+        # Summe der letzten 'fenster' Zeiträume: kumuliert[i] - kumuliert[i - fenster]
+        vorher = np.concatenate([np.zeros(fenster), kumuliert])[:anzahl]
+        ergebnisse[f'{spalte}_kumuliert'] = kumuliert
+        ergebnisse[f'{spalte}_gleitend'] = kumuliert - vorher
+    ergebnisse['CO2eq_pro_pkm_kumuliert_g'] = safe_divide(ergebnisse['CO2eq_emissionen_gesamt_rps_kumuliert'].to_numpy(), ergebnisse['personenkilometer_gefahren_kumuliert'].to_numpy()) * 1000
+    ergebnisse['CO2eq_pro_pkm_gleitend_g'] = safe_divide(ergebnisse['CO2eq_emissionen_gesamt_rps_gleitend'].to_numpy(), ergebnisse['personenkilometer_gefahren_gleitend'].to_numpy()) * 1000
+    return ergebnisse
+
+
+class Zeitreihe:
+    # Kennzahlen je Zeitraum mit kumulierten und gleitenden Werten (fenster: Anzahl Zeiträume, z.B. 12 Monate)
+    # faktoren werden an calculate_batch übergeben (Emissionsfaktoren, Ökostromanteil, Platzausnutzung Bus).
+
+    def __init__(self, fenster=12, **faktoren):
+        if fenster < 1:
+            raise ValueError("Das Fenster für gleitende Werte muss mindestens einen Zeitraum umfassen.")
+        self.fenster = fenster
+        self.faktoren = faktoren
+        self.ergebnisse = pd.DataFrame()
+        self.tabelle = pd.DataFrame(columns=perioden_spalten)  # zuletzt übernommene Zeitraumtabelle
+        self._eingaben = pd.Series(dtype=np.uint64)  # Fingerabdruck der Eingabezeile je Zeitraum
+        # Anzahl der beim letzten Aufruf neu berechneten bzw. fortgeschriebenen Zeiträume
+        self.berechnet = 0
+        self.fortgeschrieben = 0
+
+    def __len__(self):
+        return len(self.ergebnisse)
+
+    # Übernahme einer vollständigen Zeitraumtabelle; berechnet werden nur neue oder geänderte Zeiträume
+    def update(self, tabelle):
+        tabelle = read_period_table(tabelle)
+        eingaben = pd.Series(pd.util.hash_pandas_object(tabelle, index=False).to_numpy(), index=tabelle['Periode'].to_numpy())
+        bisher = self._eingaben.reindex(eingaben.index)
+        geaendert = eingaben.index[bisher.isna().to_numpy() | (bisher.to_numpy() != eingaben.to_numpy())]
+        entfernt = self._eingaben.index.difference(eingaben.index)
+        self._eingaben = eingaben
+        self.tabelle = tabelle
+        self.berechnet = len(geaendert)
+        if not len(geaendert) and not len(entfernt):
+            self.fortgeschrieben = 0
+            return self.ergebnisse
+
+        neu = tabelle[tabelle['Periode'].isin(geaendert)]
+        kennzahlen = calculate_batch(neu[['Periode'] + kilometer_spalten + verbrauch_spalten], neu[['Periode'] + buchungs_spalten],
+                                     schluessel=['Periode'], **self.faktoren)
+        if not self.ergebnisse.empty:
+            behalten = self.ergebnisse[~self.ergebnisse['Periode'].isin(geaendert.union(entfernt))]
+            kennzahlen = pd.concat([behalten, kennzahlen], ignore_index=True)
+        kennzahlen = kennzahlen.sort_values('Periode').reset_index(drop=True)
+
+        # Kumulierte Werte ändern sich erst ab dem ersten neuen, geänderten oder entfernten Zeitraum
+        erster = min(list(geaendert) + list(entfernt))
+        beginn = int(np.searchsorted(kennzahlen['Periode'].to_numpy(dtype=str), erster))
+        self.fortgeschrieben = len(kennzahlen) - beginn
+        self.ergebnisse = _update_totals(kennzahlen, beginn, self.fenster)
+        return self.ergebnisse
+
+    # Anfügen einzelner Zeiträume (z.B. eines neuen Monats) an die bisherige Zeitreihe
+    def append(self, zeitraeume):
+        zeitraeume = read_period_table(zeitraeume)
+        bisher = self.tabelle[~self.tabelle['Periode'].isin(zeitraeume['Periode'])]
+        return self.update(pd.concat([bisher, zeitraeume], ignore_index=True) if len(bisher) else zeitraeume)
+
+
+# Funktion zur Zuordnung der Zeiträume zu Quartalen oder Jahren (Zeiträume beginnend mit JJJJ, für Quartale JJJJ-MM)
+def _gruppen(perioden, stufe):
+    if stufe == 'Jahr':
+        return perioden.str[:4]
+    if stufe == 'Quartal':
+        try:
+            return pd.PeriodIndex(perioden, freq='M').asfreq('Q').astype(str)
+        except (ValueError, TypeError):
+            raise ValueError("Quartale können nur aus Monatsangaben (JJJJ-MM) gebildet werden.") from None
+    raise ValueError(f"Unbekannte Aggregationsstufe: {stufe}")
+
+
+# Funktion zur Aggregation der Zeitreihe je Quartal oder Jahr (Summen und daraus gebildete Kennzahlen)
+def aggregate_periods(ergebnisse, stufe='Jahr'):
+    gruppen = _gruppen(ergebnisse['Periode'].astype(str), stufe)
+    summen = ergebnisse[summen_spalten].groupby(np.asarray(gruppen), sort=True).sum()
+    summen.insert(0, 'Zeiträume', ergebnisse.groupby(np.asarray(gruppen), sort=True).size())
+    summen['leerkilometeranteil'] = safe_divide(summen['fahrzeugkilometer_leer'].to_numpy(), summen['fahrzeugkilometer_gesamt'].to_numpy()) * 100
+    summen['besetzungsquote'] = safe_divide(summen['personenkilometer_gefahren'].to_numpy(), summen['fahrzeugkilometer_besetzt'].to_numpy())
+    summen['CO2eq_emissionen_pro_personenkilometer_rps_g'] = safe_divide(summen['CO2eq_emissionen_gesamt_rps'].to_numpy(), summen['personenkilometer_gefahren'].to_numpy()) * 1000
+    return summen.rename_axis(stufe).reset_index()
@@ -0,0 +1,55 @@
+# Tests des HTTP/JSON-Dienstes (oekorps.api): Fehler werden je Eintrag gemeldet, die übrigen Einträge ausgewertet
+import asyncio
+import json
+
+import pytest
+
+from oekorps.api import create_app
+
+eintrag = {
+    'abgeschlossene_buchungen': 60045, 'transportierte_fahrgaeste': 74556,
+    'benzin_emissionsdaten': 3030, 'diesel_emissionsdaten': 3410, 'strom_emissionsdaten': 498,
+    'fahrzeuge': [{'Fahrzeugtyp': 'Diesel', 'Dieselverbrauch (l/100km)': 7.0, 'Kilometer leer': 50422.0, 'Kilometer besetzt': 40063.0}],
+}
+
+
+# Funktion für eine Anfrage direkt über die ASGI-Schnittstelle (ohne HTTP-Client); Rückgabe: Status und JSON
+def anfrage(app, methode, pfad, daten=None):
+    koerper = json.dumps(daten).encode('utf-8') if daten is not None else b''
+    scope = {'type': 'http', 'method': methode, 'path': pfad, 'raw_path': pfad.encode(), 'query_string': b'', 'root_path': '',
+             'headers': [(b'content-type', b'application/json')], 'scheme': 'http', 'server': ('test', 80), 'client': ('test', 1),
+             'http_version': '1.1', 'asgi': {'version': '3.0'}}
+    nachrichten = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': koerper, 'more_body': False}
+
+    async def send(nachricht):
+        nachrichten.append(nachricht)
+
+    asyncio.run(app(scope, receive, send))
+    return nachrichten[0]['status'], json.loads(b''.join(nachricht.get('body', b'') for nachricht in nachrichten[1:]))
+
+
+@pytest.mark.parametrize('pfad', ['/vergleich', '/kennzahlen'])
+@pytest.mark.parametrize('fehlerhaft', [
+    dict(eintrag, fahrzeuge='abc'),
+    dict(eintrag, fahrzeuge=[1]),
+    dict(eintrag, fahrzeuge=[{'Fahrzeugtyp': 'Diesel', 'Kilometer leer': 'viel'}]),
+    dict(eintrag, abgeschlossene_buchungen=[1, 2]),
+])
+def test_fehlerhafter_eintrag_im_stapel(pfad, fehlerhaft):
+    status, antwort = anfrage(create_app(), 'POST', pfad, [eintrag, fehlerhaft, eintrag])
+    assert status == 200
+    erster, fehler, dritter = antwort['ergebnisse']
+    assert 'fehler' in fehler
+    assert 'fehler' not in erster and erster == dritter
+    assert erster['personenkilometer_gefahren'] > 0
+
+
+def test_oekostrom_anteil_kein_zahlenwert():
+    status, antwort = anfrage(create_app(), 'POST', '/emissionsfaktoren', [{'strom_emissionsdaten': 498}, {'strom_emissionsdaten': 498, 'oekostrom_anteil': 'hoch'}])
+    assert status == 200
+    gueltig, fehler = antwort['ergebnisse']
+    assert gueltig == {'strom_emissionsdaten': 498.0}
+    assert fehler == {'fehler': "Ungültiger Zahlenwert für 'oekostrom_anteil': 'hoch'"}
@@ -0,0 +1,54 @@
+# Tests der Belegungsprofile aus Fahrgastzähldaten (oekorps.belegungsprofil)
+import numpy as np
+import pytest
+
+from oekorps.belegungsprofil import Stundenprofil, aggregate_apc, occupancy_by_line, tagtypen
+
+# 03.01.2022 Montag, 08.01.2022 Samstag, 09.01.2022 Sonntag, 06.01.2022 als Feiertag
+zaehlereignisse = """Linie,Zeitpunkt,Kilometer,Fahrgäste,Platzangebot
+1,2022-01-03 07:10,2,20,
+1,2022-01-03 07:40,1,10,
+1,2022-01-06 07:10,2,5,
+1,2022-01-08 23:30,1,4,
+2,2022-01-09 05:15,3,6,60
+2,,5,10,
+"""
+
+
+@pytest.fixture
+def afzs_datei(tmp_path):
+    pfad = tmp_path / 'afzs.csv'
+    pfad.write_text(zaehlereignisse, encoding='utf-8')
+    return str(pfad)
+
+
+@pytest.mark.parametrize('blockgroesse', [2, 1000])
+def test_stundenraster(afzs_datei, blockgroesse):
+    bus = aggregate_apc(afzs_datei, platzangebot=80.0, feiertage=['2022-01-06'], blockgroesse=blockgroesse)
+    assert bus.gruppen == ['1', '2']
+    personen_km = bus.hourly('Personenkilometer')
+    assert personen_km[0, tagtypen.index('Werktag'), 7] == pytest.approx(50.0)
+    assert personen_km[0, tagtypen.index('Sonn- und Feiertag'), 7] == pytest.approx(10.0)
+    assert personen_km[0, tagtypen.index('Samstag'), 23] == pytest.approx(4.0)
+    # Ereignisse ohne Zeitpunkt werden nicht gezählt
+    assert personen_km.sum() == pytest.approx(82.0)
+
+
+def test_platzausnutzung_je_linie(afzs_datei):
+    bus = aggregate_apc(afzs_datei, platzangebot=80.0)
+    ergebnis = occupancy_by_line(bus, von=7, bis=8, auswahl_tagtypen=['Werktag']).set_index('Linie')
+    assert ergebnis.loc['1', 'Platzausnutzung (%)'] == pytest.approx(60.0 / 400.0 * 100)
+    assert ergebnis.loc['2', 'Platzausnutzung (%)'] == pytest.approx(0.0)
+    # Bereich über Mitternacht (22–6 Uhr)
+    nacht = occupancy_by_line(bus, von=22, bis=6).set_index('Linie')
+    assert nacht['Personenkilometer'].tolist() == pytest.approx([4.0, 18.0])
+    assert nacht.loc['2', 'Platzausnutzung (%)'] == pytest.approx(18.0 / 180.0 * 100)
+
+
+def test_speichern_und_laden(afzs_datei, tmp_path):
+    bus = aggregate_apc(afzs_datei)
+    bus.save(tmp_path / 'profil.npz')
+    geladen = Stundenprofil.load(tmp_path / 'profil.npz')
+    assert geladen.gruppen == bus.gruppen
+    for groesse in bus.groessen:
+        np.testing.assert_allclose(geladen.hourly(groesse), bus.hourly(groesse))
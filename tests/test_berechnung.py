@@ -0,0 +1,72 @@
+# Tests des Berechnungskerns (oekorps.berechnung, oekorps.batch) gegen die Formeln der ursprünglichen App
+import pandas as pd
+import pytest
+
+from oekorps.batch import calculate_batch, vehicle_list_to_frame
+from oekorps.berechnung import bus_referenz, calculate_all
+
+vehicle_list = [
+    {'Fahrzeugtyp': 'Diesel', 'Benzinverbrauch (l/100km)': 0.0, 'Dieselverbrauch (l/100km)': 7.0, 'Stromverbrauch (kWh/100km)': 0.0,
+     'Kilometer leer': 30422.0, 'Kilometer besetzt': 25063.0},
+    {'Fahrzeugtyp': 'Elektro', 'Benzinverbrauch (l/100km)': 0.0, 'Dieselverbrauch (l/100km)': 0.0, 'Stromverbrauch (kWh/100km)': 21.5,
+     'Kilometer leer': 20000.0, 'Kilometer besetzt': 15000.0},
+]
+
+
+# Funktion mit den Formeln der Abschnitte 1.3 bis 3.1 wie in der ursprünglichen Vergleich_Bus_und_RPS.py
+def app_formeln(vehicle_list, abgeschlossene_buchungen, transportierte_fahrgaeste, benzin_emissionsdaten, diesel_emissionsdaten,
+                strom_emissionsdaten, oekostrom_anteil, pv_emissionsdaten, adjusted_occupancy):
+    initial_CO2eq_wtw, initial_occupancy = bus_referenz()
+    fahrzeugkilometer_leer = sum(vehicle['Kilometer leer'] for vehicle in vehicle_list)
+    fahrzeugkilometer_besetzt = sum(vehicle['Kilometer besetzt'] for vehicle in vehicle_list)
+    fahrzeugkilometer_gesamt = round(fahrzeugkilometer_leer + fahrzeugkilometer_besetzt, 2)
+    personenkilometer_gefahren = round((fahrzeugkilometer_besetzt / abgeschlossene_buchungen) * transportierte_fahrgaeste, 2)
+    verbrauch = {
+        spalte: sum(vehicle[spalte] * ((vehicle['Kilometer besetzt'] + vehicle['Kilometer leer']) / 100) for vehicle in vehicle_list)
+        for spalte in ['Benzinverbrauch (l/100km)', 'Dieselverbrauch (l/100km)', 'Stromverbrauch (kWh/100km)']
+    }
+    strom_emissionsdaten = round(strom_emissionsdaten * (1 - oekostrom_anteil / 100.0) + pv_emissionsdaten * (oekostrom_anteil / 100.0), 1)
+    benzin_emissionen = (verbrauch['Benzinverbrauch (l/100km)'] * benzin_emissionsdaten) / 1000
+    diesel_emissionen = (verbrauch['Dieselverbrauch (l/100km)'] * diesel_emissionsdaten) / 1000
+    strom_emissionen = (verbrauch['Stromverbrauch (kWh/100km)'] * strom_emissionsdaten) / 1000 * (1 - oekostrom_anteil / 100)
+    CO2eq_emissionen_gesamt_rps = round(benzin_emissionen + diesel_emissionen + strom_emissionen, 4)
+    CO2eq_emissionen_pro_personenkilometer_rps_g = round(CO2eq_emissionen_gesamt_rps / personenkilometer_gefahren, 4) * 1000
+    new_CO2eq_wtw = initial_CO2eq_wtw * (initial_occupancy / adjusted_occupancy)
+    return {
+        'fahrzeugkilometer_gesamt': fahrzeugkilometer_gesamt,
+        'durchschnittliche_fahrtdistanz_mit_lk': round(fahrzeugkilometer_gesamt / abgeschlossene_buchungen, 2),
+        'durchschnittliche_fahrtdistanz_mit_bk': round(fahrzeugkilometer_besetzt / abgeschlossene_buchungen, 2),
+        'personenkilometer_gefahren': personenkilometer_gefahren,
+        'leerkilometeranteil': round((fahrzeugkilometer_leer / fahrzeugkilometer_gesamt) * 100, 2),
+        'buendelungsquote': round(personenkilometer_gefahren / fahrzeugkilometer_gesamt, 2),
+        'besetzungsquote': round(personenkilometer_gefahren / fahrzeugkilometer_besetzt, 2),
+        'strom_emissionsdaten': strom_emissionsdaten,
+        'strom_emissionen': strom_emissionen,
+        'CO2eq_emissionen_gesamt_rps': CO2eq_emissionen_gesamt_rps,
+        'CO2eq_emissionen_pro_personenkilometer_rps_g': CO2eq_emissionen_pro_personenkilometer_rps_g,
+        'new_CO2eq_wtw': new_CO2eq_wtw,
+        'differenz_bus_rps': CO2eq_emissionen_pro_personenkilometer_rps_g - new_CO2eq_wtw,
+    }
+
+
+@pytest.mark.parametrize('oekostrom_anteil, adjusted_occupancy', [(0, 18.7), (40, 25.0), (100, 12.5)])
+def test_calculate_all_entspricht_app_formeln(oekostrom_anteil, adjusted_occupancy):
+    parameter = (vehicle_list, 60045, 74556, 3030, 3410, 498, oekostrom_anteil, 35.0, adjusted_occupancy)
+    ergebnis = calculate_all(*parameter)
+    for schluessel, erwartet in app_formeln(*parameter).items():
+        assert ergebnis[schluessel] == pytest.approx(erwartet), schluessel
+
+
+def test_calculate_batch_entspricht_calculate_all():
+    faelle = [('A', '2022', vehicle_list, 60045, 74556), ('A', '2023', vehicle_list[:1], 1200, 1500), ('B', '2022', vehicle_list[1:], 0, 0)]
+    fahrzeuge = pd.concat([vehicle_list_to_frame(fahrzeugliste, system, periode) for system, periode, fahrzeugliste, _, _ in faelle], ignore_index=True)
+    buchungen = pd.DataFrame([{'System': system, 'Periode': periode, 'Fahrten': float(fahrten), 'Transportierte Fahrgäste': float(fahrgaeste)}
+                              for system, periode, _, fahrten, fahrgaeste in faelle])
+    ergebnisse = calculate_batch(fahrzeuge, buchungen, 3030, 3410, 498, oekostrom_anteil=30, pv_emissionsdaten=35.0, adjusted_occupancy=20.0)
+
+    assert len(ergebnisse) == len(faelle)
+    for system, periode, fahrzeugliste, fahrten, fahrgaeste in faelle:
+        zeile = ergebnisse[(ergebnisse['System'] == system) & (ergebnisse['Periode'] == periode)].iloc[0]
+        erwartet = calculate_all(fahrzeugliste, fahrten, fahrgaeste, 3030, 3410, 498, 30, 35.0, 20.0)
+        for schluessel, wert in erwartet.items():
+            assert zeile[schluessel] == pytest.approx(wert), (system, periode, schluessel)
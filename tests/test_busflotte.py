@@ -0,0 +1,53 @@
+# Tests der Busflotte mit Fahrzeugmix (oekorps.busflotte)
+import pandas as pd
+import pytest
+
+from oekorps.busflotte import aggregate_bus_fleet, bus_fleet_totals, calculate_bus_fleet, read_bus_fleet
+
+bustypen = {
+    'Solobus': {'Energieträger': 'Diesel', 'Platzangebot': 80.0, 'Dieselverbrauch (l/100km)': 40.0, 'Stromverbrauch (kWh/100km)': 0.0},
+    'E-Bus': {'Energieträger': 'Elektro', 'Platzangebot': 70.0, 'Dieselverbrauch (l/100km)': 0.0, 'Stromverbrauch (kWh/100km)': 120.0},
+}
+
+
+@pytest.fixture
+def busse():
+    tabelle = pd.DataFrame({
+        'Linie': ['1', '1', '2'],
+        'Bustyp': ['Solobus', 'E-Bus', 'Solobus'],
+        'Nutzwagenkilometer': [1000.0, 500.0, 2000.0],
+        'Personenkilometer': [20000.0, None, 40000.0],
+    })
+    return read_bus_fleet(tabelle, bustypen)
+
+
+# Fehlende Angaben werden aus den Bustypen ergänzt
+def test_ergaenzung_aus_bustypen(busse):
+    assert busse['Energieträger'].tolist() == ['Diesel', 'Elektro', 'Diesel']
+    assert busse['Platzangebot'].tolist() == [80.0, 70.0, 80.0]
+
+
+def test_emissionen_und_platzausnutzung(busse):
+    ergebnis = calculate_bus_fleet(busse, diesel_emissionsdaten=3000.0, strom_emissionsdaten=400.0, platzausnutzung=20.0)
+    # Zeile ohne Personenkilometer: 500 km * 70 Plätze * 20 %
+    assert ergebnis['Personenkilometer'].tolist() == pytest.approx([20000.0, 7000.0, 40000.0])
+    assert ergebnis['CO2eq-Emissionen (kg)'].tolist() == pytest.approx([1200.0, 240.0, 2400.0])
+
+    je_linie = aggregate_bus_fleet(ergebnis).set_index('Linie')
+    assert je_linie.loc['1', 'CO2eq-Emissionen (g/Pkm)'] == pytest.approx(1440.0 / 27000.0 * 1000)
+    assert je_linie.loc['2', 'Platzausnutzung (%)'] == pytest.approx(25.0)
+
+    summen = bus_fleet_totals(ergebnis)
+    assert summen['CO2eq_emissionen_gesamt_bus'] == pytest.approx(3840.0)
+    assert summen['adjusted_occupancy'] == pytest.approx(67000.0 / 275000.0 * 100)
+    assert summen['new_CO2eq_wtw'] == pytest.approx(3840.0 / 67000.0 * 1000)
+
+
+@pytest.mark.parametrize('zeile, meldung', [
+    ({'Bustyp': 'Gelenkbus', 'Nutzwagenkilometer': 100.0}, 'ohne Platzangebot'),
+    ({'Bustyp': 'Solobus', 'Nutzwagenkilometer': -1.0}, 'Negativer Wert'),
+    ({'Bustyp': 'Solobus', 'Energieträger': 'Wasserstoff', 'Nutzwagenkilometer': 100.0}, 'Unbekannter Energieträger'),
+])
+def test_ungueltige_busflotte(zeile, meldung):
+    with pytest.raises(ValueError, match=meldung):
+        read_bus_fleet(pd.DataFrame([zeile]), bustypen)
@@ -0,0 +1,50 @@
+# Tests der Zwischenspeicher (oekorps.cache)
+import pytest
+
+from oekorps import cache
+from oekorps.cache import DiskCache, LRUCache, StufenCache, fingerprint, memoize
+
+
+def test_lru_verdraengt_aelteste_eintraege():
+    speicher = LRUCache(maxsize=2)
+    speicher.put('a', 1)
+    speicher.put('b', 2)
+    assert speicher.get('a') == 1  # 'a' zuletzt genutzt
+    speicher.put('c', 3)
+    assert 'b' not in speicher and 'a' in speicher and 'c' in speicher
+    assert (speicher.hits, speicher.misses) == (1, 0)
+
+
+def test_memoize_berechnet_einmal_je_fingerabdruck():
+    aufrufe = []
+    speicher = LRUCache()
+    for _ in range(3):
+        assert memoize(speicher, fingerprint('summe', [1.0, 2.0]), lambda: aufrufe.append(1) or 3.0) == 3.0
+    assert len(aufrufe) == 1
+    assert fingerprint('summe', [1.0, 2.0]) != fingerprint('summe', [1.0, 2.5])
+
+
+@pytest.fixture
+def pfad(tmp_path):
+    return str(tmp_path / 'cache.db')
+
+
+def test_gemeinsamer_speicher_zwischen_instanzen(pfad):
+    DiskCache(pfad).put('schluessel', {'wert': 1.5})
+    stufen = StufenCache(LRUCache(), DiskCache(pfad))
+    assert stufen.get('schluessel') == {'wert': 1.5}
+    assert stufen.hits_gemeinsam == 1 and 'schluessel' in stufen.lokal
+
+
+def test_version_trennt_eintraege(pfad, monkeypatch):
+    DiskCache(pfad, version='alt').put('schluessel', 1)
+    assert DiskCache(pfad, version='neu').get('schluessel', 'fehlt') == 'fehlt'
+    assert DiskCache(pfad, version='alt').get('schluessel') == 1
+
+    # Geänderte Referenzdaten oder ein neuer Stand des Codes ergeben eine neue Standardversion
+    speicher = DiskCache(pfad)
+    speicher.put('schluessel', 2)
+    monkeypatch.setattr(cache, 'referenzdaten_mtime', lambda: (0,))
+    assert speicher.get('schluessel', 'fehlt') == 'fehlt'
+    monkeypatch.setattr(cache, 'cache_version', cache.cache_version + 1)
+    assert cache.standard_version().startswith(f'v{cache.cache_version}-')
@@ -0,0 +1,61 @@
+# Tests der Kommandozeile (oekorps.kommandozeile): fehlerhafte Szenariodateien werden je Datei gemeldet
+import pandas as pd
+import pytest
+
+from oekorps.kommandozeile import main
+
+kopf = """abgeschlossene_buchungen = 60045
+transportierte_fahrgaeste = 74556
+benzin_emissionsdaten = 3030
+diesel_emissionsdaten = 3410
+strom_emissionsdaten = 498
+"""
+fahrzeug = """[[fahrzeuge]]
+Fahrzeugtyp = "Diesel"
+"Dieselverbrauch (l/100km)" = 7.0
+"Kilometer leer" = 50422.0
+"Kilometer besetzt" = 40063.0
+"""
+szenarien = {
+    'gut': kopf + fahrzeug,
+    'platzausnutzung_null': 'adjusted_occupancy = 0\n' + kopf + fahrzeug,
+    'bus_ohne_platzkilometer': kopf + fahrzeug + '[bus]\nnutzwagen_km = 0\nplatzangebot = 78\npersonen_km = 100\n',
+    'bus_ohne_personenkilometer': kopf + fahrzeug + '[bus]\nnutzwagen_km = 10\nplatzangebot = 78\npersonen_km = 0\n',
+    'fahrzeuge_als_text': 'fahrzeuge = "abc"\n' + kopf,
+    'oekostrom_als_text': 'oekostrom_anteil = "hoch"\n' + kopf + fahrzeug,
+}
+# Szenariodateien im JSON-Format, die kein Objekt bzw. keine Fahrzeugliste enthalten
+json_szenarien = {
+    'liste': '[1, 2]',
+    'fahrzeug_als_zahl': '{"abgeschlossene_buchungen": 100, "fahrzeuge": [1]}',
+}
+
+
+@pytest.fixture
+def szenario_verzeichnis(tmp_path):
+    for name, inhalt in szenarien.items():
+        (tmp_path / f'{name}.toml').write_text(inhalt, encoding='utf-8')
+    for name, inhalt in json_szenarien.items():
+        (tmp_path / f'{name}.json').write_text(inhalt, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_fehlerhafte_dateien_je_datei(szenario_verzeichnis, tmp_path, capsys, workers):
+    ausgabe = tmp_path / 'ergebnisse.csv'
+    assert main([str(szenario_verzeichnis), '-o', str(ausgabe), '-j', workers]) == 1
+
+    ergebnisse = pd.read_csv(ausgabe)
+    assert list(ergebnisse['Szenario']) == ['gut']
+    assert ergebnisse['adjusted_occupancy'].iloc[0] > 0
+
+    meldungen = capsys.readouterr().err.splitlines()
+    fehlerhaft = [f'{name}.toml' for name in szenarien if name != 'gut'] + [f'{name}.json' for name in json_szenarien]
+    assert len(meldungen) == len(fehlerhaft)
+    for datei in fehlerhaft:
+        assert any(f'{datei}:' in meldung for meldung in meldungen), datei
+
+
+def test_nur_gueltige_dateien(szenario_verzeichnis, capsys):
+    assert main([str(szenario_verzeichnis / 'gut.toml')]) == 0
+    assert capsys.readouterr().err == ''
@@ -0,0 +1,29 @@
+# Tests der Monte-Carlo-Simulation (oekorps.montecarlo)
+import pytest
+
+from oekorps.montecarlo import basis_from_vehicle_list, run_monte_carlo
+
+vehicle_list = [
+    {'Fahrzeugtyp': 'Elektro', 'Benzinverbrauch (l/100km)': 0.0, 'Dieselverbrauch (l/100km)': 0.0, 'Stromverbrauch (kWh/100km)': 21.5,
+     'Kilometer leer': 20000.0, 'Kilometer besetzt': 15000.0},
+]
+basis = basis_from_vehicle_list(vehicle_list, 20000, 26000, oekostrom_anteil=20)
+
+
+def test_prozesspool_entspricht_serieller_berechnung():
+    seriell = run_monte_carlo(basis, n=20_000, chunk_size=3_000, seed=7, max_workers=1)
+    parallel = run_monte_carlo(basis, n=20_000, chunk_size=3_000, seed=7, max_workers=2)
+    assert parallel.keys() == seriell.keys()
+    assert parallel['n'] == seriell['n'] == 20_000
+    assert parallel['anteil_rps_unter_bus'] == seriell['anteil_rps_unter_bus']
+    for name, werte in seriell.items():
+        if isinstance(werte, dict):
+            assert parallel[name]['perzentile'] == pytest.approx(werte['perzentile']), name
+            assert parallel[name]['mittelwert'] == pytest.approx(werte['mittelwert']), name
+            assert parallel[name]['standardabweichung'] == pytest.approx(werte['standardabweichung']), name
+
+
+@pytest.mark.parametrize('n, chunk_size, max_workers', [(0, 1000, None), (1000, 0, None), (0, 1000, 2)])
+def test_ungueltige_anzahl(n, chunk_size, max_workers):
+    with pytest.raises(ValueError):
+        run_monte_carlo(basis, n=n, chunk_size=chunk_size, max_workers=max_workers)
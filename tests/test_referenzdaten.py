@@ -0,0 +1,40 @@
+# Tests der Referenzdaten (oekorps.referenzdaten): Neuladen bei geänderter Datei, gedrosselte Prüfung
+import os
+import shutil
+
+import pytest
+
+from oekorps import referenzdaten
+from oekorps.referenzdaten import load_referenzdaten
+
+
+@pytest.fixture
+def referenzdatei(tmp_path):
+    verzeichnis = tmp_path / 'daten'
+    shutil.copytree(os.path.join(os.path.dirname(referenzdaten.__file__), 'daten'), verzeichnis)
+    return str(verzeichnis / 'referenzdaten.toml')
+
+
+# Funktion zum Ändern der Platzausnutzung des Busses in einer Referenzdatei (neuer Änderungszeitpunkt)
+def aendere_platzausnutzung(pfad, wert):
+    with open(pfad, encoding='utf-8') as datei:
+        inhalt = datei.read()
+    bisher = load_referenzdaten(pfad)['bus']['initial_occupancy']
+    with open(pfad, 'w', encoding='utf-8') as datei:
+        datei.write(inhalt.replace(f'initial_occupancy = {bisher}', f'initial_occupancy = {wert}'))
+    stat = os.stat(pfad)
+    os.utime(pfad, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_neu_laden_bei_geaenderter_datei(referenzdatei, monkeypatch):
+    monkeypatch.setattr(referenzdaten, 'pruef_intervall', 0)
+    aendere_platzausnutzung(referenzdatei, 21.5)
+    assert load_referenzdaten(referenzdatei)['bus']['initial_occupancy'] == 21.5
+
+
+def test_pruefung_gedrosselt(referenzdatei, monkeypatch):
+    monkeypatch.setattr(referenzdaten, 'pruef_intervall', 3600)
+    bisher = load_referenzdaten(referenzdatei)['bus']['initial_occupancy']
+    aendere_platzausnutzung(referenzdatei, 22.5)
+    monkeypatch.setattr(referenzdaten.os, 'stat', None)  # innerhalb des Intervalls kein os.stat
+    assert load_referenzdaten(referenzdatei)['bus']['initial_occupancy'] == bisher
@@ -0,0 +1,53 @@
+# Tests der Sensitivitätsanalyse (oekorps.sensitivitaet) an einem bekannten linearen Fall
+import numpy as np
+import pytest
+
+from oekorps.sensitivitaet import calculate_sobol, calculate_tornado, evaluate_levers, stellgroessen
+
+# Ohne Strom und bei festen Kilometern ist die Zielgröße linear in den Emissionsfaktoren für Benzin und Diesel:
+# g/Pkm = (100 * Benzin + 50 * Diesel) / 1000
+basis = {
+    'benzinverbrauch_gesamt': 100.0, 'dieselverbrauch_gesamt': 50.0, 'stromverbrauch_gesamt': 0.0,
+    'personenkilometer_gefahren': 1000.0, 'leerkilometeranteil': 20.0, 'besetzungsquote': 1.5,
+    'benzin_emissionsdaten': 2500.0, 'diesel_emissionsdaten': 2750.0, 'strom_emissionsdaten_netz': 400.0,
+    'oekostrom_anteil': 0.0, 'pv_emissionsdaten': 40.0, 'new_CO2eq_wtw': 80.0,
+}
+bereiche = {name: (wert, wert) for name, wert in [
+    ('leerkilometeranteil', 20.0), ('besetzungsquote', 1.5), ('stromverbrauch_faktor', 1.0),
+    ('oekostrom_anteil', 0.0), ('strom_emissionsdaten_netz', 400.0),
+]}
+bereiche['benzin_emissionsdaten'] = (2000.0, 3000.0)
+bereiche['diesel_emissionsdaten'] = (2500.0, 3000.0)
+
+
+def test_basiswert():
+    basiszeile = np.array([1.0 if name == 'stromverbrauch_faktor' else basis[name] for name in stellgroessen])
+    ergebnis = evaluate_levers(basis, basiszeile)
+    assert ergebnis['CO2eq_emissionen_pro_personenkilometer_rps_g'][0] == pytest.approx(387.5)
+    assert ergebnis['differenz_bus_rps'][0] == pytest.approx(307.5)
+
+
+def test_tornado_reihenfolge():
+    tornado = calculate_tornado(basis, bereiche)
+    tornado = tornado[tornado['Zielgröße'] == 'CO2eq_emissionen_pro_personenkilometer_rps_g']
+    assert tornado['Stellgröße'].tolist()[:2] == ['benzin_emissionsdaten', 'diesel_emissionsdaten']
+    assert tornado['Spannweite'].tolist() == pytest.approx([100.0, 25.0] + [0.0] * (len(stellgroessen) - 2))
+
+
+def test_sobol_indizes_linearer_fall():
+    sobol = calculate_sobol(basis, bereiche, n=4096, seed=3)
+    sobol = sobol[sobol['Zielgröße'] == 'CO2eq_emissionen_pro_personenkilometer_rps_g'].set_index('Stellgröße')
+    # Varianzanteile: (100 * 1000)^2 : (50 * 500)^2 = 16 : 1
+    assert sobol.index[:2].tolist() == ['benzin_emissionsdaten', 'diesel_emissionsdaten']
+    assert sobol.loc['benzin_emissionsdaten', 'S1'] == pytest.approx(16 / 17, abs=0.02)
+    assert sobol.loc['diesel_emissionsdaten', 'S1'] == pytest.approx(1 / 17, abs=0.02)
+    # Ohne Wechselwirkungen stimmen Totaleffekte und Indizes erster Ordnung überein
+    np.testing.assert_allclose(sobol['ST'], sobol['S1'], atol=0.02)
+    assert sobol.drop(['benzin_emissionsdaten', 'diesel_emissionsdaten'])['ST'].abs().max() == pytest.approx(0.0)
+
+
+def test_sobol_unabhaengig_von_blockgroesse():
+    gesamt = calculate_sobol(basis, bereiche, n=512, seed=1)
+    bloecke = calculate_sobol(basis, bereiche, n=512, seed=1, chunk_size=100)
+    np.testing.assert_allclose(bloecke['S1'], gesamt['S1'])
+    np.testing.assert_allclose(bloecke['ST'], gesamt['ST'])
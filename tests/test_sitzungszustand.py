@@ -0,0 +1,65 @@
+# Tests des kompakten Sitzungszustands (oekorps.sitzungszustand)
+import pickle
+
+import pytest
+
+from oekorps.sitzungszustand import Eingaben, Ergebnisse, Sitzungszustand
+
+
+def test_versionen_nur_bei_aenderung():
+    eingaben = Eingaben({'oekostrom_anteil': 0.0, 'abgeschlossene_buchungen': 100})
+    stand = eingaben.stand('oekostrom_anteil', 'abgeschlossene_buchungen')
+    assert eingaben.update(oekostrom_anteil=0.0) == []
+    assert eingaben.stand('oekostrom_anteil', 'abgeschlossene_buchungen') == stand
+    # Gleicher Wert mit anderem Typ gilt als Änderung
+    assert eingaben.update(abgeschlossene_buchungen=100.0) == ['abgeschlossene_buchungen']
+    assert eingaben.stand('oekostrom_anteil') == stand[:1]
+    assert eingaben.stand('abgeschlossene_buchungen') == (stand[1] + 1,)
+    assert 'pv_emissionsdaten' not in eingaben and eingaben.get('pv_emissionsdaten', 40.0) == 40.0
+
+
+def test_ergebnisse_unveraenderlich():
+    ergebnisse = Ergebnisse({'fahrzeugkilometer_gesamt': 100.0})
+    assert ergebnisse.replace(fahrzeugkilometer_gesamt=100.0) is ergebnisse
+    neu = ergebnisse.replace(personenkilometer_gefahren=250.0)
+    assert neu is not ergebnisse and 'personenkilometer_gefahren' not in ergebnisse
+    assert neu.fehlende(['fahrzeugkilometer_gesamt', 'personenkilometer_gefahren', 'strom_emissionen']) == ['strom_emissionen']
+    with pytest.raises(AttributeError):
+        ergebnisse.neu = 1
+
+
+def test_berechnung_nur_bei_neuem_stand():
+    zustand = Sitzungszustand({'diesel_emissionsdaten': 3000.0}, {'dieselverbrauch_gesamt': 10.0})
+    aufrufe = []
+
+    def emissionen():
+        aufrufe.append(1)
+        return zustand.eingaben['diesel_emissionsdaten'] * zustand.ergebnisse['dieselverbrauch_gesamt'] / 1000
+
+    def abschnitt():
+        stand = zustand.stand(['diesel_emissionsdaten'], ['dieselverbrauch_gesamt'])
+        return zustand.berechnen('1.5', stand, emissionen)
+
+    assert abschnitt() == pytest.approx(30.0)
+    assert abschnitt() == pytest.approx(30.0)
+    assert len(aufrufe) == 1
+    # Unveränderte Eingabe und gleiche Kennzahl: keine Neuberechnung
+    zustand.eingaben.update(diesel_emissionsdaten=3000.0)
+    zustand.uebernehmen({'dieselverbrauch_gesamt': 10.0})
+    abschnitt()
+    assert zustand.berechnungen == 1
+    zustand.uebernehmen({'dieselverbrauch_gesamt': 20.0})
+    assert abschnitt() == pytest.approx(60.0)
+    zustand.eingaben.update(diesel_emissionsdaten=2500.0)
+    assert abschnitt() == pytest.approx(50.0)
+    assert zustand.berechnungen == 3
+
+
+def test_pickle_erhaelt_versionen():
+    eingaben = Eingaben({'oekostrom_anteil': 0.0})
+    eingaben.update(oekostrom_anteil=0.5)
+    kopie = pickle.loads(pickle.dumps(eingaben))
+    assert kopie.to_dict() == eingaben.to_dict()
+    assert kopie.stand('oekostrom_anteil') == eingaben.stand('oekostrom_anteil')
+    ergebnisse = Ergebnisse({'leerkilometeranteil': 0.2})
+    assert pickle.loads(pickle.dumps(ergebnisse)).to_dict() == ergebnisse.to_dict()
@@ -0,0 +1,53 @@
+# Tests der zeitaufgelösten Emissionsfaktoren für Strom (oekorps.stromprofil)
+from datetime import date
+
+import numpy as np
+import pytest
+
+from oekorps.stromprofil import StromEmissionsreihe, calculate_strom_emissionen, charging_profiles_from_daily, ladeprofile
+
+beginn = np.datetime64('2022-01-01T00', 'h')
+stunden = 365 * 24
+intensitaet = 300 + 200 * np.sin(np.arange(stunden) * 2 * np.pi / 24) + np.random.default_rng(1).uniform(0, 50, stunden)
+
+
+# Funktion zur direkten Berechnung des Emissionsfaktors eines Tagesprofils im Zeitraum (ohne kumulierte Summen)
+def faktor_direkt(tagesprofil, start_date, end_date):
+    a = (np.datetime64(start_date, 'h') - beginn).astype(int)
+    b = (np.datetime64(end_date, 'h') - beginn).astype(int) + 24
+    anteile = np.resize(np.asarray(tagesprofil, dtype=np.float64), stunden)[a:b]
+    return float(np.dot(anteile, intensitaet[a:b]) / anteile.sum())
+
+
+@pytest.mark.parametrize('start_date, end_date', [(date(2022, 1, 1), date(2022, 12, 31)), (date(2022, 3, 10), date(2022, 3, 10)), (date(2022, 6, 1), date(2022, 8, 31))])
+def test_zeitraum_entspricht_direkter_berechnung(start_date, end_date):
+    tagesprofil = ladeprofile['Nachtladung (22–6 Uhr)']
+    reihe = StromEmissionsreihe(beginn, intensitaet, charging_profiles_from_daily(tagesprofil, stunden, beginn))
+    stromverbrauch = np.array([100.0, 250.0, 0.0])
+    energie, emissionen = reihe.query(start_date, end_date, stromverbrauch)
+    assert energie == pytest.approx(stromverbrauch)
+    assert emissionen == pytest.approx(stromverbrauch * faktor_direkt(tagesprofil, start_date, end_date) / 1000)
+    assert reihe.effective_factor(start_date, end_date, stromverbrauch) == pytest.approx(faktor_direkt(tagesprofil, start_date, end_date))
+
+
+def test_ladeprofile_je_fahrzeug():
+    tagesprofile = [ladeprofile['Nachtladung (22–6 Uhr)'], ladeprofile['Tagladung (10–16 Uhr)']]
+    reihe = StromEmissionsreihe(beginn, intensitaet, charging_profiles_from_daily(tagesprofile, stunden, beginn))
+    faktoren = reihe.factors(date(2022, 1, 1), date(2022, 1, 31))
+    assert faktoren == pytest.approx([faktor_direkt(profil, date(2022, 1, 1), date(2022, 1, 31)) for profil in tagesprofile])
+    assert faktoren[0] != pytest.approx(faktoren[1])
+
+    # Gewichteter Mittelwert nach Strombedarf; PV-Anteil wie in calculate_environmental_impact
+    assert reihe.effective_factor(date(2022, 1, 1), date(2022, 1, 31), [300.0, 100.0]) == pytest.approx((3 * faktoren[0] + faktoren[1]) / 4)
+    emissionen = calculate_strom_emissionen(reihe, date(2022, 1, 1), date(2022, 1, 31), [300.0, 100.0], oekostrom_anteil=0)
+    assert emissionen == pytest.approx(np.array([300.0, 100.0]) * faktoren / 1000)
+    with pytest.raises(ValueError):
+        reihe.query(date(2022, 1, 1), date(2022, 1, 31), [1.0, 2.0, 3.0])
+
+
+def test_zeitraum_ausserhalb_der_zeitreihe():
+    reihe = StromEmissionsreihe(beginn, intensitaet, charging_profiles_from_daily(ladeprofile['Gleichmäßig über den Tag'], stunden, beginn))
+    assert reihe.covers(date(2022, 1, 1), date(2022, 12, 31))
+    assert not reihe.covers(date(2021, 12, 1), date(2022, 1, 31))
+    with pytest.raises(ValueError):
+        reihe.effective_factor(date(2023, 1, 1), date(2023, 12, 31))
@@ -0,0 +1,52 @@
+# Tests der Szenariodatenbank (oekorps.szenarien)
+from datetime import date
+
+import pytest
+
+from oekorps import szenarien
+from oekorps.szenarien import connect, delete_scenario, list_scenarios, list_systems, load_scenario, save_scenario
+
+
+@pytest.fixture
+def pfad(tmp_path):
+    yield str(tmp_path / 'szenarien.db')
+    szenarien.close_connections()
+
+
+def test_speichern_und_laden(pfad):
+    eingaben = {'name_ridepooling_system': 'Testsystem', 'start_date': date(2022, 1, 1), 'end_date': date(2022, 12, 31),
+                'abgeschlossene_buchungen': 60045, 'oekostrom_anteil': 20, 'nicht_gespeichert': 1}
+    fahrzeuge = [{'Fahrzeugtyp': 'Diesel', 'Kilometer leer': 100.0, 'Kilometer besetzt': 200.0}]
+    ergebnisse = {'CO2eq_emissionen_pro_personenkilometer_rps_g': 123.4, 'new_CO2eq_wtw': 80.54}
+    szenario_id = save_scenario('Basis', eingaben, fahrzeuge, ergebnisse, pfad=pfad)
+    save_scenario('Anderes System', dict(eingaben, name_ridepooling_system='Zweites System'), fahrzeuge, ergebnisse, pfad=pfad)
+
+    szenario = load_scenario(szenario_id, pfad=pfad)
+    assert szenario['name'] == 'Basis'
+    assert szenario['eingaben']['start_date'] == date(2022, 1, 1)
+    assert 'nicht_gespeichert' not in szenario['eingaben']
+    assert szenario['fahrzeugflotte'] == fahrzeuge
+    assert szenario['ergebnisse'] == ergebnisse
+
+    assert list_systems(pfad=pfad) == ['Testsystem', 'Zweites System']
+    gefiltert = list_scenarios(system='Testsystem', pfad=pfad)
+    assert [eintrag['id'] for eintrag in gefiltert] == [szenario_id]
+    assert gefiltert[0]['periode'] == '2022-01-01/2022-12-31'
+
+    delete_scenario(szenario_id, pfad=pfad)
+    with pytest.raises(KeyError):
+        load_scenario(szenario_id, pfad=pfad)
+
+
+def test_verbindung_wird_wiederverwendet(pfad):
+    save_scenario('Basis', {}, [], {}, pfad=pfad)
+    verbindung = connect(pfad)
+    list_systems(pfad=pfad)
+    list_scenarios(pfad=pfad)
+    assert connect(pfad) is verbindung
+
+
+def test_ohne_datenbank_keine_datei(tmp_path):
+    pfad = str(tmp_path / 'fehlt.db')
+    assert list_scenarios(pfad=pfad) == [] and list_systems(pfad=pfad) == []
+    assert not (tmp_path / 'fehlt.db').exists()
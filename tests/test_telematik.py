@@ -0,0 +1,38 @@
+# Tests der blockweisen Aggregation von Telematikdaten (oekorps.telematik)
+import pytest
+
+from oekorps.telematik import aggregate_trips, calculate_from_trips, unbekannt
+
+fahrtabschnitte = """Fahrzeugtyp,Zeitpunkt,Kilometer,Fahrgäste,Buchungen,Einstiege
+Van,2022-01-03 08:00,10,2,1,2
+Van,2022-01-04 09:00,5,0,0,0
+Van,2022-02-01 10:00,8,1,1,1
+,2022-02-02 11:00,3,1,1,1
+Van,,3,0,0,0
+"""
+
+
+@pytest.fixture
+def telematikdatei(tmp_path):
+    pfad = tmp_path / 'telematik.csv'
+    pfad.write_text(fahrtabschnitte, encoding='utf-8')
+    return str(pfad)
+
+
+# Abschnitte ohne Fahrzeugtyp oder Zeitpunkt landen in der Gruppe unbekannt, die Kilometersumme bleibt erhalten
+@pytest.mark.parametrize('blockgroesse', [2, 1000])
+def test_aggregation_behaelt_alle_kilometer(telematikdatei, blockgroesse):
+    aggregat = aggregate_trips(telematikdatei, blockgroesse=blockgroesse)
+    gruppen = aggregat.set_index(['Fahrzeugtyp', 'Periode'])
+    assert (aggregat['Kilometer leer'] + aggregat['Kilometer besetzt']).sum() == pytest.approx(29.0)
+    assert gruppen.loc[('Van', '2022-01'), 'Kilometer leer'] == pytest.approx(5.0)
+    assert gruppen.loc[('Van', '2022-01'), 'Kilometer besetzt'] == pytest.approx(10.0)
+    assert gruppen.loc[('Van', '2022-01'), 'Personenkilometer'] == pytest.approx(20.0)
+    assert gruppen.loc[(unbekannt, '2022-02'), 'Kilometer besetzt'] == pytest.approx(3.0)
+    assert gruppen.loc[('Van', unbekannt), 'Kilometer leer'] == pytest.approx(3.0)
+
+
+def test_kennzahlen_je_zeitraum(telematikdatei):
+    ergebnis = calculate_from_trips(telematikdatei).set_index('Periode')
+    assert ergebnis['fahrzeugkilometer_gesamt'].to_dict() == pytest.approx({'2022-01': 15.0, '2022-02': 11.0, unbekannt: 3.0})
+    assert ergebnis.loc['2022-02', 'leerkilometeranteil'] == pytest.approx(0.0)
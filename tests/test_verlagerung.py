@@ -0,0 +1,59 @@
+# Tests der Netto-Wirkung durch Verkehrsverlagerung (oekorps.verlagerung)
+import numpy as np
+import pandas as pd
+import pytest
+
+from oekorps.verlagerung import aggregate_survey, calculate_mode_shift, keine_fahrt, sample_mode_shift
+
+verkehrsmittel = ['Pkw', 'Bus', 'Fahrrad']
+emissionsfaktoren = {'Pkw': 150.0, 'Bus': 80.0, 'Fahrrad': 0.0}
+
+befragung = pd.DataFrame({
+    'System': ['A', 'A', 'A', 'A', 'B', 'B'],
+    'Verkehrsmittel': ['Pkw', 'Bus', 'Pkw', keine_fahrt, 'Fahrrad', 'Pkw'],
+    'Entfernung': [1.0, 1.0, 8.0, 8.0, 3.0, 3.0],
+    'Gewicht': [1.0, 1.0, 2.0, 2.0, 1.0, 3.0],
+})
+systeme = pd.DataFrame({
+    'System': ['A', 'B', 'C'],
+    'personenkilometer_gefahren': [10000.0, 2000.0, 500.0],
+    'CO2eq_emissionen_gesamt_rps': [1500.0, 200.0, 50.0],
+})
+
+
+def test_anteile_summieren_zu_eins():
+    umfrage = aggregate_survey(befragung, verkehrsmittel)
+    anteile = umfrage.shares()
+    besetzt = umfrage.gewichte.sum(axis=2) > 0
+    np.testing.assert_allclose(anteile.sum(axis=2)[besetzt], 1.0)
+    np.testing.assert_allclose(anteile.sum(axis=2)[~besetzt], 0.0)
+    np.testing.assert_allclose(umfrage.distance_shares().sum(axis=1), 1.0)
+
+    ergebnis = calculate_mode_shift(umfrage, systeme, emissionsfaktoren)
+    anteil_spalten = [f'Anteil {name} (%)' for name in umfrage.verkehrsmittel]
+    np.testing.assert_allclose(ergebnis[anteil_spalten].sum(axis=1), 100.0)
+
+
+def test_netto_emissionen():
+    umfrage = aggregate_survey(befragung, verkehrsmittel)
+    ergebnis = calculate_mode_shift(umfrage, systeme, emissionsfaktoren).set_index('System')
+    # System C hat keine Antworten und wird nicht ausgewertet
+    assert list(ergebnis.index) == ['A', 'B']
+    # A: Pkm-Anteile der Klassen über die Fahrtweiten 2/34 (0–2 km) und 32/34 (5–10 km)
+    ersetzt_a = 2 / 34 * (0.5 * 150 + 0.5 * 80) + 32 / 34 * (0.5 * 150)
+    assert ergebnis.loc['A', 'CO2eq_ersetzt_pro_personenkilometer_g'] == pytest.approx(ersetzt_a)
+    assert ergebnis.loc['B', 'CO2eq_netto'] == pytest.approx(200.0 - 2000.0 * 0.75 * 150 / 1000)
+
+
+def test_ziehungen_um_den_punktwert():
+    umfrage = aggregate_survey(befragung, verkehrsmittel)
+    punktwert = calculate_mode_shift(umfrage, systeme, emissionsfaktoren).set_index('System')['CO2eq_netto']
+    ziehungen = sample_mode_shift(umfrage, systeme, emissionsfaktoren, n=4000, seed=1, chunk_size=1000).set_index('System')
+    wiederholt = sample_mode_shift(umfrage, systeme, emissionsfaktoren, n=4000, seed=1, chunk_size=1000).set_index('System')
+    pd.testing.assert_frame_equal(ziehungen, wiederholt)
+    assert (ziehungen['CO2eq_netto_p5'] <= punktwert).all() and (punktwert <= ziehungen['CO2eq_netto_p95']).all()
+
+
+def test_unbekanntes_verkehrsmittel():
+    with pytest.raises(ValueError, match='Unbekannte Verkehrsmittel'):
+        aggregate_survey(pd.DataFrame({'System': ['A'], 'Verkehrsmittel': ['Zeppelin']}), verkehrsmittel)
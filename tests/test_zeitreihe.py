@@ -0,0 +1,47 @@
+# Tests der inkrementellen Zeitreihe (oekorps.zeitreihe)
+import pandas as pd
+
+from oekorps.zeitreihe import Zeitreihe
+
+
+# Funktion zum Erstellen einer Zeitraumtabelle mit monatlichen Zeiträumen
+def zeitraumtabelle(anzahl=18):
+    return pd.DataFrame({
+        'Periode': [f'{2022 + i // 12}-{i % 12 + 1:02d}' for i in range(anzahl)],
+        'Kilometer leer': [4000.0 + 37 * i for i in range(anzahl)],
+        'Kilometer besetzt': [3000.0 + 53 * i for i in range(anzahl)],
+        'Fahrten': [5000.0 + 11 * i for i in range(anzahl)],
+        'Transportierte Fahrgäste': [6200.0 + 17 * i for i in range(anzahl)],
+        'Dieselverbrauch (l/100km)': [7.0] * anzahl,
+        'Stromverbrauch (kWh/100km)': [2.0 + 0.1 * i for i in range(anzahl)],
+    })
+
+
+def test_aenderung_entspricht_neuberechnung():
+    zeitreihe = Zeitreihe(fenster=6, oekostrom_anteil=25)
+    tabelle = zeitraumtabelle()
+    zeitreihe.update(tabelle)
+
+    geaendert = tabelle.copy()
+    geaendert.loc[9, 'Kilometer besetzt'] += 500.0
+    geaendert.loc[12, 'Fahrten'] -= 100.0
+    ergebnisse = zeitreihe.update(geaendert)
+    assert zeitreihe.berechnet == 2
+    assert zeitreihe.fortgeschrieben == len(tabelle) - 9
+
+    neu = Zeitreihe(fenster=6, oekostrom_anteil=25).update(geaendert)
+    pd.testing.assert_frame_equal(ergebnisse, neu[ergebnisse.columns])
+
+
+def test_anfuegen_und_entfernen_entspricht_neuberechnung():
+    zeitreihe = Zeitreihe(fenster=3)
+    tabelle = zeitraumtabelle()
+    zeitreihe.update(tabelle.iloc[:12])
+    ergebnisse = zeitreihe.append(tabelle.iloc[12:])
+    pd.testing.assert_frame_equal(ergebnisse, Zeitreihe(fenster=3).update(tabelle)[ergebnisse.columns])
+
+    ohne = tabelle.drop(index=4)
+    ergebnisse = zeitreihe.update(ohne)
+    assert zeitreihe.berechnet == 0
+    # Ohne neu berechnete Zeiträume bleibt der Datentyp der Spalte Periode der des bisherigen Ergebnisses
+    pd.testing.assert_frame_equal(ergebnisse, Zeitreihe(fenster=3).update(ohne)[ergebnisse.columns], check_dtype=False)